@@ -21,6 +21,8 @@ except ImportError:
     OLLAMA_AVAILABLE = False
 
 from agent_system.base.response_model import BaseResponseModel
+from agent_system.base.profiling import profiled
+from agent_system.base.call_monitor import monitored_call
 #设置动态项目目录
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 if PROJECT_ROOT not in sys.path:
@@ -41,6 +43,16 @@ class BaseAgent:
         llm_config: LLM 模型的配置
     """
     
+    # 子类中构建提示词的方法，启用性能剖析时记录为prompt_build span
+    PROMPT_BUILDER_METHODS = ("build_prompt", "_build_prompt", "_build_run_prompt", "_build_decision_prompt")
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls.PROMPT_BUILDER_METHODS:
+            method = cls.__dict__.get(name)
+            if callable(method):
+                setattr(cls, name, profiled("prompt_build", "agent")(method))
+    
     def __init__(
         self,
         model_type: str,
@@ -83,6 +95,12 @@ class BaseAgent:
         # 安全处理默认空列表
         if instructions is None:
             instructions = []
+        
+        # 系统提示词文本与最近一次调用的token用量估算，用于对比不同调用方式的开销
+        instructions_text = instructions if isinstance(instructions, str) else "\n".join(instructions)
+        self._system_prompt_text = f"{description}\n{instructions_text}"
+        self.last_prompt_tokens = 0
+        self.last_completion_tokens = 0
 
         # 使用提供的配置初始化代理
         self._init_agent(
@@ -218,6 +236,20 @@ class BaseAgent:
         except Exception as e:
             raise ValueError(f"模型 {model_class.__name__} 初始化失败: {e}") from e
     
+    def reset_case_state(self) -> None:
+        """清除与单个病例相关的状态，使代理实例可在多个病例之间复用。
+
+        模型客户端与系统提示词保留，响应缓存、token用量估算以及底层代理的会话记忆被清空。
+        """
+        if self.cache is not None:
+            self.cache.clear()
+        self.last_prompt_tokens = 0
+        self.last_completion_tokens = 0
+        # 不同版本的agno中会话记忆的接口不同，存在时才清空
+        memory = getattr(self.agent, "memory", None)
+        if memory is not None and hasattr(memory, "clear"):
+            memory.clear()
+    
     def run(self, prompt: str, **kwargs) -> Union[str, BaseResponseModel]:
         """执行同步代理运行，支持缓存和结构化输出。
         
@@ -233,13 +265,17 @@ class BaseAgent:
         """
         # 首先检查缓存
         if self.cache and self.cache._check_cache_hit(prompt, **kwargs):
+            self.last_prompt_tokens = 0
+            self.last_completion_tokens = 0
             return self.cache._get_cache()
 
         # 根据输出类型获取结果
+        self.last_prompt_tokens = self.estimate_tokens(self._system_prompt_text) + self.estimate_tokens(prompt)
         if self.structured_outputs:
             result = self._run_structured(prompt, **kwargs)
         else:
             result = self._run_unstructured(prompt, **kwargs)
+        self.last_completion_tokens = self._estimate_result_tokens(result)
 
         # 如果启用了缓存，则缓存结果
         self._cache_result(result)
@@ -274,6 +310,8 @@ class BaseAgent:
             f"每次尝试并行 {self.num_requests} 个请求。"
         )
     
+    @profiled("llm_request", "llm")
+    @monitored_call
     def _execute_parallel_structured_requests(self, prompt: str, **kwargs) -> Optional[BaseResponseModel]:
         """执行多个并行的结构化输出请求。
         
@@ -329,6 +367,7 @@ class BaseAgent:
             
         return None
     
+    @profiled("parse", "agent")
     def _parse_json_response(self, response_str: str) -> Optional[BaseResponseModel]:
         """将 JSON 字符串响应解析为结构化模型。
         
@@ -428,6 +467,8 @@ class BaseAgent:
         # 如果没有找到匹配的大括号，返回从第一个{到末尾
         return text[start_idx:] if brace_count > 0 else None
     
+    @profiled("llm_request", "llm")
+    @monitored_call
     def _run_unstructured(self, prompt: str, **kwargs) -> str:
         """执行非结构化输出运行。
         
@@ -476,6 +517,38 @@ class BaseAgent:
             if not future.done():
                 future.cancel()
     
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """粗略估算文本的token数量。
+        
+        中日韩字符按每字1个token计算，其余字符按每4个字符1个token计算。
+        
+        Args:
+            text: 要估算的文本
+            
+        Returns:
+            估算的token数量
+        """
+        if not text:
+            return 0
+        cjk_count = sum(1 for ch in text if '\u4e00' <= ch <= '\u9fff' or '\u3000' <= ch <= '\u303f' or '\uff00' <= ch <= '\uffef')
+        return cjk_count + (len(text) - cjk_count + 3) // 4
+    
+    def _estimate_result_tokens(self, result: Union[str, BaseResponseModel, None]) -> int:
+        """估算响应结果的token数量。
+        
+        Args:
+            result: 字符串响应或结构化响应
+            
+        Returns:
+            估算的token数量
+        """
+        if result is None:
+            return 0
+        if isinstance(result, BaseResponseModel):
+            return self.estimate_tokens(result.model_dump_json())
+        return self.estimate_tokens(str(result))
+    
     def _cache_result(self, result: Union[str, BaseResponseModel]) -> None:
         """如果启用了缓存，则缓存结果。
         
@@ -501,13 +574,17 @@ class BaseAgent:
         """
         # 检查缓存
         if self.cache and self.cache._check_cache_hit(prompt, **kwargs):
+            self.last_prompt_tokens = 0
+            self.last_completion_tokens = 0
             return self.cache._get_cache()
 
         # 根据输出类型获取结果
+        self.last_prompt_tokens = self.estimate_tokens(self._system_prompt_text) + self.estimate_tokens(prompt)
         if self.structured_outputs:
             result = await self._async_run_structured(prompt, **kwargs)
         else:
             result = await self._async_run_unstructured(prompt, **kwargs)
+        self.last_completion_tokens = self._estimate_result_tokens(result)
 
         # 缓存结果
         self._cache_result(result)
@@ -515,7 +592,7 @@ class BaseAgent:
         return result
     
     async def _async_run_structured(self, prompt: str, **kwargs) -> BaseResponseModel:
-        """异步执行结构化输出运行。
+        """异步执行结构化输出运行，带重试逻辑。
         
         Args:
             prompt: 输入提示
@@ -527,42 +604,58 @@ class BaseAgent:
         Raises:
             RuntimeError: 如果无法获得有效的结构化响应
         """
+        max_retries = 5
+        
+        for retry_count in range(max_retries):
+            result = await self._execute_parallel_async_structured_requests(prompt, **kwargs)
+            
+            if result is not None:
+                return result
+                
+            print(f"解析异步响应的重试尝试 {retry_count + 1}")
+        
+        raise RuntimeError(
+            f"在 {max_retries} 次重试尝试后无法获得有效的结构化响应，"
+            f"每次尝试并行 {self.num_requests} 个异步请求。"
+        )
+    
+    @profiled("llm_request", "llm")
+    @monitored_call
+    async def _execute_parallel_async_structured_requests(self, prompt: str, **kwargs) -> Optional[BaseResponseModel]:
+        """执行多个并行的异步结构化输出请求。
+        
+        Args:
+            prompt: 输入提示
+            **kwargs: 额外参数
+            
+        Returns:
+            第一个有效的结构化响应，如果全部失败则返回 None
+        """
         tasks = {
             asyncio.create_task(self.agent.arun(prompt, **kwargs))
             for _ in range(self.num_requests)
         }
+        pending = set(tasks)
         
         try:
-            # 等待第一个完成的任务
-            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-
-            while done:
-                task = done.pop()
-                try:
-                    response: RunResponse = await task
-                    result = self._process_async_structured_response(response)
-                    
-                    if result is not None:
-                        return result
-                        
-                except Exception as e:
-                    print(f"代理异步运行失败: {e}")
-                    
-                # 从任务集中移除已完成的任务
-                tasks.discard(task)
-                
-                # 如果没有更多待处理的任务，跳出循环
-                if not pending:
-                    break
-                    
-                # 等待下一个任务完成
-                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
-
-            raise RuntimeError(f"在 {self.num_requests} 次并行尝试后无法获得有效的结构化响应")
+            while pending:
+                # 等待下一个完成的任务
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        response: RunResponse = task.result()
+                        result = self._process_async_structured_response(response)
+                        if result is not None:
+                            return result
+                    except Exception as e:
+                        print(f"代理异步运行失败: {e}")
+            return None
             
         finally:
             await self._cancel_remaining_tasks(tasks)
     
+    @profiled("llm_request", "llm")
+    @monitored_call
     async def _async_run_unstructured(self, prompt: str, **kwargs) -> str:
         """异步执行非结构化输出运行。
         
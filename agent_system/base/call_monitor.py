@@ -0,0 +1,60 @@
+import time
+import asyncio
+import functools
+from typing import Any, Optional
+
+# 进程内所有agent共享的LLM调用观察者，需实现record_call(latency, success)；为None时不记录
+_call_observer: Optional[Any] = None
+
+
+def get_call_observer() -> Optional[Any]:
+    """返回当前的LLM调用观察者，未设置时返回None"""
+    return _call_observer
+
+
+def set_call_observer(observer: Optional[Any]) -> Optional[Any]:
+    """
+    设置LLM调用观察者，批处理中所有线程和协程的调用都会上报给它
+
+    Returns:
+        之前的观察者，用于恢复
+    """
+    global _call_observer
+    previous, _call_observer = _call_observer, observer
+    return previous
+
+
+def monitored_call(fn):
+    """
+    记录一次LLM请求（含并行请求）的耗时和是否成功的装饰器
+    返回None或抛出异常视为失败，解析失败、限流和超时都会计入失败
+    """
+    def record(start: float, success: bool):
+        observer = _call_observer
+        if observer is not None:
+            observer.record_call(time.perf_counter() - start, success)
+
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception:
+                record(start, False)
+                raise
+            record(start, result is not None)
+            return result
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            record(start, False)
+            raise
+        record(start, result is not None)
+        return result
+    return wrapper
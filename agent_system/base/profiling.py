@@ -0,0 +1,67 @@
+import asyncio
+import functools
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Optional
+
+# 当前上下文中启用的性能剖析器，线程和asyncio任务各自独立；为None时所有span为空操作
+_current_profiler: ContextVar[Optional[Any]] = ContextVar("current_profiler", default=None)
+
+
+def get_profiler() -> Optional[Any]:
+    """返回当前上下文的性能剖析器，未启用时返回None"""
+    return _current_profiler.get()
+
+
+def set_profiler(profiler: Optional[Any]):
+    """
+    为当前上下文设置性能剖析器
+
+    Returns:
+        用于reset_profiler恢复的token
+    """
+    return _current_profiler.set(profiler)
+
+
+def reset_profiler(token) -> None:
+    """恢复set_profiler之前的性能剖析器"""
+    _current_profiler.reset(token)
+
+
+def profile_span(name: str, category: str = "agent", **args):
+    """
+    在当前性能剖析器中记录一个span，未启用剖析时返回空上下文
+
+    Args:
+        name: span名称
+        category: span类别，如stage、agent、llm、io、guidance
+        **args: 附加到trace事件的参数
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return nullcontext()
+    return profiler.span(name, category, **args)
+
+
+def profiled(name: str, category: str = "agent"):
+    """
+    将函数或协程函数的执行记录为span的装饰器
+
+    Args:
+        name: span名称
+        category: span类别
+    """
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with profile_span(name, category):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile_span(name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -103,6 +103,32 @@ class TaskController(BaseAgent):
             print(f"任务控制决策失败: {str(e)}")
             return self._get_fallback_result(pending_tasks)
     
+    async def async_run(self, 
+                        pending_tasks: List[Dict[str, str]], 
+                        chief_complaint: str, 
+                        hpi_content: str = "", 
+                        ph_content: str = "",
+                        additional_info: str = "",
+                        task_manager = None) -> ControllerDecision:
+        """
+        异步执行任务控制决策，参数与返回值同run
+        """
+        try:
+            if self.score_driven_mode and task_manager is not None:
+                return self._get_score_driven_result(pending_tasks, task_manager)
+            elif self.simple_mode:
+                return self._get_simple_mode_result(pending_tasks)
+            
+            prompt = self._build_decision_prompt(
+                pending_tasks, chief_complaint, hpi_content, ph_content, additional_info
+            )
+            result = await super().async_run(prompt)
+            return self._ensure_result_type(result)
+            
+        except Exception as e:
+            print(f"任务控制决策失败: {str(e)}")
+            return self._get_fallback_result(pending_tasks)
+    
     def _ensure_result_type(self, result: Any) -> ControllerDecision:
         """
         确保返回结果为正确的类型
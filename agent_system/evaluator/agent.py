@@ -88,6 +88,20 @@ class Evaluator(BaseAgent):
             print(f"评价执行失败: {str(e)}")
             return self._get_fallback_result()
     
+    async def async_run(self, patient_case: Dict[str, Any], current_round: int, 
+                        all_rounds_data: List[Dict[str, Any]], historical_scores: Dict[str, float] = None) -> EvaluatorResult:
+        """
+        异步执行评价任务，参数与返回值同run
+        """
+        try:
+            prompt = self.build_prompt(patient_case, current_round, all_rounds_data, historical_scores)
+            result = await super().async_run(prompt)
+            return self._ensure_result_type(result)
+            
+        except Exception as e:
+            print(f"评价执行失败: {str(e)}")
+            return self._get_fallback_result()
+    
     def build_prompt(self, patient_case: Dict[str, Any], current_round: int, 
                      all_rounds_data: List[Dict[str, Any]], historical_scores: Dict[str, float] = None) -> str:
         """
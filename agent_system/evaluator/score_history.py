@@ -1,95 +1,150 @@
 """
-全局评分历史管理器
+评分历史管理器
 
-用于存储和管理各轮次的评分历史，支持第一轮不传入historical_scores的需求
+按会话（session）存储和管理各轮次的评分历史，支持第一轮不传入historical_scores的需求。
+每个工作流使用独立的会话ID，多线程批处理时各病例的评分历史互不干扰。
 """
 
-from typing import Dict, List, Any
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+# 评价维度
+SCORE_DIMENSIONS = (
+    "clinical_inquiry",
+    "communication_quality",
+    "information_completeness",
+    "overall_professionalism",
+    "present_illness_similarity",
+    "past_history_similarity",
+    "chief_complaint_similarity"
+)
+
+
+def empty_scores() -> Dict[str, float]:
+    """获取所有维度为0的评分字典"""
+    return {dimension: 0.0 for dimension in SCORE_DIMENSIONS}
+
 
 class ScoreHistoryManager:
     """
     评分历史管理器
-    
-    单例模式实现，用于全局管理评分历史数据
+
+    以会话ID为键管理评分历史，读写均加锁，可在多个线程之间共享；
+    会话数超过max_sessions时淘汰最久未访问的会话，每个会话最多保留max_rounds轮评分
     """
-    
-    _instance = None
-    _history: Dict[str, List[Dict[str, Any]]] = {}
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
-    def __init__(self):
-        """初始化评分历史管理器"""
-        if not hasattr(self, '_initialized'):
-            self._initialized = True
-    
+
+    def __init__(self, max_sessions: int = 1024, max_rounds: Optional[int] = None):
+        """
+        初始化评分历史管理器
+
+        Args:
+            max_sessions: 最多保留的会话数
+            max_rounds: 每个会话最多保留的轮次数，为None时不限制
+        """
+        self.max_sessions = max(1, max_sessions)
+        self.max_rounds = max_rounds
+        self._history: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
     def clear_history(self, session_id: str = "default"):
         """清除指定会话的历史记录"""
-        if session_id in self._history:
-            del self._history[session_id]
-    
+        with self._lock:
+            self._history.pop(session_id, None)
+
     def clear_all_history(self):
         """清除所有历史记录"""
-        self._history.clear()
-    
+        with self._lock:
+            self._history.clear()
+
     def add_round_score(self, round_number: int, scores: Dict[str, float], session_id: str = "default"):
         """
-        添加一轮评分到历史记录
-        
+        添加一轮评分到历史记录，同一轮次重复添加时覆盖
+
         Args:
             round_number: 轮次编号
             scores: 该轮的评分字典
             session_id: 会话ID，用于区分不同对话
         """
-        if session_id not in self._history:
-            self._history[session_id] = []
-        
-        self._history[session_id].append({
+        record = {
             'round': round_number,
-            'scores': scores,
-            'timestamp': None  # 可以添加时间戳
-        })
-    
+            'scores': dict(scores),
+            'timestamp': datetime.now().isoformat()
+        }
+        with self._lock:
+            history = self._touch(session_id, create=True)
+            if history and history[-1]['round'] == round_number:
+                history[-1] = record
+            else:
+                history.append(record)
+            if self.max_rounds is not None and len(history) > self.max_rounds:
+                del history[:len(history) - self.max_rounds]
+            while len(self._history) > self.max_sessions:
+                self._history.popitem(last=False)
+
     def get_historical_scores(self, current_round: int, session_id: str = "default") -> Dict[str, float]:
         """
         获取历史评分（不包括当前轮）
-        
+
         Args:
             current_round: 当前轮次
             session_id: 会话ID
-            
+
         Returns:
-            Dict[str, float]: 历史评分汇总，如果第一轮返回空字典
+            Dict[str, float]: 当前轮之前最新一轮的评分，如果第一轮或无历史返回空字典
         """
-        if session_id not in self._history or current_round <= 1:
+        if current_round <= 1:
             return {}
-        
-        # 返回所有历史轮次的评分
-        # 这里可以设计更复杂的逻辑，如返回平均值、最新值等
-        if self._history[session_id]:
-            # 返回最新一轮的评分作为参考
-            latest_scores = self._history[session_id][-1]['scores']
-            return latest_scores
-        
+        with self._lock:
+            history = self._touch(session_id)
+            for record in reversed(history or []):
+                if record['round'] < current_round:
+                    return dict(record['scores'])
         return {}
-    
+
     def get_all_history(self, session_id: str = "default") -> List[Dict[str, Any]]:
         """获取完整的评分历史"""
-        return self._history.get(session_id, [])
-    
+        with self._lock:
+            return [dict(record, scores=dict(record['scores'])) for record in self._history.get(session_id, [])]
+
     def get_round_score(self, round_number: int, session_id: str = "default") -> Dict[str, float]:
         """获取指定轮次的评分"""
-        if session_id not in self._history:
-            return {}
-        
-        for record in self._history[session_id]:
-            if record['round'] == round_number:
-                return record['scores']
-        
+        with self._lock:
+            for record in self._history.get(session_id, []):
+                if record['round'] == round_number:
+                    return dict(record['scores'])
         return {}
 
-# 创建全局实例
-score_history_manager = ScoreHistoryManager()
\ No newline at end of file
+    def restore_history(self, history: List[Dict[str, Any]], session_id: str = "default"):
+        """
+        用给定的评分历史替换指定会话的记录，用于从检查点恢复
+
+        Args:
+            history: get_all_history导出的评分历史
+            session_id: 会话ID
+        """
+        with self._lock:
+            self._history.pop(session_id, None)
+        for record in history:
+            self.add_round_score(record['round'], record['scores'], session_id)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取当前保留的会话数和轮次数"""
+        with self._lock:
+            return {
+                "sessions": len(self._history),
+                "rounds": sum(len(history) for history in self._history.values())
+            }
+
+    def _touch(self, session_id: str, create: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """获取会话记录并标记为最近访问，调用方需持有锁"""
+        if session_id not in self._history:
+            if not create:
+                return None
+            self._history[session_id] = []
+        self._history.move_to_end(session_id)
+        return self._history[session_id]
+
+# 创建全局实例，各工作流通过不同的会话ID共享
+score_history_manager = ScoreHistoryManager()
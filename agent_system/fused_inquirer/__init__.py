@@ -0,0 +1,21 @@
+"""
+融合问诊智能体模块
+
+该模块将Controller、Prompter、Inquirer三次串行调用合并为一次结构化调用，
+直接输出选择的任务、询问指导和医生问题。
+
+主要组件:
+- FusedInquiryResult: 融合问诊智能体的响应数据模型
+- FusedInquirerPrompt: 融合问诊智能体的提示词模板
+- FusedInquirer: 融合问诊智能体的主要实现类
+"""
+
+from .response_model import FusedInquiryResult
+from .prompt import FusedInquirerPrompt
+from .agent import FusedInquirer
+
+__all__ = [
+    'FusedInquiryResult',
+    'FusedInquirerPrompt',
+    'FusedInquirer'
+]
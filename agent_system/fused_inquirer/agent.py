@@ -0,0 +1,200 @@
+from typing import Any, Dict, List, Optional
+from agent_system.base import BaseAgent
+from agent_system.fused_inquirer.prompt import FusedInquirerPrompt
+from agent_system.fused_inquirer.response_model import FusedInquiryResult
+
+
+class FusedInquirer(BaseAgent):
+    """
+    融合问诊智能体
+
+    在一次结构化调用中完成任务选择、询问指导和问诊问题生成，
+    替代串行模式下TaskController → Prompter → Inquirer三次LLM调用，
+    避免重复发送同样的现病史、既往史和主诉。
+
+    核心功能:
+    1. 从待执行任务列表中选择下一步任务（或使用外部指定的任务）
+    2. 给出针对选定任务的询问指导
+    3. 生成最终的医生问诊问题
+
+    Attributes:
+        model_type (str): 使用的大语言模型类型，默认为 gpt-oss:latest
+        llm_config (dict): LLM模型配置参数
+    """
+
+    DEFAULT_QUESTION = "请您详细描述一下您的症状，包括什么时候开始的，有什么特点？"
+
+    def __init__(self, model_type: str = "gpt-oss:latest", llm_config: dict = None):
+        """
+        初始化融合问诊智能体
+
+        Args:
+            model_type (str): 大语言模型类型，默认使用 gpt-oss:latest
+            llm_config (dict): LLM模型的配置参数，如果为None则使用默认配置
+        """
+        super().__init__(
+            model_type=model_type,
+            description=FusedInquirerPrompt.description,
+            instructions=FusedInquirerPrompt.instructions,
+            response_model=FusedInquiryResult,
+            llm_config=llm_config or {},
+            structured_outputs=True,
+            markdown=False,
+            use_cache=False
+        )
+
+    def run(self, pending_tasks: List[Dict[str, str]], chief_complaint: str,
+            hpi_content: str = "", ph_content: str = "",
+            department_inquiry_guidance: str = "",
+            fixed_task: Optional[str] = None) -> FusedInquiryResult:
+        """
+        执行融合问诊生成
+
+        Args:
+            pending_tasks (List[Dict[str, str]]): 待执行的任务列表，每个任务包含name、description字段
+            chief_complaint (str): 患者主诉
+            hpi_content (str): 现病史内容
+            ph_content (str): 既往史内容
+            department_inquiry_guidance (str): 科室询问指导
+            fixed_task (Optional[str]): 已由规则确定的任务（sequence/score_driven模式），为None时由LLM选择
+
+        Returns:
+            FusedInquiryResult: 包含selected_task、specific_guidance和current_chat的结构化结果
+        """
+        try:
+            prompt = self._build_prompt(
+                pending_tasks, chief_complaint, hpi_content, ph_content,
+                department_inquiry_guidance, fixed_task
+            )
+            result = super().run(prompt)
+            return self._ensure_result_type(result, pending_tasks, fixed_task)
+
+        except Exception as e:
+            print(f"融合问诊生成失败: {str(e)}")
+            return self._get_fallback_result(pending_tasks, fixed_task)
+
+    async def async_run(self, pending_tasks: List[Dict[str, str]], chief_complaint: str,
+                        hpi_content: str = "", ph_content: str = "",
+                        department_inquiry_guidance: str = "",
+                        fixed_task: Optional[str] = None) -> FusedInquiryResult:
+        """
+        异步执行融合问诊生成，参数与返回值同run
+        """
+        try:
+            prompt = self._build_prompt(
+                pending_tasks, chief_complaint, hpi_content, ph_content,
+                department_inquiry_guidance, fixed_task
+            )
+            result = await super().async_run(prompt)
+            return self._ensure_result_type(result, pending_tasks, fixed_task)
+
+        except Exception as e:
+            print(f"融合问诊生成失败: {str(e)}")
+            return self._get_fallback_result(pending_tasks, fixed_task)
+
+    def _ensure_result_type(self, result: Any, pending_tasks: List[Dict[str, str]],
+                            fixed_task: Optional[str]) -> FusedInquiryResult:
+        """
+        确保返回结果为正确的类型，并校正不在任务列表中的任务选择
+
+        Args:
+            result (Any): LLM返回的原始结果
+            pending_tasks (List[Dict[str, str]]): 待执行的任务列表
+            fixed_task (Optional[str]): 外部指定的任务
+
+        Returns:
+            FusedInquiryResult: 转换后的结构化结果
+        """
+        if isinstance(result, dict):
+            result = FusedInquiryResult(**result)
+        if not isinstance(result, FusedInquiryResult):
+            return self._get_fallback_result(pending_tasks, fixed_task)
+
+        task_names = [task.get("name", "") for task in pending_tasks]
+        if fixed_task:
+            result.selected_task = fixed_task
+        elif task_names and result.selected_task not in task_names:
+            result.selected_task = task_names[0]
+
+        if not result.current_chat.strip():
+            result.current_chat = self.DEFAULT_QUESTION
+        return result
+
+    def _get_fallback_result(self, pending_tasks: List[Dict[str, str]],
+                             fixed_task: Optional[str] = None) -> FusedInquiryResult:
+        """
+        生成失败时的默认结果
+
+        Args:
+            pending_tasks (List[Dict[str, str]]): 待执行的任务列表
+            fixed_task (Optional[str]): 外部指定的任务
+
+        Returns:
+            FusedInquiryResult: 包含默认任务和默认问题的结果
+        """
+        if fixed_task:
+            selected_task = fixed_task
+        elif pending_tasks:
+            selected_task = pending_tasks[0].get("name", "未知任务")
+        else:
+            selected_task = "基本信息收集"
+
+        return FusedInquiryResult(
+            selected_task=selected_task,
+            specific_guidance="由于系统异常，请按照标准临床询问流程进行患者评估，重点询问患者的主要症状、起病过程和伴随症状等基本病史信息。",
+            current_chat=self.DEFAULT_QUESTION
+        )
+
+    def _build_prompt(self, pending_tasks: List[Dict[str, str]], chief_complaint: str,
+                      hpi_content: str, ph_content: str,
+                      department_inquiry_guidance: str = "",
+                      fixed_task: Optional[str] = None) -> str:
+        """
+        构建融合问诊的提示词
+
+        Args:
+            pending_tasks (List[Dict[str, str]]): 待执行的任务列表
+            chief_complaint (str): 患者主诉
+            hpi_content (str): 现病史内容
+            ph_content (str): 既往史内容
+            department_inquiry_guidance (str): 科室询问指导
+            fixed_task (Optional[str]): 外部指定的任务
+
+        Returns:
+            str: 构建的提示词
+        """
+        tasks_display = ""
+        for i, task in enumerate(pending_tasks, 1):
+            tasks_display += f"{i}. 任务名称: {task.get('name', '未知任务')}\n   描述: {task.get('description', '无描述')}\n"
+        if not tasks_display.strip():
+            tasks_display = "当前没有待执行的任务，请围绕基本信息收集进行询问。"
+
+        hpi_display = hpi_content.strip() if hpi_content.strip() else "暂无现病史信息"
+        ph_display = ph_content.strip() if ph_content.strip() else "暂无既往史信息"
+
+        task_section = f"\n指定任务: {fixed_task}（selected_task必须使用该任务）\n" if fixed_task else ""
+
+        guidance_section = ""
+        if department_inquiry_guidance:
+            guidance_section = f"\n科室询问指导：\n{department_inquiry_guidance}\n优先考虑科室询问指导中的建议。\n"
+
+        example_output = FusedInquirerPrompt.get_example_output()
+
+        prompt = f"""患者基本信息：
+患者主诉: {chief_complaint}
+现病史: {hpi_display}
+既往史: {ph_display}
+
+待执行任务列表：
+{tasks_display}{task_section}{guidance_section}
+已知信息提醒：以上是患者已经提供的基本信息，请避免重复询问这些内容。
+
+请依次完成：选择下一步任务、给出该任务的询问指导、生成一句简洁的问诊问题。
+
+输出格式示例：
+{example_output}
+
+请严格按照上述JSON格式输出。
+输出内容为:"""
+
+        return prompt
@@ -0,0 +1,26 @@
+from pydantic import Field
+from agent_system.base import BaseResponseModel
+
+
+class FusedInquiryResult(BaseResponseModel):
+    """
+    融合问诊智能体结果模型
+    
+    在一次结构化调用中同时给出任务选择、询问指导和最终的医生问题，
+    对应串行模式下Controller、Prompter和Inquirer三个智能体的输出。
+    """
+    
+    selected_task: str = Field(
+        ...,
+        description="从待执行任务列表中选择的任务名称"
+    )
+    
+    specific_guidance: str = Field(
+        default="",
+        description="针对选定任务的询问指导，仅包含医生可以通过询问获取的信息"
+    )
+    
+    current_chat: str = Field(
+        ...,
+        description="围绕选定任务向患者提出的问诊问题，语言通俗易懂，总长度不超过80字"
+    )
@@ -71,6 +71,13 @@ class Inquirer(BaseAgent):
         
         return result
     
+    async def async_run(self, hpi_content: str, ph_content: str, chief_complaint: str) -> InquirerResponseModel:
+        """
+        异步执行问题生成，参数与返回值同run
+        """
+        prompt = self._build_prompt(hpi_content, ph_content, chief_complaint)
+        return await super().async_run(prompt)
+    
     def _build_prompt(self, hpi_content: str, ph_content: str, chief_complaint: str) -> str:
         """
         构建Inquirer的提示词模板
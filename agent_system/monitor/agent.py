@@ -38,17 +38,38 @@ class Monitor(BaseAgent):
         Returns:
             MonitorResult: 包含完成度评分和评分理由
         """
-        if task_name and task_description:
-            prompt = self._build_task_specific_prompt(task_name, task_description, 
-                                                    hpi_content, ph_content, chief_complaint,
-                                                    triage_result)
-        else:
-            prompt = self.build_prompt(hpi_content, ph_content, chief_complaint, triage_result)
+        prompt = self._build_run_prompt(hpi_content, ph_content, chief_complaint,
+                                        task_name, task_description, triage_result)
         
         # 调用LLM进行评估
         result = super().run(prompt)
         
-        # 确保返回正确的类型
+        return self._ensure_result_type(result)
+    
+    async def async_run(self, hpi_content: str, ph_content: str, chief_complaint: str, 
+                        task_name: str = None, task_description: str = None,
+                        triage_result: dict = None) -> MonitorResult:
+        """
+        异步监控病史质量，参数与返回值同run
+        """
+        prompt = self._build_run_prompt(hpi_content, ph_content, chief_complaint,
+                                        task_name, task_description, triage_result)
+        result = await super().async_run(prompt)
+        return self._ensure_result_type(result)
+    
+    def _build_run_prompt(self, hpi_content: str, ph_content: str, chief_complaint: str,
+                          task_name: str = None, task_description: str = None,
+                          triage_result: dict = None) -> str:
+        """指定任务时构建针对性评估提示词，否则构建整体评估提示词"""
+        if task_name and task_description:
+            return self._build_task_specific_prompt(task_name, task_description, 
+                                                    hpi_content, ph_content, chief_complaint,
+                                                    triage_result)
+        return self.build_prompt(hpi_content, ph_content, chief_complaint, triage_result)
+    
+    @staticmethod
+    def _ensure_result_type(result) -> MonitorResult:
+        """确保返回正确的类型"""
         if isinstance(result, MonitorResult):
             return result
         elif isinstance(result, dict):
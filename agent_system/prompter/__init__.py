@@ -1,5 +1,6 @@
 from .agent import Prompter
 from .response_model import PrompterResult
 from .prompt import PrompterPrompt
+from .template_cache import PrompterTemplateCache
 
-__all__ = ['Prompter', 'PrompterResult', 'PrompterPrompt']
\ No newline at end of file
+__all__ = ['Prompter', 'PrompterResult', 'PrompterPrompt', 'PrompterTemplateCache']
\ No newline at end of file
@@ -41,6 +41,8 @@ class Prompter(BaseAgent):
             markdown=False,
             use_cache=False
         )
+        # 最近一次run是否返回了默认结果（LLM调用失败），默认结果不应被缓存复用
+        self.last_run_fallback = False
     
     def run(self, hpi_content: str, ph_content: str, chief_complaint: str, current_task: str, specific_guidance: str = "") -> PrompterResult:
         """
@@ -64,6 +66,7 @@ class Prompter(BaseAgent):
         Raises:
             Exception: 当LLM调用失败时，返回包含默认信息的PrompterResult
         """
+        self.last_run_fallback = False
         try:
             # 构建生成提示词
             prompt = self._build_prompt(hpi_content, ph_content, chief_complaint, current_task, specific_guidance)
@@ -77,6 +80,22 @@ class Prompter(BaseAgent):
         except Exception as e:
             # 当生成失败时记录错误并返回默认结果
             print(f"预问诊询问子智能体生成失败: {str(e)}")
+            self.last_run_fallback = True
+            return self._get_fallback_result(current_task)
+    
+    async def async_run(self, hpi_content: str, ph_content: str, chief_complaint: str, current_task: str, specific_guidance: str = "") -> PrompterResult:
+        """
+        异步执行预问诊询问智能体生成，参数与返回值同run
+        """
+        self.last_run_fallback = False
+        try:
+            prompt = self._build_prompt(hpi_content, ph_content, chief_complaint, current_task, specific_guidance)
+            result = await super().async_run(prompt)
+            return self._ensure_result_type(result)
+            
+        except Exception as e:
+            print(f"预问诊询问子智能体生成失败: {str(e)}")
+            self.last_run_fallback = True
             return self._get_fallback_result(current_task)
     
     def _ensure_result_type(self, result: Any) -> PrompterResult:
@@ -95,6 +114,7 @@ class Prompter(BaseAgent):
             return PrompterResult(**result)
         else:
             # 如果类型不匹配，返回默认结果
+            self.last_run_fallback = True
             return self._get_fallback_result("未知任务")
     
     def _extract_department_guidance(self, hpi_content: str, chief_complaint: str) -> str:
@@ -246,7 +266,8 @@ class Prompter(BaseAgent):
         
         return ""
 
-    def _get_fallback_result(self, task_name: str) -> PrompterResult:
+    @staticmethod
+    def _get_fallback_result(task_name: str) -> PrompterResult:
         """
         生成失败时的默认结果
         
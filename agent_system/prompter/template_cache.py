@@ -0,0 +1,239 @@
+import os
+import json
+import glob
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from agent_system.prompter.agent import Prompter
+from agent_system.prompter.response_model import PrompterResult
+
+
+class PrompterTemplateCache:
+    """
+    Prompter输出模板缓存
+
+    同一任务、同一分诊科室、同一阶段下Prompter生成的description和instructions高度重复，
+    因此以(任务名, 一级科室, 二级科室, 阶段)为键缓存Prompter输出，命中时跳过LLM调用。
+    缓存前会将输出中出现的病例相关内容（如主诉）替换为槽位，命中时再用当前病例信息回填。
+    线程安全，可在批处理的多个工作流之间共享。
+
+    Attributes:
+        max_entries (int): 最大缓存条目数，超出后按LRU淘汰
+        hits (int): 命中次数
+        misses (int): 未命中次数
+    """
+
+    # 槽位名称与对应的占位符
+    SLOT_MARKERS = {
+        "chief_complaint": "{{主诉}}",
+        "hpi": "{{现病史}}"
+    }
+    # 槽位取值的最小长度，过短的内容容易误替换
+    MIN_SLOT_LENGTH = 4
+
+    def __init__(self, max_entries: int = 2048):
+        """
+        初始化模板缓存
+
+        Args:
+            max_entries (int): 最大缓存条目数
+        """
+        self.max_entries = max_entries
+        self._templates: "OrderedDict[Tuple[str, str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def build_key(task: str, primary_department: str, secondary_department: str, phase: str) -> Tuple[str, str, str, str]:
+        """
+        构建缓存键
+
+        Args:
+            task (str): Controller选择的任务名
+            primary_department (str): 一级科室
+            secondary_department (str): 二级科室
+            phase (str): 当前任务阶段
+
+        Returns:
+            Tuple: 缓存键
+        """
+        return (task or "", primary_department or "", secondary_department or "", phase or "")
+
+    def get(self, key: Tuple[str, str, str, str], slots: Optional[Dict[str, str]] = None) -> Optional[PrompterResult]:
+        """
+        查询缓存并用当前病例信息回填槽位
+
+        Args:
+            key (Tuple): 缓存键
+            slots (Dict[str, str]): 当前病例的槽位取值，如{"chief_complaint": ..., "hpi": ...}
+
+        Returns:
+            Optional[PrompterResult]: 命中时返回回填后的结果，未命中或缺少所需槽位时返回None
+        """
+        slots = slots or {}
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                self.misses += 1
+                return None
+            # 模板需要的槽位当前病例无法提供时视为未命中
+            if any(not slots.get(name) for name in template["slots"]):
+                self.misses += 1
+                return None
+            self._templates.move_to_end(key)
+            template["hits"] += 1
+            self.hits += 1
+            description = template["description"]
+            instructions = list(template["instructions"])
+
+        for name in template["slots"]:
+            marker = self.SLOT_MARKERS[name]
+            description = description.replace(marker, slots[name])
+            instructions = [line.replace(marker, slots[name]) for line in instructions]
+
+        return PrompterResult(description=description, instructions=instructions)
+
+    def put(self, key: Tuple[str, str, str, str], result: PrompterResult,
+            slots: Optional[Dict[str, str]] = None) -> None:
+        """
+        将Prompter输出写入缓存，病例相关内容替换为槽位
+
+        Args:
+            key (Tuple): 缓存键
+            result (PrompterResult): Prompter输出
+            slots (Dict[str, str]): 生成该输出时的病例槽位取值
+        """
+        description = result.description
+        instructions = list(result.instructions)
+        used_slots = []
+
+        # 先替换较长的内容，避免主诉被包含在现病史中时替换不完整
+        slot_items = sorted((slots or {}).items(), key=lambda item: len(item[1] or ""), reverse=True)
+        for name, value in slot_items:
+            if name not in self.SLOT_MARKERS or not value or len(value) < self.MIN_SLOT_LENGTH:
+                continue
+            marker = self.SLOT_MARKERS[name]
+            if value in description or any(value in line for line in instructions):
+                description = description.replace(value, marker)
+                instructions = [line.replace(value, marker) for line in instructions]
+                used_slots.append(name)
+
+        with self._lock:
+            self._templates[key] = {
+                "description": description,
+                "instructions": instructions,
+                "slots": used_slots,
+                "hits": 0
+            }
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+
+    def warm_start_from_logs(self, log_dir: str, task_phase_map: Optional[Dict[str, str]] = None) -> int:
+        """
+        从历史工作流日志中预热缓存
+
+        读取日志中的prompter执行记录，优先使用记录中的cache_key；
+        旧日志没有cache_key时，科室取同一日志中最近一次triager输出，阶段由task_phase_map推断。
+        LLM失败时的默认输出和缓存命中的记录不会被加入缓存。
+
+        Args:
+            log_dir (str): 工作流日志目录
+            task_phase_map (Dict[str, str]): 任务名到阶段值的映射
+
+        Returns:
+            int: 写入缓存的模板数量
+        """
+        task_phase_map = task_phase_map or {}
+        loaded = 0
+
+        for log_file in sorted(glob.glob(os.path.join(log_dir, "workflow_*.jsonl"))):
+            primary_department, secondary_department = "", ""
+            try:
+                with open(log_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if entry.get("event_type") != "agent_execution":
+                            continue
+
+                        agent_name = entry.get("agent_name")
+                        output_data = entry.get("output_data") or {}
+                        if agent_name == "triager":
+                            primary_department = output_data.get("primary_department", primary_department)
+                            secondary_department = output_data.get("secondary_department", secondary_department)
+                            continue
+                        if agent_name != "prompter" or output_data.get("cache_hit"):
+                            continue
+
+                        input_data = entry.get("input_data") or {}
+                        task = input_data.get("current_task", "")
+                        description = output_data.get("description", "")
+                        if not task or not description:
+                            continue
+                        if description == Prompter._get_fallback_result(task).description:
+                            continue
+
+                        cache_key = input_data.get("cache_key")
+                        if cache_key:
+                            key = self.build_key(
+                                cache_key.get("task", task),
+                                cache_key.get("primary_department", ""),
+                                cache_key.get("secondary_department", ""),
+                                cache_key.get("phase", "")
+                            )
+                        else:
+                            key = self.build_key(task, primary_department, secondary_department,
+                                                 task_phase_map.get(task, ""))
+
+                        result = PrompterResult(
+                            description=description,
+                            instructions=output_data.get("instructions", [])
+                        )
+                        self.put(key, result, {
+                            "chief_complaint": input_data.get("chief_complaint", ""),
+                            "hpi": input_data.get("hpi_content", "")
+                        })
+                        loaded += 1
+            except OSError as e:
+                print(f"读取日志文件失败 {log_file}: {e}")
+
+        return loaded
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict: 包含条目数、命中次数、未命中次数和命中率
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._templates),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total > 0 else 0.0
+            }
+
+    def clear(self) -> None:
+        """清空缓存和统计"""
+        with self._lock:
+            self._templates.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key: Tuple[str, str, str, str]) -> bool:
+        with self._lock:
+            return key in self._templates
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._templates)
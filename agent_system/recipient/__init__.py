@@ -1,5 +1,12 @@
-from .agent import RecipientAgent
-from .prompt import RecipientPrompt
-from .response_model import RecipientResponseModel
+from .agent import RecipientAgent, RecipientDeltaAgent
+from .prompt import RecipientPrompt, RecipientDeltaPrompt
+from .response_model import RecipientResponseModel, RecipientPatchModel
 
-__all__ = ["RecipientAgent", "RecipientPrompt", "RecipientResponseModel"]
\ No newline at end of file
+__all__ = [
+    "RecipientAgent",
+    "RecipientDeltaAgent",
+    "RecipientPrompt",
+    "RecipientDeltaPrompt",
+    "RecipientResponseModel",
+    "RecipientPatchModel"
+]
\ No newline at end of file
@@ -1,6 +1,6 @@
 from agent_system.base import BaseAgent
-from agent_system.recipient.prompt import RecipientPrompt
-from agent_system.recipient.response_model import RecipientResponseModel
+from agent_system.recipient.prompt import RecipientPrompt, RecipientDeltaPrompt
+from agent_system.recipient.response_model import RecipientResponseModel, RecipientPatchModel
 
 class RecipientAgent(BaseAgent):
     """Recipient智能体：根据完整对话记录和上一轮医疗信息，更新现病史、既往史并提取主诉"""
@@ -83,4 +83,145 @@ class RecipientAgent(BaseAgent):
         prompt += f"2. 根据完整对话记录和上一轮既往史，更新并完善既往史（updated_PH）\n"
         prompt += f"3. 从完整对话记录中提取患者的主诉（chief_complaint）"
         
-        return prompt
\ No newline at end of file
+        return prompt
+
+
+class RecipientDeltaAgent(BaseAgent):
+    """Recipient增量智能体：仅根据最新一轮对话和当前结构化病历，输出需要变更的字段及追加内容"""
+
+    HPI_PREFIX = "现病史："
+    PH_PREFIX = "既往史："
+    # 视为"尚无内容"的占位文本，追加时直接替换
+    PLACEHOLDERS = ("暂无现病史信息", "暂无既往史信息", "暂无主诉信息", "症状不明确")
+
+    def __init__(self, model_type: str, llm_config: dict = {}):
+        super().__init__(
+            model_type=model_type,
+            description=RecipientDeltaPrompt.description,
+            instructions=RecipientDeltaPrompt.instructions,
+            response_model=RecipientPatchModel,
+            llm_config=llm_config,
+            structured_outputs=True,
+            markdown=False,
+            use_cache=False,
+        )
+
+    def run(
+        self,
+        latest_doctor_question: str,
+        latest_patient_response: str,
+        previous_HPI: str = None,
+        previous_PH: str = None,
+        previous_chief_complaint: str = None,
+        **kwargs
+    ) -> RecipientPatchModel:
+        """运行Recipient增量智能体
+
+        Args:
+            latest_doctor_question: 医生本轮的提问
+            latest_patient_response: 患者本轮的回答
+            previous_HPI: 当前的现病史
+            previous_PH: 当前的既往史
+            previous_chief_complaint: 当前的主诉
+
+        Returns:
+            RecipientPatchModel: 本轮对话对病历的增量补丁
+        """
+        prompt = self.build_prompt(
+            latest_doctor_question,
+            latest_patient_response,
+            previous_HPI,
+            previous_PH,
+            previous_chief_complaint
+        )
+        return super().run(prompt, **kwargs)
+
+    async def async_run(
+        self,
+        latest_doctor_question: str,
+        latest_patient_response: str,
+        previous_HPI: str = None,
+        previous_PH: str = None,
+        previous_chief_complaint: str = None,
+        **kwargs
+    ) -> RecipientPatchModel:
+        """异步运行Recipient增量智能体"""
+        prompt = self.build_prompt(
+            latest_doctor_question,
+            latest_patient_response,
+            previous_HPI,
+            previous_PH,
+            previous_chief_complaint
+        )
+        return await super().async_run(prompt, **kwargs)
+
+    def build_prompt(
+        self,
+        latest_doctor_question: str,
+        latest_patient_response: str,
+        previous_HPI: str,
+        previous_PH: str,
+        previous_chief_complaint: str = None
+    ) -> str:
+        """构建增量处理提示，长度只与当前病历和最新一轮对话有关，不随对话轮数增长"""
+        prompt = "当前病历：\n"
+        prompt += f"主诉：{previous_chief_complaint or '暂无主诉信息'}\n"
+        prompt += f"{previous_HPI or '暂无现病史信息'}\n"
+        prompt += f"{previous_PH or '暂无既往史信息'}\n\n"
+
+        prompt += "最新一轮对话：\n"
+        prompt += f"医生: {latest_doctor_question}\n"
+        prompt += f"患者: {latest_patient_response}\n\n"
+
+        prompt += "请仅根据最新一轮对话，输出对当前病历的增量补丁：\n"
+        prompt += "1. 判断哪些字段有新信息（changed_fields）\n"
+        prompt += "2. 给出需要追加到现病史、既往史末尾的新内容（HPI_append、PH_append）\n"
+        prompt += "3. 仅在需要修订时给出新的主诉（chief_complaint），否则输出空字符串"
+
+        return prompt
+
+    @classmethod
+    def apply_patch(
+        cls,
+        patch: RecipientPatchModel,
+        previous_HPI: str = "",
+        previous_PH: str = "",
+        previous_chief_complaint: str = ""
+    ) -> RecipientResponseModel:
+        """将增量补丁应用到当前病历上，得到与全量模式相同结构的结果
+
+        Args:
+            patch: 增量补丁
+            previous_HPI: 当前的现病史
+            previous_PH: 当前的既往史
+            previous_chief_complaint: 当前的主诉
+
+        Returns:
+            RecipientResponseModel: 应用补丁后的主诉、现病史和既往史
+        """
+        updated_HPI = cls._append_section(previous_HPI, patch.HPI_append, cls.HPI_PREFIX)
+        updated_PH = cls._append_section(previous_PH, patch.PH_append, cls.PH_PREFIX)
+        chief_complaint = patch.chief_complaint.strip() or previous_chief_complaint or ""
+
+        return RecipientResponseModel(
+            updated_HPI=updated_HPI,
+            updated_PH=updated_PH,
+            chief_complaint=chief_complaint
+        )
+
+    @classmethod
+    def _append_section(cls, previous: str, addition: str, prefix: str) -> str:
+        """将追加内容拼接到以prefix开头的病历段落末尾"""
+        previous = (previous or "").strip()
+        addition = (addition or "").strip()
+        if addition.startswith(prefix):
+            addition = addition[len(prefix):].strip()
+        if not addition:
+            return previous
+
+        body = previous[len(prefix):].strip() if previous.startswith(prefix) else previous
+        if not body or body in cls.PLACEHOLDERS:
+            return f"{prefix}{addition}"
+        if body[-1] not in "。；！？.;!?":
+            body += "。"
+        return f"{prefix}{body}{addition}"
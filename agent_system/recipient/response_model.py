@@ -1,3 +1,4 @@
+from typing import List
 from pydantic import Field
 from agent_system.base import BaseResponseModel
 
@@ -17,4 +18,27 @@ class RecipientResponseModel(BaseResponseModel):
     chief_complaint: str = Field(
         ...,
         description="根据完整对话记录提取的患者主诉，简洁描述患者的主要症状及持续时间"
-    )
\ No newline at end of file
+    )
+
+class RecipientPatchModel(BaseResponseModel):
+    """Recipient增量模式响应模型：描述本轮对话对结构化病历的增量补丁"""
+
+    changed_fields: List[str] = Field(
+        default_factory=list,
+        description="本轮确有变更的字段列表，取值为 updated_HPI、updated_PH、chief_complaint"
+    )
+
+    HPI_append: str = Field(
+        default="",
+        description="需要追加到现病史末尾的新内容，不含'现病史：'前缀，无新增时为空字符串"
+    )
+
+    PH_append: str = Field(
+        default="",
+        description="需要追加到既往史末尾的新内容，不含'既往史：'前缀，无新增时为空字符串"
+    )
+
+    chief_complaint: str = Field(
+        default="",
+        description="修订后的完整主诉，仅在主诉需要变更时填写，否则为空字符串"
+    )
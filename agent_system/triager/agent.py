@@ -77,6 +77,19 @@ class TriageAgent(BaseAgent):
             print(f"科室分诊分析失败: {str(e)}")
             return self._get_fallback_result()
     
+    async def async_run(self, chief_complaint: str, hpi_content: str = "", ph_content: str = "", current_guidance = "") -> TriageResult:
+        """
+        异步执行科室分诊，参数与返回值同run
+        """
+        try:
+            prompt = self.build_prompt(chief_complaint, hpi_content, ph_content, current_guidance)
+            result = await super().async_run(prompt)
+            return self._ensure_result_type(result)
+            
+        except Exception as e:
+            print(f"科室分诊分析失败: {str(e)}")
+            return self._get_fallback_result()
+    
     def build_prompt(self, chief_complaint: str, hpi_content: str = "", ph_content: str = "", current_guidance: str = "") -> str:
         """
         构建科室分诊的提示词模板
@@ -1,7 +1,7 @@
 import json
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,6 +22,13 @@ class GuidanceLoader:
 
         self.current_guidance = department_guidance
         self.comparison_rules = self._load_comparison_rules() if self.use_department_comparison else {}
+        # 询问指导文件内容，首次查询时读取，之后在多个病例之间复用
+        self._guidance_data: Optional[Dict[str, Any]] = None
+
+    def reset(self, department_guidance: str = "") -> None:
+        """开始新病例时恢复初始指导，已加载的指导文件和对比规则保留"""
+        self.department_guidance = department_guidance
+        self.current_guidance = department_guidance
 
     def _load_comparison_rules(self) -> Dict[str, Any]:
         """加载科室对比规则"""
@@ -39,14 +46,17 @@ class GuidanceLoader:
     def load_inquiry_guidance(self, department: str) -> str:
         """加载科室特定的询问指导"""
         try:
-            guidance_file = self.department_guidance_file
+            guidance_data = self._guidance_data
+            if guidance_data is None:
+                guidance_file = self.department_guidance_file
             
-            if not os.path.exists(guidance_file):
-                logger.warning(f"⚠️ 指导文件不存在: {guidance_file}")
-                return ""
+                if not os.path.exists(guidance_file):
+                    logger.warning(f"⚠️ 指导文件不存在: {guidance_file}")
+                    return ""
             
-            with open(guidance_file, 'r', encoding='utf-8') as f:
-                guidance_data = json.load(f)
+                with open(guidance_file, 'r', encoding='utf-8') as f:
+                    guidance_data = json.load(f)
+                self._guidance_data = guidance_data
             
             if department not in guidance_data:
                 if "其他" in guidance_data:
@@ -69,9 +79,9 @@ class GuidanceLoader:
         """公共方法：获取两个科室的对比鉴别指导"""
         return self._get_comparison_guidance(dept1, dept2)
     
-    def update_guidance_for_Triager(self, predicted_department: str) -> str:
+    def update_guidance_for_Triager(self, predicted_department: str, preloaded_guidance: Optional[str] = None) -> str:
         """公共方法：动态更新询问指导（注意大小写！）"""
-        return self._update_guidance_for_Triager(predicted_department)
+        return self._update_guidance_for_Triager(predicted_department, preloaded_guidance)
     
     # 如果需要小写版本，也可以添加
     def update_guidance_for_triager(self, predicted_department: str) -> str:
@@ -132,14 +142,17 @@ class GuidanceLoader:
         
         return "\n\n".join(guidance_parts)
     
-    def _update_guidance_for_Triager(self, predicted_department: str) -> str:
-        """动态更新询问指导。如果禁用动态指导，则返回当前的指导。"""
+    def _update_guidance_for_Triager(self, predicted_department: str, preloaded_guidance: Optional[str] = None) -> str:
+        """动态更新询问指导。如果禁用动态指导，则返回当前的指导。preloaded_guidance为预先加载的该科室指导，提供时不再读取指导文件。"""
         # 修复：如果禁用了动态指导，则直接返回当前已有的指导，不进行任何更新
         if not self.use_dynamic_guidance:
             return self.department_guidance  
         
         first_department = predicted_department.split('-')[0] if '-' in predicted_department else predicted_department
-        new_guidance = self.load_inquiry_guidance(first_department)
+        if preloaded_guidance is not None:
+            new_guidance = preloaded_guidance
+        else:
+            new_guidance = self.load_inquiry_guidance(first_department)
         
         if new_guidance and new_guidance != self.current_guidance:
             self.current_guidance = new_guidance
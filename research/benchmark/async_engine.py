@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+异步引擎与线程池引擎对比基准测试
+- 在本进程后台线程中启动OpenAI兼容的假LLM服务（/v1/chat/completions，固定延迟）
+- 每组(引擎, 并发病例数)在独立子进程中运行，经由真实的agno OpenAILike客户端访问假服务
+- thread引擎每个病例一个线程；async引擎所有病例在同一事件循环中运行，LLM并发由信号量限制
+- 输出总耗时、吞吐（步/秒）、峰值常驻内存与峰值线程数
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def fake_completion_content():
+    """返回覆盖所有agent响应模型字段的JSON字符串"""
+    dimension = {"score": 3.0, "comment": "ok"}
+    return json.dumps({
+        "updated_HPI": "现病史：患者头痛3天，伴恶心。", "updated_PH": "既往史：否认高血压。", "chief_complaint": "头痛3天",
+        "changed_fields": ["updated_HPI"], "HPI_append": "伴恶心。", "PH_append": "",
+        "triage_reasoning": "头痛", "primary_department": "内科", "secondary_department": "神经内科",
+        "candidate_primary_department": "外科", "candidate_secondary_department": "神经外科",
+        "completion_score": round(random.uniform(0.5, 1.0), 2), "reason": "r",
+        "selected_task": "发病情况", "specific_guidance": "询问起病情况",
+        "description": "d", "instructions": ["i"], "current_chat": "请问头痛是从什么时候开始的？",
+        "clinical_inquiry": dimension, "communication_quality": dimension, "information_completeness": dimension,
+        "overall_professionalism": dimension, "present_illness_similarity": dimension,
+        "past_history_similarity": dimension, "chief_complaint_similarity": dimension,
+        "summary": "s", "key_suggestions": ["k"],
+    }, ensure_ascii=False)
+
+
+class FakeLLMServer:
+    """基于asyncio的最小HTTP/1.1服务，支持keep-alive，仅实现chat completions接口"""
+
+    def __init__(self, latency: float, host: str = "127.0.0.1"):
+        self.latency = latency
+        self.host = host
+        self.port = None
+        self.requests = 0
+        self._ready = threading.Event()
+        self._loop = None
+
+    def start(self):
+        """在后台线程中启动服务，返回base_url"""
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._ready.wait()
+        return f"http://{self.host}:{self.port}/v1"
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, 0, backlog=4096))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                content_length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        content_length = int(value.strip())
+                if content_length:
+                    await reader.readexactly(content_length)
+
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                body = json.dumps({
+                    "id": f"chatcmpl-{self.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "fake",
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": fake_completion_content()},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                }, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: keep-alive\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _workflow_kwargs(case_data, case_index, args, log_dir):
+    """构建两种引擎共用的工作流参数"""
+    from guidance.loader import GuidanceLoader
+    return {
+        "case_data": case_data,
+        "model_type": "fake",
+        "llm_config": {"fake": {"class": "OpenAILike", "params": {
+            "id": "fake", "api_key": "bench", "base_url": args.base_url
+        }}},
+        "max_steps": args.steps,
+        "log_dir": log_dir,
+        "case_index": case_index,
+        "controller_mode": args.controller_mode,
+        "guidance_loader": GuidanceLoader(
+            use_dynamic_guidance=True,
+            use_department_comparison=True,
+            department_guidance_file=os.path.join(PROJECT_ROOT, "guidance/department_inquiry_guidance.json"),
+            comparison_rules_file=os.path.join(PROJECT_ROOT, "guidance/department_comparison_guidance.json")
+        ),
+        "checkpoint": False
+    }
+
+
+def run_worker(args):
+    """子进程：以指定引擎运行args.cases个并发病例，向stdout输出一行JSON统计"""
+    os.environ.setdefault("API_KEY", "bench")
+    os.environ.setdefault("BASE_URL", args.base_url)
+    from research.workflow import MedicalWorkflow, AsyncMedicalWorkflow
+
+    with open(args.dataset, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    log_dir = tempfile.mkdtemp(prefix=f"async_bench_{args.engine}_")
+    cases = [(dataset[i % len(dataset)], i) for i in range(args.cases)]
+
+    peak_threads = threading.active_count()
+    sampling = threading.Event()
+
+    def sample_threads():
+        nonlocal peak_threads
+        while not sampling.wait(0.05):
+            peak_threads = max(peak_threads, threading.active_count())
+
+    sampler = threading.Thread(target=sample_threads, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+
+    if args.engine == "thread":
+        def run_case(case):
+            workflow = MedicalWorkflow(**_workflow_kwargs(case[0], case[1], args, log_dir))
+            workflow.run()
+            return workflow.current_step
+
+        with ThreadPoolExecutor(max_workers=args.cases) as executor:
+            steps = list(executor.map(run_case, cases))
+    else:
+        async def run_all():
+            llm_semaphore = asyncio.Semaphore(args.llm_concurrency) if args.llm_concurrency > 0 else None
+
+            async def run_case(case):
+                workflow = AsyncMedicalWorkflow(
+                    llm_semaphore=llm_semaphore, **_workflow_kwargs(case[0], case[1], args, log_dir)
+                )
+                await workflow.async_run()
+                return workflow.current_step
+
+            return await asyncio.gather(*(run_case(case) for case in cases))
+
+        steps = asyncio.run(run_all())
+
+    elapsed = time.perf_counter() - start
+    sampling.set()
+    sampler.join()
+
+    print(json.dumps({
+        "engine": args.engine,
+        "cases": args.cases,
+        "steps": sum(steps),
+        "elapsed": elapsed,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_threads": peak_threads
+    }))
+
+
+def run_benchmark(args):
+    """启动假LLM服务，依次在子进程中运行各组配置并打印对比表"""
+    server = FakeLLMServer(args.latency)
+    base_url = server.start()
+
+    print(f"假LLM服务: {base_url}, 延迟: {args.latency * 1000:.0f}ms, 最大步数: {args.steps}, "
+          f"async LLM并发上限: {args.llm_concurrency or '不限'}")
+    print(f"{'引擎':<8}{'病例数':>8}{'总步数':>8}{'总耗时(s)':>12}{'吞吐(步/s)':>12}{'峰值内存(MB)':>14}{'峰值线程':>10}{'LLM请求':>10}")
+
+    for cases in args.concurrency:
+        for engine in args.engines:
+            requests_before = server.requests
+            command = [
+                sys.executable, os.path.abspath(__file__), "--worker",
+                "--engine", engine, "--cases", str(cases), "--base-url", base_url,
+                "--dataset", args.dataset, "--steps", str(args.steps),
+                "--controller-mode", args.controller_mode, "--llm-concurrency", str(args.llm_concurrency)
+            ]
+            completed = subprocess.run(command, capture_output=True, text=True, cwd=PROJECT_ROOT)
+            stats_line = next((line for line in reversed(completed.stdout.splitlines()) if line.startswith("{")), None)
+            if completed.returncode != 0 or stats_line is None:
+                print(f"{engine:<8}{cases:>8}  运行失败: {completed.stderr.strip().splitlines()[-1:]}")
+                continue
+            stats = json.loads(stats_line)
+            throughput = stats["steps"] / stats["elapsed"] if stats["elapsed"] else 0.0
+            print(f"{engine:<8}{cases:>8}{stats['steps']:>8}{stats['elapsed']:>12.2f}{throughput:>12.1f}"
+                  f"{stats['max_rss_mb']:>14.1f}{stats['peak_threads']:>10}{server.requests - requests_before:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="异步引擎与线程池引擎对比基准测试")
+    parser.add_argument("--dataset", type=str, default=os.path.join(PROJECT_ROOT, "research/dataset/test_data.json"),
+                        help="数据集路径")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 500], help="并发病例数列表")
+    parser.add_argument("--engines", type=str, nargs="+", default=["thread", "async"],
+                        choices=["thread", "async"], help="参与对比的引擎")
+    parser.add_argument("--steps", type=int, default=5, help="每个病例的最大步数")
+    parser.add_argument("--latency", type=float, default=0.2, help="假LLM服务单次请求延迟（秒）")
+    parser.add_argument("--llm-concurrency", type=int, default=0, help="async引擎的LLM并发请求上限，0表示不限制")
+    parser.add_argument("--controller-mode", type=str, default="score_driven",
+                        choices=["normal", "sequence", "score_driven"], help="任务控制器模式")
+    # 子进程参数
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--engine", type=str, default="thread", help=argparse.SUPPRESS)
+    parser.add_argument("--cases", type=int, default=50, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+    else:
+        run_benchmark(args)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+单病例初始化耗时基准测试
+- 与批处理相同的方式为每个病例构建工作流参数并创建MedicalWorkflow，不执行step
+- fresh: 每个病例新建GuidanceLoader、StepExecutor及全部agent（--disable-engine-pool的行为）
+- pooled: 从StepExecutorPool借用执行器，只重置病例状态，创建后立即归还
+- 输出两种方式的平均、P50、P95初始化耗时
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESEARCH_DIR = os.path.join(PROJECT_ROOT, "research")
+for path in (PROJECT_ROOT, RESEARCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def build_batch_args(bench_args, log_dir: str, disable_engine_pool: bool) -> argparse.Namespace:
+    """使用批处理命令行的默认值构建参数"""
+    from utils.parse_arguments import parse_arguments
+    argv = sys.argv
+    sys.argv = [
+        "main.py",
+        "--controller-mode", bench_args.controller_mode,
+        "--recipient-mode", bench_args.recipient_mode,
+        "--log-dir", log_dir,
+        "--disable-checkpoint"
+    ] + (["--disable-engine-pool"] if disable_engine_pool else [])
+    try:
+        return parse_arguments()
+    finally:
+        sys.argv = argv
+
+
+def measure(dataset, args, cases: int):
+    """依次创建cases个工作流，返回每个病例的初始化耗时（秒）"""
+    from research.workflow import MedicalWorkflow
+    from utils.build_workflow_kwargs import build_workflow_kwargs
+    from utils.create_step_executor_pool import create_step_executor_pool
+
+    executor_pool = create_step_executor_pool(args)
+    timings = []
+    for i in range(cases):
+        start = time.perf_counter()
+        workflow = MedicalWorkflow(**build_workflow_kwargs(dataset[i % len(dataset)], i, args, None, executor_pool))
+        timings.append(time.perf_counter() - start)
+        if executor_pool is not None:
+            executor_pool.release(workflow.step_executor)
+        else:
+            workflow.step_executor.shutdown()
+    if executor_pool is not None:
+        executor_pool.shutdown()
+    return timings
+
+
+def summarize(timings):
+    """计算平均、P50、P95耗时（毫秒）"""
+    ordered = sorted(timings)
+    return {
+        "mean": statistics.mean(ordered) * 1000,
+        "p50": ordered[len(ordered) // 2] * 1000,
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="单病例初始化耗时基准测试")
+    parser.add_argument("--dataset", type=str, default=os.path.join(PROJECT_ROOT, "research/dataset/test_data.json"),
+                        help="数据集路径")
+    parser.add_argument("--cases", type=int, default=200, help="创建的病例数")
+    parser.add_argument("--controller-mode", type=str, default="normal",
+                        choices=["normal", "sequence", "score_driven"], help="任务控制器模式")
+    parser.add_argument("--recipient-mode", type=str, default="full", choices=["full", "delta"],
+                        help="Recipient模式")
+    bench_args = parser.parse_args()
+
+    with open(bench_args.dataset, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+
+    results = {}
+    for name, disable_engine_pool in (("fresh", True), ("pooled", False)):
+        log_dir = tempfile.mkdtemp(prefix=f"case_setup_{name}_")
+        args = build_batch_args(bench_args, log_dir, disable_engine_pool)
+        results[name] = summarize(measure(dataset, args, bench_args.cases))
+
+    print()
+    print(f"{'方式':<10}{'平均(ms)':>12}{'P50(ms)':>12}{'P95(ms)':>12}")
+    for name, stats in results.items():
+        print(f"{name:<10}{stats['mean']:>12.2f}{stats['p50']:>12.2f}{stats['p95']:>12.2f}")
+    print(f"平均初始化耗时降低: {results['fresh']['mean'] / max(results['pooled']['mean'], 1e-9):.1f}x")
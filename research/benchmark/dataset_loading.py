@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+数据集加载基准测试
+- 以test_data.json中的病例为模板生成指定规模的JSON数组数据集
+- json.load: 原有方式，整体解析后按一级科室扫描筛选
+- index (cold): 首次使用，流式扫描并写入旁路索引
+- index (warm): 旁路索引已存在，只读取索引
+- 输出各方式的启动耗时（加载+科室筛选）和tracemalloc统计的峰值内存
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESEARCH_DIR = os.path.join(PROJECT_ROOT, "research")
+for path in (PROJECT_ROOT, RESEARCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from utils.indexed_dataset import IndexedDataset
+
+DEPARTMENTS = ["内科", "外科", "妇产科", "儿科", "五官科"]
+
+
+def generate_dataset(template_path: str, cases: int, output_path: str):
+    """逐条写入合成数据集，避免生成时占用大量内存"""
+    with open(template_path, "r", encoding="utf-8") as f:
+        templates = json.load(f)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(cases):
+            case = dict(templates[i % len(templates)], 一级科室=DEPARTMENTS[i % len(DEPARTMENTS)])
+            f.write((",\n" if i else "") + json.dumps(case, ensure_ascii=False, indent=2))
+        f.write("\n]\n")
+
+
+def load_with_json(dataset_path: str, department: str) -> int:
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    return len([case for case in dataset if case.get("一级科室", "") == department])
+
+
+def load_with_index(dataset_path: str, department: str) -> int:
+    return len(IndexedDataset(dataset_path).filter_department(department))
+
+
+def measure(func, *args):
+    """返回耗时（秒）、峰值内存（MB）和函数结果"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="数据集加载基准测试")
+    parser.add_argument("--dataset", type=str, default=os.path.join(PROJECT_ROOT, "research/dataset/test_data.json"),
+                        help="病例模板数据集路径")
+    parser.add_argument("--cases", type=int, default=200000, help="生成的病例数")
+    parser.add_argument("--department", type=str, default="儿科", help="筛选的一级科室")
+    bench_args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="dataset_loading_")
+    dataset_path = os.path.join(work_dir, "dataset.json")
+    generate_dataset(bench_args.dataset, bench_args.cases, dataset_path)
+    print(f"数据集: {bench_args.cases} 个病例, {os.path.getsize(dataset_path) / 1024 / 1024:.1f} MB")
+
+    results = {
+        "json.load": measure(load_with_json, dataset_path, bench_args.department),
+        "index (cold)": measure(load_with_index, dataset_path, bench_args.department),
+        "index (warm)": measure(load_with_index, dataset_path, bench_args.department)
+    }
+
+    print()
+    print(f"{'方式':<16}{'耗时(s)':>10}{'峰值内存(MB)':>16}{'筛选病例数':>12}")
+    for name, (elapsed, peak, count) in results.items():
+        print(f"{name:<16}{elapsed:>10.2f}{peak:>16.1f}{count:>12}")
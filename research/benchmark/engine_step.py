@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+问诊引擎单步基准测试（科研批处理与服务端共用）
+- 使用固定延迟的假LLM替换agno Agent，不产生真实API调用
+- 分别以虚拟患者（科研批处理）、日志回放、真实患者输入（服务端run_turn）三种患者来源运行同一引擎
+- 输出每步平均耗时、扣除假LLM延迟后的引擎开销以及每步LLM调用次数
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import agent_system.base.agent as base_agent_module
+
+
+class _FakeRunResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLMAgent:
+    """固定延迟的假LLM，返回覆盖所有agent响应模型字段的JSON"""
+
+    latency = 0.0
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def _payload(cls):
+        with cls._lock:
+            cls.calls += 1
+        dimension = {"score": 3.0, "comment": "ok"}
+        return json.dumps({
+            "updated_HPI": "现病史：患者头痛3天，伴恶心。", "updated_PH": "既往史：否认高血压。", "chief_complaint": "头痛3天",
+            "changed_fields": ["updated_HPI"], "HPI_append": "伴恶心。", "PH_append": "",
+            "triage_reasoning": "头痛", "primary_department": "内科", "secondary_department": "神经内科",
+            "candidate_primary_department": "外科", "candidate_secondary_department": "神经外科",
+            "completion_score": round(random.uniform(0.5, 1.0), 2), "reason": "r",
+            "selected_task": "发病情况", "specific_guidance": "询问起病情况",
+            "description": "d", "instructions": ["i"], "current_chat": "请问头痛是从什么时候开始的？",
+            "clinical_inquiry": dimension, "communication_quality": dimension, "information_completeness": dimension,
+            "overall_professionalism": dimension, "present_illness_similarity": dimension,
+            "past_history_similarity": dimension, "chief_complaint_similarity": dimension,
+            "summary": "s", "key_suggestions": ["k"],
+        }, ensure_ascii=False)
+
+    def run(self, prompt, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return _FakeRunResponse(self._payload())
+
+    async def arun(self, prompt, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return _FakeRunResponse(self._payload())
+
+
+# 在创建任何agent之前替换agno Agent
+base_agent_module.Agent = FakeLLMAgent
+
+from research.workflow import MedicalWorkflow
+from research.workflow.patient_source import ReplayPatientSource
+from research.workflow.replay import ReplayLog
+from service.workflow.medical_workflow import MedicalWorkflow as ServiceWorkflow
+from guidance.loader import GuidanceLoader
+
+
+def make_loader():
+    """创建GuidanceLoader"""
+    return GuidanceLoader(
+        use_dynamic_guidance=True,
+        use_department_comparison=True,
+        department_guidance_file=os.path.join(PROJECT_ROOT, "guidance/department_inquiry_guidance.json"),
+        comparison_rules_file=os.path.join(PROJECT_ROOT, "guidance/department_comparison_guidance.json")
+    )
+
+
+def run_batch_case(case_data, case_index, args, log_dir, patient_source=None):
+    """以科研批处理方式运行单个病例，返回(步数, 日志路径)"""
+    workflow = MedicalWorkflow(
+        case_data=case_data, model_type=args.model_type, llm_config=args.llm_config,
+        max_steps=args.steps, log_dir=log_dir, case_index=case_index,
+        controller_mode=args.controller_mode, guidance_loader=make_loader(),
+        speculative=args.speculative, checkpoint=False, patient_source=patient_source
+    )
+    log_file_path = workflow.run()
+    return workflow.current_step, log_file_path
+
+
+def run_service_case(case_index, args):
+    """以服务端方式运行单个会话，每轮通过run_turn传入患者回答，返回步数"""
+    workflow = ServiceWorkflow(
+        model_type=args.model_type, llm_config=args.llm_config, max_steps=args.steps,
+        controller_mode=args.controller_mode, guidance_loader=make_loader(), speculative=args.speculative
+    )
+    steps = 0
+    while not workflow.is_finished():
+        if workflow.run_turn(f"患者第{steps + 1}轮回答") is None:
+            break
+        steps += 1
+    workflow.finish()
+    return steps
+
+
+def measure(name, fn, cases, threads, latency):
+    """并发运行cases个病例并打印统计"""
+    FakeLLMAgent.calls = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(fn, range(cases)))
+    elapsed = time.perf_counter() - start
+    total_steps = sum(result[0] if isinstance(result, tuple) else result for result in results)
+    calls_per_step = FakeLLMAgent.calls / total_steps if total_steps else 0.0
+    per_step_ms = elapsed * threads / total_steps * 1000 if total_steps else 0.0
+    overhead_ms = max(0.0, per_step_ms - calls_per_step * latency * 1000)
+    print(f"{name:<12}{total_steps:>8}{elapsed:>12.2f}{per_step_ms:>14.1f}{overhead_ms:>14.1f}{calls_per_step:>12.1f}")
+    return results
+
+
+def run_benchmark(args):
+    """依次运行虚拟患者、日志回放和服务端三种模式"""
+    with open(args.dataset, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    FakeLLMAgent.latency = args.latency
+    log_dir = tempfile.mkdtemp(prefix="engine_bench_")
+
+    print(f"病例数: {args.cases}, 最大步数: {args.steps}, 线程数: {args.threads}, 假LLM延迟: {args.latency * 1000:.0f}ms")
+    print(f"{'模式':<12}{'总步数':>8}{'总耗时(s)':>12}{'每步耗时(ms)':>14}{'引擎开销(ms)':>14}{'LLM调用/步':>12}")
+
+    virtual_results = measure(
+        "virtual",
+        lambda i: run_batch_case(dataset[i % len(dataset)], i, args, os.path.join(log_dir, "virtual")),
+        args.cases, args.threads, args.latency
+    )
+    measure(
+        "replay",
+        lambda i: run_batch_case(dataset[i % len(dataset)], i, args, os.path.join(log_dir, "replay"),
+                                 patient_source=ReplayPatientSource(
+                                     ReplayLog(virtual_results[i][1], frozen_agents=["patient"]))),
+        args.cases, args.threads, args.latency
+    )
+    measure(
+        "service",
+        lambda i: run_service_case(i, args),
+        args.cases, args.threads, args.latency
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="问诊引擎单步基准测试")
+    parser.add_argument("--dataset", type=str, default=os.path.join(PROJECT_ROOT, "research/dataset/test_data.json"),
+                        help="数据集路径")
+    parser.add_argument("--cases", type=int, default=20, help="病例数")
+    parser.add_argument("--steps", type=int, default=10, help="每个病例的最大步数")
+    parser.add_argument("--threads", type=int, default=10, help="线程数")
+    parser.add_argument("--latency", type=float, default=0.05, help="假LLM单次调用延迟（秒）")
+    parser.add_argument("--controller-mode", type=str, default="score_driven",
+                        choices=["normal", "sequence", "score_driven"], help="任务控制器模式")
+    parser.add_argument("--speculative", action="store_true", help="启用推测预计算")
+    parser.add_argument("--model-type", type=str, default="deepseek", help="模型类型")
+    args = parser.parse_args()
+    args.llm_config = {}
+    run_benchmark(args)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+混合引擎（多进程 × 异步）多核扩展性基准测试
+- 复用async_engine中的OpenAI兼容假LLM服务，固定延迟
+- 固定病例总数，依次以不同工作进程数运行run_workflow_batch_hybrid
+- 输出总耗时、吞吐（步/秒）及相对单进程的加速比；假LLM延迟越低，GIL受限的提示词构建、解析、日志序列化占比越高，多进程的收益越明显
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESEARCH_DIR = os.path.join(PROJECT_ROOT, "research")
+for path in (PROJECT_ROOT, RESEARCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from research.benchmark.async_engine import FakeLLMServer
+
+
+def build_batch_args(bench_args, num_processes: int, log_root: str) -> argparse.Namespace:
+    """使用批处理命令行的默认值构建混合引擎参数"""
+    from utils.parse_arguments import parse_arguments
+    run_dir = os.path.join(log_root, f"p{num_processes}")
+    argv = sys.argv
+    sys.argv = [
+        "main.py", "--engine", "hybrid",
+        "--num-processes", str(num_processes),
+        "--max-concurrent-cases", str(bench_args.concurrent_cases),
+        "--llm-concurrency", str(bench_args.llm_concurrency),
+        "--max-steps", str(bench_args.steps),
+        "--controller-mode", bench_args.controller_mode,
+        "--log-dir", os.path.join(run_dir, "logs"),
+        "--output-dir", os.path.join(run_dir, "output"),
+        "--progress-interval", "3600"
+    ]
+    try:
+        return parse_arguments()
+    finally:
+        sys.argv = argv
+
+
+def run_benchmark(bench_args):
+    """启动假LLM服务，按不同进程数运行同一批病例并打印扩展性对比"""
+    server = FakeLLMServer(bench_args.latency)
+    base_url = server.start()
+    # 工作进程通过config.LLM_CONFIG读取环境变量中的服务地址
+    os.environ["API_KEY"] = "bench"
+    os.environ["BASE_URL"] = base_url
+
+    from utils.run_workflow_batch_hybrid import run_workflow_batch_hybrid
+
+    with open(bench_args.dataset, "r", encoding="utf-8") as f:
+        source = json.load(f)
+    dataset = [source[i % len(source)] for i in range(bench_args.cases)]
+    log_root = tempfile.mkdtemp(prefix="hybrid_bench_")
+
+    print(f"假LLM服务: {base_url}, 延迟: {bench_args.latency * 1000:.0f}ms, 病例数: {bench_args.cases}, "
+          f"每进程并发病例数: {bench_args.concurrent_cases}, 最大步数: {bench_args.steps}, CPU核数: {os.cpu_count()}")
+    rows = []
+    for num_processes in bench_args.processes:
+        args = build_batch_args(bench_args, num_processes, log_root)
+        requests_before = server.requests
+        start = time.perf_counter()
+        batch_results = run_workflow_batch_hybrid(dataset, args)
+        elapsed = time.perf_counter() - start
+        steps = sum(result['workflow_status']['current_step'] for result in batch_results['results'])
+        rows.append((num_processes, batch_results['summary']['successful_samples'], steps, elapsed,
+                     server.requests - requests_before))
+
+    print()
+    print(f"{'进程数':>6}{'成功病例':>10}{'总步数':>8}{'总耗时(s)':>12}{'吞吐(步/s)':>12}{'加速比':>8}{'LLM请求':>10}")
+    baseline = None
+    for num_processes, succeeded, steps, elapsed, requests in rows:
+        throughput = steps / elapsed if elapsed else 0.0
+        baseline = baseline or throughput
+        print(f"{num_processes:>6}{succeeded:>10}{steps:>8}{elapsed:>12.2f}{throughput:>12.1f}"
+              f"{throughput / baseline if baseline else 0.0:>8.2f}{requests:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="混合引擎多核扩展性基准测试")
+    parser.add_argument("--dataset", type=str, default=os.path.join(PROJECT_ROOT, "research/dataset/test_data.json"),
+                        help="数据集路径")
+    parser.add_argument("--cases", type=int, default=400, help="病例总数")
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, 4, max(1, os.cpu_count() or 1)}), help="工作进程数列表")
+    parser.add_argument("--concurrent-cases", type=int, default=100, help="每个进程同时推进的病例数")
+    parser.add_argument("--llm-concurrency", type=int, default=0, help="全局LLM并发请求上限，0表示不限制")
+    parser.add_argument("--steps", type=int, default=5, help="每个病例的最大步数")
+    parser.add_argument("--latency", type=float, default=0.02, help="假LLM服务单次请求延迟（秒）")
+    parser.add_argument("--controller-mode", type=str, default="score_driven",
+                        choices=["normal", "sequence", "score_driven"], help="任务控制器模式")
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+性能剖析汇总报告
+- 读取批处理中各病例导出的Chrome trace（--profile生成的 *.trace.json）
+- 按关键路径将每个step的耗时归因到阶段（recipient、monitor、evaluator等）及其内部span（LLM请求、提示词构建、解析、日志写入、指导查询）
+- 并发执行的子span（如异步引擎中同一step的多个Monitor调用）只沿最晚结束的分支计入关键路径
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+from collections import defaultdict
+from typing import Dict, Any, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow.profiler import TRACE_SUFFIX
+
+# step自身（不属于任何子span）的耗时
+SELF_TIME = "(self)"
+# 并发子span中非关键分支额外占用的耗时
+CONCURRENCY_WAIT = "(concurrency_wait)"
+
+
+def load_traces(trace_dir: str) -> List[List[Dict[str, Any]]]:
+    """读取目录下所有trace文件，返回每个病例的span列表"""
+    traces = []
+    for path in sorted(glob.glob(os.path.join(trace_dir, f"*{TRACE_SUFFIX}"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                traces.append(json.load(f).get("traceEvents", []))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"跳过无法读取的trace {path}: {e}")
+    return traces
+
+
+def critical_path(span: Dict[str, Any], children: Dict[int, List[Dict[str, Any]]],
+                  breakdown: Dict[str, float]):
+    """
+    将span的耗时沿关键路径归因到各span名称
+
+    Args:
+        span: trace事件
+        children: 父span id到子span列表的映射
+        breakdown: 累加结果，span名称 -> 微秒
+    """
+    kids = sorted(children.get(span["args"]["id"], []), key=lambda event: event["ts"])
+    covered = 0.0
+    cluster: List[Dict[str, Any]] = []
+    cluster_end = None
+
+    def flush():
+        nonlocal covered
+        if not cluster:
+            return
+        start = cluster[0]["ts"]
+        end = max(event["ts"] + event["dur"] for event in cluster)
+        # 重叠的子span中最晚结束的决定了完成时间
+        critical = max(cluster, key=lambda event: event["ts"] + event["dur"])
+        critical_path(critical, children, breakdown)
+        wait = (end - start) - critical["dur"]
+        if wait > 0:
+            breakdown[CONCURRENCY_WAIT] += wait
+        covered += end - start
+
+    for kid in kids:
+        if cluster and kid["ts"] >= cluster_end:
+            flush()
+            cluster = []
+        if not cluster:
+            cluster_end = kid["ts"] + kid["dur"]
+        cluster.append(kid)
+        cluster_end = max(cluster_end, kid["ts"] + kid["dur"])
+    flush()
+
+    breakdown[span["name"]] += max(0.0, span["dur"] - covered)
+
+
+def aggregate(traces: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    汇总所有病例的关键路径耗时
+
+    Returns:
+        dict: steps（step数）、step_time（step总耗时，微秒）、stages（阶段 -> 子span名称 -> 微秒）
+    """
+    stages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    steps = 0
+    step_time = 0.0
+    for events in traces:
+        children = defaultdict(list)
+        for event in events:
+            parent = event.get("args", {}).get("parent")
+            if parent is not None:
+                children[parent].append(event)
+
+        for step in (event for event in events if event.get("cat") == "step"):
+            steps += 1
+            step_time += step["dur"]
+            breakdown = defaultdict(float)
+            critical_path(step, children, breakdown)
+            # 将step子树内的耗时按所属阶段分组：step直接子span为阶段
+            for stage in children.get(step["args"]["id"], []):
+                stage_breakdown = defaultdict(float)
+                critical_path(stage, children, stage_breakdown)
+                for name, value in stage_breakdown.items():
+                    stages[stage["name"]][name] += value
+            stages[SELF_TIME][SELF_TIME] += breakdown.get(step["name"], 0.0)
+    return {"steps": steps, "step_time": step_time, "stages": stages}
+
+
+def print_report(report: Dict[str, Any], top: int):
+    """打印按阶段和span类型汇总的关键路径耗时"""
+    steps, step_time, stages = report["steps"], report["step_time"], report["stages"]
+    if not steps:
+        print("没有找到step span，请确认使用 --profile 运行批处理")
+        return
+
+    print(f"病例step数: {steps}, step总耗时: {step_time / 1e6:.2f}s, 平均每步: {step_time / steps / 1e3:.1f}ms")
+    print()
+    print(f"{'阶段':<18}{'总耗时(s)':>12}{'每步(ms)':>12}{'占比':>8}")
+    stage_totals = sorted(((name, sum(values.values())) for name, values in stages.items()),
+                          key=lambda item: item[1], reverse=True)
+    for name, total in stage_totals:
+        print(f"{name:<18}{total / 1e6:>12.2f}{total / steps / 1e3:>12.1f}{total / step_time:>8.1%}")
+
+    print()
+    print(f"{'span':<20}{'总耗时(s)':>12}{'每步(ms)':>12}{'占比':>8}")
+    span_totals = defaultdict(float)
+    for values in stages.values():
+        for name, value in values.items():
+            span_totals[name] += value
+    for name, total in sorted(span_totals.items(), key=lambda item: item[1], reverse=True):
+        print(f"{name:<20}{total / 1e6:>12.2f}{total / steps / 1e3:>12.1f}{total / step_time:>8.1%}")
+
+    print()
+    print(f"关键路径耗时最多的前 {top} 项（阶段 / span）:")
+    cells = sorted(((stage, name, value) for stage, values in stages.items() for name, value in values.items()),
+                   key=lambda item: item[2], reverse=True)
+    for stage, name, value in cells[:top]:
+        print(f"  {stage:<16} {name:<20}{value / steps / 1e3:>10.1f}ms/step{value / step_time:>8.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="性能剖析汇总报告")
+    parser.add_argument("trace_dir", type=str, help="包含 *.trace.json 的工作流日志目录")
+    parser.add_argument("--top", type=int, default=10, help="输出关键路径耗时最多的前N项")
+    parser.add_argument("--json", type=str, default=None, help="同时将汇总结果写入该JSON文件")
+    args = parser.parse_args()
+
+    report = aggregate(load_traces(args.trace_dir))
+    print_report(report, args.top)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "steps": report["steps"],
+                "step_time_us": report["step_time"],
+                "stages": {stage: dict(values) for stage, values in report["stages"].items()}
+            }, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+批处理结果存储基准测试
+- 生成与process_single_sample结构相同的合成病例结果
+- in-memory: 原有方式，BatchProcessor在内存中保存全部结果，结束后写出缩进格式的batch_report JSON
+- sink: 结果逐条写入列式结果目录（pyarrow可用时为Parquet，否则为分块CSV），摘要增量统计
+- 输出写入耗时、tracemalloc峰值内存、磁盘占用，以及运行后重新加载并计算摘要的耗时
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESEARCH_DIR = os.path.join(PROJECT_ROOT, "research")
+for path in (PROJECT_ROOT, RESEARCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from utils.update_progress import BatchProcessor
+from utils.results_sink import ResultsSink, summarize_results
+
+DEPARTMENTS = ["内科", "外科", "妇产科", "儿科", "五官科"]
+
+
+def make_result(i: int):
+    """构造一个合成病例结果"""
+    department = DEPARTMENTS[i % len(DEPARTMENTS)]
+    triage_info = {
+        "primary_department": department,
+        "secondary_department": department + "一",
+        "triage_reasoning": "患者主诉与现病史提示" * 10,
+        "candidate_primary_department": DEPARTMENTS[(i + 1) % len(DEPARTMENTS)],
+        "candidate_secondary_department": "候选二级科室"
+    }
+    return {
+        "sample_index": i,
+        "thread_id": 1000 + i % 8,
+        "execution_time": 30.0 + i % 17,
+        "setup_time": 0.001,
+        "log_file_path": f"logs/workflow_20250101_000000_case_{i:04d}.jsonl",
+        "workflow_status": {
+            "current_step": 10 + i % 20,
+            "max_steps": 30,
+            "current_phase": "ph",
+            "workflow_completed": True,
+            "workflow_success": i % 3 != 0,
+            "completion_summary": {
+                "current_phase": "ph",
+                "phases": {
+                    phase: {"completed": total - i % 2, "saturated": 0, "total": total,
+                            "completion_rate": (total - i % 2) / total, "is_completed": i % 2 == 0}
+                    for phase, total in (("triage", 2), ("hpi", 6), ("ph", 5))
+                }
+            },
+            "conversation_length": 4000 + i % 500,
+            "triage_info": triage_info,
+            "log_file_path": f"logs/workflow_20250101_000000_case_{i:04d}.jsonl"
+        },
+        "medical_summary": {
+            "chief_complaint": "头晕伴恶心1天",
+            "history_of_present_illness": "患者缘于入院前1天无明显诱因出现头晕,伴恶心,无呕吐。" * 8,
+            "past_history": "既往血脂代谢异常史2年,口服阿托伐他汀等药物治疗。" * 4,
+            "triage_info": triage_info
+        },
+        "processed_at": "2025-01-01T00:00:00"
+    }
+
+
+def run_in_memory(cases: int, output_dir: str) -> str:
+    processor = BatchProcessor(num_threads=1)
+    for i in range(cases):
+        processor.update_progress(success=True, result=make_result(i))
+    report_file = os.path.join(output_dir, "batch_report.json")
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump({"sample_results": processor.results}, f, ensure_ascii=False, indent=2)
+    return report_file
+
+
+def run_sink(cases: int, output_dir: str, results_format: str) -> str:
+    sink = ResultsSink(os.path.join(output_dir, "batch_results"), results_format=results_format)
+    processor = BatchProcessor(num_threads=1, results_sink=sink)
+    for i in range(cases):
+        processor.update_progress(success=True, result=make_result(i))
+    processor.close()
+    return sink.path
+
+
+def load_report(report_file: str):
+    with open(report_file, "r", encoding="utf-8") as f:
+        results = json.load(f)["sample_results"]
+    return sum(result["workflow_status"]["current_step"] for result in results) / len(results)
+
+
+def load_sink(path: str):
+    return summarize_results(path)["mean_steps"]
+
+
+def measure(func, *args):
+    """返回耗时（秒）、峰值内存（MB）和函数结果"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, result
+
+
+def disk_size(path: str) -> float:
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1024 / 1024
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 1024 / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批处理结果存储基准测试")
+    parser.add_argument("--cases", type=int, default=50000, help="合成病例结果数")
+    parser.add_argument("--results-format", type=str, default="auto", choices=["auto", "parquet", "csv"],
+                        help="sink的存储格式")
+    bench_args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="results_sink_")
+    rows = []
+    for name, writer, loader in (("in-memory", run_in_memory, load_report),
+                                 ("sink", lambda cases, output_dir: run_sink(cases, output_dir, bench_args.results_format),
+                                  load_sink)):
+        output_dir = os.path.join(work_dir, name)
+        os.makedirs(output_dir)
+        write_time, write_peak, output_path = measure(writer, bench_args.cases, output_dir)
+        load_time, load_peak, mean_steps = measure(loader, output_path)
+        rows.append((name, write_time, write_peak, disk_size(output_path), load_time, load_peak, mean_steps))
+
+    print()
+    print(f"{'方式':<12}{'写入(s)':>10}{'写入峰值(MB)':>14}{'磁盘(MB)':>10}{'加载(s)':>10}{'加载峰值(MB)':>14}{'平均步数':>10}")
+    for name, write_time, write_peak, size, load_time, load_peak, mean_steps in rows:
+        print(f"{name:<12}{write_time:>10.2f}{write_peak:>14.1f}{size:>10.1f}{load_time:>10.2f}{load_peak:>14.1f}"
+              f"{mean_steps:>10.2f}")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+单步簿记开销基准测试（不调用LLM）
+- 对比旧版（嵌套dict的step结果 + 每次从头重建完成情况摘要）与
+  新版（__slots__ 数据类 + TaskManager增量维护的完成情况摘要）
+- 模拟每个step中TaskManager、StepExecutor、MedicalWorkflow和日志对状态的读写：
+  阶段判断、待完成任务、评分更新、摘要读取（执行器、进度打印、最终日志各一次）、step结果构建与状态回写
+- 在多线程下并发运行大量病例，输出每步平均开销与每个step结果对象的内存占用
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow.task_manager import TaskManager, TaskPhase
+from research.workflow.models import StepResult, TriageState
+
+
+# ---------- 旧版实现（用于对比） ----------
+class LegacyTaskManager(TaskManager):
+    """每次调用都从头扫描评分的TaskManager"""
+
+    def _is_phase_completed(self, phase):
+        phase_scores = self.task_scores[phase]
+        saturated = self.saturated_tasks[phase]
+        return all(
+            score >= self.completion_threshold or task_name in saturated
+            for task_name, score in phase_scores.items()
+        )
+
+    def get_completion_summary(self):
+        summary = {"current_phase": self.get_current_phase().value, "phases": {}}
+        for phase, tasks in self.task_definitions.items():
+            completed_count = sum(
+                1 for task_name in tasks
+                if self.task_scores[phase][task_name] >= self.completion_threshold
+            )
+            total_count = len(tasks)
+            summary["phases"][phase.value] = {
+                "completed": completed_count,
+                "saturated": len(self.saturated_tasks[phase]),
+                "total": total_count,
+                "completion_rate": completed_count / total_count if total_count > 0 else 0,
+                "is_completed": self._is_phase_completed(phase)
+            }
+        return summary
+
+
+def legacy_step(task_manager, step_num, triage, scores):
+    """旧版单步簿记：嵌套dict结果、科室字符串拼接再拆分"""
+    task_manager.update_step(step_num)
+    phase = task_manager.get_current_phase()
+    task_manager.get_pending_tasks(phase)
+    step_result = {
+        "step_number": step_num, "success": False, "patient_response": "",
+        "updated_hpi": "", "updated_ph": "", "updated_chief_complaint": "",
+        "triage_result": {
+            "primary_department": "", "secondary_department": "", "triage_reasoning": "",
+            "candidate_primary_department": "", "candidate_secondary_department": ""
+        },
+        "doctor_question": "", "conversation_history": "", "task_completion_summary": {}, "errors": []
+    }
+    previous_department = f"{triage.get('primary_department', '')}-{triage.get('secondary_department', '')}"
+    previous_candidate = f"{triage.get('candidate_primary_department', '')}-{triage.get('candidate_secondary_department', '')}"
+    step_result["triage_result"] = {
+        "primary_department": previous_department.split('-')[0],
+        "secondary_department": previous_department.split('-')[1],
+        "triage_reasoning": triage.get("triage_reasoning", ""),
+        "candidate_primary_department": previous_candidate.split('-')[0],
+        "candidate_secondary_department": previous_candidate.split('-')[1]
+    }
+    if phase != TaskPhase.COMPLETED:
+        task_manager.update_task_scores(phase, scores(task_manager, phase))
+    step_result["task_completion_summary"] = task_manager.get_completion_summary()
+    step_result["success"] = True
+    task_manager.get_current_phase()
+    task_manager.get_completion_summary()
+    return step_result, step_result["triage_result"]
+
+
+def slotted_step(task_manager, step_num, triage, scores):
+    """新版单步簿记：slots数据类结果、沿用分诊状态对象"""
+    task_manager.update_step(step_num)
+    phase = task_manager.get_current_phase()
+    task_manager.get_pending_tasks(phase)
+    step_result = StepResult(step_number=step_num)
+    step_result.triage = triage
+    if phase != TaskPhase.COMPLETED:
+        task_manager.update_task_scores(phase, scores(task_manager, phase))
+    step_result.task_completion_summary = task_manager.get_completion_summary()
+    step_result.success = True
+    task_manager.get_current_phase()
+    task_manager.get_completion_summary()
+    return step_result, step_result.triage
+
+
+def make_scorer(seed):
+    """生成缓慢上升、且多数步骤不变的评分序列，模拟Monitor跳过/评分停滞的情况"""
+    rng = random.Random(seed)
+
+    def scores(task_manager, phase):
+        current = task_manager.get_task_scores(phase)
+        result = dict(current)
+        if rng.random() < 0.4:
+            task_name = rng.choice(list(current))
+            result[task_name] = min(1.0, current[task_name] + 0.2)
+        return result
+    return scores
+
+
+def run_case(variant, case_index, steps):
+    """运行单个病例的全部step，返回总耗时"""
+    scores = make_scorer(case_index)
+    if variant == "legacy":
+        task_manager, step_fn = LegacyTaskManager(), legacy_step
+        triage = {"primary_department": "内科", "secondary_department": "心血管内科", "triage_reasoning": "r",
+                  "candidate_primary_department": "内科", "candidate_secondary_department": "呼吸内科"}
+    else:
+        task_manager, step_fn = TaskManager(), slotted_step
+        triage = TriageState("内科", "心血管内科", "r", "内科", "呼吸内科")
+    start = time.perf_counter()
+    for step in range(1, steps + 1):
+        _, triage = step_fn(task_manager, step, triage, scores)
+    return time.perf_counter() - start
+
+
+def measure_result_memory(variant, count=10000):
+    """测量count个step结果对象的内存占用（字节/个）"""
+    task_manager = LegacyTaskManager() if variant == "legacy" else TaskManager()
+    scores = make_scorer(0)
+    triage = ({"primary_department": "内科", "secondary_department": "心血管内科", "triage_reasoning": "",
+               "candidate_primary_department": "", "candidate_secondary_department": ""}
+              if variant == "legacy" else TriageState("内科", "心血管内科"))
+    step_fn = legacy_step if variant == "legacy" else slotted_step
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [step_fn(task_manager, 10, triage, scores)[0] for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del results
+    return size / count
+
+
+def run_benchmark(cases, steps, threads):
+    """在多线程下并发运行两种实现并打印对比结果"""
+    print(f"病例数: {cases}, 每例步数: {steps}, 线程数: {threads}")
+    print(f"{'实现':<10}{'总耗时(s)':>12}{'每步开销(us)':>16}{'结果对象(B)':>14}")
+    baseline = None
+    for variant in ("legacy", "slotted"):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda i: run_case(variant, i, steps), range(cases)))
+        elapsed = time.perf_counter() - start
+        per_step_us = elapsed / (cases * steps) * 1e6
+        memory = measure_result_memory(variant)
+        print(f"{variant:<10}{elapsed:>12.3f}{per_step_us:>16.2f}{memory:>14.0f}")
+        if baseline is None:
+            baseline = per_step_us
+        else:
+            print(f"每步簿记开销降低: {(1 - per_step_us / baseline):.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="单步簿记开销基准测试")
+    parser.add_argument("--cases", type=int, default=2000, help="并发病例数")
+    parser.add_argument("--steps", type=int, default=30, help="每个病例的步数")
+    parser.add_argument("--threads", type=int, default=20, help="线程数")
+    args = parser.parse_args()
+    run_benchmark(args.cases, args.steps, args.threads)
@@ -26,6 +26,12 @@ from utils.load_dataset import load_dataset
 from utils.setup_logging import setup_logging
 from utils.generate_summary_report import generate_summary_report
 from utils.run_workflow_batch import run_workflow_batch
+from utils.run_workflow_batch_async import run_workflow_batch_async
+from utils.run_workflow_batch_hybrid import run_workflow_batch_hybrid
+from utils.run_workflow_batch_queue import run_workflow_batch_queue
+from utils.lease_queue import LeaseQueue
+from utils.build_queue_report import build_queue_report
+from utils.estimate_run_cost import estimate_run_cost
 from utils.print_progress_report import print_progress_report
 
 # 设置项目根目录
@@ -48,33 +54,73 @@ def main():
     logging.info("AIM医疗问诊工作流批处理系统启动")
     logging.info("=" * 60)
     
+    # 回放日志目录与输出目录相同时，新日志会覆盖回放来源
+    if args.replay_from and os.path.abspath(args.replay_from) == os.path.abspath(args.log_dir):
+        logging.error("--replay-from 不能与 --log-dir 相同")
+        return 1
+    
+    if args.queue_db and args.engine != "thread":
+        logging.error("--queue-db 目前仅支持thread引擎")
+        return 1
+    
+    if args.adaptive_concurrency and args.engine != "thread":
+        logging.error("--adaptive-concurrency 目前仅支持thread引擎")
+        return 1
+    
+    # 只查看租约队列的合并进度和报告
+    if args.queue_status:
+        if not args.queue_db or not os.path.exists(args.queue_db):
+            logging.error("--queue-status 需要指定已存在的 --queue-db")
+            return 1
+        os.makedirs(args.output_dir, exist_ok=True)
+        batch_results = build_queue_report(LeaseQueue(args.queue_db))
+        generate_summary_report(batch_results, args.output_dir)
+        summary = batch_results['summary']
+        print(f"队列 {args.queue_db}: 共 {summary['total_samples']} 个病例 | 成功: {summary['successful_samples']} | "
+              f"失败: {summary['failed_samples']} | 跳过: {summary['skipped_samples']} | "
+              f"执行中: {summary['leased_samples']} | 待处理: {summary['pending_samples']}")
+        for worker_id, worker in summary['processing_config']['workers'].items():
+            print(f"  {worker_id}: 处理 {worker['processed']} 个病例, 累计耗时 {worker['execution_time']:.1f}s")
+        return 0
+    
     try:
         # 加载数据集
         dataset = load_dataset(
             args.dataset_path, 
             args.start_index, 
             args.end_index, 
-            args.sample_limit
+            args.sample_limit,
+            args.department_filter
         )
         
-        # 如果指定了科室筛选，先筛选出指定科室的病例
+        # 如果指定了科室筛选，数据集已通过科室索引筛选出指定科室的病例
         if args.department_filter:                                                                                  
-            filtered_dataset = []
-            for case in dataset:
-                if case.get('一级科室', '') == args.department_filter:
-                    filtered_dataset.append(case)
-            dataset = filtered_dataset
             print(f"筛选 '{args.department_filter}' 科室病例: {len(dataset)} 个")
 
             #在固定科室模式下
             args.use_dynamic_guidance = False
             logging.info("固定科室模式已激活，动态指导已禁用。")
+
+        # 试运行：只估算token用量、费用和耗时，不执行病例
+        if args.dry_run:
+            estimate_run_cost(dataset, args)
+            return 0
         
         # 打印初始化信息
         if args.department_filter:
             print(f"筛选科室: {args.department_filter}")
-        print(f"并行处理线程数: {args.num_threads}")
+        if args.queue_db:
+            print(f"租约队列: {args.queue_db}, 每个工作进程 {args.num_threads} 个线程")
+        elif args.engine == "async":
+            print(f"异步引擎: 并发病例数 {args.max_concurrent_cases}, LLM并发请求上限 {args.llm_concurrency or '不限'}")
+        elif args.engine == "hybrid":
+            print(f"混合引擎: {args.num_processes} 个进程 × 每进程并发病例数 {args.max_concurrent_cases}, "
+                  f"全局LLM并发请求上限 {args.llm_concurrency or '不限'}")
+        else:
+            print(f"并行处理线程数: {args.num_threads}")
         print(f"结果将保存至 {args.output_dir} 目录")
+        if args.replay_from:
+            print(f"⏪ 回放模式: 从 {args.replay_from} 复用 {', '.join(args.freeze_agents)} 的输出")
         if args.use_inquiry_guidance:
             if args.department_filter:
                 print(f"📋 已启用 '{args.department_filter}' 科室的固定询问指导")
@@ -92,7 +138,14 @@ def main():
         
         # 执行批处理
         logging.info("开始批量处理...")
-        batch_results = run_workflow_batch(dataset, args)
+        if args.queue_db:
+            batch_results = run_workflow_batch_queue(dataset, args)
+        elif args.engine == "async":
+            batch_results = run_workflow_batch_async(dataset, args)
+        elif args.engine == "hybrid":
+            batch_results = run_workflow_batch_hybrid(dataset, args)
+        else:
+            batch_results = run_workflow_batch(dataset, args)
         
         # 生成报告
         generate_summary_report(batch_results, args.output_dir)
@@ -0,0 +1,88 @@
+import argparse
+import time
+import logging
+from typing import Dict, Any, List
+
+from utils.update_progress import BatchProcessor
+from utils.print_progress_report import print_progress_report
+from utils.order_cases import simulate_makespan
+
+
+def build_batch_summary(processor: BatchProcessor, dataset: List[Dict[str, Any]],
+                        args: argparse.Namespace, prompter_cache=None,
+                        processing_config: Dict[str, Any] = None,
+                        total_samples: int = None,
+                        case_order: List[int] = None) -> Dict[str, Any]:
+    """
+    打印最终进度报告并构建批处理结果摘要（线程池与异步批处理共用）
+    dataset为按需读取的迭代器时，由调用方传入实际遍历到的样本数total_samples；
+    case_order为病例的提交顺序（样本序号），为None时为数据集顺序
+    """
+    if total_samples is None:
+        total_samples = len(dataset)
+
+    # 最终进度报告
+    total_time = time.time() - processor.start_time
+    stats = processor.get_progress_stats()
+
+    print_progress_report(processor, total_samples)
+    if prompter_cache is not None:
+        logging.info(f"Prompter模板缓存统计: {prompter_cache.get_stats()}")
+
+    # 构建最终结果摘要
+    summary = {
+        'total_samples': total_samples,
+        'processed_samples': processor.processed_count,
+        'successful_samples': processor.success_count,
+        'failed_samples': processor.failed_count,
+        'skipped_samples': processor.skipped_count,
+        'success_rate': stats['success_rate'],
+        'total_execution_time': total_time,
+        'average_time_per_sample': total_time / max(processor.processed_count, 1),
+        'samples_per_minute': stats['samples_per_minute'],
+        'failed_sample_details': processor.failed_samples,
+        'processing_config': dict({
+            'num_threads': args.num_threads,
+            'model_type': args.model_type,
+            'max_steps': args.max_steps,
+            'dataset_range': f"[{args.start_index}, {args.start_index + total_samples})"
+        }, **(processing_config or {}))
+    }
+    if processor.results_sink is not None:
+        summary['results_store'] = processor.results_sink.path
+        summary['results_format'] = processor.results_sink.results_format
+        summary['result_stats'] = processor.results_sink.get_summary()
+    if processor.execution_times:
+        summary['schedule'] = build_schedule_comparison(processor, args, total_time, case_order)
+    if prompter_cache is not None:
+        summary['prompter_cache_stats'] = prompter_cache.get_stats()
+
+    return {
+        'summary': summary,
+        'results': processor.results
+    }
+
+
+def build_schedule_comparison(processor: BatchProcessor, args: argparse.Namespace,
+                              wall_clock: float, case_order: List[int] = None) -> Dict[str, Any]:
+    """
+    用本次各病例的实际耗时模拟不同提交顺序下的总耗时，与实际墙钟时间对比
+    - simulated_fifo: 按数据集顺序提交
+    - simulated_submitted: 按本次实际的提交顺序
+    - simulated_longest_first: 按实际耗时从长到短提交（已知耗时时的近似最优顺序）
+    """
+    durations = processor.execution_times
+    fifo_order = sorted(durations)
+    submitted_order = [index for index in case_order if index in durations] if case_order is not None else fifo_order
+    slots = processor.num_threads
+    simulated_fifo = simulate_makespan([durations[index] for index in fifo_order], slots)
+    simulated_submitted = simulate_makespan([durations[index] for index in submitted_order], slots)
+    return {
+        'policy': getattr(args, 'schedule', 'fifo'),
+        'slots': slots,
+        'wall_clock': wall_clock,
+        'simulated_fifo': simulated_fifo,
+        'simulated_submitted': simulated_submitted,
+        'simulated_longest_first': simulate_makespan(sorted(durations.values(), reverse=True), slots),
+        'speedup_vs_fifo': simulated_fifo / max(simulated_submitted, 1e-9)
+    }
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+import json
+import logging
+from typing import Dict, Any
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from config import LLM_CONFIG
+
+
+def build_llm_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """根据命令行参数构建语言模型配置，用户提供的额外模型配置合并到所选模型中"""
+    # 使用 LLM_CONFIG 作为基础配置
+    # BaseAgent 会根据 model_type 自动选择正确的模型配置
+    llm_config = LLM_CONFIG.copy()
+
+    # 如果用户提供了额外的模型配置，则合并到对应的模型配置中
+    if args.model_config:
+        try:
+            user_config = json.loads(args.model_config)
+            # 更新选定模型的配置
+            if args.model_type in llm_config:
+                llm_config[args.model_type]["params"].update(user_config.get("params", {}))
+            else:
+                logging.warning(f"模型类型 {args.model_type} 不存在，忽略用户配置")
+        except json.JSONDecodeError:
+            logging.warning("模型配置JSON格式错误，使用默认配置")
+
+    return llm_config
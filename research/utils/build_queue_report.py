@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Dict, Any
+
+from utils.lease_queue import LeaseQueue, DONE
+
+
+def build_queue_report(lease_queue: LeaseQueue) -> Dict[str, Any]:
+    """
+    汇总租约队列中所有工作进程的结果，构建与批处理结果相同结构的合并摘要，可直接用于generate_summary_report
+    """
+    status = lease_queue.get_status()
+    finished = lease_queue.get_finished()
+
+    results = []
+    failed_sample_details = []
+    workers: Dict[str, Dict[str, Any]] = {}
+    skipped = 0
+    for record in finished:
+        result = record['result']
+        if record['status'] == DONE and result.get('skipped'):
+            skipped += 1
+            continue
+        worker = workers.setdefault(record['worker_id'], {'processed': 0, 'execution_time': 0.0})
+        worker['processed'] += 1
+        worker['execution_time'] += result.get('execution_time', 0.0)
+        if record['status'] == DONE:
+            results.append(dict(result, sample_index=record['case_index'], worker_id=record['worker_id'],
+                                attempts=record['attempts']))
+        else:
+            failed_sample_details.append({
+                'sample_index': record['case_index'],
+                'error': result.get('error', ''),
+                'timestamp': datetime.fromtimestamp(record['finished_at']).isoformat() if record['finished_at'] else None
+            })
+
+    processed = len(results) + len(failed_sample_details)
+    # 合并耗时按墙钟时间计算：最早领取到最晚结束
+    timestamps = [record for record in finished if record['started_at'] and record['finished_at']]
+    total_time = (max(record['finished_at'] for record in timestamps) - min(record['started_at'] for record in timestamps)
+                  if timestamps else 0.0)
+
+    summary = {
+        'total_samples': status['total'],
+        'processed_samples': processed,
+        'successful_samples': len(results),
+        'failed_samples': len(failed_sample_details),
+        'skipped_samples': skipped,
+        'pending_samples': status['pending'],
+        'leased_samples': status['leased'],
+        'success_rate': len(results) / max(processed, 1),
+        'total_execution_time': total_time,
+        'average_time_per_sample': sum(result.get('execution_time', 0.0) for result in results) / max(len(results), 1),
+        'samples_per_minute': processed / max(total_time / 60, 0.01),
+        'failed_sample_details': failed_sample_details,
+        'processing_config': dict(lease_queue.get_meta(), queue_db=lease_queue.db_path, workers=workers)
+    }
+    return {
+        'summary': summary,
+        'results': results
+    }
@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import logging
+from typing import Dict, Any
+from utils.find_replay_log import find_replay_log
+from utils.build_llm_config import build_llm_config
+from utils.create_guidance_loader import create_guidance_loader
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow import ScorePlateauPolicy, ReplayLog
+
+
+def build_workflow_kwargs(sample_data: Dict[str, Any], sample_index: int,
+                          args: argparse.Namespace, prompter_cache=None,
+                          executor_pool=None, resume_index=None) -> Dict[str, Any]:
+    """
+    根据命令行参数构建单个样本的工作流参数（同步与异步工作流共用）
+    指定执行器池时工作流从池中借用执行器，复用已创建的agent和已加载的指导；回放模式下不使用执行器池
+    指定续跑索引且启用检查点时，从索引中该case的日志查找检查点续跑
+    """
+    llm_config = build_llm_config(args)
+
+    # 任务停止策略
+    stopping_policy = None
+    if args.stopping_policy == "plateau":
+        stopping_policy = ScorePlateauPolicy(
+            window=args.plateau_window,
+            min_gain=args.plateau_min_gain,
+            min_score=args.plateau_min_score
+        )
+
+    # 回放模式：冻结的agent复用历史日志中的输出
+    replay_log = None
+    if args.replay_from:
+        replay_file = find_replay_log(args.replay_from, sample_index)
+        if replay_file:
+            replay_log = ReplayLog(replay_file, args.freeze_agents)
+        else:
+            logging.warning(f"样本 {sample_index}: {args.replay_from} 中没有已完成的历史日志，完整运行")
+
+    # 队列模式下病例可能因租约过期被重新领取，此时日志目录中的检查点属于之前的工作进程，
+    # 从中续跑会截断并追加到该进程的日志，因此队列模式不从检查点续跑
+    resume_from = None
+    if resume_index is not None and not args.disable_checkpoint and not args.queue_db:
+        resume_from = resume_index.find_checkpoint(sample_index)
+
+    if executor_pool is not None and replay_log is None:
+        # 执行器池中的执行器各自持有GuidanceLoader
+        loader = None
+        department_guidance = executor_pool.department_guidance
+    else:
+        loader = create_guidance_loader(args)
+        department_guidance = getattr(loader, "department_guidance", "")
+
+    return {
+        "case_data": sample_data,
+        "model_type": args.model_type,
+        "llm_config": llm_config,
+        "max_steps": args.max_steps,
+        "log_dir": args.log_dir,
+        "case_index": sample_index,
+        "controller_mode": args.controller_mode,
+        "guidance_loader": loader, #将 loader 传递给 MedicalWorkflow
+        "department_guidance": department_guidance,
+        "recipient_mode": args.recipient_mode,
+        "recipient_full_interval": args.recipient_full_interval,
+        "monitor_skip_threshold": args.monitor_skip_threshold,
+        "triage_stable_steps": args.triage_stable_steps,
+        "prompter_cache": prompter_cache,
+        "generation_mode": args.generation_mode,
+        "speculative": args.speculative,
+        "stopping_policy": stopping_policy,
+        "checkpoint": not args.disable_checkpoint,
+        "resume_from": resume_from,
+        "replay_log": replay_log,
+        "profile": args.profile,
+        "step_executor_pool": executor_pool
+    }
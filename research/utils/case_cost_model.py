@@ -0,0 +1,86 @@
+"""
+病例耗时估计：每步的提示词都包含病案内容，单个病例的耗时近似正比于 步数 ×（固定提示词长度 + 病案长度）。
+步数按历史日志中同一一级科室病例的平均步数估计，没有历史记录时使用全部历史的平均步数，再回退到max_steps。
+估计值只用于病例之间的相对排序。
+"""
+import os
+import sys
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow.completion_manifest import CompletionManifest
+
+# 每步提示词中与病例无关部分（agent指令、任务列表等）的近似字节数
+PROMPT_BASE_BYTES = 4000
+
+
+class CaseCostModel:
+    """根据病案长度和历史日志估计病例的相对耗时"""
+
+    def __init__(self, history_dirs: List[str], max_steps: int):
+        """
+        Args:
+            history_dirs: 历史工作流日志目录，读取其中的完成清单；旧版本清单中没有科室时读取日志的首行（workflow_start）
+            max_steps: 本次运行的最大步数，历史步数超过该值时按该值计算
+        """
+        self.max_steps = max_steps
+        self.department_steps: Dict[str, float] = {}
+        self.default_steps = float(max_steps)
+        self._load_history(history_dirs)
+
+    def _load_history(self, history_dirs: List[str]):
+        """统计历史病例各一级科室的平均步数"""
+        start_time = time.time()
+        totals: Dict[str, List[int]] = {}
+        for log_dir in history_dirs:
+            for record in CompletionManifest(log_dir).load().values():
+                department = record.get("department")
+                if department is None:
+                    department = self._read_department(os.path.join(log_dir, record.get("log_file", "")))
+                if department is None:
+                    continue
+                totals.setdefault(department, []).append(min(record.get("total_steps", self.max_steps), self.max_steps))
+
+        history_count = sum(len(steps) for steps in totals.values())
+        if history_count:
+            self.department_steps = {name: sum(steps) / len(steps) for name, steps in totals.items()}
+            self.default_steps = sum(sum(steps) for steps in totals.values()) / history_count
+        logging.info(f"病例耗时估计: 历史病例 {history_count} 个, 科室平均步数 "
+                     f"{ {name: round(steps, 1) for name, steps in self.department_steps.items()} }, "
+                     f"耗时 {(time.time() - start_time) * 1000:.1f}ms")
+
+    @staticmethod
+    def _read_department(log_file_path: str) -> Optional[str]:
+        """从日志首行的病例数据中读取一级科室，日志不存在或无法解析时返回None"""
+        try:
+            with open(log_file_path, "r", encoding="utf-8") as f:
+                first_entry = json.loads(f.readline())
+        except (OSError, json.JSONDecodeError):
+            return None
+        if first_entry.get("event_type") != "workflow_start":
+            return None
+        return first_entry.get("case_data", {}).get("一级科室", "")
+
+    def expected_steps(self, department: str) -> float:
+        """估计该科室病例的步数"""
+        return self.department_steps.get(department, self.default_steps)
+
+    def estimate(self, case_size: int, department: str) -> float:
+        """
+        估计病例的相对耗时
+
+        Args:
+            case_size: 病例的字节长度
+            department: 一级科室
+
+        Returns:
+            float: 相对耗时，只用于排序
+        """
+        return self.expected_steps(department) * (PROMPT_BASE_BYTES + case_size)
@@ -0,0 +1,155 @@
+"""
+批处理并发自适应控制（AIMD）：按固定间隔观察窗口内的LLM调用延迟、失败率和病例吞吐，
+- 失败率超过阈值（限流、超时）时乘性减小并发
+- 平均延迟超过基线的latency_factor倍时减小一个步长
+- 否则加性增大并发；增大后吞吐（每分钟成功的LLM调用数）没有明显提升说明已接近服务端容量，
+  退回增大前的并发并保持若干个间隔后再试探
+病例吞吐（病例/分钟）随每次调整记录在日志中；病例耗时较长时窗口内完成的病例很少，因此用LLM调用吞吐判断是否饱和
+"""
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+
+class ConcurrencyController:
+    """根据LLM调用反馈调整同时运行的病例数"""
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 64,
+                 interval: float = 30.0, error_threshold: float = 0.05,
+                 latency_factor: float = 2.0, decrease_factor: float = 0.7,
+                 min_throughput_gain: float = 0.05, hold_intervals: int = 3):
+        """
+        Args:
+            initial: 初始并发数
+            min_limit: 并发下限
+            max_limit: 并发上限
+            interval: 调整间隔（秒）
+            error_threshold: 窗口内LLM调用失败率超过该值时乘性减小
+            latency_factor: 窗口平均延迟超过基线延迟的倍数时减小
+            decrease_factor: 乘性减小的系数
+            min_throughput_gain: 增大并发后LLM调用吞吐的最小相对提升，低于该值时退回增大前的并发
+            hold_intervals: 退回后保持并发的间隔数
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.interval = interval
+        self.error_threshold = error_threshold
+        self.latency_factor = latency_factor
+        self.decrease_factor = decrease_factor
+        self.min_throughput_gain = min_throughput_gain
+        self.hold_intervals = hold_intervals
+
+        self._lock = threading.Lock()
+        self._latencies: List[float] = []
+        self._failures = 0
+        # 基线延迟：未过载时观察到的最低窗口平均延迟
+        self.baseline_latency: Optional[float] = None
+        self._last_adjust_time = time.time()
+        self._last_throughput: Optional[float] = None
+        self._last_action: Optional[str] = None
+        self._limit_before_increase = self.limit
+        self._hold_remaining = 0
+        self.adjustments: List[Dict[str, Any]] = []
+
+    def record_call(self, latency: float, success: bool):
+        """记录一次LLM调用，由agent的调用观察钩子在各工作线程中调用"""
+        with self._lock:
+            self._latencies.append(latency)
+            if not success:
+                self._failures += 1
+
+    def maybe_adjust(self, progress_stats: Dict[str, Any]) -> int:
+        """
+        距上次调整超过interval时根据窗口统计调整并发
+
+        Args:
+            progress_stats: BatchProcessor.get_progress_stats()的返回值
+
+        Returns:
+            int: 调整后的并发数
+        """
+        now = time.time()
+        elapsed = now - self._last_adjust_time
+        if elapsed < self.interval:
+            return self.limit
+
+        with self._lock:
+            latencies, self._latencies = self._latencies, []
+            failures, self._failures = self._failures, 0
+        self._last_adjust_time = now
+        if not latencies:
+            return self.limit
+
+        throughput = (len(latencies) - failures) / elapsed * 60
+        cases_per_minute = progress_stats.get('samples_per_minute', 0.0)
+        error_rate = failures / len(latencies)
+        mean_latency = sum(latencies) / len(latencies)
+        old_limit = self.limit
+        action, reason = None, None
+
+        if error_rate > self.error_threshold:
+            action, reason = "decrease", f"LLM调用失败率 {error_rate:.1%} 超过 {self.error_threshold:.1%}"
+            self.limit = max(self.min_limit, min(old_limit - 1, int(old_limit * self.decrease_factor)))
+        elif self.baseline_latency is not None and mean_latency > self.baseline_latency * self.latency_factor:
+            action, reason = "decrease", (f"平均延迟 {mean_latency:.2f}s 超过基线 {self.baseline_latency:.2f}s 的 "
+                                          f"{self.latency_factor:g} 倍")
+            self.limit = max(self.min_limit, old_limit - self._step())
+        elif (self._last_action == "increase" and self._last_throughput is not None
+              and throughput < self._last_throughput * (1 + self.min_throughput_gain)):
+            action, reason = "plateau", (f"LLM调用吞吐 {throughput:.1f}/分钟 相比增大前 {self._last_throughput:.1f}/分钟 "
+                                         f"提升不足 {self.min_throughput_gain:.0%}")
+            self.limit = self._limit_before_increase
+            self._hold_remaining = self.hold_intervals
+        elif self._hold_remaining > 0:
+            self._hold_remaining -= 1
+        elif old_limit < self.max_limit:
+            action, reason = "increase", "延迟和失败率正常"
+            self._limit_before_increase = old_limit
+            self.limit = min(self.max_limit, old_limit + self._step())
+
+        if error_rate <= self.error_threshold:
+            self.baseline_latency = mean_latency if self.baseline_latency is None else min(self.baseline_latency,
+                                                                                            mean_latency)
+        if action is not None:
+            self._last_action = action
+        self._last_throughput = throughput
+
+        if action is not None:
+            record = {
+                'time': now,
+                'action': action,
+                'old_limit': old_limit,
+                'new_limit': self.limit,
+                'reason': reason,
+                'mean_latency': mean_latency,
+                'error_rate': error_rate,
+                'call_throughput': throughput,
+                'cases_per_minute': cases_per_minute,
+                'calls': len(latencies)
+            }
+            self.adjustments.append(record)
+            logging.info(f"并发调整: {old_limit} -> {self.limit} ({reason}; 调用 {len(latencies)} 次, "
+                         f"平均延迟 {mean_latency:.2f}s, 失败率 {error_rate:.1%}, "
+                         f"病例吞吐 {cases_per_minute:.1f} 病例/分钟)")
+        return self.limit
+
+    def _step(self) -> int:
+        """加性调整的步长，并发较大时按比例放大，避免收敛过慢"""
+        return max(1, self.limit // 8)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取控制器统计
+
+        Returns:
+            Dict: 最终并发数、上下限、基线延迟和调整次数
+        """
+        return {
+            'final_limit': self.limit,
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit,
+            'baseline_latency': self.baseline_latency,
+            'adjustments': len(self.adjustments)
+        }
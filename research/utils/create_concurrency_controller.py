@@ -0,0 +1,20 @@
+import argparse
+import logging
+from typing import Optional
+
+from utils.concurrency_controller import ConcurrencyController
+
+
+def create_concurrency_controller(args: argparse.Namespace) -> Optional[ConcurrencyController]:
+    """创建thread引擎的自适应并发控制器，未启用--adaptive-concurrency时返回None"""
+    if not args.adaptive_concurrency:
+        return None
+    controller = ConcurrencyController(
+        initial=args.num_threads,
+        min_limit=args.min_threads,
+        max_limit=args.max_threads,
+        interval=args.adjust_interval
+    )
+    logging.info(f"使用自适应并发: 初始 {controller.limit} 个线程, 范围 [{controller.min_limit}, {controller.max_limit}], "
+                 f"每 {args.adjust_interval}s 调整一次")
+    return controller
@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from guidance.loader import GuidanceLoader
+
+
+def create_guidance_loader(args: argparse.Namespace) -> GuidanceLoader:
+    """
+    根据命令行参数创建GuidanceLoader
+    固定科室模式下预先加载该科室的询问指导，结果保存在loader.department_guidance中
+    """
+    #是否使用固定科室模式
+    department_guidance = ""
+
+    # 初始化 GuidanceLoader
+    loader = GuidanceLoader(
+        department_guidance = department_guidance,
+        use_dynamic_guidance=args.use_dynamic_guidance,
+        use_department_comparison=args.use_department_comparison,
+        department_guidance_file=args.department_guidance_file,
+        comparison_rules_file=args.comparison_rules_file
+    )
+
+    if args.use_inquiry_guidance:
+        if args.department_filter:
+            # 固定科室模式
+            department_guidance = loader.load_inquiry_guidance(args.department_filter)
+
+            # 将加载好的指导同步回 loader 实例
+            loader.department_guidance = department_guidance
+
+            if department_guidance:
+                print(f"✅ 已加载 '{args.department_filter}' 科室的固定询问指导")
+            else:
+                print(f"⚠️ 未能加载 '{args.department_filter}' 科室的询问指导，将使用默认询问模式")
+        else:
+            # 动态指导模式
+            if args.max_steps > 1 and args.use_dynamic_guidance:
+                print(f"🔄 已启用动态科室询问指导模式")
+            else:
+                print(f"⚠️ 单步问诊不需要动态指导，将使用默认模式")
+
+    return loader
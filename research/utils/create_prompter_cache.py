@@ -0,0 +1,27 @@
+import argparse
+import os
+import sys
+import logging
+from typing import Optional
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_system.prompter import PrompterTemplateCache
+from research.workflow import TaskManager
+
+
+def create_prompter_cache(args: argparse.Namespace) -> Optional[PrompterTemplateCache]:
+    """创建批处理共享的Prompter模板缓存，未启用时返回None"""
+    if not args.prompter_cache:
+        return None
+    prompter_cache = PrompterTemplateCache(max_entries=args.prompter_cache_size)
+    if args.prompter_cache_warm_start:
+        loaded = prompter_cache.warm_start_from_logs(
+            args.prompter_cache_warm_start,
+            task_phase_map=TaskManager().get_task_phase_map()
+        )
+        logging.info(f"Prompter模板缓存预热完成，载入 {loaded} 条记录，缓存条目 {len(prompter_cache)} 个")
+    return prompter_cache
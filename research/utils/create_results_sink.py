@@ -0,0 +1,21 @@
+import os
+from datetime import datetime
+import argparse
+from typing import Optional
+
+from utils.results_sink import ResultsSink
+
+
+def create_results_sink(args: argparse.Namespace, writer_id: Optional[str] = None) -> ResultsSink:
+    """
+    在输出目录下创建本次批处理的列式结果目录
+    目录名包含写入方标识，同一秒启动的多个队列工作进程写入各自的目录
+
+    Args:
+        args: 命令行参数
+        writer_id: 写入方标识（队列模式下为工作进程ID），为None时使用进程号
+    """
+    writer_id = str(writer_id or os.getpid()).replace(os.sep, "_")
+    path = os.path.join(args.output_dir,
+                        f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{writer_id}")
+    return ResultsSink(path, chunk_size=args.results_chunk_size, results_format=args.results_format)
@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import copy
+import logging
+from typing import Optional, Type
+
+from utils.build_llm_config import build_llm_config
+from utils.create_guidance_loader import create_guidance_loader
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow import StepExecutor, StepExecutorPool
+
+
+def create_step_executor_pool(args: argparse.Namespace, prompter_cache=None,
+                              executor_class: Type[StepExecutor] = StepExecutor) -> Optional[StepExecutorPool]:
+    """
+    创建批处理共享的step执行器池，未启用或处于回放模式时返回None
+    指导文件只在这里读取一次，每个执行器持有GuidanceLoader的浅拷贝，共享已加载的指导和对比规则
+    """
+    if args.disable_engine_pool:
+        return None
+    if args.replay_from:
+        # 回放模式下每个病例冻结的agent绑定各自的历史日志，不能复用执行器
+        logging.info("回放模式下不使用执行器池")
+        return None
+
+    base_loader = create_guidance_loader(args)
+    return StepExecutorPool(
+        executor_class=executor_class,
+        guidance_loader_factory=lambda: copy.copy(base_loader),
+        department_guidance=getattr(base_loader, "department_guidance", ""),
+        model_type=args.model_type,
+        llm_config=build_llm_config(args),
+        controller_mode=args.controller_mode,
+        recipient_mode=args.recipient_mode,
+        recipient_full_interval=args.recipient_full_interval,
+        monitor_skip_threshold=args.monitor_skip_threshold,
+        triage_stable_steps=args.triage_stable_steps,
+        prompter_cache=prompter_cache,
+        generation_mode=args.generation_mode,
+        speculative=args.speculative
+    )
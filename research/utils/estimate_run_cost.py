@@ -0,0 +1,224 @@
+"""
+试运行估算（--dry-run）：不调用LLM，估算本次批处理的LLM调用数、token用量、费用和总耗时。
+- 步数：按历史日志中同一一级科室病例的平均步数（与lef调度相同的CaseCostModel）
+- 提示词token：对均匀抽样的病例用真实的提示词构建方法按合成轨迹估算，其余病例按病案长度线性外推
+- 输出token和每次调用的延迟：取历史日志中各agent的平均值，没有历史时使用默认值
+- 跳过和缓存：按历史日志中分诊复用、Monitor评分复用和Prompter模板缓存省去的调用比例折算
+- 总耗时：按调度顺序将病例分配给配置的并发槽位模拟；历史延迟是在以往运行的并发下测得的
+"""
+import os
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, Any, List, Sequence, Tuple
+
+from utils.case_cost_model import CaseCostModel
+from utils.order_cases import order_cases, simulate_makespan
+from utils.prompt_token_estimator import PromptTokenEstimator
+from utils.run_history import RunHistory
+
+# 没有历史日志时各agent每次调用的输出token数
+DEFAULT_COMPLETION_TOKENS = {
+    "virtual_patient": 60,
+    "recipient": 400,
+    "recipient_delta": 150,
+    "triager": 200,
+    "monitor": 100,
+    "controller": 150,
+    "prompter": 300,
+    "inquirer": 60,
+    "fused_inquirer": 200,
+    "evaluator": 600
+}
+# 没有历史日志时的调用延迟：固定开销（网络、排队、首token）+ 输出token数 / 生成速度
+DEFAULT_CALL_OVERHEAD_SECONDS = 1.0
+DEFAULT_OUTPUT_TOKENS_PER_SECOND = 30.0
+# 各模型的默认价格（元/百万token，输入、输出），其他模型需通过--input-price/--output-price指定
+MODEL_PRICES = {
+    "deepseek": (2.0, 8.0)
+}
+
+
+def estimate_run_cost(dataset: Sequence[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    估算本次批处理的token用量、费用和总耗时，打印报告并保存到输出目录
+
+    Args:
+        dataset: 数据集（IndexedDataset或病例列表）
+        args: 批处理命令行参数
+
+    Returns:
+        Dict: 估算结果
+    """
+    start_time = time.time()
+    history_dirs = args.schedule_history or [path for path in (args.log_dir, args.replay_from) if path]
+    history = RunHistory(history_dirs, args.max_steps)
+    cost_model = CaseCostModel(history_dirs, args.max_steps)
+    estimator = PromptTokenEstimator(args, history)
+
+    if hasattr(dataset, "case_sizes"):
+        sizes = list(dataset.case_sizes())
+        departments = list(dataset.case_departments())
+    else:
+        sizes = [len(json.dumps(case, ensure_ascii=False).encode("utf-8")) for case in dataset]
+        departments = [case.get("一级科室", "") for case in dataset]
+    case_count = len(sizes)
+    steps = [max(1, min(args.max_steps, round(cost_model.expected_steps(department)))) for department in departments]
+
+    # 抽样病例用真实提示词构建方法估算，按每步token数与病案长度的线性关系外推到其余病例
+    sample_count = min(case_count, max(1, args.dry_run_sample))
+    sampled = {i * case_count // sample_count: None for i in range(sample_count)} if case_count else {}
+    for position in sampled:
+        sampled[position] = estimator.estimate_case(dataset[position], steps[position])
+    agent_names = sorted({name for usage in sampled.values() for name in usage})
+    per_step: Dict[str, Tuple[float, float, float]] = {}
+    for name in agent_names:
+        xs = [sizes[position] for position in sampled]
+        ys = [usage.get(name, {}).get("prompt_tokens", 0) / steps[position] for position, usage in sampled.items()]
+        intercept, slope = _fit_line(xs, ys)
+        calls_per_step = sum(usage.get(name, {}).get("calls", 0) / steps[position]
+                             for position, usage in sampled.items()) / len(sampled)
+        per_step[name] = (calls_per_step, intercept, slope)
+
+    agents = {
+        name: {
+            "calls": 0.0,
+            "prompt_tokens": 0.0,
+            "completion_tokens": 0.0,
+            "call_rate": history.call_rate(name),
+            "completion_tokens_per_call": _completion_tokens(history, name),
+            "call_latency": _call_latency(history, name)
+        }
+        for name in agent_names
+    }
+    case_seconds: List[float] = []
+    for position in range(case_count):
+        usage = sampled.get(position)
+        seconds = 0.0
+        for name, stats in agents.items():
+            if usage is not None:
+                calls = usage.get(name, {}).get("calls", 0)
+                prompt_tokens = usage.get(name, {}).get("prompt_tokens", 0)
+            else:
+                calls_per_step, intercept, slope = per_step[name]
+                calls = calls_per_step * steps[position]
+                prompt_tokens = max(0.0, intercept + slope * sizes[position]) * steps[position]
+            calls *= stats["call_rate"]
+            stats["calls"] += calls
+            stats["prompt_tokens"] += prompt_tokens * stats["call_rate"]
+            stats["completion_tokens"] += calls * stats["completion_tokens_per_call"]
+            seconds += calls * stats["call_latency"]
+        case_seconds.append(seconds)
+
+    slots = _concurrency_slots(args)
+    order = order_cases(dataset, args, cost_model)
+    wall_clock = simulate_makespan([case_seconds[i] for i in order], slots)
+
+    total_prompt = sum(stats["prompt_tokens"] for stats in agents.values())
+    total_completion = sum(stats["completion_tokens"] for stats in agents.values())
+    input_price, output_price = MODEL_PRICES.get(args.model_type, (None, None))
+    if args.input_price is not None:
+        input_price = args.input_price
+    if args.output_price is not None:
+        output_price = args.output_price
+    cost = None
+    if input_price is not None and output_price is not None:
+        cost = (total_prompt * input_price + total_completion * output_price) / 1_000_000
+
+    estimate = {
+        "generated_at": datetime.now().isoformat(),
+        "dataset_path": args.dataset_path,
+        "cases": case_count,
+        "sampled_cases": len(sampled),
+        "model_type": args.model_type,
+        "engine": "queue" if args.queue_db else args.engine,
+        "concurrency_slots": slots,
+        "schedule": args.schedule,
+        "mean_steps": sum(steps) / case_count if case_count else 0.0,
+        "history": history.get_summary(),
+        "agents": agents,
+        "llm_calls": sum(stats["calls"] for stats in agents.values()),
+        "prompt_tokens": total_prompt,
+        "completion_tokens": total_completion,
+        "input_price": input_price,
+        "output_price": output_price,
+        "cost": cost,
+        "mean_case_seconds": sum(case_seconds) / case_count if case_count else 0.0,
+        "wall_clock_seconds": wall_clock,
+        "estimation_time": time.time() - start_time
+    }
+    _print_estimate(estimate)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    estimate_file = os.path.join(args.output_dir, f"dry_run_estimate_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(estimate_file, "w", encoding="utf-8") as f:
+        json.dump(estimate, f, ensure_ascii=False, indent=2)
+    logging.info(f"试运行估算已保存: {estimate_file}")
+    return estimate
+
+
+def _fit_line(xs: List[float], ys: List[float]) -> Tuple[float, float]:
+    """最小二乘拟合y = a + b·x，x没有变化时斜率为0"""
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if not variance:
+        return mean_y, 0.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+    return mean_y - slope * mean_x, slope
+
+
+def _completion_tokens(history: RunHistory, name: str) -> float:
+    completion_tokens = history.completion_tokens(name)
+    return completion_tokens if completion_tokens is not None else DEFAULT_COMPLETION_TOKENS.get(name, 100)
+
+
+def _call_latency(history: RunHistory, name: str) -> float:
+    latency = history.call_latency(name)
+    if latency is not None:
+        return latency
+    return DEFAULT_CALL_OVERHEAD_SECONDS + _completion_tokens(history, name) / DEFAULT_OUTPUT_TOKENS_PER_SECOND
+
+
+def _concurrency_slots(args: argparse.Namespace) -> int:
+    """同时运行的病例数；异步和混合引擎中每个病例同一时刻最多一个LLM请求，受LLM并发上限约束"""
+    if args.queue_db or args.engine == "thread":
+        return max(1, args.num_threads)
+    slots = args.max_concurrent_cases
+    if args.engine == "hybrid":
+        slots *= args.num_processes
+    if args.llm_concurrency:
+        slots = min(slots, args.llm_concurrency)
+    return max(1, slots)
+
+
+def _print_estimate(estimate: Dict[str, Any]):
+    history = estimate["history"]
+    print("\n" + "=" * 60)
+    print("试运行估算（未调用LLM）")
+    print("=" * 60)
+    print(f"病例数: {estimate['cases']}（抽样构建提示词 {estimate['sampled_cases']} 个）")
+    print(f"模型: {estimate['model_type']} | 引擎: {estimate['engine']} | 并发病例数: {estimate['concurrency_slots']} | "
+          f"调度: {estimate['schedule']}")
+    if history["cases"]:
+        print(f"历史记录: {history['cases']} 个病例, 解析日志 {history['parsed_logs']} 个, "
+              f"步数 平均 {history['mean_steps']:.1f} / P50 {history['p50_steps']} / P90 {history['p90_steps']}")
+    else:
+        print("历史记录: 无，步数按--max-steps、延迟和输出长度按默认值估算")
+    print(f"平均步数: {estimate['mean_steps']:.1f}")
+    print(f"\n{'agent':<18}{'调用次数':>12}{'输入token':>16}{'输出token':>16}{'延迟(s)':>10}{'调用比例':>10}")
+    for name, stats in estimate["agents"].items():
+        print(f"{name:<18}{stats['calls']:>12,.0f}{stats['prompt_tokens']:>16,.0f}{stats['completion_tokens']:>16,.0f}"
+              f"{stats['call_latency']:>10.2f}{stats['call_rate']:>10.0%}")
+    print(f"{'合计':<18}{estimate['llm_calls']:>12,.0f}{estimate['prompt_tokens']:>16,.0f}"
+          f"{estimate['completion_tokens']:>16,.0f}")
+    if estimate["cost"] is not None:
+        print(f"\n估算费用: {estimate['cost']:,.2f} 元（输入 {estimate['input_price']} 元/百万token, "
+              f"输出 {estimate['output_price']} 元/百万token）")
+    else:
+        print(f"\n估算费用: 未知，模型 {estimate['model_type']} 没有默认价格，请指定--input-price和--output-price")
+    print(f"单个病例平均耗时: {estimate['mean_case_seconds']:.1f} 秒")
+    print(f"估算总耗时: {estimate['wall_clock_seconds'] / 60:.1f} 分钟")
+    print(f"估算用时: {estimate['estimation_time']:.2f} 秒")
@@ -0,0 +1,70 @@
+"""
+查找指定case用于回放的历史工作流日志。
+只使用已完成（最后一行为workflow_complete）的日志，存在多个时取最新的一个。
+每个历史日志目录只在首次查找时读取一次完成清单并扫描一次目录，之后每个case都是内存查找；
+清单中没有记录的case（旧版本生成的目录）回退到读取该case日志的最后一行。
+"""
+import os
+import sys
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from utils.list_logged_cases import list_logged_cases
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow.completion_manifest import CompletionManifest, read_last_line
+
+
+# 历史日志目录到回放索引的缓存，并发的病例共用同一次加载
+_replay_indexes: Dict[str, Tuple[Dict[int, str], Dict[int, List[str]]]] = {}
+_replay_indexes_lock = threading.Lock()
+
+
+def _load_replay_index(replay_dir: str) -> Tuple[Dict[int, str], Dict[int, List[str]]]:
+    """读取历史日志目录的完成清单并扫描日志文件，返回(清单中已完成case的日志路径, 各case的日志文件名)"""
+    with _replay_indexes_lock:
+        if replay_dir not in _replay_indexes:
+            _replay_indexes[replay_dir] = _build_replay_index(replay_dir)
+        return _replay_indexes[replay_dir]
+
+
+def _build_replay_index(replay_dir: str) -> Tuple[Dict[int, str], Dict[int, List[str]]]:
+    logged_cases = list_logged_cases(replay_dir)
+    completed = {
+        case_index: os.path.join(replay_dir, record["log_file"])
+        for case_index, record in CompletionManifest(replay_dir).load().items()
+        if record.get("log_file") in logged_cases.get(case_index, ())
+    }
+    logging.info(f"回放索引 {replay_dir}: 清单中已完成 {len(completed)} 个case, 日志目录中共 {len(logged_cases)} 个case")
+    return completed, logged_cases
+
+
+def find_replay_log(replay_dir: str, case_index: int) -> Optional[str]:
+    """
+    查找指定case已完成的历史工作流日志
+    
+    Args:
+        replay_dir: 历史日志目录
+        case_index: case序号
+        
+    Returns:
+        Optional[str]: 日志文件路径，不存在已完成的日志时返回None
+    """
+    completed, logged_cases = _load_replay_index(replay_dir)
+    if case_index in completed:
+        return completed[case_index]
+    for filename in sorted(logged_cases.get(case_index, ()), reverse=True):
+        log_file = os.path.join(replay_dir, filename)
+        try:
+            last_line = read_last_line(log_file)
+            if last_line and json.loads(last_line).get("event_type") == "workflow_complete":
+                return log_file
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"无法读取回放日志 {log_file}: {e}")
+    return None
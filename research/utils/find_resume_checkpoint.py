@@ -0,0 +1,38 @@
+"""
+查找指定case可用于断点续跑的检查点。
+检查点与工作流日志同名（.ckpt.json），仅当对应日志文件仍然存在时可用。
+调用方传入续跑索引扫描到的该case的日志文件名，由日志路径直接得到检查点路径，不再glob日志目录。
+"""
+import os
+import sys
+import logging
+from typing import List, Optional
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow.checkpoint import get_checkpoint_path
+
+
+def find_resume_checkpoint(log_dir: str, case_index: int, log_files: List[str]) -> Optional[str]:
+    """
+    查找指定case的检查点，存在多个日志时取最新的一个
+    
+    Args:
+        log_dir: 日志目录
+        case_index: case序号
+        log_files: 该case的日志文件名（list_logged_cases的结果）
+        
+    Returns:
+        Optional[str]: 检查点文件路径，不存在可用检查点时返回None
+    """
+    for filename in sorted(log_files, reverse=True):
+        log_file = os.path.join(log_dir, filename)
+        checkpoint_path = get_checkpoint_path(log_file)
+        # 续跑检查可能已删除不完整的日志
+        if os.path.exists(checkpoint_path) and os.path.exists(log_file):
+            logging.info(f"发现case {case_index} 的检查点: {checkpoint_path}")
+            return checkpoint_path
+    return None
@@ -15,6 +15,7 @@ def generate_summary_report(batch_results: Dict[str, Any],
     detailed_report = {
         'batch_execution_summary': summary,
         'sample_results': results,
+        'sample_results_store': summary.get('results_store'),
         'generated_at': datetime.now().isoformat(),
         'report_version': '1.0'
     }
@@ -42,7 +43,32 @@ def generate_summary_report(batch_results: Dict[str, Any],
             f.write(f"成功率: {summary['success_rate']:.2%}\n")
             f.write(f"总执行时间: {summary['total_execution_time']:.2f} 秒\n")
             f.write(f"平均处理时间: {summary['average_time_per_sample']:.2f} 秒/样本\n")
-            f.write(f"处理速度: {summary['samples_per_minute']:.2f} 样本/分钟\n\n")
+            f.write(f"处理速度: {summary['samples_per_minute']:.2f} 样本/分钟\n")
+            if summary.get('results_store'):
+                f.write(f"样本结果目录: {summary['results_store']} ({summary['results_format']})\n")
+            f.write("\n")
+            
+            if summary.get('result_stats'):
+                result_stats = summary['result_stats']
+                f.write("结果统计:\n")
+                f.write(f"  工作流成功率: {result_stats['workflow_success_rate']:.2%}\n")
+                f.write(f"  平均步数: {result_stats['mean_steps']:.2f}\n")
+                f.write(f"  平均耗时: {result_stats['mean_execution_time']:.2f} 秒 (最长 {result_stats['max_execution_time']:.2f} 秒)\n")
+                f.write("  各阶段平均完成率: " + ", ".join(
+                    f"{phase} {rate:.2%}" for phase, rate in result_stats['mean_phase_completion_rate'].items()) + "\n")
+                f.write(f"  步数分布: {result_stats['steps_histogram']}\n")
+                f.write(f"  分诊一级科室分布: {result_stats['primary_departments']}\n")
+                f.write("\n")
+            
+            if summary.get('schedule'):
+                schedule = summary['schedule']
+                f.write(f"调度策略: {schedule['policy']} (并发槽位 {schedule['slots']})\n")
+                f.write(f"  实际总耗时: {schedule['wall_clock']:.2f} 秒\n")
+                f.write(f"  模拟FIFO总耗时: {schedule['simulated_fifo']:.2f} 秒\n")
+                f.write(f"  模拟本次顺序总耗时: {schedule['simulated_submitted']:.2f} 秒 "
+                        f"(相对FIFO {schedule['speedup_vs_fifo']:.2f}x)\n")
+                f.write(f"  模拟按实际耗时从长到短总耗时: {schedule['simulated_longest_first']:.2f} 秒\n")
+                f.write("\n")
             
             f.write("处理配置:\n")
             for key, value in summary['processing_config'].items():
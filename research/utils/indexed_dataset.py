@@ -0,0 +1,255 @@
+"""
+带索引的数据集：首次使用时流式扫描数据集文件（JSON数组或JSONL），生成旁路索引文件，
+记录每个病例的字节偏移和长度以及科室到病例序号的映射。
+之后按序号随机读取、按范围或科室筛选都只读取所需病例，不需要将整个数据集加载到内存。
+"""
+import os
+import json
+import codecs
+import logging
+from array import array
+from bisect import bisect_left
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+# 旁路索引文件后缀，索引文件与数据集位于同一目录
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 1
+# 建立科室索引使用的字段
+DEPARTMENT_FIELD = "一级科室"
+_READ_SIZE = 1 << 20
+_WHITESPACE = " \t\r\n"
+
+
+def _scan_json_array(f) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """
+    流式扫描JSON数组，每次只在缓冲区中保留尚未解析的部分
+
+    Yields:
+        Tuple[int, int, Dict]: 病例的字节偏移、字节长度和解析后的病例
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    # buffer[pos]对应的文件字节偏移
+    byte_pos = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(_READ_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+    def skip(chars: str):
+        nonlocal pos, byte_pos
+        while True:
+            start = pos
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            byte_pos += len(buffer[start:pos].encode("utf-8"))
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    fill()
+    if buffer.startswith("\ufeff"):
+        pos = 1
+        byte_pos = 3
+    skip(_WHITESPACE)
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise ValueError("数据集应该是包含病例的JSON数组")
+    pos += 1
+    byte_pos += 1
+
+    while True:
+        skip(_WHITESPACE + ("," if started else ""))
+        if pos >= len(buffer):
+            raise ValueError("数据集JSON格式错误: 数组未结束")
+        if buffer[pos] == "]":
+            return
+        if buffer[pos] != "{":
+            raise ValueError(f"数据集JSON格式错误: 字节偏移 {byte_pos} 处的元素不是对象")
+        try:
+            sample, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # 病例跨越缓冲区边界，继续读取后重试
+            if eof:
+                raise
+            fill()
+            continue
+        length = len(buffer[pos:end].encode("utf-8"))
+        yield byte_pos, length, sample
+        byte_pos += length
+        pos = end
+        started = True
+
+
+def _scan_jsonl(f) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """
+    逐行扫描JSONL，跳过空行
+
+    Yields:
+        Tuple[int, int, Dict]: 病例的字节偏移、字节长度和解析后的病例
+    """
+    offset = 0
+    for line_number, line in enumerate(f, 1):
+        stripped = line.strip()
+        if stripped:
+            start = offset + (len(line) - len(line.lstrip()))
+            sample = json.loads(stripped)
+            if not isinstance(sample, dict):
+                raise ValueError(f"数据集第 {line_number} 行不是对象")
+            yield start, len(stripped), sample
+        offset += len(line)
+
+
+def _detect_format(dataset_path: str) -> str:
+    """根据第一个非空白字符判断数据集是JSON数组还是JSONL"""
+    with open(dataset_path, "rb") as f:
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                raise ValueError("数据集文件为空")
+            stripped = chunk.lstrip(b"\xef\xbb\xbf \t\r\n")
+            if stripped:
+                return "json" if stripped[:1] == b"[" else "jsonl"
+
+
+class IndexedDataset:
+    """
+    按需读取的数据集
+    支持len()、整数下标随机访问、切片和迭代，切片与科室筛选返回共享同一索引的视图
+    """
+
+    def __init__(self, dataset_path: str, positions: Optional[Sequence[int]] = None, _index: Optional[Dict] = None):
+        """
+        Args:
+            dataset_path: 数据集路径（JSON数组或JSONL）
+            positions: 视图包含的病例序号，为None时包含全部病例
+        """
+        self.dataset_path = dataset_path
+        self._index = _index if _index is not None else self._load_or_build_index()
+        self.positions = positions if positions is not None else range(len(self._index["offsets"]))
+
+    @property
+    def index_path(self) -> str:
+        return self.dataset_path + INDEX_SUFFIX
+
+    @property
+    def total_samples(self) -> int:
+        """数据集中的病例总数（不受视图范围影响）"""
+        return len(self._index["offsets"])
+
+    def _load_or_build_index(self) -> Dict[str, Any]:
+        """读取旁路索引，索引不存在或与数据集文件不一致时重新扫描"""
+        stat = os.stat(self.dataset_path)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if (data.get("version") == INDEX_VERSION and data.get("source_size") == stat.st_size
+                    and data.get("source_mtime_ns") == stat.st_mtime_ns):
+                return self._to_arrays(data)
+            logging.info(f"数据集已变化，重建索引: {self.index_path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"数据集索引无法读取，重建索引: {e}")
+
+        data = self._build_index(stat)
+        try:
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            # 数据集目录不可写时只在本次运行中使用内存中的索引
+            logging.warning(f"数据集索引写入失败，仅在本次运行中使用: {e}")
+        return self._to_arrays(data)
+
+    def _build_index(self, stat: os.stat_result) -> Dict[str, Any]:
+        """流式扫描数据集，记录每个病例的位置和科室"""
+        logging.info(f"正在为数据集建立索引: {self.dataset_path}")
+        file_format = _detect_format(self.dataset_path)
+        offsets, lengths = [], []
+        departments: Dict[str, list] = {}
+        with open(self.dataset_path, "rb") as f:
+            scanner = _scan_json_array(f) if file_format == "json" else _scan_jsonl(f)
+            for offset, length, sample in scanner:
+                department = sample.get(DEPARTMENT_FIELD, "")
+                departments.setdefault(department if isinstance(department, str) else str(department), []).append(len(offsets))
+                offsets.append(offset)
+                lengths.append(length)
+        logging.info(f"数据集索引建立完成: {len(offsets)} 个病例, {len(departments)} 个科室")
+        return {
+            "version": INDEX_VERSION,
+            "format": file_format,
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "offsets": offsets,
+            "lengths": lengths,
+            "departments": departments
+        }
+
+    @staticmethod
+    def _to_arrays(data: Dict[str, Any]) -> Dict[str, Any]:
+        """将索引中的列表转换为紧凑数组"""
+        return {
+            "offsets": array("q", data["offsets"]),
+            "lengths": array("q", data["lengths"]),
+            "departments": {name: array("q", indexes) for name, indexes in data["departments"].items()}
+        }
+
+    def _view(self, positions: Sequence[int]) -> "IndexedDataset":
+        return IndexedDataset(self.dataset_path, positions, self._index)
+
+    def _read(self, f, position: int) -> Dict[str, Any]:
+        f.seek(self._index["offsets"][position])
+        return json.loads(f.read(self._index["lengths"][position]))
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._view(self.positions[item])
+        with open(self.dataset_path, "rb") as f:
+            return self._read(f, self.positions[item])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with open(self.dataset_path, "rb") as f:
+            for position in self.positions:
+                yield self._read(f, position)
+
+    def case_sizes(self) -> List[int]:
+        """视图中每个病例在数据集文件中的字节长度，只读取索引"""
+        return [self._index["lengths"][position] for position in self.positions]
+
+    def case_departments(self) -> List[str]:
+        """视图中每个病例的一级科室，由科室索引反查，不读取病例内容"""
+        departments = {}
+        for name, indexes in self._index["departments"].items():
+            for index in indexes:
+                departments[index] = name
+        return [departments.get(position, "") for position in self.positions]
+
+    def filter_department(self, department: str) -> "IndexedDataset":
+        """
+        筛选指定一级科室的病例，只使用科室索引，不读取病例内容
+
+        Args:
+            department: 一级科室名称
+
+        Returns:
+            IndexedDataset: 视图范围内属于该科室的病例，保持原有顺序
+        """
+        indexes = self._index["departments"].get(department, array("q"))
+        if isinstance(self.positions, range) and self.positions.step == 1:
+            # 连续范围内的科室病例可以直接二分截取
+            start = bisect_left(indexes, self.positions.start)
+            end = bisect_left(indexes, self.positions.stop)
+            return self._view(indexes[start:end])
+        in_view = set(self.positions)
+        return self._view(array("q", (index for index in indexes if index in in_view)))
@@ -1,28 +1,56 @@
 """
 检查指定case是否已经完成工作流处理。
 确保每个 case 的日志文件是完整的。
-删除任何不完整或无效的日志文件。
+删除任何不完整或无效的日志文件（存在检查点的不完整日志保留，用于断点续跑）。
 返回该 case 是否已完成工作流处理。
+只从文件末尾读取最后一行；发现已完成的旧日志时补写完成清单，下次续跑无需再检查该日志。
+多个工作进程共享日志目录时（租约队列模式）使用只读检查，不删除可能仍在写入的日志。
 """
 import os
+import sys
 import glob
 import json
 import logging
-def is_case_completed(log_dir: str, case_index: int) -> bool:
+from typing import List, Optional
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow.checkpoint import get_checkpoint_path, remove_checkpoint
+from research.workflow.completion_manifest import CompletionManifest, read_last_line
+
+def _read_department(log_file: str) -> Optional[str]:
+    """从日志首行（workflow_start）的病例数据中读取一级科室，补写清单时使用，无法读取时返回None"""
+    try:
+        with open(log_file, 'r', encoding='utf-8') as f:
+            first_entry = json.loads(f.readline())
+    except (OSError, json.JSONDecodeError):
+        return None
+    return first_entry.get("case_data", {}).get("一级科室", "")
+
+
+def is_case_completed(log_dir: str, case_index: int, matching_files: Optional[List[str]] = None,
+                      remove_incomplete: bool = True) -> bool:
     """
     检查指定case是否已经完成工作流
-    如果存在不完整的文件则删除，确保每个case在目录中只出现一次
+    如果存在不完整的文件则删除，确保每个case在目录中只出现一次；
+    不完整但存在检查点的文件予以保留，由工作流从检查点续跑
     
     Args:
         log_dir: 日志目录
         case_index: case序号
+        matching_files: 该case的日志文件路径，调用方已扫描过日志目录时传入，为None时通过glob查找
+        remove_incomplete: 是否删除不完整的文件；为False时只读取日志判断是否完成，不修改日志目录
         
     Returns:
         bool: 如果case已完成返回True，否则返回False
     """
-    # 构建文件路径模式：workflow_*_case_{case_index:04d}.jsonl
-    pattern = os.path.join(log_dir, f"workflow_*_case_{case_index:04d}.jsonl")
-    matching_files = glob.glob(pattern)
+    if matching_files is None:
+        # 构建文件路径模式：workflow_*_case_{case_index:04d}.jsonl
+        pattern = os.path.join(log_dir, f"workflow_*_case_{case_index:04d}.jsonl")
+        matching_files = glob.glob(pattern)
     
     if not matching_files:
         return False
@@ -33,63 +61,95 @@ def is_case_completed(log_dir: str, case_index: int) -> bool:
     
     # 检查每个匹配的文件
     for log_file in matching_files:
+        checkpoint_path = get_checkpoint_path(log_file)
+        if not remove_incomplete:
+            # 只读检查：不完整的日志可能正由其他工作进程写入
+            try:
+                last_line = read_last_line(log_file)
+                last_entry = json.loads(last_line) if last_line and last_line.strip() else {}
+            except (OSError, json.JSONDecodeError):
+                continue
+            if last_entry.get("event_type") == "workflow_complete":
+                logging.info(f"发现已完成的case {case_index}: {log_file}")
+                return True
+            continue
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                # 读取最后一行
-                lines = f.readlines()
-                if not lines:
-                    # 文件为空，删除
+            # 从文件末尾读取最后一行
+            last_line = read_last_line(log_file)
+            if last_line is None:
+                # 文件为空，删除
+                try:
+                    os.remove(log_file)
+                    remove_checkpoint(checkpoint_path)
+                    logging.info(f"删除空文件: {log_file}")
+                except (OSError, FileNotFoundError, PermissionError) as e:
+                    # 文件删除失败不影响主流程，记录警告即可
+                    logging.warning(f"无法删除空文件 {log_file}: {e}")
+                continue
+            
+            last_line = last_line.strip()
+            if not last_line:
+                # 最后一行为空，删除
+                try:
+                    os.remove(log_file)
+                    remove_checkpoint(checkpoint_path)
+                    logging.info(f"删除最后一行为空的文件: {log_file}")
+                except (OSError, FileNotFoundError, PermissionError) as e:
+                    # 文件删除失败不影响主流程，记录警告即可
+                    logging.warning(f"无法删除最后一行为空的文件 {log_file}: {e}")
+                continue
+            
+            # 解析最后一行的JSON
+            try:
+                last_entry = json.loads(last_line)
+                if last_entry.get("event_type") == "workflow_complete":
+                    # 找到完整的文件，清理可能残留的检查点
+                    logging.info(f"发现已完成的case {case_index}: {log_file}")
+                    remove_checkpoint(checkpoint_path)
                     try:
-                        os.remove(log_file)
-                        logging.info(f"删除空文件: {log_file}")
-                    except (OSError, FileNotFoundError, PermissionError) as e:
-                        # 文件删除失败不影响主流程，记录警告即可
-                        logging.warning(f"无法删除空文件 {log_file}: {e}")
+                        CompletionManifest(log_dir).record(case_index, log_file, last_entry.get("success", False),
+                                                           last_entry.get("total_steps", 0),
+                                                           _read_department(log_file))
+                    except OSError as e:
+                        # 补写清单失败不影响判断，下次续跑时仍会检查该日志
+                        logging.warning(f"无法补写完成清单 case {case_index}: {e}")
+                    return True
+                elif os.path.exists(checkpoint_path):
+                    # 文件不完整但存在检查点，保留以便续跑
+                    logging.info(f"发现可续跑的case {case_index}: {log_file}")
                     continue
-                
-                last_line = lines[-1].strip()
-                if not last_line:
-                    # 最后一行为空，删除
+                else:
+                    # 文件不完整，删除
                     try:
                         os.remove(log_file)
-                        logging.info(f"删除最后一行为空的文件: {log_file}")
+                        remove_checkpoint(checkpoint_path)
+                        logging.info(f"删除不完整的文件: {log_file}")
                     except (OSError, FileNotFoundError, PermissionError) as e:
                         # 文件删除失败不影响主流程，记录警告即可
-                        logging.warning(f"无法删除最后一行为空的文件 {log_file}: {e}")
+                        logging.warning(f"无法删除不完整的文件 {log_file}: {e}")
                     continue
                 
-                # 解析最后一行的JSON
-                try:
-                    last_entry = json.loads(last_line)
-                    if last_entry.get("event_type") == "workflow_complete":
-                        # 找到完整的文件
-                        logging.info(f"发现已完成的case {case_index}: {log_file}")
-                        return True
-                    else:
-                        # 文件不完整，删除
-                        try:
-                            os.remove(log_file)
-                            logging.info(f"删除不完整的文件: {log_file}")
-                        except (OSError, FileNotFoundError, PermissionError) as e:
-                            # 文件删除失败不影响主流程，记录警告即可
-                            logging.warning(f"无法删除不完整的文件 {log_file}: {e}")
-                        continue
-                        
-                except json.JSONDecodeError:
-                    # JSON解析失败，删除文件
-                    try:
-                        os.remove(log_file)
-                        logging.info(f"删除JSON格式错误的文件: {log_file}")
-                    except (OSError, FileNotFoundError, PermissionError) as e:
-                        # 文件删除失败不影响主流程，记录警告即可
-                        logging.warning(f"无法删除JSON格式错误的文件 {log_file}: {e}")
+            except json.JSONDecodeError:
+                if os.path.exists(checkpoint_path):
+                    # 最后一行写入中断，续跑时会截断到检查点位置
+                    logging.info(f"发现可续跑的case {case_index}: {log_file}")
                     continue
+                # JSON解析失败，删除文件
+                try:
+                    os.remove(log_file)
+                    remove_checkpoint(checkpoint_path)
+                    logging.info(f"删除JSON格式错误的文件: {log_file}")
+                except (OSError, FileNotFoundError, PermissionError) as e:
+                    # 文件删除失败不影响主流程，记录警告即可
+                    logging.warning(f"无法删除JSON格式错误的文件 {log_file}: {e}")
+                continue
                     
         except Exception as e:
             logging.warning(f"检查文件 {log_file} 时出错: {e}")
             # 出现异常也删除文件，避免后续问题
             try:
                 os.remove(log_file)
+                remove_checkpoint(checkpoint_path)
                 logging.info(f"删除异常文件: {log_file}")
             except (OSError, FileNotFoundError, PermissionError) as delete_error:
                 # 修复1：明确指定要捕获的异常类型
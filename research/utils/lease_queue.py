@@ -0,0 +1,240 @@
+"""
+基于SQLite的病例租约队列：多台机器上的research/main.py进程共享同一个数据库文件，
+每个进程按需领取病例租约并定期续约，进程崩溃后租约到期，病例由其他进程重新领取。
+数据库使用默认的回滚日志模式（不使用WAL），以便放在NFS等共享存储上。
+"""
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+# 病例状态
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    case_index INTEGER PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker_id TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cases_status ON cases (status, case_index);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class LeaseQueue:
+    """病例租约队列"""
+
+    def __init__(self, db_path: str, max_attempts: int = 3, timeout: float = 60.0):
+        """
+        Args:
+            db_path: SQLite数据库路径，所有工作进程使用同一个文件
+            max_attempts: 每个病例最多领取次数，执行失败或租约过期达到该次数后标记为失败
+            timeout: 等待数据库写锁的秒数
+        """
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """每次操作使用独立连接，工作线程之间不共享连接"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        在写事务中执行
+        BEGIN IMMEDIATE在事务开始时即获取写锁，多个进程同时领取时不会拿到同一个病例
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def populate(self, case_indexes: Iterable[int], meta: Dict[str, Any]):
+        """
+        写入待处理病例，已存在的病例保持原状态，多个工作进程可以重复调用
+
+        Args:
+            case_indexes: 病例序号
+            meta: 数据集路径、范围等队列配置；首次调用时写入，之后的调用必须一致
+
+        Raises:
+            ValueError: 与队列已有的配置不一致
+        """
+        with self._transaction() as conn:
+            existing = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            expected = {key: json.dumps(value, ensure_ascii=False) for key, value in meta.items()}
+            if existing:
+                mismatched = [key for key, value in expected.items() if existing.get(key) != value]
+                if mismatched:
+                    raise ValueError("队列配置与本次运行不一致: " + ", ".join(
+                        f"{key}={existing.get(key)} (本次: {expected[key]})" for key in mismatched))
+                return
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", expected.items())
+            conn.executemany("INSERT OR IGNORE INTO cases (case_index) VALUES (?)",
+                             ((case_index,) for case_index in case_indexes))
+
+    def acquire(self, worker_id: str, lease_seconds: float) -> Optional[int]:
+        """
+        领取一个待处理或租约已过期的病例
+
+        Args:
+            worker_id: 工作进程标识
+            lease_seconds: 租约时长，需在到期前调用heartbeat续约
+
+        Returns:
+            Optional[int]: 病例序号，没有可领取的病例时返回None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # 租约过期且已达到最大领取次数的病例不再重试
+            conn.execute(
+                "UPDATE cases SET status = ?, finished_at = ?, result = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, json.dumps({"error": "租约过期次数达到上限"}, ensure_ascii=False),
+                 LEASED, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT case_index FROM cases WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY case_index LIMIT 1",
+                (PENDING, LEASED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE cases SET status = ?, worker_id = ?, lease_expires = ?, attempts = attempts + 1, "
+                "started_at = ? WHERE case_index = ?",
+                (LEASED, worker_id, now + lease_seconds, now, row[0])
+            )
+            return row[0]
+
+    def heartbeat(self, worker_id: str, lease_seconds: float) -> int:
+        """
+        为工作进程持有的所有租约续约
+
+        Returns:
+            int: 续约的病例数
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE cases SET lease_expires = ? WHERE status = ? AND worker_id = ?",
+                (time.time() + lease_seconds, LEASED, worker_id)
+            ).rowcount
+
+    def complete(self, case_index: int, worker_id: str, result: Dict[str, Any]):
+        """
+        标记病例完成；租约过期后被重新领取的病例以先完成的结果为准
+
+        Args:
+            case_index: 病例序号
+            worker_id: 完成病例的工作进程
+            result: 病例结果摘要，用于合并报告
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE cases SET status = ?, worker_id = ?, lease_expires = NULL, finished_at = ?, result = ? "
+                "WHERE case_index = ? AND status != ?",
+                (DONE, worker_id, time.time(), json.dumps(result, ensure_ascii=False), case_index, DONE)
+            )
+
+    def fail(self, case_index: int, worker_id: str, error: str):
+        """
+        病例执行失败，未达到最大领取次数时放回队列重试
+
+        Args:
+            case_index: 病例序号
+            worker_id: 执行失败的工作进程
+            error: 错误信息
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE cases SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "lease_expires = NULL, finished_at = ?, result = ? "
+                "WHERE case_index = ? AND status = ? AND worker_id = ?",
+                (self.max_attempts, FAILED, PENDING, time.time(),
+                 json.dumps({"error": error}, ensure_ascii=False), case_index, LEASED, worker_id)
+            )
+
+    def release(self, worker_id: str) -> int:
+        """
+        工作进程退出前归还尚未完成的租约，本次领取不计入领取次数
+
+        Returns:
+            int: 归还的病例数
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE cases SET status = ?, lease_expires = NULL, attempts = attempts - 1 "
+                "WHERE status = ? AND worker_id = ?",
+                (PENDING, LEASED, worker_id)
+            ).rowcount
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取队列整体进度
+
+        Returns:
+            Dict: 各状态病例数、总数和正在持有租约的工作进程
+        """
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM cases GROUP BY status").fetchall())
+            leased_workers = dict(conn.execute(
+                "SELECT worker_id, COUNT(*) FROM cases WHERE status = ? AND lease_expires >= ? GROUP BY worker_id",
+                (LEASED, time.time())
+            ).fetchall())
+        status = {state: counts.get(state, 0) for state in (PENDING, LEASED, DONE, FAILED)}
+        status["total"] = sum(counts.values())
+        status["active_workers"] = leased_workers
+        return status
+
+    def get_meta(self) -> Dict[str, Any]:
+        """获取队列配置"""
+        with self._connect() as conn:
+            return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+
+    def get_finished(self) -> List[Dict[str, Any]]:
+        """
+        获取所有已完成和失败的病例
+
+        Returns:
+            List[Dict]: 按病例序号排序，包含状态、工作进程、领取次数、起止时间和结果摘要
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT case_index, status, worker_id, attempts, started_at, finished_at, result FROM cases "
+                "WHERE status IN (?, ?) ORDER BY case_index",
+                (DONE, FAILED)
+            ).fetchall()
+        return [{
+            "case_index": case_index,
+            "status": status,
+            "worker_id": worker_id,
+            "attempts": attempts,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "result": json.loads(result) if result else {}
+        } for case_index, status, worker_id, attempts, started_at, finished_at, result in rows]
@@ -0,0 +1,32 @@
+"""
+一次性扫描日志目录，返回已存在工作流日志的case及其日志文件名。
+批处理只对其中的case调用is_case_completed，避免对每个case分别glob整个目录。
+"""
+import os
+import re
+from typing import Dict, List
+
+# 工作流日志文件名：workflow_{timestamp}_case_{case_index:04d}.jsonl
+_LOG_FILE_PATTERN = re.compile(r"^workflow_.+_case_(\d+)\.jsonl$")
+
+
+def list_logged_cases(log_dir: str) -> Dict[int, List[str]]:
+    """
+    列出日志目录中存在工作流日志的case
+
+    Args:
+        log_dir: 日志目录
+
+    Returns:
+        Dict[int, List[str]]: case序号到日志文件名列表的映射，目录不存在时为空
+    """
+    if not os.path.isdir(log_dir):
+        return {}
+
+    logged_cases = {}
+    with os.scandir(log_dir) as entries:
+        for entry in entries:
+            match = _LOG_FILE_PATTERN.match(entry.name)
+            if match:
+                logged_cases.setdefault(int(match.group(1)), []).append(entry.name)
+    return logged_cases
@@ -1,27 +1,31 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import Optional
+
+from utils.indexed_dataset import IndexedDataset
 def load_dataset(dataset_path: str, start_index: int = 0, 
                 end_index: Optional[int] = None, 
-                sample_limit: Optional[int] = None) -> List[Dict[str, Any]]:
-    """加载和验证数据集"""
+                sample_limit: Optional[int] = None,
+                department_filter: Optional[str] = None) -> IndexedDataset:
+    """
+    加载和验证数据集
+    数据集可以是JSON数组或JSONL，通过旁路索引按需读取病例；department_filter在索引范围内按一级科室筛选
+    """
     logging.info(f"正在加载数据集: {dataset_path}")
     
     if not os.path.exists(dataset_path):
         raise FileNotFoundError(f"数据集文件不存在: {dataset_path}")
     
     try:
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            full_dataset = json.load(f)
+        full_dataset = IndexedDataset(dataset_path)
     except json.JSONDecodeError as e:
         raise ValueError(f"数据集JSON格式错误: {e}")
+    except ValueError:
+        raise
     except Exception as e:
         raise Exception(f"加载数据集失败: {e}")
     
-    if not isinstance(full_dataset, list):
-        raise ValueError("数据集应该是包含病例的JSON数组")
-    
     total_samples = len(full_dataset)
     logging.info(f"数据集总样本数: {total_samples}")
     
@@ -43,14 +47,18 @@ def load_dataset(dataset_path: str, start_index: int = 0,
     
     logging.info(f"将处理样本范围: [{start_index}, {end_index}), 共 {len(dataset)} 个样本")
     
+    if department_filter:
+        dataset = dataset.filter_department(department_filter)
+        logging.info(f"筛选 '{department_filter}' 科室病例: {len(dataset)} 个")
+    
     # 验证数据格式
     for i, sample in enumerate(dataset[:5]):  # 只验证前5个样本
         if not isinstance(sample, dict):
-            raise ValueError(f"样本 {start_index + i} 格式错误，应为字典类型")
+            raise ValueError(f"样本 {dataset.positions[i]} 格式错误，应为字典类型")
         
         required_keys = ['病案介绍']
         for key in required_keys:
             if key not in sample:
-                logging.warning(f"样本 {start_index + i} 缺少必需字段: {key}")
+                logging.warning(f"样本 {dataset.positions[i]} 缺少必需字段: {key}")
     
     return dataset
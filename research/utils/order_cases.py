@@ -0,0 +1,61 @@
+import json
+import heapq
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+
+from utils.case_cost_model import CaseCostModel
+
+
+def order_cases(dataset: Sequence[Dict[str, Any]], args: argparse.Namespace,
+                cost_model: Optional[CaseCostModel] = None) -> List[int]:
+    """
+    按调度策略确定病例的提交顺序
+    fifo按数据集顺序；lef（longest-expected-first）按估计耗时从长到短，长病例先开始，批次末尾只剩短病例，
+    减少少数长病例单独运行的拖尾时间
+
+    Args:
+        dataset: 数据集（IndexedDataset或病例列表）
+        args: 批处理命令行参数
+        cost_model: 调用方已构建的耗时估计，为None时从历史日志目录构建
+
+    Returns:
+        List[int]: 病例在dataset中的位置
+    """
+    if args.schedule != "lef":
+        return list(range(len(dataset)))
+
+    # 带索引的数据集直接从索引读取病例长度和科室，不读取病例内容
+    if hasattr(dataset, "case_sizes"):
+        sizes = dataset.case_sizes()
+        departments = dataset.case_departments()
+    else:
+        sizes = [len(json.dumps(case, ensure_ascii=False).encode("utf-8")) for case in dataset]
+        departments = [case.get("一级科室", "") for case in dataset]
+
+    if cost_model is None:
+        history_dirs = args.schedule_history or [path for path in (args.log_dir, args.replay_from) if path]
+        cost_model = CaseCostModel(history_dirs, args.max_steps)
+    estimates = [cost_model.estimate(size, department) for size, department in zip(sizes, departments)]
+    order = sorted(range(len(dataset)), key=lambda i: estimates[i], reverse=True)
+    if order:
+        logging.info(f"按估计耗时从长到短调度 {len(order)} 个病例, "
+                     f"估计耗时最长/最短比 {estimates[order[0]] / max(estimates[order[-1]], 1e-9):.2f}")
+    return order
+
+
+def simulate_makespan(durations: List[float], slots: int) -> float:
+    """
+    模拟按给定顺序将病例分配给最先空闲的并发槽位时的总耗时
+
+    Args:
+        durations: 按提交顺序排列的病例耗时
+        slots: 并发槽位数（线程数或并发病例数）
+
+    Returns:
+        float: 最后一个病例结束的时间
+    """
+    finish_times = [0.0] * max(1, min(slots, len(durations)))
+    for duration in durations:
+        heapq.heapreplace(finish_times, finish_times[0] + duration)
+    return max(finish_times) if durations else 0.0
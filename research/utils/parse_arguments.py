@@ -8,6 +8,7 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from config import LLM_CONFIG 
+from research.workflow.replay import REPLAYABLE_AGENTS, DEFAULT_FROZEN_AGENTS
 
 def parse_arguments() -> argparse.Namespace:
     """解析命令行参数"""
@@ -61,6 +62,30 @@ def parse_arguments() -> argparse.Namespace:
         default=4,
         help='并行处理线程数'
     )
+    parser.add_argument(
+        '--adaptive-concurrency',
+        action='store_true',
+        default=False,
+        help='thread引擎下根据LLM调用延迟、失败率和吞吐自动调整同时运行的病例数，--num-threads为初始值'
+    )
+    parser.add_argument(
+        '--min-threads',
+        type=int,
+        default=1,
+        help='自适应并发的下限'
+    )
+    parser.add_argument(
+        '--max-threads',
+        type=int,
+        default=64,
+        help='自适应并发的上限'
+    )
+    parser.add_argument(
+        '--adjust-interval',
+        type=float,
+        default=30,
+        help='自适应并发的调整间隔（秒）'
+    )
     parser.add_argument(
         '--max-steps', 
         type=int, 
@@ -133,6 +158,223 @@ def parse_arguments() -> argparse.Namespace:
         default='sequence',  #默认为normal模式
         help='任务控制器模式：normal为智能模式（需要LLM推理），sequence为顺序模式（直接选择第一个任务），score_driven为分数驱动模式（选择当前任务组中分数最低的任务）'
     )
+    parser.add_argument(
+        '--recipient-mode',
+        type=str,
+        choices=['full', 'delta'],
+        default='full',
+        help='Recipient模式：full为每轮基于完整对话全量重整病历，delta为仅发送最新一轮对话并增量更新病历'
+    )
+    parser.add_argument(
+        '--recipient-full-interval',
+        type=int,
+        default=5,
+        help='delta模式下每隔多少步执行一次全量重整（阶段切换时也会全量重整）'
+    )
+    parser.add_argument(
+        '--monitor-skip-threshold',
+        type=int,
+        default=-1,
+        help='Monitor跳过阈值（字符数）：任务依赖的病历内容自上次评分以来变化不超过该值时复用上次评分，0表示仅在内容完全相同时跳过，负数表示不跳过'
+    )
+    parser.add_argument(
+        '--triage-stable-steps',
+        type=int,
+        default=0,
+        help='分诊稳定步数K：分诊阶段科室结果连续K步相同且主诉未实质变化时复用上次分诊结果，不再调用Triager；0表示每步都调用'
+    )
+    parser.add_argument(
+        '--generation-mode',
+        type=str,
+        choices=['chained', 'fused'],
+        default='chained',
+        help='医生问题生成模式：chained为Controller→Prompter→Inquirer三次串行调用，fused为单次调用同时输出任务、指导和问题 (默认: chained)'
+    )
+    parser.add_argument(
+        '--stopping-policy',
+        type=str,
+        choices=['none', 'plateau'],
+        default='none',
+        help='任务停止策略：none为任务达到完成阈值才结束，plateau为任务连续多次询问后评分无明显提升时标记为饱和并跳过 (默认: none)'
+    )
+    parser.add_argument(
+        '--plateau-window',
+        type=int,
+        default=3,
+        help='plateau策略的观察窗口：连续询问同一任务的次数 (默认: 3)'
+    )
+    parser.add_argument(
+        '--plateau-min-gain',
+        type=float,
+        default=0.05,
+        help='plateau策略的最小边际提升：窗口内评分提升低于该值时判定为饱和 (默认: 0.05)'
+    )
+    parser.add_argument(
+        '--plateau-min-score',
+        type=float,
+        default=0.0,
+        help='plateau策略允许判定饱和的最低评分，低于该值的任务继续询问 (默认: 0.0)'
+    )
+    parser.add_argument(
+        '--disable-checkpoint',
+        action='store_true',
+        help='不在每步完成后保存检查点；默认保存，中断后重新运行时未完成的case从检查点续跑'
+    )
+    parser.add_argument(
+        '--disable-engine-pool',
+        action='store_true',
+        help='每个case重新创建step执行器和全部agent；默认各工作线程复用执行器、模型客户端和已加载的指导，只重置病例状态'
+    )
+    parser.add_argument(
+        '--speculative',
+        action='store_true',
+        default=False,
+        help='启用推测预计算：在评估和虚拟患者回答期间，后台预先计算下一步的Controller决策、Prompter预热和科室指导'
+    )
+    parser.add_argument(
+        '--prompter-cache',
+        action='store_true',
+        default=False,
+        help='启用Prompter模板缓存：按(任务, 一级科室, 二级科室, 阶段)复用Prompter输出，批处理内所有病例共享'
+    )
+    parser.add_argument(
+        '--prompter-cache-size',
+        type=int,
+        default=2048,
+        help='Prompter模板缓存的最大条目数'
+    )
+    parser.add_argument(
+        '--prompter-cache-warm-start',
+        type=str,
+        default=None,
+        help='用于预热Prompter模板缓存的历史工作流日志目录'
+    )
+    parser.add_argument(
+        '--replay-from',
+        type=str,
+        default=None,
+        help='回放模式：从该目录读取各case已完成的历史工作流日志，冻结的agent复用日志输出，只有修改的agent调用LLM；新日志写入--log-dir'
+    )
+    parser.add_argument(
+        '--freeze-agents',
+        type=str,
+        nargs='+',
+        choices=REPLAYABLE_AGENTS,
+        default=DEFAULT_FROZEN_AGENTS,
+        help='回放模式下使用日志输出的agent，patient表示患者回答'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        default=False,
+        help='记录每个step的性能剖析span，在工作流日志旁导出Chrome trace（.trace.json），可用benchmark/profile_report.py汇总'
+    )
+    parser.add_argument(
+        '--engine',
+        type=str,
+        choices=['thread', 'async', 'hybrid'],
+        default='thread',
+        help='批处理执行引擎：thread为线程池（每个病例一个线程），async为单事件循环协程（每个病例一个协程），hybrid为多进程×异步（每个进程一个事件循环）'
+    )
+    parser.add_argument(
+        '--num-processes',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='hybrid引擎的工作进程数'
+    )
+    parser.add_argument(
+        '--max-concurrent-cases',
+        type=int,
+        default=200,
+        help='async引擎下同时推进的最大病例数；hybrid引擎下为每个进程同时推进的最大病例数'
+    )
+    parser.add_argument(
+        '--llm-concurrency',
+        type=int,
+        default=64,
+        help='async/hybrid引擎下所有病例（hybrid为所有进程）共享的LLM并发请求上限，0表示不限制'
+    )
+    parser.add_argument(
+        '--results-format',
+        type=str,
+        choices=['auto', 'parquet', 'csv'],
+        default='auto',
+        help='病例结果列式存储格式：parquet需要pyarrow，csv为分块CSV，auto在安装了pyarrow时使用parquet'
+    )
+    parser.add_argument(
+        '--results-chunk-size',
+        type=int,
+        default=500,
+        help='病例结果每个分块文件的行数'
+    )
+    parser.add_argument(
+        '--schedule',
+        type=str,
+        choices=['fifo', 'lef'],
+        default='fifo',
+        help='病例调度策略：fifo按数据集顺序提交，lef按估计耗时从长到短提交（根据病案长度和历史日志中同科室病例的平均步数估计），减少批次末尾长病例单独运行的时间'
+    )
+    parser.add_argument(
+        '--schedule-history',
+        type=str,
+        nargs='+',
+        default=None,
+        help='lef调度和试运行估算使用的历史工作流日志目录，默认为--log-dir和--replay-from'
+    )
+    parser.add_argument(
+        '--queue-db',
+        type=str,
+        default=None,
+        help='共享租约队列的SQLite数据库路径：多个进程（可在不同机器上）使用相同的数据集参数和该路径运行，按需领取病例租约，替代手动划分--start-index/--end-index'
+    )
+    parser.add_argument(
+        '--worker-id',
+        type=str,
+        default=None,
+        help='租约队列中的工作进程标识，默认为"主机名-进程号"'
+    )
+    parser.add_argument(
+        '--lease-seconds',
+        type=float,
+        default=300,
+        help='病例租约时长（秒），工作进程每隔三分之一时长续约；进程崩溃后租约到期，病例由其他进程重新领取'
+    )
+    parser.add_argument(
+        '--max-attempts',
+        type=int,
+        default=3,
+        help='租约队列中每个病例的最大领取次数，执行失败或租约过期达到该次数后标记为失败'
+    )
+    parser.add_argument(
+        '--queue-status',
+        action='store_true',
+        default=False,
+        help='只查看--queue-db的合并进度，并在--output-dir生成所有工作进程的合并摘要报告，不执行病例'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        default=False,
+        help='试运行：不调用LLM，根据真实提示词和历史日志估算本次运行的token用量、费用和总耗时，结果保存到--output-dir'
+    )
+    parser.add_argument(
+        '--dry-run-sample',
+        type=int,
+        default=50,
+        help='试运行时构建提示词的抽样病例数，其余病例按病案长度外推'
+    )
+    parser.add_argument(
+        '--input-price',
+        type=float,
+        default=None,
+        help='输入token价格（元/百万token），默认使用模型的内置价格'
+    )
+    parser.add_argument(
+        '--output-price',
+        type=float,
+        default=None,
+        help='输出token价格（元/百万token），默认使用模型的内置价格'
+    )
     
     
     # 调试和日志
@@ -9,6 +9,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any
 from datetime import datetime
 from utils.update_progress import BatchProcessor
+from utils.build_workflow_kwargs import build_workflow_kwargs
 
 # 设置项目根目录
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -16,78 +17,24 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from research.workflow import MedicalWorkflow
-from config import LLM_CONFIG 
-from guidance.loader import GuidanceLoader
 
 
 def process_single_sample(sample_data: Dict[str, Any], sample_index: int, 
                          args: argparse.Namespace, 
-                         processor: BatchProcessor) -> Dict[str, Any]:
+                         processor: BatchProcessor,
+                         prompter_cache=None,
+                         executor_pool=None,
+                         resume_index=None) -> Dict[str, Any]:
     """处理单个样本的工作函数"""
     thread_id = threading.current_thread().ident
     start_time = time.time()
     
     
     try:
-        # 使用 LLM_CONFIG 作为基础配置
-        # BaseAgent 会根据 model_type 自动选择正确的模型配置
-        llm_config = LLM_CONFIG.copy()
-        
-        # 如果用户提供了额外的模型配置，则合并到对应的模型配置中
-        if args.model_config:
-            try:
-                user_config = json.loads(args.model_config)
-                # 更新选定模型的配置
-                if args.model_type in llm_config:
-                    llm_config[args.model_type]["params"].update(user_config.get("params", {}))
-                else:
-                    logging.warning(f"样本 {sample_index}: 模型类型 {args.model_type} 不存在，忽略用户配置")
-            except json.JSONDecodeError:
-                logging.warning(f"样本 {sample_index}: 模型配置JSON格式错误，使用默认配置")
-        
-        #是否使用固定科室模式
-        department_guidance = ""
-
-        # 初始化 GuidanceLoader
-        loader = GuidanceLoader(
-            department_guidance = department_guidance,
-            use_dynamic_guidance=args.use_dynamic_guidance,
-            use_department_comparison=args.use_department_comparison,
-            department_guidance_file=args.department_guidance_file,
-            comparison_rules_file=args.comparison_rules_file
-        )
-
-        if args.use_inquiry_guidance:
-            if args.department_filter:
-                # 固定科室模式
-                department_guidance = loader.load_inquiry_guidance(args.department_filter)
-                
-                # 将加载好的指导同步回 loader 实例
-                loader.department_guidance = department_guidance
-
-                if department_guidance:
-                    print(f"✅ 已加载 '{args.department_filter}' 科室的固定询问指导")
-                else:
-                    print(f"⚠️ 未能加载 '{args.department_filter}' 科室的询问指导，将使用默认询问模式")
-            else:
-                # 动态指导模式
-                if args.max_steps > 1 and args.use_dynamic_guidance:
-                    print(f"🔄 已启用动态科室询问指导模式")
-                else:
-                    print(f"⚠️ 单步问诊不需要动态指导，将使用默认模式")
-
         # 创建工作流实例
-        workflow = MedicalWorkflow(
-            case_data=sample_data,
-            model_type=args.model_type,
-            llm_config=llm_config,
-            max_steps=args.max_steps,
-            log_dir=args.log_dir,
-            case_index=sample_index,
-            controller_mode=args.controller_mode,
-            guidance_loader=loader, #将 loader 传递给 MedicalWorkflow
-            department_guidance=department_guidance
-        )
+        workflow = MedicalWorkflow(**build_workflow_kwargs(sample_data, sample_index, args, prompter_cache,
+                                                           executor_pool, resume_index))
+        setup_time = time.time() - start_time
         
         # 执行工作流
         logging.debug(f"线程 {thread_id}: 开始处理样本 {sample_index}")
@@ -104,6 +51,7 @@ def process_single_sample(sample_data: Dict[str, Any], sample_index: int,
             'sample_index': sample_index,
             'thread_id': thread_id,
             'execution_time': execution_time,
+            'setup_time': setup_time,
             'log_file_path': log_file_path,
             'workflow_status': workflow_status,
             'medical_summary': medical_summary,
@@ -114,7 +62,7 @@ def process_single_sample(sample_data: Dict[str, Any], sample_index: int,
         # 更新进度
         processor.update_progress(success=True, result=result)
         
-        logging.info(f"样本 {sample_index} 处理完成 (耗时: {execution_time:.2f}s, "
+        logging.info(f"样本 {sample_index} 处理完成 (耗时: {execution_time:.2f}s, 初始化: {setup_time * 1000:.1f}ms, "
                     f"步数: {workflow_status['current_step']}, "
                     f"成功: {workflow_status['workflow_success']})")
         
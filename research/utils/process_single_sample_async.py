@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional
+from datetime import datetime
+from utils.update_progress import BatchProcessor
+from utils.build_workflow_kwargs import build_workflow_kwargs
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow import AsyncMedicalWorkflow
+
+
+async def process_single_sample_async(sample_data: Dict[str, Any], sample_index: int,
+                                      args: argparse.Namespace,
+                                      processor: BatchProcessor,
+                                      prompter_cache=None,
+                                      llm_semaphore: Optional[asyncio.Semaphore] = None,
+                                      executor_pool=None,
+                                      resume_index=None) -> Dict[str, Any]:
+    """在事件循环中处理单个样本的协程，结果格式与process_single_sample一致"""
+    thread_id = threading.current_thread().ident
+    start_time = time.time()
+
+    try:
+        # 创建异步工作流实例，所有病例共享LLM并发配额
+        workflow = AsyncMedicalWorkflow(
+            llm_semaphore=llm_semaphore,
+            **build_workflow_kwargs(sample_data, sample_index, args, prompter_cache, executor_pool,
+                                    resume_index)
+        )
+        setup_time = time.time() - start_time
+
+        logging.debug(f"协程: 开始处理样本 {sample_index}")
+        log_file_path = await workflow.async_run()
+
+        execution_time = time.time() - start_time
+
+        # 获取执行结果
+        workflow_status = workflow.get_current_status()
+        medical_summary = workflow.get_medical_summary()
+
+        result = {
+            'sample_index': sample_index,
+            'thread_id': thread_id,
+            'execution_time': execution_time,
+            'setup_time': setup_time,
+            'log_file_path': log_file_path,
+            'workflow_status': workflow_status,
+            'medical_summary': medical_summary,
+            'processed_at': datetime.now().isoformat()
+        }
+
+        processor.update_progress(success=True, result=result)
+
+        logging.info(f"样本 {sample_index} 处理完成 (耗时: {execution_time:.2f}s, 初始化: {setup_time * 1000:.1f}ms, "
+                    f"步数: {workflow_status['current_step']}, "
+                    f"成功: {workflow_status['workflow_success']})")
+
+        return result
+
+    except Exception as e:
+        execution_time = time.time() - start_time
+        error_msg = f"样本 {sample_index} 处理失败: {str(e)}"
+
+        logging.error(error_msg)
+        processor.update_progress(success=False, error=e, sample_index=sample_index)
+
+        return {
+            'sample_index': sample_index,
+            'thread_id': thread_id,
+            'execution_time': execution_time,
+            'error': str(e),
+            'processed_at': datetime.now().isoformat(),
+            'success': False
+        }
@@ -0,0 +1,224 @@
+"""
+提示词token估算：用与批处理相同配置创建的StepExecutor，调用其中各agent实际使用的提示词构建方法，
+按合成的逐步增长的病例轨迹构建每一步会发送的提示词并估算token数（含系统提示词），不调用LLM。
+合成轨迹：每轮追加一问一答，问答长度取历史日志的平均值；病历（现病史、既往史）随步数按比例增长到病案原文的长度；
+各阶段的步数按历史比例分配，阶段内待完成的任务数逐步减少。
+"""
+import argparse
+import math
+import os
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.build_llm_config import build_llm_config
+from utils.create_guidance_loader import create_guidance_loader
+from utils.run_history import RunHistory
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_system.base import BaseAgent
+from agent_system.inquirer import Inquirer
+from agent_system.prompter import Prompter
+from agent_system.evaluator.score_history import empty_scores
+from research.workflow import StepExecutor, TaskManager, TurnStore, PatientSource
+from research.workflow.task_manager import TaskPhase
+
+# 没有历史日志时的问答长度（字符）和分诊阶段步数
+DEFAULT_QUESTION_CHARS = 60
+DEFAULT_RESPONSE_CHARS = 50
+DEFAULT_TRIAGE_STEPS = 2
+# 分诊阶段最多的步数，与TaskManager.get_current_phase一致
+MAX_TRIAGE_STEPS = 4
+QUESTION_FILLER = "请问您这种情况大概持续多久了？发作的时候还有没有其他不舒服的地方？之前有没有去医院看过或者用过什么药？"
+
+
+class PromptTokenEstimator:
+    """按合成轨迹统计单个病例各agent的LLM调用数和提示词token数"""
+
+    def __init__(self, args: argparse.Namespace, history: Optional[RunHistory] = None):
+        """
+        Args:
+            args: 批处理命令行参数，决定agent组合（Recipient模式、问题生成模式、Controller模式）和指导
+            history: 历史运行统计，用于问答长度和阶段步数比例，为None时使用默认值
+        """
+        loader = create_guidance_loader(args)
+        self.department_guidance = getattr(loader, "department_guidance", "")
+        self.executor = StepExecutor(
+            model_type=args.model_type,
+            llm_config=build_llm_config(args),
+            controller_mode=args.controller_mode,
+            guidance_loader=loader,
+            recipient_mode=args.recipient_mode,
+            recipient_full_interval=args.recipient_full_interval,
+            generation_mode=args.generation_mode
+        )
+        self.task_definitions = TaskManager().task_definitions
+        turn_chars = history.mean_turn_chars() if history else None
+        self.question_chars = round(turn_chars["question"]) if turn_chars else DEFAULT_QUESTION_CHARS
+        self.response_chars = round(turn_chars["response"]) if turn_chars else DEFAULT_RESPONSE_CHARS
+        self.phase_fractions = history.phase_fractions() if history else None
+        # 系统提示词的token数按agent缓存；Inquirer的系统提示词由Prompter生成，按任务使用默认模板
+        self._system_tokens: Dict[int, int] = {}
+        self._inquirers: Dict[str, Inquirer] = {}
+
+    def phase_plan(self, steps: int) -> List[Tuple[TaskPhase, List[Dict[str, str]]]]:
+        """
+        确定合成轨迹每一步的阶段和待完成任务
+
+        Args:
+            steps: 病例的步数
+
+        Returns:
+            List: 每一步的(阶段, 待完成任务列表)
+        """
+        fractions = self.phase_fractions or {}
+        phase_total = sum(fractions.get(phase.value, 0.0) for phase in (TaskPhase.TRIAGE, TaskPhase.HPI, TaskPhase.PH))
+        if phase_total:
+            triage_steps = round(steps * fractions.get(TaskPhase.TRIAGE.value, 0.0) / phase_total)
+            hpi_ratio = fractions.get(TaskPhase.HPI.value, 0.0) / phase_total
+        else:
+            triage_steps = DEFAULT_TRIAGE_STEPS
+            hpi_ratio = None
+        triage_steps = max(1, min(triage_steps, MAX_TRIAGE_STEPS, steps))
+        remaining = steps - triage_steps
+        if hpi_ratio is None:
+            # 没有历史时按任务数在现病史和既往史阶段之间分配
+            hpi_tasks = len(self.task_definitions[TaskPhase.HPI])
+            hpi_steps = round(remaining * hpi_tasks / (hpi_tasks + len(self.task_definitions[TaskPhase.PH])))
+        else:
+            hpi_steps = min(remaining, round(steps * hpi_ratio))
+
+        plan = []
+        for phase, phase_steps in ((TaskPhase.TRIAGE, triage_steps), (TaskPhase.HPI, hpi_steps),
+                                   (TaskPhase.PH, remaining - hpi_steps)):
+            tasks = [{"name": name, "description": definition["description"]}
+                     for name, definition in self.task_definitions[phase].items()]
+            for i in range(phase_steps):
+                completed = i * len(tasks) // phase_steps
+                plan.append((phase, tasks[completed:]))
+        return plan
+
+    def estimate_case(self, case: Dict[str, Any], steps: int) -> Dict[str, Dict[str, int]]:
+        """
+        估算单个病例按给定步数运行时各agent的调用数和提示词token数
+
+        Args:
+            case: 病例数据
+            steps: 步数
+
+        Returns:
+            Dict: agent名到{"calls", "prompt_tokens"}的映射
+        """
+        executor = self.executor
+        executor.reset_case_state("dry-run", self.department_guidance)
+        case_info = case.get("病案介绍", {})
+        full_hpi = case_info.get("现病史", "")
+        full_ph = case_info.get("既往史", "")
+        full_chief_complaint = case_info.get("主诉", "")
+        department = f"{case.get('一级科室', '')}-{case.get('二级科室', '')}"
+        triage_result = {"primary_department": case.get("一级科室", ""), "secondary_department": case.get("二级科室", "")}
+        answer_source = full_hpi or full_chief_complaint or QUESTION_FILLER
+
+        usage: Dict[str, Dict[str, int]] = {}
+        turn_store = TurnStore()
+        hpi, ph, chief_complaint = "", "", ""
+        question = ""
+        guidance = self.department_guidance
+        plan = self.phase_plan(steps)
+        for step, (phase, pending_tasks) in enumerate(plan, 1):
+            is_first_step = step == 1
+
+            # 患者回答
+            patient = executor.patient_source.virtual_patient
+            self._count(usage, "virtual_patient", patient, patient._build_prompt(
+                PatientSource.FIRST_INQUIRY if is_first_step else question, is_first_step, case))
+            response = _take(answer_source, (step - 1) * self.response_chars, self.response_chars)
+            turn_store.append(step, "" if is_first_step else question, response)
+
+            # Recipient：全量模式发送完整对话，增量模式只发送最新一轮
+            if executor._should_run_full_recipient(step, phase, hpi):
+                executor._recipient_last_full_step = step
+                executor._recipient_last_phase = phase
+                self._count(usage, "recipient", executor.recipient, executor.recipient.build_prompt(
+                    turn_store.render_conversation(), hpi, ph, chief_complaint))
+            else:
+                self._count(usage, "recipient_delta", executor.recipient_delta, executor.recipient_delta.build_prompt(
+                    question, response, hpi, ph, chief_complaint))
+            progress = step / len(plan)
+            hpi = "现病史：" + full_hpi[:math.ceil(len(full_hpi) * progress)]
+            ph = "既往史：" + full_ph[:math.ceil(len(full_ph) * progress)]
+            chief_complaint = full_chief_complaint
+
+            # Triager，分诊后按科室切换询问指导
+            if phase == TaskPhase.TRIAGE:
+                self._count(usage, "triager", executor.triager, executor.triager.build_prompt(
+                    chief_complaint, hpi, ph, guidance + "\n\n【科室对比鉴别指导】\n无对比建议"))
+                guidance = executor.guidance_loader.update_guidance_for_Triager(department)
+
+            # Monitor逐个评估当前阶段的待完成任务
+            for task in pending_tasks:
+                self._count(usage, "monitor", executor.monitor, executor.monitor._build_run_prompt(
+                    hpi, ph, chief_complaint, task["name"], task["description"],
+                    triage_result if phase == TaskPhase.TRIAGE else None))
+
+            # 问题生成
+            task_name = pending_tasks[0]["name"]
+            if executor.generation_mode == "fused":
+                fixed_task = task_name if executor._is_rule_based_controller() else None
+                self._count(usage, "fused_inquirer", executor.fused_inquirer, executor.fused_inquirer._build_prompt(
+                    pending_tasks, chief_complaint, hpi, ph, guidance, fixed_task))
+            else:
+                if not executor._is_rule_based_controller():
+                    self._count(usage, "controller", executor.controller, executor.controller._build_decision_prompt(
+                        pending_tasks, chief_complaint, hpi, ph))
+                specific_guidance = executor.controller._get_fallback_result(pending_tasks).specific_guidance
+                self._count(usage, "prompter", executor.prompter, executor.prompter._build_prompt(
+                    hpi, ph, chief_complaint, task_name, specific_guidance))
+                inquirer = self._inquirer(task_name)
+                inquirer.department_inquiry_guidance = guidance
+                self._count(usage, "inquirer", inquirer, inquirer._build_prompt(hpi, ph, chief_complaint))
+            question = _take(QUESTION_FILLER, 0, self.question_chars)
+
+            # Evaluator，与StepExecutor._evaluator_input相同的多轮数据
+            rounds = turn_store.to_rounds()
+            rounds[-1].update({"HPI": hpi, "PH": ph, "chief_complaint": chief_complaint})
+            for round_data in rounds:
+                round_data["evaluation_scores"] = empty_scores()
+            self._count(usage, "evaluator", executor.evaluator, executor.evaluator.build_prompt(
+                case, step, rounds, empty_scores()))
+        return usage
+
+    def _inquirer(self, task_name: str) -> Inquirer:
+        """按任务创建使用Prompter默认模板的Inquirer"""
+        inquirer = self._inquirers.get(task_name)
+        if inquirer is None:
+            template = Prompter._get_fallback_result(task_name)
+            inquirer = Inquirer(
+                description=template.description,
+                instructions=template.instructions,
+                model_type=self.executor.model_type,
+                llm_config=self.executor.llm_config
+            )
+            self._inquirers[task_name] = inquirer
+        return inquirer
+
+    def _count(self, usage: Dict[str, Dict[str, int]], name: str, agent: BaseAgent, prompt: str):
+        """累计一次调用，提示词token数与BaseAgent.run的估算方式相同"""
+        system_tokens = self._system_tokens.get(id(agent))
+        if system_tokens is None:
+            system_tokens = self._system_tokens[id(agent)] = BaseAgent.estimate_tokens(agent._system_prompt_text)
+        stats = usage.setdefault(name, {"calls": 0, "prompt_tokens": 0})
+        stats["calls"] += 1
+        stats["prompt_tokens"] += system_tokens + BaseAgent.estimate_tokens(prompt)
+
+
+def _take(text: str, start: int, length: int) -> str:
+    """从text的start处循环截取length个字符"""
+    if not text or length <= 0:
+        return ""
+    repeated = text * (length // len(text) + 2)
+    start %= len(text)
+    return repeated[start:start + length]
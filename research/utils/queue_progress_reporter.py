@@ -0,0 +1,40 @@
+import logging
+from typing import Dict, Any
+
+
+class QueueProgressReporter:
+    """
+    工作进程中的进度上报器
+    提供与BatchProcessor相同的update_progress/update_skipped接口，将进度事件写入进度队列，
+    由父进程转发给BatchProcessor
+    """
+    
+    def __init__(self, progress_queue, worker_id: int):
+        """
+        Args:
+            progress_queue: 父进程创建的multiprocessing队列
+            worker_id: 工作进程编号
+        """
+        self.progress_queue = progress_queue
+        self.worker_id = worker_id
+    
+    def update_progress(self, success: bool, result: Dict[str, Any] = None,
+                        error: Exception = None, sample_index: int = None):
+        """上报一个样本的处理结果，异常以字符串形式传回父进程"""
+        if sample_index is None and result:
+            sample_index = result.get('sample_index')
+        self.progress_queue.put(("progress", self.worker_id, {
+            'success': success,
+            'result': result,
+            'error': str(error) if error is not None else None,
+            'sample_index': sample_index
+        }))
+    
+    def update_skipped(self, sample_index: int):
+        """上报跳过的样本"""
+        self.progress_queue.put(("skipped", self.worker_id, {'sample_index': sample_index}))
+    
+    def report_done(self, stats: Dict[str, Any]):
+        """上报工作进程结束及其统计信息"""
+        logging.info(f"工作进程 {self.worker_id} 完成: {stats}")
+        self.progress_queue.put(("done", self.worker_id, stats))
@@ -0,0 +1,354 @@
+"""
+批处理结果的列式存储：每个病例的结果展开为固定类型的列（步数、耗时、各阶段完成率、分诊结果等），
+按块追加写入结果目录，不在内存中累积。安装了pyarrow时每块写为一个Parquet文件，否则写为CSV文件，
+列类型记录在目录下的_schema.json中。摘要统计在写入时增量累计，不需要重新读取结果。
+尚未写成分块的行同时逐行追加到预写日志_pending.jsonl，进程崩溃时不会丢失；读取结果目录时也会读取预写日志中的行。
+"""
+import os
+import csv
+import json
+import logging
+import threading
+from typing import Dict, Any, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+SCHEMA_FILENAME = "_schema.json"
+# 尚未写成分块的行，每个分块写出后清空
+WAL_FILENAME = "_pending.jsonl"
+# 与工作流配置中的phases一致
+PHASES = ("triage", "hpi", "ph")
+
+# 列名和类型（int/float/bool/str），所有列均可为空
+RESULT_COLUMNS = [
+    ("sample_index", "int"),
+    ("success", "bool"),
+    ("error", "str"),
+    ("thread_id", "int"),
+    ("execution_time", "float"),
+    ("setup_time", "float"),
+    ("current_step", "int"),
+    ("max_steps", "int"),
+    ("current_phase", "str"),
+    ("workflow_completed", "bool"),
+    ("workflow_success", "bool"),
+    ("conversation_length", "int"),
+] + [
+    (f"{phase}_{field}", field_type)
+    for phase in PHASES
+    for field, field_type in (("completed", "int"), ("total", "int"), ("completion_rate", "float"))
+] + [
+    ("primary_department", "str"),
+    ("secondary_department", "str"),
+    ("candidate_primary_department", "str"),
+    ("candidate_secondary_department", "str"),
+    ("chief_complaint", "str"),
+    ("history_of_present_illness", "str"),
+    ("past_history", "str"),
+    ("log_file_path", "str"),
+    ("processed_at", "str"),
+]
+COLUMN_TYPES = dict(RESULT_COLUMNS)
+
+
+def flatten_result(result: Dict[str, Any], success: bool = True) -> Dict[str, Any]:
+    """
+    将process_single_sample的结果展开为一行
+
+    Args:
+        result: 病例结果（失败时只有sample_index、error等字段）
+        success: 病例是否处理成功
+
+    Returns:
+        Dict: 列名到值的映射，缺失的列为None
+    """
+    status = result.get("workflow_status") or {}
+    phases = (status.get("completion_summary") or {}).get("phases", {})
+    triage = status.get("triage_info") or {}
+    medical_summary = result.get("medical_summary") or {}
+    row = {
+        "sample_index": result.get("sample_index"),
+        "success": success,
+        "error": result.get("error"),
+        "thread_id": result.get("thread_id"),
+        "execution_time": result.get("execution_time"),
+        "setup_time": result.get("setup_time"),
+        "current_step": status.get("current_step"),
+        "max_steps": status.get("max_steps"),
+        "current_phase": status.get("current_phase"),
+        "workflow_completed": status.get("workflow_completed"),
+        "workflow_success": status.get("workflow_success"),
+        "conversation_length": status.get("conversation_length"),
+        "primary_department": triage.get("primary_department"),
+        "secondary_department": triage.get("secondary_department"),
+        "candidate_primary_department": triage.get("candidate_primary_department"),
+        "candidate_secondary_department": triage.get("candidate_secondary_department"),
+        "chief_complaint": medical_summary.get("chief_complaint"),
+        "history_of_present_illness": medical_summary.get("history_of_present_illness"),
+        "past_history": medical_summary.get("past_history"),
+        "log_file_path": result.get("log_file_path"),
+        "processed_at": result.get("processed_at"),
+    }
+    for phase in PHASES:
+        phase_summary = phases.get(phase) or {}
+        for field in ("completed", "total", "completion_rate"):
+            row[f"{phase}_{field}"] = phase_summary.get(field)
+    return row
+
+
+class ResultStats:
+    """结果摘要统计，逐行增量累计"""
+
+    def __init__(self):
+        self.rows = 0
+        self.succeeded = 0
+        self.workflow_success = 0
+        self.execution_time_sum = 0.0
+        self.execution_time_max = 0.0
+        self.setup_time_sum = 0.0
+        self.steps_sum = 0
+        self.steps_histogram: Dict[int, int] = {}
+        self.phase_completion_sum = {phase: 0.0 for phase in PHASES}
+        self.primary_departments: Dict[str, int] = {}
+
+    def add(self, row: Dict[str, Any]):
+        """累计一行结果，失败的病例只计入行数"""
+        self.rows += 1
+        if not row.get("success"):
+            return
+        self.succeeded += 1
+        if row.get("workflow_success"):
+            self.workflow_success += 1
+        execution_time = row.get("execution_time") or 0.0
+        self.execution_time_sum += execution_time
+        self.execution_time_max = max(self.execution_time_max, execution_time)
+        self.setup_time_sum += row.get("setup_time") or 0.0
+        steps = row.get("current_step") or 0
+        self.steps_sum += steps
+        self.steps_histogram[steps] = self.steps_histogram.get(steps, 0) + 1
+        for phase in PHASES:
+            self.phase_completion_sum[phase] += row.get(f"{phase}_completion_rate") or 0.0
+        department = row.get("primary_department") or ""
+        self.primary_departments[department] = self.primary_departments.get(department, 0) + 1
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        获取摘要
+
+        Returns:
+            Dict: 工作流成功率、平均耗时与步数、步数分布、各阶段平均完成率和分诊科室分布
+        """
+        count = max(self.succeeded, 1)
+        return {
+            "rows": self.rows,
+            "succeeded": self.succeeded,
+            "workflow_success_rate": self.workflow_success / count,
+            "mean_execution_time": self.execution_time_sum / count,
+            "max_execution_time": self.execution_time_max,
+            "mean_setup_time": self.setup_time_sum / count,
+            "mean_steps": self.steps_sum / count,
+            "steps_histogram": dict(sorted(self.steps_histogram.items())),
+            "mean_phase_completion_rate": {
+                phase: total / count for phase, total in self.phase_completion_sum.items()
+            },
+            "primary_departments": self.primary_departments
+        }
+
+
+class ResultsSink:
+    """
+    结果目录写入器，线程安全
+    每chunk_size行写出一个分块文件（part-00000.parquet或part-00000.csv），close时写出剩余的行；
+    缓冲区中的行同时写入预写日志，分块写出失败时保留在缓冲区和预写日志中，下次写出时重试；
+    进程崩溃时预写日志保留在目录中，读取结果目录时一并读取
+    """
+
+    def __init__(self, path: str, chunk_size: int = 500, results_format: str = "auto"):
+        """
+        Args:
+            path: 结果目录，必须尚不存在
+            chunk_size: 每个分块文件的行数
+            results_format: parquet、csv或auto（安装了pyarrow时使用parquet）
+        """
+        if results_format == "auto":
+            results_format = "parquet" if PYARROW_AVAILABLE else "csv"
+        if results_format == "parquet" and not PYARROW_AVAILABLE:
+            raise ImportError("写入Parquet需要安装pyarrow，或使用--results-format csv")
+        self.path = path
+        self.chunk_size = max(1, chunk_size)
+        self.results_format = results_format
+        self.stats = ResultStats()
+        self._rows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # 目录已存在时抛出FileExistsError，保证每个结果目录只有一个写入器，分块和预写日志不会被其他写入器覆盖或清空
+        os.makedirs(path)
+        self._part = 0
+        with open(os.path.join(path, SCHEMA_FILENAME), "w", encoding="utf-8") as f:
+            json.dump({"format": results_format, "columns": RESULT_COLUMNS}, f, ensure_ascii=False, indent=2)
+        self._wal_path = os.path.join(path, WAL_FILENAME)
+        self._wal = open(self._wal_path, "x", encoding="utf-8")
+
+    def append(self, result: Dict[str, Any], success: bool = True):
+        """追加一个病例的结果"""
+        row = flatten_result(result, success)
+        with self._lock:
+            self.stats.add(row)
+            self._rows.append(row)
+            try:
+                self._wal.write(json.dumps(row, ensure_ascii=False) + "\n")
+                self._wal.flush()
+            except Exception as e:
+                logging.error(f"结果预写日志写入失败 {self._wal_path}: {e}")
+            if len(self._rows) >= self.chunk_size:
+                self._flush()
+
+    def close(self):
+        """写出缓冲区中剩余的行，全部写出后删除预写日志"""
+        with self._lock:
+            if self._rows:
+                self._flush()
+            self._wal.close()
+            if not self._rows:
+                try:
+                    os.remove(self._wal_path)
+                except OSError:
+                    pass
+
+    def get_summary(self) -> Dict[str, Any]:
+        """获取已写入结果的摘要统计"""
+        with self._lock:
+            return self.stats.get_summary()
+
+    def _flush(self):
+        """写出一个分块文件并清空预写日志，调用方需持有锁；写出失败时保留缓冲区中的行"""
+        part_path = os.path.join(self.path, f"part-{self._part:05d}.{self.results_format}")
+        try:
+            if self.results_format == "parquet":
+                _write_parquet(self._rows, part_path)
+            else:
+                _write_csv(self._rows, part_path)
+        except Exception as e:
+            logging.error(f"结果分块写入失败 {part_path}，{len(self._rows)} 行保留在预写日志中: {e}")
+            try:
+                os.remove(part_path + ".tmp")
+            except OSError:
+                pass
+            return
+        self._part += 1
+        self._rows = []
+        try:
+            self._wal.truncate(0)
+        except Exception as e:
+            # 分块已写出，预写日志中的行会在读取时重复，记录错误即可
+            logging.error(f"结果预写日志清空失败 {self._wal_path}: {e}")
+
+
+_ARROW_TYPES = {"int": "int64", "float": "float64", "bool": "bool_", "str": "string"}
+
+
+def _write_parquet(rows: List[Dict[str, Any]], part_path: str):
+    schema = pa.schema([(name, getattr(pa, _ARROW_TYPES[column_type])()) for name, column_type in RESULT_COLUMNS])
+    table = pa.Table.from_pydict({name: [row[name] for row in rows] for name, _ in RESULT_COLUMNS}, schema=schema)
+    temp_path = part_path + ".tmp"
+    pq.write_table(table, temp_path)
+    os.replace(temp_path, part_path)
+
+
+def _write_csv(rows: List[Dict[str, Any]], part_path: str):
+    temp_path = part_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=[name for name, _ in RESULT_COLUMNS])
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(temp_path, part_path)
+
+
+def _parse_value(value: str, column_type: str):
+    if value == "":
+        return None
+    if column_type == "int":
+        return int(value)
+    if column_type == "float":
+        return float(value)
+    if column_type == "bool":
+        return value == "True"
+    return value
+
+
+def _read_wal(wal_path: str) -> Iterator[Dict[str, Any]]:
+    """读取预写日志中的行，跳过崩溃时写了一半的最后一行"""
+    if not os.path.exists(wal_path):
+        return
+    with open(wal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_result_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    按分块顺序逐行读取结果目录，每次只加载一个分块，最后读取预写日志中尚未写成分块的行
+
+    Args:
+        path: 结果目录
+
+    Yields:
+        Dict: 按_schema.json中的类型解析后的一行结果
+    """
+    for part_name in sorted(os.listdir(path)):
+        part_path = os.path.join(path, part_name)
+        if part_name.endswith(".parquet"):
+            if not PYARROW_AVAILABLE:
+                raise ImportError("读取Parquet结果需要安装pyarrow")
+            yield from pq.read_table(part_path).to_pylist()
+        elif part_name.endswith(".csv"):
+            with open(part_path, "r", encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    yield {name: _parse_value(value, COLUMN_TYPES.get(name, "str")) for name, value in row.items()}
+    yield from _read_wal(os.path.join(path, WAL_FILENAME))
+
+
+def summarize_results(path: str) -> Dict[str, Any]:
+    """从结果目录流式重新计算摘要统计，用于运行结束后的分析"""
+    stats = ResultStats()
+    for row in iter_result_rows(path):
+        stats.add(row)
+    return stats.get_summary()
+
+
+def load_results(path: str, columns: Optional[List[str]] = None):
+    """
+    将结果目录加载为pandas DataFrame，用于运行结束后的分析
+
+    Args:
+        path: 结果目录
+        columns: 只加载的列，为None时加载全部列
+
+    Returns:
+        pandas.DataFrame
+    """
+    import pandas as pd
+
+    with open(os.path.join(path, SCHEMA_FILENAME), "r", encoding="utf-8") as f:
+        schema = json.load(f)
+    dtypes = {"int": "Int64", "float": "float64", "bool": "boolean", "str": "string"}
+    column_dtypes = {name: dtypes[column_type] for name, column_type in schema["columns"]}
+    parts = sorted(name for name in os.listdir(path) if name.endswith("." + schema["format"]))
+    if schema["format"] == "parquet":
+        frames = [pd.read_parquet(os.path.join(path, name), columns=columns) for name in parts]
+    else:
+        frames = [pd.read_csv(os.path.join(path, name), usecols=columns, dtype=column_dtypes) for name in parts]
+    pending = list(_read_wal(os.path.join(path, WAL_FILENAME)))
+    if pending:
+        pending_frame = pd.DataFrame(pending, columns=[name for name, _ in schema["columns"]]).astype(column_dtypes)
+        frames.append(pending_frame[columns] if columns else pending_frame)
+    if not frames:
+        return pd.DataFrame(columns=columns or [name for name, _ in schema["columns"]])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,78 @@
+"""
+续跑索引：启动时读取一次完成清单并扫描一次日志目录，之后每个case的完成判断都是内存查找。
+清单中没有记录但存在日志的case（旧版本生成的目录、或写入清单前中断的case）回退到is_case_completed检查，
+检查确认完成的case会补写到清单中。
+多个工作进程共享日志目录时应关闭remove_incomplete，回退检查只读取日志，不删除其他进程正在写入的日志。
+"""
+import os
+import sys
+import time
+import logging
+from typing import Optional
+
+from utils.list_logged_cases import list_logged_cases
+from utils.is_case_completed import is_case_completed
+from utils.find_resume_checkpoint import find_resume_checkpoint
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow.completion_manifest import CompletionManifest
+
+
+class ResumeIndex:
+    """批处理续跑时判断case是否已完成"""
+
+    def __init__(self, log_dir: str, remove_incomplete: bool = True):
+        """
+        Args:
+            log_dir: 工作流日志目录
+            remove_incomplete: 回退检查时是否删除不完整的日志
+        """
+        start_time = time.time()
+        self.log_dir = log_dir
+        self.remove_incomplete = remove_incomplete
+        self.logged_cases = list_logged_cases(log_dir)
+        # 清单记录的日志仍存在时才视为已完成，日志被删除的case重新运行
+        self.completed_cases = {
+            case_index
+            for case_index, record in CompletionManifest(log_dir).load().items()
+            if record.get("log_file") in self.logged_cases.get(case_index, ())
+        }
+        logging.info(f"续跑索引: 清单中已完成 {len(self.completed_cases)} 个case, "
+                     f"日志目录中共 {len(self.logged_cases)} 个case, 耗时 {(time.time() - start_time) * 1000:.1f}ms")
+
+    def is_completed(self, case_index: int) -> bool:
+        """
+        判断case是否已完成，不在清单中的已有日志由is_case_completed检查（remove_incomplete时并清理不完整的日志）
+
+        Args:
+            case_index: case序号
+
+        Returns:
+            bool: 已完成返回True
+        """
+        if case_index in self.completed_cases:
+            return True
+        if case_index in self.logged_cases:
+            return is_case_completed(self.log_dir, case_index, [
+                os.path.join(self.log_dir, filename) for filename in self.logged_cases[case_index]
+            ], remove_incomplete=self.remove_incomplete)
+        return False
+
+    def find_checkpoint(self, case_index: int) -> Optional[str]:
+        """
+        查找case可用于断点续跑的检查点，只检查启动时扫描到的该case的日志，没有日志的case直接返回None
+
+        Args:
+            case_index: case序号
+
+        Returns:
+            Optional[str]: 检查点文件路径，不存在可用检查点时返回None
+        """
+        log_files = self.logged_cases.get(case_index)
+        if not log_files:
+            return None
+        return find_resume_checkpoint(self.log_dir, case_index, log_files)
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from typing import Iterable, Dict, Any, Tuple
+import argparse
+
+from utils.process_single_sample_async import process_single_sample_async
+
+
+async def run_cases_async(cases: Iterable[Tuple[int, Dict[str, Any]]], args: argparse.Namespace,
+                          processor, prompter_cache=None, llm_semaphore=None,
+                          executor_pool=None, resume_index=None) -> int:
+    """
+    在当前事件循环中并发处理一组病例，同时进行的病例数不超过args.max_concurrent_cases
+    病例按需从cases中取出：生产者协程在线程中逐个迭代（读取病例、续跑检查等文件操作不阻塞事件循环），
+    经容量为1的队列交给max_concurrent_cases个工作协程，内存中只保留正在处理的病例
+    
+    Args:
+        cases: (样本序号, 样本数据) 的可迭代对象，可以是按需读取病例的生成器
+        args: 命令行参数
+        processor: 进度管理器（BatchProcessor或工作进程中的QueueProgressReporter）
+        prompter_cache: Prompter模板缓存
+        llm_semaphore: LLM并发限制（asyncio.Semaphore或跨进程的SharedLLMLimiter），为None时不限制
+        executor_pool: 并发病例复用的step执行器池，为None时每个病例新建执行器
+        resume_index: 续跑索引，用于查找病例的检查点，为None时不从检查点续跑
+
+    Returns:
+        int: 处理的病例数
+    """
+    num_workers = max(1, args.max_concurrent_cases)
+    case_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    case_iter = iter(cases)
+    
+    async def produce():
+        try:
+            while True:
+                case = await asyncio.to_thread(next, case_iter, None)
+                if case is None:
+                    break
+                await case_queue.put(case)
+        except Exception as e:
+            logging.error(f"读取病例失败，停止提交新病例: {e}")
+        # 每个工作协程一个结束标记
+        for _ in range(num_workers):
+            await case_queue.put(None)
+    
+    async def work() -> int:
+        processed = 0
+        while True:
+            case = await case_queue.get()
+            if case is None:
+                return processed
+            sample_index, sample_data = case
+            try:
+                await process_single_sample_async(
+                    sample_data, sample_index, args, processor, prompter_cache, llm_semaphore, executor_pool,
+                    resume_index
+                )
+            except Exception as e:
+                logging.error(f"协程执行异常 (case_{sample_index}): {e}")
+            processed += 1
+
+    workers = [asyncio.create_task(work(), name=f"case_worker_{i}") for i in range(num_workers)]
+    _, *processed = await asyncio.gather(produce(), *workers)
+    return sum(processed)
@@ -0,0 +1,178 @@
+"""
+历史运行统计：从以往的工作流日志中统计病例步数分布、各阶段步数、各agent每次LLM调用的平均延迟和输出token数，
+以及因分诊复用、Monitor评分复用和Prompter模板缓存而省去的调用比例，供试运行估算使用。
+步数取自完成清单中的全部记录；延迟等统计只解析最近的若干个日志文件。
+"""
+import os
+import sys
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_system.base import BaseAgent
+from research.workflow.completion_manifest import CompletionManifest
+
+# 输出内容能代表LLM响应长度的agent；Monitor日志只记录评分汇总，不用于估计输出token数
+_OUTPUT_SAMPLED_AGENTS = ("virtual_patient", "recipient", "recipient_delta", "triager", "controller",
+                          "prompter", "inquirer", "fused_inquirer", "evaluator")
+
+
+class RunHistory:
+    """以往运行的步数、延迟和调用比例统计"""
+
+    def __init__(self, history_dirs: List[str], max_steps: int, log_limit: int = 200):
+        """
+        Args:
+            history_dirs: 历史工作流日志目录
+            max_steps: 本次运行的最大步数，历史步数超过该值时按该值计算
+            log_limit: 最多解析的日志文件数，按完成时间从新到旧选取
+        """
+        self.max_steps = max_steps
+        self.steps: List[int] = []
+        self.log_count = 0
+        self.phase_steps: Dict[str, int] = {}
+        self.step_seconds: List[float] = []
+        # agent名 -> 日志记录数、实际LLM调用数、按结构应有的调用数、调用耗时、输出token数及其样本数
+        self.agents: Dict[str, Dict[str, float]] = {}
+        self.question_chars = 0
+        self.response_chars = 0
+        self.turns = 0
+        self._load(history_dirs, log_limit)
+
+    def _load(self, history_dirs: List[str], log_limit: int):
+        start_time = time.time()
+        records = []
+        for log_dir in history_dirs:
+            for record in CompletionManifest(log_dir).load().values():
+                self.steps.append(min(record.get("total_steps", self.max_steps), self.max_steps))
+                records.append((record.get("completed_at", ""), os.path.join(log_dir, record.get("log_file", ""))))
+
+        for _, log_file_path in sorted(records, reverse=True)[:log_limit]:
+            try:
+                with open(log_file_path, "r", encoding="utf-8") as f:
+                    self._parse_log(f)
+                self.log_count += 1
+            except OSError:
+                continue
+        logging.info(f"历史运行统计: 完成清单记录 {len(self.steps)} 条, 解析日志 {self.log_count} 个, "
+                     f"耗时 {(time.time() - start_time) * 1000:.1f}ms")
+
+    def _parse_log(self, lines):
+        step_started: Optional[datetime] = None
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            event_type = entry.get("event_type")
+            if event_type == "step_start":
+                step_started = datetime.fromisoformat(entry["timestamp"])
+                phase = entry.get("current_phase", "")
+                self.phase_steps[phase] = self.phase_steps.get(phase, 0) + 1
+            elif event_type == "step_complete" and step_started is not None:
+                self.step_seconds.append((datetime.fromisoformat(entry["timestamp"]) - step_started).total_seconds())
+                step_started = None
+            elif event_type == "patient_response":
+                self.response_chars += len(entry.get("message", ""))
+                self.turns += 1
+            elif event_type == "question_generation":
+                self.question_chars += len(entry.get("doctor_question", ""))
+            elif event_type == "agent_execution":
+                self._add_agent_execution(entry)
+
+    def _add_agent_execution(self, entry: Dict[str, Any]):
+        """累计一条agent执行记录，跳过的分诊、命中缓存的Prompter不计为LLM调用"""
+        name = entry.get("agent_name", "")
+        input_data = entry.get("input_data") or {}
+        output_data = entry.get("output_data") or {}
+        if name == "recipient" and input_data.get("mode") == "delta":
+            name = "recipient_delta"
+            output_data = output_data.get("patch", output_data)
+
+        expected_calls = 1
+        calls = 1
+        if name == "monitor":
+            expected_calls = len(input_data.get("pending_tasks", []))
+            calls = len(output_data.get("evaluated_tasks", []))
+        elif name == "triager" and output_data.get("skipped"):
+            calls = 0
+        elif name == "prompter" and output_data.get("cache_hit"):
+            calls = 0
+
+        stats = self.agents.setdefault(name, {"executions": 0, "calls": 0, "expected_calls": 0, "seconds": 0.0,
+                                              "completion_tokens": 0, "output_samples": 0})
+        stats["executions"] += 1
+        stats["calls"] += calls
+        stats["expected_calls"] += expected_calls
+        if calls:
+            stats["seconds"] += entry.get("execution_time_seconds") or 0.0
+            if name in _OUTPUT_SAMPLED_AGENTS:
+                stats["completion_tokens"] += BaseAgent.estimate_tokens(json.dumps(output_data, ensure_ascii=False))
+                stats["output_samples"] += 1
+
+    def call_latency(self, agent_name: str) -> Optional[float]:
+        """该agent每次LLM调用的平均延迟（秒），没有历史记录时返回None"""
+        stats = self.agents.get(agent_name)
+        if not stats or not stats["calls"]:
+            return None
+        return stats["seconds"] / stats["calls"]
+
+    def completion_tokens(self, agent_name: str) -> Optional[float]:
+        """该agent每次LLM调用的平均输出token数，没有历史记录时返回None"""
+        stats = self.agents.get(agent_name)
+        if not stats or not stats["output_samples"]:
+            return None
+        return stats["completion_tokens"] / stats["output_samples"]
+
+    def call_rate(self, agent_name: str) -> float:
+        """实际LLM调用数与按流程结构应有调用数之比，反映跳过和缓存的效果；没有历史记录时为1"""
+        stats = self.agents.get(agent_name)
+        if not stats or not stats["expected_calls"]:
+            return 1.0
+        return stats["calls"] / stats["expected_calls"]
+
+    def mean_turn_chars(self) -> Optional[Dict[str, float]]:
+        """医生问题和患者回答的平均字符数，没有历史记录时返回None"""
+        if not self.turns:
+            return None
+        return {"question": self.question_chars / self.turns, "response": self.response_chars / self.turns}
+
+    def phase_fractions(self) -> Optional[Dict[str, float]]:
+        """各阶段步数占总步数的比例，没有历史记录时返回None"""
+        total = sum(self.phase_steps.values())
+        if not total:
+            return None
+        return {phase: count / total for phase, count in self.phase_steps.items()}
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        获取统计摘要
+
+        Returns:
+            Dict: 病例数、步数分位数、平均步耗时、各阶段比例和各agent的调用统计
+        """
+        steps = sorted(self.steps)
+        return {
+            "cases": len(steps),
+            "parsed_logs": self.log_count,
+            "mean_steps": sum(steps) / len(steps) if steps else None,
+            "p50_steps": steps[len(steps) // 2] if steps else None,
+            "p90_steps": steps[min(len(steps) - 1, int(len(steps) * 0.9))] if steps else None,
+            "mean_step_seconds": sum(self.step_seconds) / len(self.step_seconds) if self.step_seconds else None,
+            "phase_fractions": self.phase_fractions(),
+            "agents": {
+                name: {
+                    "call_rate": self.call_rate(name),
+                    "call_latency": self.call_latency(name),
+                    "completion_tokens": self.completion_tokens(name)
+                }
+                for name in sorted(self.agents)
+            }
+        }
@@ -1,92 +1,135 @@
 import os
+import sys
 import time
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterable, Dict, Any
 import argparse
 
 from utils.update_progress import BatchProcessor 
-from utils.print_progress_report import print_progress_report 
-from utils.is_case_completed import is_case_completed 
 from utils.process_single_sample import process_single_sample  
+from utils.create_prompter_cache import create_prompter_cache
+from utils.build_batch_summary import build_batch_summary
+from utils.resume_index import ResumeIndex
+from utils.create_step_executor_pool import create_step_executor_pool
+from utils.create_results_sink import create_results_sink
+from utils.order_cases import order_cases
+from utils.create_concurrency_controller import create_concurrency_controller
 
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
-def run_workflow_batch(dataset: List[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
-    """执行批量工作流处理"""
-    total_samples = len(dataset)
-    logging.info(f"使用 {args.num_threads} 个线程")
-    
-    # 创建批处理管理器
-    processor = BatchProcessor(num_threads=args.num_threads)
-    processor.start_time = time.time()
+from agent_system.base.call_monitor import set_call_observer
+
+
+def run_workflow_batch(dataset: Iterable[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    执行批量工作流处理
+    从数据集迭代器中按需取出case，线程池中同时存在的任务不超过2倍线程数；
+    完成的结果逐条写入输出目录下的列式结果目录，不在内存中累积。
+    lef调度需要按位置随机读取，dataset须支持len()和下标访问。
+    启用自适应并发时，同时运行的case数由ConcurrencyController根据LLM调用延迟、失败率和吞吐在上下限之间调整
+    """
+    controller = create_concurrency_controller(args)
+    if controller is None:
+        logging.info(f"使用 {args.num_threads} 个线程")
     
     # 创建输出目录
     os.makedirs(args.output_dir, exist_ok=True)
     os.makedirs(args.log_dir, exist_ok=True)
     
+    # 创建批处理管理器，结果流式写入结果目录
+    processor = BatchProcessor(num_threads=args.num_threads, results_sink=create_results_sink(args))
+    processor.start_time = time.time()
+    
+    # 创建批处理共享的Prompter模板缓存
+    prompter_cache = create_prompter_cache(args)
+    
+    # 各工作线程复用的step执行器池
+    executor_pool = create_step_executor_pool(args, prompter_cache)
+    
+    # 启动时读取一次完成清单，之后按需判断每个case是否已完成
+    resume_index = ResumeIndex(args.log_dir)
+    max_in_flight = max(1, args.num_threads * 2)
+    max_workers = controller.max_limit if controller is not None else args.num_threads
+    previous_observer = set_call_observer(controller) if controller is not None else None
+    if args.schedule == "lef":
+        case_order = order_cases(dataset, args)
+        cases = ((i, dataset[i]) for i in case_order)
+    else:
+        case_order = None
+        cases = enumerate(dataset)
+    total_samples = 0
+    
     try:
         # 使用线程池执行批处理
-        with ThreadPoolExecutor(max_workers=args.num_threads) as executor:
-            # 提交所有任务
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_index = {}
-            for i, sample_data in enumerate(dataset):
-                sample_index = args.start_index + i
+            exhausted = False
+            while True:
+                # 补充任务直到达到在途上限；自适应并发时在途任务数即为同时运行的case数
+                if controller is not None:
+                    max_in_flight = controller.maybe_adjust(processor.get_progress_stats())
+                while not exhausted and len(future_to_index) < max_in_flight:
+                    try:
+                        i, sample_data = next(cases)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    total_samples += 1
+                    sample_index = args.start_index + i
                 
-                # 检查case是否已经完成
-                if is_case_completed(args.log_dir, sample_index):
-                    processor.update_skipped(sample_index)
-                    continue
+                    # 检查case是否已经完成
+                    if resume_index.is_completed(sample_index):
+                        processor.update_skipped(sample_index)
+                        continue
                 
-                future = executor.submit(
-                    process_single_sample, 
-                    sample_data, 
-                    sample_index, 
-                    args, 
-                    processor
-                )
-                future_to_index[future] = sample_index
+                    future = executor.submit(
+                        process_single_sample, 
+                        sample_data, 
+                        sample_index, 
+                        args, 
+                        processor,
+                        prompter_cache,
+                        executor_pool,
+                        resume_index
+                    )
+                    future_to_index[future] = sample_index
             
-            # 等待所有任务完成
-            for future in as_completed(future_to_index):
-                sample_index = future_to_index[future]
-                try:
-                    _ = future.result()  # 结果已经在process_single_sample中处理
-                except Exception as e:
-                    logging.error(f"线程执行异常 (样本 {sample_index}): {e}")
+                if not future_to_index:
+                    break
+                
+                # 等待任意任务完成后继续补充；自适应并发时定期醒来检查是否需要调整
+                done, _ = wait(future_to_index, timeout=1.0 if controller is not None else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    sample_index = future_to_index.pop(future)
+                    try:
+                        _ = future.result()  # 结果已经在process_single_sample中处理
+                    except Exception as e:
+                        logging.error(f"线程执行异常 (样本 {sample_index}): {e}")
     
     except KeyboardInterrupt:
         logging.warning("收到中断信号，正在停止处理...")
-        executor.shutdown(wait=False)
+        executor.shutdown(wait=False, cancel_futures=True)
         raise
+    finally:
+        if controller is not None:
+            set_call_observer(previous_observer)
+        processor.close()
+        if executor_pool is not None:
+            executor_pool.shutdown()
     
-    # 最终进度报告
-    total_time = time.time() - processor.start_time
-    stats = processor.get_progress_stats()
-    
-    print_progress_report(processor, total_samples)
-    
-    # 构建最终结果摘要
-    summary = {
-        'total_samples': total_samples,
-        'processed_samples': processor.processed_count,
-        'successful_samples': processor.success_count,
-        'failed_samples': processor.failed_count,
-        'skipped_samples': processor.skipped_count,
-        'success_rate': stats['success_rate'],
-        'total_execution_time': total_time,
-        'average_time_per_sample': total_time / max(processor.processed_count, 1),
-        'samples_per_minute': stats['samples_per_minute'],
-        'failed_sample_details': processor.failed_samples,
-        'processing_config': {
-            'num_threads': args.num_threads,
-            'model_type': args.model_type,
-            'max_steps': args.max_steps,
-            'dataset_range': f"[{args.start_index}, {args.start_index + len(dataset)})"
-        }
-    }
-    
-    return {
-        'summary': summary,
-        'results': processor.results
-    }
\ No newline at end of file
+    batch_results = build_batch_summary(processor, dataset, args, prompter_cache, {
+        'engine': 'thread',
+        'engine_pool': executor_pool.get_stats() if executor_pool is not None else None,
+        'adaptive_concurrency': controller.get_stats() if controller is not None else None
+    }, total_samples=total_samples,
+        case_order=[args.start_index + i for i in case_order] if case_order is not None else None)
+    if controller is not None:
+        batch_results['summary']['concurrency_adjustments'] = controller.adjustments
+    return batch_results
+    
\ No newline at end of file
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any
+import argparse
+
+from utils.update_progress import BatchProcessor
+from utils.resume_index import ResumeIndex
+from utils.run_cases_async import run_cases_async
+from utils.create_prompter_cache import create_prompter_cache
+from utils.build_batch_summary import build_batch_summary
+from utils.create_step_executor_pool import create_step_executor_pool
+from utils.create_results_sink import create_results_sink
+from utils.order_cases import order_cases
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow import AsyncStepExecutor
+
+
+def run_workflow_batch_async(dataset: List[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    使用单个事件循环执行批量工作流处理
+    所有病例在同一线程中并发推进，max_concurrent_cases限制同时进行的病例数，llm_concurrency限制模型服务的并发请求数；
+    病例在有空闲并发名额时才从数据集读取并检查是否已完成
+    """
+    return asyncio.run(_run_workflow_batch_async(dataset, args))
+
+
+async def _run_workflow_batch_async(dataset: List[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    """异步批处理主协程"""
+    logging.info(f"使用异步引擎: 最多 {args.max_concurrent_cases} 个并发病例, "
+                 f"LLM并发请求上限 {args.llm_concurrency or '不限'}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.makedirs(args.log_dir, exist_ok=True)
+
+    processor = BatchProcessor(num_threads=args.max_concurrent_cases, results_sink=create_results_sink(args))
+    processor.start_time = time.time()
+
+    prompter_cache = create_prompter_cache(args)
+
+    executor_pool = create_step_executor_pool(args, prompter_cache, AsyncStepExecutor)
+
+    llm_semaphore = asyncio.Semaphore(args.llm_concurrency) if args.llm_concurrency > 0 else None
+
+    resume_index = ResumeIndex(args.log_dir)
+    # 病例按调度顺序获得并发名额
+    case_order = order_cases(dataset, args)
+
+    def pending_cases():
+        for i in case_order:
+            sample_index = args.start_index + i
+
+            # 检查case是否已经完成
+            if resume_index.is_completed(sample_index):
+                processor.update_skipped(sample_index)
+                continue
+
+            yield sample_index, dataset[i]
+
+    try:
+        await run_cases_async(pending_cases(), args, processor, prompter_cache, llm_semaphore, executor_pool,
+                              resume_index)
+    finally:
+        processor.close()
+        if executor_pool is not None:
+            executor_pool.shutdown()
+
+    return build_batch_summary(processor, dataset, args, prompter_cache, {
+        'engine': 'async',
+        'max_concurrent_cases': args.max_concurrent_cases,
+        'llm_concurrency': args.llm_concurrency,
+        'engine_pool': executor_pool.get_stats() if executor_pool is not None else None
+    }, case_order=[args.start_index + i for i in case_order])
@@ -0,0 +1,231 @@
+import os
+import sys
+import time
+import queue
+import asyncio
+import logging
+import multiprocessing
+from typing import List, Dict, Any, Tuple
+import argparse
+
+from utils.indexed_dataset import IndexedDataset
+
+from utils.update_progress import BatchProcessor
+from utils.resume_index import ResumeIndex
+from utils.create_prompter_cache import create_prompter_cache
+from utils.build_batch_summary import build_batch_summary
+from utils.print_progress_report import print_progress_report
+from utils.run_cases_async import run_cases_async
+from utils.shared_llm_limiter import SharedLLMLimiter
+from utils.queue_progress_reporter import QueueProgressReporter
+from utils.create_step_executor_pool import create_step_executor_pool
+from utils.create_results_sink import create_results_sink
+from utils.order_cases import order_cases
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from research.workflow import AsyncStepExecutor
+
+
+def run_workflow_batch_hybrid(dataset: IndexedDataset, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    使用多进程 × 异步的混合引擎执行批量工作流处理
+    启动num_processes个工作进程，每个进程在自己的事件循环中并发推进最多max_concurrent_cases个病例；
+    llm_concurrency为所有进程共享的LLM并发请求上限，各进程通过进度队列向父进程的BatchProcessor汇报进度。
+    待处理的病例按调度顺序放入共享的工作队列，空闲的工作进程从中领取，队列中只有病例在数据集文件中的位置，
+    工作进程自行打开数据集并按需读取病例
+    """
+    num_processes = max(1, args.num_processes)
+    logging.info(f"使用混合引擎: {num_processes} 个进程 × 每进程最多 {args.max_concurrent_cases} 个并发病例, "
+                 f"全局LLM并发请求上限 {args.llm_concurrency or '不限'}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.makedirs(args.log_dir, exist_ok=True)
+
+    processor = BatchProcessor(num_threads=num_processes * args.max_concurrent_cases,
+                               results_sink=create_results_sink(args))
+    processor.start_time = time.time()
+
+    # 已完成的case在父进程中统一跳过，剩余case按调度顺序放入工作队列
+    resume_index = ResumeIndex(args.log_dir)
+    case_order = order_cases(dataset, args)
+    pending: List[Tuple[int, int]] = []
+    for i in case_order:
+        sample_index = args.start_index + i
+        if resume_index.is_completed(sample_index):
+            processor.update_skipped(sample_index)
+            continue
+        pending.append((sample_index, dataset.positions[i]))
+    num_workers = min(num_processes, len(pending))
+
+    # 使用spawn启动工作进程，避免fork继承父进程中的线程和网络连接
+    context = multiprocessing.get_context("spawn")
+    progress_queue = context.Queue()
+    work_queue = context.Queue()
+    for case in pending:
+        work_queue.put(case)
+    # 每个工作进程一个结束标记
+    for _ in range(num_workers):
+        work_queue.put(None)
+    llm_limiter = (SharedLLMLimiter.create(context, args.llm_concurrency, num_workers)
+                   if args.llm_concurrency > 0 and num_workers else None)
+
+    workers = []
+    for worker_id in range(num_workers):
+        worker = context.Process(
+            target=_hybrid_worker,
+            args=(worker_id, work_queue, args, progress_queue, llm_limiter, resume_index),
+            name=f"workflow-worker-{worker_id}",
+            daemon=True
+        )
+        worker.start()
+        workers.append(worker)
+
+    cache_stats = []
+    pool_stats = []
+    try:
+        reported = _consume_progress(processor, progress_queue, workers, llm_limiter, len(dataset), args,
+                                     cache_stats, pool_stats)
+    except KeyboardInterrupt:
+        logging.warning("收到中断信号，正在停止工作进程...")
+        for worker in workers:
+            worker.terminate()
+        work_queue.cancel_join_thread()
+        processor.close()
+        raise
+
+    for worker in workers:
+        worker.join()
+    # 所有工作进程异常退出时队列中可能仍有病例，退出时不等待写入
+    work_queue.cancel_join_thread()
+
+    # 工作进程异常退出时，其正在处理的case和未被领取的case记为失败
+    crashed = [worker for worker in workers if worker.exitcode != 0]
+    if crashed:
+        error = RuntimeError("工作进程异常退出: " + ", ".join(
+            f"{worker.name} (exitcode={worker.exitcode})" for worker in crashed))
+        for sample_index, _ in pending:
+            if sample_index not in reported:
+                processor.update_progress(success=False, error=error, sample_index=sample_index)
+    processor.close()
+
+    batch_results = build_batch_summary(processor, dataset, args, None, {
+        'engine': 'hybrid',
+        'num_processes': len(workers),
+        'max_concurrent_cases': args.max_concurrent_cases,
+        'llm_concurrency': args.llm_concurrency,
+        'engine_pool': {
+            'created': sum(stats['created'] for stats in pool_stats),
+            'acquired': sum(stats['acquired'] for stats in pool_stats),
+            'per_process': pool_stats
+        } if pool_stats else None
+    }, case_order=[args.start_index + i for i in case_order])
+    if cache_stats:
+        hits = sum(stats.get('hits', 0) for stats in cache_stats)
+        misses = sum(stats.get('misses', 0) for stats in cache_stats)
+        batch_results['summary']['prompter_cache_stats'] = {
+            'entries': sum(stats.get('entries', 0) for stats in cache_stats),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses > 0 else 0.0,
+            'per_process': cache_stats
+        }
+        logging.info(f"Prompter模板缓存统计: {batch_results['summary']['prompter_cache_stats']}")
+    return batch_results
+
+
+def _consume_progress(processor: BatchProcessor, progress_queue, workers: list,
+                      llm_limiter, total_samples: int, args: argparse.Namespace,
+                      cache_stats: list, pool_stats: list) -> set:
+    """
+    在父进程中读取进度队列并转发给BatchProcessor，按progress_interval打印进度，直到所有工作进程结束；
+    工作进程异常退出时收回其持有的LLM并发配额
+
+    Returns:
+        set: 已上报结果的样本序号
+    """
+    reported = set()
+    done_workers = set()
+    last_report = time.time()
+
+    while len(done_workers) < len(workers):
+        try:
+            kind, worker_id, payload = progress_queue.get(timeout=0.5)
+        except queue.Empty:
+            # 工作进程异常退出时不会发送done消息
+            for worker_id, worker in enumerate(workers):
+                if worker_id not in done_workers and not worker.is_alive():
+                    done_workers.add(worker_id)
+                    logging.error(f"工作进程 {worker.name} 异常退出 (exitcode={worker.exitcode})")
+                    if llm_limiter is not None:
+                        reclaimed = llm_limiter.reclaim(worker_id)
+                        if reclaimed:
+                            logging.warning(f"收回工作进程 {worker.name} 未归还的 {reclaimed} 个LLM并发配额")
+            continue
+
+        if kind == "progress":
+            reported.add(payload['sample_index'])
+            processor.update_progress(
+                success=payload['success'],
+                result=payload['result'],
+                error=payload['error'],
+                sample_index=payload['sample_index']
+            )
+        elif kind == "skipped":
+            processor.update_skipped(payload['sample_index'])
+        elif kind == "done":
+            done_workers.add(worker_id)
+            if payload.get('prompter_cache_stats'):
+                cache_stats.append(payload['prompter_cache_stats'])
+            if payload.get('engine_pool_stats'):
+                pool_stats.append(payload['engine_pool_stats'])
+
+        if time.time() - last_report >= args.progress_interval:
+            print_progress_report(processor, total_samples)
+            last_report = time.time()
+
+    return reported
+
+
+def _hybrid_worker(worker_id: int, work_queue, args: argparse.Namespace,
+                   progress_queue, llm_limiter, resume_index) -> None:
+    """
+    工作进程入口：在独立的事件循环中处理从工作队列领取的病例
+
+    Args:
+        work_queue: 共享工作队列，元素为(样本序号, 病例在数据集文件中的位置)，None表示没有更多病例
+        llm_limiter: 未绑定的SharedLLMLimiter，为None时不限制
+        resume_index: 父进程的续跑索引，用于查找病例的检查点
+    """
+    level = getattr(logging, args.log_level.upper(), logging.INFO)
+    # 模块导入时可能已配置过根日志记录器，强制使用带进程名的格式
+    logging.basicConfig(level=level, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s',
+                        force=True)
+
+    reporter = QueueProgressReporter(progress_queue, worker_id)
+    # Prompter模板缓存无法跨进程共享，每个进程各自维护
+    prompter_cache = create_prompter_cache(args)
+    llm_semaphore = llm_limiter.bind(worker_id) if llm_limiter is not None else None
+    executor_pool = create_step_executor_pool(args, prompter_cache, AsyncStepExecutor)
+
+    # 父进程已建立旁路索引，这里只读取索引
+    dataset = IndexedDataset(args.dataset_path)
+    case_data = ((sample_index, dataset[position]) for sample_index, position in iter(work_queue.get, None))
+
+    start_time = time.time()
+    try:
+        processed = asyncio.run(run_cases_async(case_data, args, reporter, prompter_cache, llm_semaphore,
+                                                executor_pool, resume_index))
+    finally:
+        if executor_pool is not None:
+            executor_pool.shutdown()
+
+    reporter.report_done({
+        'cases': processed,
+        'elapsed_time': time.time() - start_time,
+        'prompter_cache_stats': prompter_cache.get_stats() if prompter_cache is not None else None,
+        'engine_pool_stats': executor_pool.get_stats() if executor_pool is not None else None
+    })
@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Sequence, Dict, Any
+import argparse
+
+from utils.update_progress import BatchProcessor
+from utils.process_single_sample import process_single_sample
+from utils.create_prompter_cache import create_prompter_cache
+from utils.build_batch_summary import build_batch_summary
+from utils.resume_index import ResumeIndex
+from utils.create_step_executor_pool import create_step_executor_pool
+from utils.lease_queue import LeaseQueue
+from utils.create_results_sink import create_results_sink
+from utils.create_concurrency_controller import create_concurrency_controller
+
+# 设置项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_system.base.call_monitor import set_call_observer
+
+# 队列中暂时没有可领取的病例（其他工作进程仍持有租约）时的轮询间隔（秒）
+_POLL_INTERVAL = 1.0
+
+
+def run_workflow_batch_queue(dataset: Sequence[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    从共享租约队列中领取病例执行批量工作流处理
+    任意数量的工作进程（可在不同机器上）使用相同的数据集参数和--queue-db运行，每个空闲线程领取一个病例租约，
+    后台线程定期续约；队列中没有可领取的病例时等待其他进程的租约完成或过期，所有病例结束后退出
+    启用自适应并发时，本进程同时持有的租约数由ConcurrencyController根据LLM调用延迟、失败率和吞吐调整
+    """
+    worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    logging.info(f"使用租约队列 {args.queue_db}: 工作进程 {worker_id}, {args.num_threads} 个线程, "
+                 f"租约时长 {args.lease_seconds}s")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.makedirs(args.log_dir, exist_ok=True)
+
+    lease_queue = LeaseQueue(args.queue_db, max_attempts=args.max_attempts)
+    lease_queue.populate(range(args.start_index, args.start_index + len(dataset)), {
+        'dataset_path': os.path.abspath(args.dataset_path),
+        'start_index': args.start_index,
+        'total_samples': len(dataset),
+        'department_filter': args.department_filter
+    })
+
+    processor = BatchProcessor(num_threads=args.num_threads, results_sink=create_results_sink(args, worker_id))
+    processor.start_time = time.time()
+
+    prompter_cache = create_prompter_cache(args)
+    executor_pool = create_step_executor_pool(args, prompter_cache)
+    # 租约过期的病例可能仍由原工作进程执行，不完整的日志只跳过不删除
+    resume_index = ResumeIndex(args.log_dir, remove_incomplete=False)
+
+    # 租约在到期前续约三次，单次续约失败不会导致租约过期
+    stop_heartbeat = threading.Event()
+    heartbeat_thread = threading.Thread(
+        target=_heartbeat_loop,
+        args=(lease_queue, worker_id, args.lease_seconds, stop_heartbeat),
+        name="lease-heartbeat",
+        daemon=True
+    )
+    heartbeat_thread.start()
+
+    controller = create_concurrency_controller(args)
+    max_in_flight = args.num_threads
+    max_workers = controller.max_limit if controller is not None else args.num_threads
+    previous_observer = set_call_observer(controller) if controller is not None else None
+
+    total_samples = 0
+    last_report = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_index = {}
+            while True:
+                if controller is not None:
+                    max_in_flight = controller.maybe_adjust(processor.get_progress_stats())
+                # 只为空闲线程领取租约，避免长时间持有尚未开始的病例
+                while len(future_to_index) < max_in_flight:
+                    sample_index = lease_queue.acquire(worker_id, args.lease_seconds)
+                    if sample_index is None:
+                        break
+                    total_samples += 1
+
+                    if resume_index.is_completed(sample_index):
+                        processor.update_skipped(sample_index)
+                        lease_queue.complete(sample_index, worker_id, {'skipped': True})
+                        continue
+
+                    future = executor.submit(
+                        process_single_sample,
+                        dataset[sample_index - args.start_index],
+                        sample_index,
+                        args,
+                        processor,
+                        prompter_cache,
+                        executor_pool
+                    )
+                    future_to_index[future] = sample_index
+
+                if time.time() - last_report >= args.progress_interval:
+                    _print_queue_progress(lease_queue)
+                    last_report = time.time()
+
+                if not future_to_index:
+                    status = lease_queue.get_status()
+                    if status['pending'] == 0 and status['leased'] == 0:
+                        break
+                    # 其他工作进程仍持有租约，等待其完成或过期后重新领取
+                    time.sleep(_POLL_INTERVAL)
+                    continue
+
+                done, _ = wait(future_to_index, timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    sample_index = future_to_index.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"线程执行异常 (样本 {sample_index}): {e}")
+                        result = {'error': str(e)}
+                    if 'error' in result:
+                        lease_queue.fail(sample_index, worker_id, result['error'])
+                    else:
+                        lease_queue.complete(sample_index, worker_id, {
+                            'execution_time': result['execution_time'],
+                            'setup_time': result['setup_time'],
+                            'log_file_path': result['log_file_path'],
+                            'current_step': result['workflow_status']['current_step'],
+                            'workflow_success': result['workflow_status']['workflow_success'],
+                            'processed_at': result['processed_at']
+                        })
+
+    except KeyboardInterrupt:
+        logging.warning("收到中断信号，正在停止处理...")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        if controller is not None:
+            set_call_observer(previous_observer)
+        stop_heartbeat.set()
+        heartbeat_thread.join()
+        # 中断时未完成的租约立即放回队列，其他工作进程无需等待租约过期
+        released = lease_queue.release(worker_id)
+        if released:
+            logging.info(f"已归还 {released} 个未完成的病例租约")
+        processor.close()
+        if executor_pool is not None:
+            executor_pool.shutdown()
+
+    _print_queue_progress(lease_queue)
+    return build_batch_summary(processor, dataset, args, prompter_cache, {
+        'engine': 'thread',
+        'queue_db': args.queue_db,
+        'worker_id': worker_id,
+        'engine_pool': executor_pool.get_stats() if executor_pool is not None else None,
+        'adaptive_concurrency': controller.get_stats() if controller is not None else None
+    }, total_samples=total_samples)
+
+
+def _heartbeat_loop(lease_queue: LeaseQueue, worker_id: str, lease_seconds: float, stop_event: threading.Event):
+    """定期为本进程持有的租约续约"""
+    while not stop_event.wait(lease_seconds / 3):
+        try:
+            lease_queue.heartbeat(worker_id, lease_seconds)
+        except Exception as e:
+            logging.warning(f"租约续约失败: {e}")
+
+
+def _print_queue_progress(lease_queue: LeaseQueue):
+    """打印所有工作进程的合并进度"""
+    status = lease_queue.get_status()
+    finished = status['done'] + status['failed']
+    print(f"\n=== 队列进度 ===")
+    print(f"已结束: {finished}/{status['total']} ({finished / max(status['total'], 1):.1%}) | "
+          f"完成: {status['done']} | 失败: {status['failed']} | 执行中: {status['leased']} | 待处理: {status['pending']}")
+    print(f"活跃工作进程: {len(status['active_workers'])}")
+    print("=" * 50)
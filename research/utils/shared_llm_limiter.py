@@ -0,0 +1,82 @@
+import asyncio
+
+
+class SharedLLMLimiter:
+    """
+    跨进程共享的LLM并发限制器
+    父进程通过create创建共享状态并传入各工作进程，工作进程调用bind绑定自己的编号后，
+    以异步上下文管理器的形式提供给AsyncStepExecutor作为llm_semaphore；获取配额时以非阻塞方式轮询，不阻塞工作进程的事件循环。
+    每个工作进程持有的配额分别记录，工作进程异常退出时父进程通过reclaim收回其未归还的配额
+    """
+    
+    def __init__(self, limit: int, lock, held, worker_id: int = None,
+                 poll_interval: float = 0.002, max_poll_interval: float = 0.05):
+        """
+        Args:
+            limit: 所有进程共享的LLM并发请求上限
+            lock: 保护配额记录的multiprocessing锁
+            held: 各工作进程持有配额数的共享数组
+            worker_id: 工作进程编号，父进程中为None
+            poll_interval: 首次轮询间隔（秒），之后指数退避
+            max_poll_interval: 最大轮询间隔（秒）
+        """
+        self.limit = limit
+        self.lock = lock
+        self.held = held
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+    
+    @classmethod
+    def create(cls, context, limit: int, num_workers: int) -> "SharedLLMLimiter":
+        """
+        在父进程中创建共享状态
+
+        Args:
+            context: multiprocessing上下文
+            limit: LLM并发请求上限
+            num_workers: 工作进程数
+
+        Returns:
+            SharedLLMLimiter: 未绑定工作进程的限制器，作为参数传给各工作进程
+        """
+        return cls(limit, context.Lock(), context.Array("i", num_workers, lock=False))
+
+    def bind(self, worker_id: int) -> "SharedLLMLimiter":
+        """在工作进程中绑定工作进程编号，持有的配额记在该编号下"""
+        self.worker_id = worker_id
+        return self
+
+    def reclaim(self, worker_id: int) -> int:
+        """
+        收回已退出的工作进程未归还的配额
+
+        Args:
+            worker_id: 工作进程编号
+
+        Returns:
+            int: 收回的配额数
+        """
+        with self.lock:
+            held = self.held[worker_id]
+            self.held[worker_id] = 0
+        return held
+
+    def _try_acquire(self) -> bool:
+        with self.lock:
+            if sum(self.held) >= self.limit:
+                return False
+            self.held[self.worker_id] += 1
+            return True
+
+    async def __aenter__(self):
+        delay = self.poll_interval
+        while not self._try_acquire():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        with self.lock:
+            self.held[self.worker_id] -= 1
+        return False
@@ -4,10 +4,17 @@ from datetime import datetime
 import logging
 from typing import Dict, Any
 
+from utils.results_sink import ResultsSink
+
 class BatchProcessor:
     """批处理管理器，负责协调多线程执行和状态管理"""
     
-    def __init__(self, num_threads: int = 20):
+    def __init__(self, num_threads: int = 20, results_sink: ResultsSink = None):
+        """
+        Args:
+            num_threads: 并行数
+            results_sink: 列式结果目录；指定后成功和失败的结果逐条写入结果目录，不再保存在内存中
+        """
         self.num_threads = num_threads
         self.lock = threading.Lock()  # 线程安全锁
         self.processed_count = 0  # 已处理样本数
@@ -16,7 +23,9 @@ class BatchProcessor:
         self.skipped_count = 0    # 跳过的样本数
         self.results = []         # 结果列表
         self.failed_samples = []  # 失败样本列表
+        self.execution_times = {}  # 样本序号到执行耗时的映射，用于调度策略对比
         self.start_time = None    # 开始时间
+        self.results_sink = results_sink
         
     def update_progress(self, success: bool, result: Dict[str, Any] = None, 
                        error: Exception = None, sample_index: int = None):
@@ -26,15 +35,29 @@ class BatchProcessor:
             if success:
                 self.success_count += 1
                 if result:
-                    self.results.append(result)
+                    if 'execution_time' in result and 'sample_index' in result:
+                        self.execution_times[result['sample_index']] = result['execution_time']
+                    if self.results_sink is not None:
+                        self.results_sink.append(result)
+                    else:
+                        self.results.append(result)
             else:
                 self.failed_count += 1
                 if error and sample_index is not None:
-                    self.failed_samples.append({
+                    failed_sample = {
                         'sample_index': sample_index,
                         'error': str(error),
                         'timestamp': datetime.now().isoformat()
-                    })
+                    }
+                    self.failed_samples.append(failed_sample)
+                    if self.results_sink is not None:
+                        self.results_sink.append(dict(failed_sample, processed_at=failed_sample['timestamp']),
+                                                 success=False)
+    
+    def close(self):
+        """写出结果目录中剩余的结果"""
+        if self.results_sink is not None:
+            self.results_sink.close()
     
     def update_skipped(self, sample_index: int):
         """线程安全地更新跳过样本计数"""
@@ -2,6 +2,20 @@
 from .medical_workflow import MedicalWorkflow
 from .task_manager import TaskManager  
 from .step_executor import StepExecutor
+from .async_step_executor import AsyncStepExecutor
+from .async_medical_workflow import AsyncMedicalWorkflow
 from .workflow_logger import WorkflowLogger
+from .turn_store import TurnStore
+from .stopping_policy import StoppingPolicy, ScorePlateauPolicy
+from .models import StepResult, TriageState, PhaseSummary
+from .patient_source import PatientSource, VirtualPatientSource, InteractivePatientSource, ReplayPatientSource
+from .replay import ReplayLog, FrozenAgent
+from .profiler import StepProfiler
+from .engine_pool import StepExecutorPool
+from .completion_manifest import CompletionManifest, read_last_line
 
-__all__ = ["MedicalWorkflow", "TaskManager", "StepExecutor", "WorkflowLogger"]
\ No newline at end of file
+__all__ = ["MedicalWorkflow", "AsyncMedicalWorkflow", "TaskManager", "StepExecutor", "AsyncStepExecutor", "WorkflowLogger", "TurnStore",
+           "StoppingPolicy", "ScorePlateauPolicy", "StepResult", "TriageState", "PhaseSummary",
+           "PatientSource", "VirtualPatientSource", "InteractivePatientSource", "ReplayPatientSource",
+           "ReplayLog", "FrozenAgent", "StepProfiler", "StepExecutorPool",
+           "CompletionManifest", "read_last_line"]
\ No newline at end of file
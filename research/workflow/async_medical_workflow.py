@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from typing import Optional, Dict, Any
+
+from agent_system.base.profiling import profiled
+from .medical_workflow import MedicalWorkflow
+from .async_step_executor import AsyncStepExecutor
+from .checkpoint import save_checkpoint
+
+
+class AsyncMedicalWorkflow(MedicalWorkflow):
+    """
+    异步医疗问诊工作流
+    与MedicalWorkflow共用状态管理、日志和检查点逻辑，每个step由AsyncStepExecutor在事件循环中执行；
+    检查点在事件循环中导出状态，写盘和fsync在线程中完成，避免阻塞其他病例；
+    日志记录在事件循环中缓冲，每个step结束后与检查点一起在线程中写入，工作流收尾（完成记录、完成清单）也在线程中执行
+    """
+
+    step_executor_class = AsyncStepExecutor
+
+    def __init__(self, *args, llm_semaphore: Optional[asyncio.Semaphore] = None, **kwargs):
+        """
+        初始化异步医疗问诊工作流，其余参数同MedicalWorkflow
+
+        Args:
+            llm_semaphore: 限制LLM并发请求数的信号量，批处理中所有病例共享；为None时不限制
+        """
+        if kwargs.get("speculative"):
+            logging.warning("异步工作流不支持推测预计算，已忽略speculative参数")
+            kwargs["speculative"] = False
+        super().__init__(*args, **kwargs)
+        self.step_executor.llm_semaphore = llm_semaphore
+        self.logger.start_buffering()
+        # 已导出但尚未写盘的检查点状态
+        self._pending_checkpoint: Optional[Dict[str, Any]] = None
+
+    async def async_run(self) -> str:
+        """
+        异步执行完整的医疗问诊工作流
+
+        Returns:
+            str: 日志文件路径
+        """
+        print(f"开始执行医疗问诊工作流，病例：{self.case_data.get('病案介绍', {}).get('主诉', '未知病例')}")
+
+        interrupted = False
+        try:
+            # 从检查点恢复时从下一步继续
+            for step in range(self.current_step + 1, self.max_steps + 1):
+                self.current_step = step
+
+                if self.task_manager.is_workflow_completed():
+                    print(f"所有任务已完成，工作流在第 {step} 步结束")
+                    self.workflow_completed = True
+                    self.workflow_success = True
+                    break
+
+                if not await self._async_execute_single_step(step):
+                    print(f"Step {step} 执行失败，工作流终止")
+                    break
+
+                self._print_step_progress(step)
+
+            if not self.workflow_completed:
+                print(f"已达到最大步数 {self.max_steps}，工作流结束")
+                self.workflow_success = False
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # 事件循环被中断或任务被取消时与手动中断相同处理，保留检查点
+            interrupted = True
+            raise
+
+        except Exception as e:
+            print(f"工作流执行出现异常: {str(e)}")
+            self.logger.log_error(self.current_step, "workflow_error", str(e))
+            self.workflow_success = False
+
+        finally:
+            await asyncio.to_thread(self._finish_run, interrupted)
+
+        print(f"工作流执行完成，日志文件：{self.logger.get_log_file_path()}")
+        return self.logger.get_log_file_path()
+
+    async def _async_execute_single_step(self, step_num: int) -> bool:
+        """
+        异步执行单个step
+
+        Args:
+            step_num: step编号
+
+        Returns:
+            bool: 是否执行成功
+        """
+        try:
+            with self.profiler.activate(), self.profiler.span("step", "step", step=step_num):
+                step_result = await self.step_executor.async_execute_step(**self._prepare_step(step_num))
+                success = self._record_step_result(step_num, step_result)
+                # 日志先于检查点写入，检查点记录的日志位置（含缓冲的记录）写盘后才有效
+                await asyncio.to_thread(self.logger.flush)
+                await self._write_checkpoint()
+                return success
+
+        except Exception as e:
+            self._handle_step_exception(step_num, e)
+            return False
+
+    def _finish_run(self, interrupted: bool):
+        """在线程中结束工作流：先写出缓冲的日志，之后的完成记录直接写入文件，再写完成清单"""
+        self.logger.stop_buffering()
+        super()._finish_run(interrupted)
+
+    def _save_checkpoint(self):
+        """只导出检查点状态，由_write_checkpoint在线程中写盘"""
+        if self.checkpoint_enabled:
+            self._pending_checkpoint = self._get_state()
+
+    @profiled("checkpoint", "io")
+    async def _write_checkpoint(self):
+        """在线程中写入已导出的检查点，失败时仅记录警告，不影响工作流执行"""
+        state, self._pending_checkpoint = self._pending_checkpoint, None
+        if state is None:
+            return
+        try:
+            await asyncio.to_thread(save_checkpoint, self.checkpoint_path, state)
+        except Exception as e:
+            logging.warning(f"保存检查点失败: {e}")
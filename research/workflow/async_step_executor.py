@@ -0,0 +1,314 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+
+from agent_system.base.profiling import profiled
+from .step_executor import StepExecutor
+from .task_manager import TaskManager, TaskPhase
+from .turn_store import TurnStore
+from .models import StepResult, TriageState
+from .workflow_logger import WorkflowLogger
+
+
+class AsyncStepExecutor(StepExecutor):
+    """
+    异步step执行器
+    与StepExecutor执行相同的agent pipeline，LLM调用通过各agent的async_run在事件循环中等待，
+    单个进程可在同一事件循环上并发推进大量病例；llm_semaphore限制所有病例对模型服务的并发请求数
+    """
+
+    def __init__(self, *args, llm_semaphore: Optional[asyncio.Semaphore] = None, **kwargs):
+        """
+        初始化异步step执行器，其余参数同StepExecutor
+
+        Args:
+            llm_semaphore: 限制LLM并发请求数的信号量，可在多个工作流之间共享；为None时不限制
+        """
+        # 推测预计算依赖后台线程且领取结果时会阻塞，异步引擎通过病例间并发掩盖延迟，不启用推测
+        if kwargs.get("speculative"):
+            logging.warning("异步执行器不支持推测预计算，已忽略speculative参数")
+            kwargs["speculative"] = False
+        super().__init__(*args, **kwargs)
+        self.llm_semaphore = llm_semaphore
+
+    async def _call_llm(self, fn, *args, **kwargs):
+        """在LLM并发配额内调用异步agent方法"""
+        if self.llm_semaphore is None:
+            return await fn(*args, **kwargs)
+        async with self.llm_semaphore:
+            return await fn(*args, **kwargs)
+
+    async def async_execute_step(self,
+                                 step_num: int,
+                                 case_data: Dict[str, Any],
+                                 task_manager: TaskManager,
+                                 logger: WorkflowLogger,
+                                 turn_store: Optional[TurnStore] = None,
+                                 previous_hpi: str = "",
+                                 previous_ph: str = "",
+                                 previous_chief_complaint: str = "",
+                                 previous_triage: Optional[TriageState] = None,
+                                 current_guidance: str = "",
+                                 is_first_step: bool = False,
+                                 doctor_question: str = "") -> StepResult:
+        """
+        异步执行单个step的完整流程，参数与返回值同execute_step
+        """
+        step_result = StepResult(
+            step_number=step_num,
+            updated_hpi=previous_hpi,
+            updated_ph=previous_ph,
+            updated_chief_complaint=previous_chief_complaint
+        )
+        if previous_triage is None:
+            previous_triage = TriageState()
+
+        if turn_store is None:
+            turn_store = TurnStore()
+
+        try:
+            current_phase = self._begin_step(step_num, task_manager)
+
+            # Step 1: 获取患者回应
+            patient_response = await self._async_get_patient_response(
+                step_num, case_data, logger, is_first_step, doctor_question
+            )
+            self._apply_patient_response(step_num, step_result, turn_store, patient_response,
+                                         is_first_step, doctor_question)
+
+            # Step 2: 使用Recipient更新病史信息
+            recipient_result = await self._async_execute_recipient(
+                step_num, logger, turn_store, previous_hpi, previous_ph, previous_chief_complaint,
+                current_phase=current_phase,
+                latest_doctor_question="" if is_first_step else doctor_question,
+                latest_patient_response=patient_response
+            )
+            self._apply_recipient_result(step_result, recipient_result)
+
+            # Step 3: 使用Triager进行科室分诊（仅当当前阶段是分诊阶段时）
+            if current_phase == TaskPhase.TRIAGE:
+                triage_result = await self._async_execute_triager(
+                    step_num, logger, recipient_result, previous_triage.department,
+                    previous_triage.candidate_department, current_guidance
+                )
+                new_guidance = self._apply_triage_result(step_result, triage_result)
+            else:
+                step_result.triage = previous_triage
+                new_guidance = current_guidance
+
+            # Step 4: 使用Monitor评估任务完成度
+            monitor_results = await self._async_execute_monitor_by_phase(
+                step_num, logger, task_manager, recipient_result, step_result.triage
+            )
+
+            # Step 5: 更新任务分数
+            self._update_task_scores(step_num, logger, task_manager, monitor_results)
+
+            generation_start = time.time()
+            self._generation_usage = {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            if self.generation_mode == "fused":
+                # Step 6-8: 使用FusedInquirer一次完成任务选择、询问指导和问题生成
+                fused_result = await self._async_execute_fused_inquirer(
+                    step_num, logger, task_manager, recipient_result, new_guidance
+                )
+                selected_task = fused_result.selected_task
+                doctor_question = fused_result.current_chat
+            else:
+                # Step 6-8: Controller选择任务、Prompter生成询问策略、Inquirer生成医生问题
+                controller_result = await self._async_execute_controller(
+                    step_num, logger, task_manager, recipient_result
+                )
+                prompter_result = await self._async_execute_prompter(
+                    step_num, logger, recipient_result, controller_result,
+                    step_result.triage, current_phase
+                )
+                doctor_question = await self._async_execute_inquirer(
+                    step_num, logger, recipient_result, prompter_result, new_guidance
+                )
+                selected_task = controller_result.selected_task
+
+            self._apply_generated_question(step_num, logger, task_manager, step_result,
+                                           selected_task, doctor_question, generation_start)
+
+            # Step 9: 使用Evaluator进行评分
+            evaluator_result = await self._async_execute_evaluator(
+                step_num, logger, case_data, step_result, turn_store
+            )
+
+            # Step 10: 获取任务完成情况摘要
+            self._complete_step(step_result, task_manager, turn_store, evaluator_result, new_guidance)
+
+        except Exception as e:
+            self._handle_step_error(step_num, logger, step_result, case_data, e)
+
+        return step_result
+
+    @profiled("patient", "stage")
+    async def _async_get_patient_response(self, step_num: int, case_data: Dict[str, Any],
+                                          logger: WorkflowLogger, is_first_step: bool,
+                                          doctor_question: str = "") -> str:
+        """从患者来源异步获取本轮患者回应，只有需要调用LLM的来源占用并发配额"""
+        if self.patient_source.uses_llm:
+            return await self._call_llm(
+                self.patient_source.async_get_response, step_num, case_data, logger, is_first_step, doctor_question
+            )
+        return await self.patient_source.async_get_response(step_num, case_data, logger, is_first_step, doctor_question)
+
+    @profiled("recipient", "stage")
+    async def _async_execute_recipient(self, step_num: int, logger: WorkflowLogger,
+                                       turn_store: TurnStore, previous_hpi: str,
+                                       previous_ph: str, previous_chief_complaint: str,
+                                       current_phase: Optional[TaskPhase] = None,
+                                       latest_doctor_question: str = "",
+                                       latest_patient_response: str = ""):
+        """异步执行Recipient agent（全量或增量模式）"""
+        if not self._should_run_full_recipient(step_num, current_phase, previous_hpi):
+            try:
+                start_time = time.time()
+                input_data = {
+                    "latest_doctor_question": latest_doctor_question,
+                    "latest_patient_response": latest_patient_response,
+                    "previous_HPI": previous_hpi,
+                    "previous_PH": previous_ph,
+                    "previous_chief_complaint": previous_chief_complaint
+                }
+                patch = await self._call_llm(self.recipient_delta.async_run, **input_data)
+                return self._finish_recipient_delta(step_num, logger, input_data, patch, start_time)
+            except Exception as e:
+                error_msg = f"Recipient增量更新失败，回退到全量模式: {str(e)}"
+                logger.log_error(step_num, "recipient_delta_error", error_msg)
+
+        start_time = time.time()
+        input_data = {
+            "conversation_history": turn_store.render_conversation(),
+            "previous_HPI": previous_hpi,
+            "previous_PH": previous_ph,
+            "previous_chief_complaint": previous_chief_complaint
+        }
+        result = await self._call_llm(self.recipient.async_run, **input_data)
+        return self._finish_recipient(step_num, logger, input_data, result,
+                                      time.time() - start_time, current_phase)
+
+    @profiled("triager", "stage")
+    async def _async_execute_triager(self, step_num: int, logger: WorkflowLogger,
+                                     recipient_result, previous_department: str,
+                                     previous_candidate_department: str, current_guidance: str):
+        """异步执行Triage agent进行科室分诊，科室已稳定时复用上次分诊结果"""
+        reused = self._reuse_triage_result(step_num, logger, recipient_result)
+        if reused is not None:
+            return reused
+
+        start_time = time.time()
+        input_data, comparison_guidance = self._triager_input(
+            recipient_result, previous_department, previous_candidate_department, current_guidance
+        )
+        result = await self._call_llm(self.triager.async_run, **input_data)
+        return self._finish_triager(step_num, logger, input_data, comparison_guidance, result,
+                                    time.time() - start_time)
+
+    @profiled("monitor", "stage")
+    async def _async_execute_monitor_by_phase(self, step_num: int, logger: WorkflowLogger,
+                                              task_manager: TaskManager, recipient_result,
+                                              triage: Optional[TriageState] = None) -> Dict[str, Dict[str, float]]:
+        """异步按阶段执行Monitor评估，各任务的评估互不依赖，并发调用"""
+        monitor_results = {}
+        current_phase = task_manager.get_current_phase()
+        if current_phase == TaskPhase.COMPLETED:
+            return monitor_results
+
+        pending_tasks = task_manager.get_pending_tasks(current_phase)
+        if not pending_tasks:
+            return monitor_results
+
+        start_time = time.time()
+
+        try:
+            evidence = self._get_monitor_evidence(current_phase, recipient_result, triage)
+            scores, skipped_tasks, tasks_to_evaluate = self._reuse_monitor_scores(current_phase, pending_tasks, evidence)
+            results = await asyncio.gather(*(
+                self._call_llm(self.monitor.async_run, **self._monitor_input(current_phase, recipient_result, triage, task))
+                for task in tasks_to_evaluate
+            ))
+            for task, monitor_result in zip(tasks_to_evaluate, results):
+                self._record_monitor_score(current_phase, task, evidence, monitor_result, scores)
+
+            monitor_results[current_phase] = self._finish_monitor(
+                step_num, logger, current_phase, pending_tasks, recipient_result,
+                scores, skipped_tasks, time.time() - start_time
+            )
+
+        except Exception as e:
+            error_msg = f"Monitor执行失败: {str(e)}"
+            logger.log_error(step_num, "monitor_error", error_msg)
+            monitor_results[current_phase] = {task["name"]: 0.1 for task in pending_tasks}
+
+        return monitor_results
+
+    @profiled("controller", "stage")
+    async def _async_execute_controller(self, step_num: int, logger: WorkflowLogger,
+                                        task_manager: TaskManager, recipient_result):
+        """异步执行Controller agent，规则型Controller不调用LLM，直接同步执行"""
+        start_time = time.time()
+        input_data, result = self._controller_input(task_manager, recipient_result)
+        speculative_hit = result is not None
+        if result is None:
+            if self._is_rule_based_controller():
+                result = self.controller.run(**input_data)
+            else:
+                result = await self._call_llm(self.controller.async_run, **input_data)
+                self._record_generation_usage(self.controller)
+        return self._finish_controller(step_num, logger, input_data, result, speculative_hit,
+                                       time.time() - start_time)
+
+    @profiled("prompter", "stage")
+    async def _async_execute_prompter(self, step_num: int, logger: WorkflowLogger,
+                                      recipient_result, controller_result,
+                                      triage: Optional[TriageState] = None,
+                                      current_phase: Optional[TaskPhase] = None):
+        """异步执行Prompter agent，启用模板缓存时优先复用相同任务、科室和阶段的输出"""
+        start_time = time.time()
+        input_data, cache_key, slots, result, cache_hit = self._lookup_prompter(
+            recipient_result, controller_result, triage, current_phase
+        )
+        fresh = result is None
+        if fresh:
+            result = await self._call_llm(self.prompter.async_run, **input_data)
+            self._record_generation_usage(self.prompter)
+        return self._finish_prompter(step_num, logger, input_data, cache_key, slots, result,
+                                     cache_hit, fresh, time.time() - start_time)
+
+    @profiled("inquirer", "stage")
+    async def _async_execute_inquirer(self, step_num: int, logger: WorkflowLogger,
+                                      recipient_result, prompter_result, new_guidance) -> str:
+        """异步执行Inquirer agent"""
+        start_time = time.time()
+        try:
+            inquirer, input_data = self._build_inquirer(recipient_result, prompter_result, new_guidance)
+            result = await self._call_llm(inquirer.async_run, **input_data)
+            return self._finish_inquirer(step_num, logger, inquirer, input_data, result,
+                                         time.time() - start_time)
+        except Exception as e:
+            return self._handle_inquirer_error(step_num, logger, e)
+
+    @profiled("fused_inquirer", "stage")
+    async def _async_execute_fused_inquirer(self, step_num: int, logger: WorkflowLogger,
+                                            task_manager: TaskManager, recipient_result, new_guidance):
+        """异步执行FusedInquirer agent"""
+        start_time = time.time()
+        input_data = self._fused_inquirer_input(task_manager, recipient_result, new_guidance)
+        result = await self._call_llm(self.fused_inquirer.async_run, **input_data)
+        return self._finish_fused_inquirer(step_num, logger, input_data, result, time.time() - start_time)
+
+    @profiled("evaluator", "stage")
+    async def _async_execute_evaluator(self, step_num: int, logger: WorkflowLogger,
+                                       case_data: Dict[str, Any], step_result: StepResult,
+                                       turn_store: TurnStore):
+        """异步执行Evaluator agent"""
+        start_time = time.time()
+        try:
+            input_data, evaluator_kwargs = self._evaluator_input(step_num, case_data, step_result, turn_store)
+            result = await self._call_llm(self.evaluator.async_run, **evaluator_kwargs)
+            return self._finish_evaluator(step_num, logger, input_data, result, time.time() - start_time)
+        except Exception as e:
+            return self._handle_evaluator_error(step_num, logger, e)
@@ -0,0 +1,95 @@
+import os
+import json
+import hashlib
+from typing import Dict, Any, Optional
+
+# 检查点格式版本，格式不兼容时递增
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = ".ckpt.json"
+
+
+def get_checkpoint_path(log_file_path: str) -> str:
+    """
+    获取工作流日志对应的检查点文件路径
+
+    Args:
+        log_file_path: 工作流jsonl日志路径
+
+    Returns:
+        str: 检查点文件路径，如workflow_xxx_case_0001.ckpt.json
+    """
+    base, ext = os.path.splitext(log_file_path)
+    if ext != ".jsonl":
+        base = log_file_path
+    return base + CHECKPOINT_SUFFIX
+
+
+def get_case_fingerprint(case_data: Dict[str, Any]) -> str:
+    """
+    计算病例数据指纹，用于确认检查点属于同一病例
+
+    Args:
+        case_data: 病例数据
+
+    Returns:
+        str: 病例数据的md5指纹
+    """
+    case_str = json.dumps(case_data, ensure_ascii=False, sort_keys=True)
+    return hashlib.md5(case_str.encode("utf-8")).hexdigest()
+
+
+def save_checkpoint(checkpoint_path: str, state: Dict[str, Any]):
+    """
+    原子写入检查点：先写临时文件再替换，避免中断时留下不完整的检查点
+
+    Args:
+        checkpoint_path: 检查点文件路径
+        state: 工作流状态
+    """
+    state = dict(state, version=CHECKPOINT_VERSION)
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+
+def load_checkpoint(checkpoint_path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取检查点
+
+    Args:
+        checkpoint_path: 检查点文件路径
+
+    Returns:
+        Optional[Dict]: 工作流状态，文件不存在、损坏或版本不兼容时返回None
+    """
+    if not os.path.exists(checkpoint_path):
+        return None
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"读取检查点失败 {checkpoint_path}: {e}")
+        return None
+    if state.get("version") != CHECKPOINT_VERSION:
+        print(f"检查点版本不兼容，忽略: {checkpoint_path}")
+        return None
+    return state
+
+
+def remove_checkpoint(checkpoint_path: str):
+    """
+    删除检查点及可能残留的临时文件
+
+    Args:
+        checkpoint_path: 检查点文件路径
+    """
+    for path in (checkpoint_path, checkpoint_path + ".tmp"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"删除检查点失败 {path}: {e}")
@@ -0,0 +1,106 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+# 完成清单文件名，位于工作流日志目录下
+MANIFEST_FILENAME = "completed_cases.jsonl"
+
+
+def read_last_line(file_path: str, block_size: int = 4096) -> Optional[str]:
+    """
+    从文件末尾向前读取最后一行，不读取整个文件
+
+    Args:
+        file_path: 文件路径
+        block_size: 每次向前读取的字节数
+
+    Returns:
+        Optional[str]: 最后一行内容（不含换行符），文件为空时返回None
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if end == 0:
+            return None
+        # 最后一行自身的换行符不计入
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            end -= 1
+        chunks = []
+        position = end
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size)
+            newline = chunk.rfind(b'\n')
+            if newline >= 0:
+                chunks.append(chunk[newline + 1:])
+                break
+            chunks.append(chunk)
+    return b''.join(reversed(chunks)).decode('utf-8', errors='replace')
+
+
+class CompletionManifest:
+    """
+    病例完成清单
+    日志目录下只追加的JSONL文件，每个病例写入workflow_complete后追加一条记录；
+    续跑时读取一次清单即可得到所有已完成的病例，无需逐个打开日志文件
+    """
+
+    def __init__(self, log_dir: str):
+        """
+        Args:
+            log_dir: 工作流日志目录
+        """
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, MANIFEST_FILENAME)
+
+    def record(self, case_index: int, log_file_path: str, success: bool, total_steps: int,
+               department: Optional[str] = None):
+        """
+        追加一条完成记录
+        整行通过一次O_APPEND写入，多个线程或进程同时完成病例时记录不会交错
+
+        Args:
+            case_index: 病例序号
+            log_file_path: 工作流日志路径
+            success: 工作流是否成功完成
+            total_steps: 执行的step数
+            department: 病例的一级科室，供调度时按科室估计步数，无需打开日志读取病例数据
+        """
+        line = json.dumps({
+            "case_index": case_index,
+            "log_file": os.path.basename(log_file_path),
+            "success": success,
+            "total_steps": total_steps,
+            "department": department,
+            "completed_at": datetime.now().isoformat()
+        }, ensure_ascii=False) + "\n"
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode('utf-8'))
+        finally:
+            os.close(fd)
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """
+        读取清单
+
+        Returns:
+            Dict[int, Dict]: 病例序号到最近一条完成记录的映射，清单不存在时为空
+        """
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    completed[int(record["case_index"])] = record
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    # 写入中断的记录对应的病例会由日志回退检查重新确认
+                    logging.warning(f"跳过无法解析的完成记录: {line.strip()[:200]}")
+        return completed
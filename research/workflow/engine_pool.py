@@ -0,0 +1,104 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional, Type
+
+from .step_executor import StepExecutor
+
+
+class StepExecutorPool:
+    """
+    step执行器池
+    批处理中每个工作线程（或异步引擎中每个并发病例）同一时刻只使用一个执行器，执行器在病例结束后归还，
+    下一个病例复用其中的agent、模型客户端和已加载的指导，只重置与病例相关的状态。
+    池中执行器数量不超过同时运行的病例数。
+    """
+
+    def __init__(self, executor_class: Type[StepExecutor] = StepExecutor,
+                 guidance_loader_factory: Optional[Callable[[], Any]] = None,
+                 department_guidance: str = "",
+                 **executor_kwargs):
+        """
+        Args:
+            executor_class: 执行器类型，需与工作流的step_executor_class一致
+            guidance_loader_factory: 创建GuidanceLoader的函数，每个执行器使用独立的实例；为None时不使用指导
+            department_guidance: 病例的默认初始科室指导（固定科室模式下为该科室的询问指导）
+            **executor_kwargs: 创建执行器的其余参数，同StepExecutor
+        """
+        if executor_kwargs.get("replay_log") is not None or executor_kwargs.get("patient_source") is not None:
+            raise ValueError("回放日志和患者来源与单个病例绑定，不能在执行器池中共享")
+        self.executor_class = executor_class
+        self.guidance_loader_factory = guidance_loader_factory
+        self.department_guidance = department_guidance
+        self.executor_kwargs = executor_kwargs
+        self._idle: List[StepExecutor] = []
+        self._lock = threading.Lock()
+        self.created_count = 0
+        self.acquired_count = 0
+
+    def acquire(self, session_id: str, department_guidance: Optional[str] = None) -> StepExecutor:
+        """
+        取出一个空闲执行器并重置为新病例，没有空闲执行器时新建
+
+        Args:
+            session_id: 新病例评分历史的会话ID
+            department_guidance: 新病例的初始科室指导，为None时使用池的默认指导
+
+        Returns:
+            StepExecutor: 已重置的执行器
+        """
+        with self._lock:
+            executor = self._idle.pop() if self._idle else None
+            self.acquired_count += 1
+        if executor is None:
+            executor = self._create_executor(session_id)
+        if department_guidance is None:
+            department_guidance = self.department_guidance
+        executor.reset_case_state(session_id, department_guidance)
+        return executor
+
+    def release(self, executor: StepExecutor):
+        """归还执行器，供后续病例复用"""
+        with self._lock:
+            self._idle.append(executor)
+
+    @contextmanager
+    def lease(self, session_id: str, department_guidance: Optional[str] = None):
+        """在上下文内借用执行器，退出时归还"""
+        executor = self.acquire(session_id, department_guidance)
+        try:
+            yield executor
+        finally:
+            self.release(executor)
+
+    def _create_executor(self, session_id: str) -> StepExecutor:
+        """新建执行器"""
+        guidance_loader = self.guidance_loader_factory() if self.guidance_loader_factory else None
+        executor = self.executor_class(
+            guidance_loader=guidance_loader,
+            session_id=session_id,
+            **self.executor_kwargs
+        )
+        with self._lock:
+            self.created_count += 1
+        return executor
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取池的使用统计
+
+        Returns:
+            Dict: 新建执行器数、借出次数和复用率
+        """
+        with self._lock:
+            return {
+                "created": self.created_count,
+                "acquired": self.acquired_count,
+                "reuse_rate": 1 - self.created_count / self.acquired_count if self.acquired_count else 0.0
+            }
+
+    def shutdown(self):
+        """关闭所有空闲执行器的后台资源"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for executor in idle:
+            executor.shutdown()
@@ -1,9 +1,20 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Type
+import os
 import time
+import uuid
 import logging
 from .task_manager import TaskManager, TaskPhase
 from .step_executor import StepExecutor
 from .workflow_logger import WorkflowLogger
+from .turn_store import TurnStore
+from .models import StepResult, TriageState
+from .patient_source import PatientSource
+from .replay import ReplayLog
+from .engine_pool import StepExecutorPool
+from .profiler import StepProfiler, NULL_PROFILER, get_trace_path
+from agent_system.base.profiling import profiled
+from .checkpoint import (get_checkpoint_path, get_case_fingerprint, save_checkpoint,
+                         load_checkpoint, remove_checkpoint)
 
 class MedicalWorkflow:
     """
@@ -11,10 +22,23 @@ class MedicalWorkflow:
     负责协调整个30步问诊过程的执行
     """
     
+    # step执行器类型，异步工作流使用AsyncStepExecutor
+    step_executor_class = StepExecutor
+    
     def __init__(self, case_data: Dict[str, Any], model_type: str = "deepseek", 
                  llm_config: Optional[Dict] = None, max_steps: int = 30, log_dir: str = "logs",
                  case_index: Optional[int] = None, controller_mode: str = "normal",
-                 guidance_loader: Optional = None,department_guidance: str = "",):
+                 guidance_loader: Optional = None,department_guidance: str = "",
+                 recipient_mode: str = "full", recipient_full_interval: int = 5,
+                 monitor_skip_threshold: int = -1, triage_stable_steps: int = 0,
+                 prompter_cache: Optional = None, generation_mode: str = "chained",
+                 speculative: bool = False, stopping_policy: Optional = None,
+                 checkpoint: bool = True, resume_from: Optional[str] = None,
+                 patient_source: Optional[PatientSource] = None,
+                 logger_class: Type[WorkflowLogger] = WorkflowLogger,
+                 replay_log: Optional[ReplayLog] = None,
+                 profile: bool = False,
+                 step_executor_pool: Optional[StepExecutorPool] = None):
         """
         初始化医疗问诊工作流
         
@@ -28,42 +52,192 @@ class MedicalWorkflow:
             controller_mode: 任务控制器模式，'normal'为智能模式，'sequence'为顺序模式，'score_driven'为分数驱动模式
             guidance_loader: GuidanceLoader实例，用于加载动态指导内容
             department_guidance: 科室指导内容，默认为空字符串(如果在初始化时传入了固定的科室指导（例如通过 --department_filter 参数指定），current_guidance 会被设置为该固定指导内容。如果没有传入固定指导，current_guidance 初始值为空字符串 "")
+            recipient_mode: Recipient模式，'full'为全量重整，'delta'为增量更新
+            recipient_full_interval: 增量模式下每隔多少步执行一次全量重整
+            monitor_skip_threshold: Monitor跳过阈值（字符数），负数表示每步都重新评分
+            triage_stable_steps: 分诊稳定步数K，科室连续K步相同且主诉未实质变化时跳过Triager调用；0表示每步都调用
+            prompter_cache: PrompterTemplateCache 对象，批处理中共享的Prompter模板缓存
+            generation_mode: 问题生成模式，'chained'为Controller→Prompter→Inquirer串行，'fused'为单次融合调用
+            speculative: 是否在等待患者回答期间推测预计算下一步不依赖回答的工作
+            stopping_policy: StoppingPolicy 对象，用于将评分停滞的任务标记为饱和；为None时不提前停止
+            checkpoint: 是否在每个step成功完成后保存检查点，用于中断后续跑
+            resume_from: 检查点文件路径，指定时从该检查点恢复并继续写入原日志文件
+            patient_source: 患者回答来源，为None时使用虚拟患者
+            logger_class: 日志记录器类型，服务端使用不落盘的日志记录器
+            replay_log: ReplayLog 对象，指定时冻结的agent复用历史日志中的输出，新日志中记录每个输出的来源
+            profile: 是否记录每个step的性能剖析span，结束时在日志旁导出Chrome trace（.trace.json）
+            step_executor_pool: StepExecutorPool 对象，指定时从池中借用执行器并在结束时归还，执行器相关参数以池的配置为准；
+                回放模式或指定患者来源时不使用池
         """
         self.case_data = case_data
         self.model_type = model_type
         self.llm_config = llm_config or {}
         self.max_steps = max_steps
+        self.replay_log = replay_log
+        if replay_log is not None and speculative:
+            logging.warning("回放模式不支持推测预计算，已忽略speculative参数")
+            speculative = False
+        
+        # 性能剖析器，未启用时所有span为空操作
+        self.profiler = StepProfiler(case_index) if profile else NULL_PROFILER
+        
+        # 评分历史的会话ID，由工作流持有，保证并发病例之间互不干扰
+        self.session_id = f"case_{case_index}_{uuid.uuid4().hex[:8]}"
         
         # 初始化核心组件
         self.task_manager = TaskManager()
-        self.step_executor = StepExecutor(
-            model_type=model_type, 
-            llm_config=self.llm_config, 
-            controller_mode=controller_mode,
-            guidance_loader=guidance_loader,  # 将 GuidanceLoader 传递给 StepExecutor
-        )
-        self.logger = WorkflowLogger(case_data=case_data, log_dir=log_dir, case_index=case_index)
+        self.task_manager.set_stopping_policy(stopping_policy)
+        # 回放日志和患者来源与单个病例绑定，此时不使用执行器池
+        if replay_log is not None or patient_source is not None:
+            step_executor_pool = None
+        self.step_executor_pool = step_executor_pool
+        workflow_config = {
+            "max_steps": max_steps,
+            "model_type": model_type,
+            "controller_mode": controller_mode,
+            "generation_mode": generation_mode,
+            "recipient_mode": recipient_mode,
+            "monitor_skip_threshold": monitor_skip_threshold,
+            "triage_stable_steps": triage_stable_steps,
+            "prompter_cache": prompter_cache is not None,
+            "speculative": speculative,
+            "stopping_policy": self.task_manager.stopping_policy.describe(),
+            "checkpoint": checkpoint,
+            "profile": profile,
+            "engine_pool": step_executor_pool is not None
+        }
+        if replay_log is not None:
+            workflow_config["replay"] = {
+                "source_log": replay_log.source_path,
+                "frozen_agents": replay_log.frozen_agents
+            }
         
-        # 重置历史评分，确保新的工作流从零开始
-        StepExecutor.reset_historical_scores() #StepExecutor单步执行器
+        # 读取检查点，病例数据不一致的检查点视为无效
+        self.checkpoint_enabled = checkpoint
+        self.case_fingerprint = get_case_fingerprint(case_data)
+        resume_state = load_checkpoint(resume_from) if resume_from else None
+        if resume_state and resume_state.get("case_fingerprint") != self.case_fingerprint:
+            print(f"检查点与病例数据不一致，重新开始: {resume_from}")
+            resume_state = None
+        if resume_state and not os.path.exists(resume_state.get("log_file_path", "")):
+            print(f"检查点对应的日志文件不存在，重新开始: {resume_from}")
+            resume_state = None
+        
+        if resume_state:
+            self.logger = logger_class(
+                case_data=case_data, log_dir=log_dir, case_index=case_index,
+                workflow_config=workflow_config,
+                resume_log_file=resume_state["log_file_path"],
+                resume_offset=resume_state["log_offset"],
+                resume_step=resume_state["current_step"]
+            )
+        else:
+            self.logger = logger_class(
+                case_data=case_data, log_dir=log_dir, case_index=case_index,
+                workflow_config=workflow_config
+            )
+        self.checkpoint_path = get_checkpoint_path(self.logger.get_log_file_path())
+        if replay_log is not None:
+            self.logger.provenance_provider = replay_log.get_provenance
         
         # 初始化工作流状态
         self.current_step = 0
-        self.conversation_history = ""   # 完整对话历史
+        self.turn_store = TurnStore()   # 结构化对话轮次
         self.current_hpi = ""
         self.current_ph = ""
         self.current_chief_complaint = ""
-        self.current_triage = {
-            "primary_department": "",
-            "secondary_department": "",
-            "triage_reasoning": "",
-            "candidate_primary_department": "",
-            "candidate_secondary_department": "",
-
-        }
+        self.current_triage = TriageState()
+        self.last_step_result: Optional[StepResult] = None
         self.workflow_completed = False
         self.workflow_success = False
         self.current_guidance = department_guidance
+        
+        # 执行器最后创建或从池中借出，之后初始化失败时归还或关闭，避免占用池中的执行器
+        if step_executor_pool is not None:
+            self.step_executor = step_executor_pool.acquire(self.session_id, department_guidance)
+            if not isinstance(self.step_executor, self.step_executor_class):
+                step_executor_pool.release(self.step_executor)
+                raise TypeError(f"执行器池的执行器类型 {type(self.step_executor).__name__} "
+                                f"与工作流要求的 {self.step_executor_class.__name__} 不一致")
+        else:
+            self.step_executor = self.step_executor_class(
+                model_type=model_type, 
+                llm_config=self.llm_config, 
+                controller_mode=controller_mode,
+                guidance_loader=guidance_loader,  # 将 GuidanceLoader 传递给 StepExecutor
+                recipient_mode=recipient_mode,
+                recipient_full_interval=recipient_full_interval,
+                monitor_skip_threshold=monitor_skip_threshold,
+                triage_stable_steps=triage_stable_steps,
+                prompter_cache=prompter_cache,
+                generation_mode=generation_mode,
+                speculative=speculative,
+                session_id=self.session_id,
+                patient_source=patient_source,
+                replay_log=replay_log,
+            )
+        
+        if resume_state:
+            try:
+                self._restore_state(resume_state)
+            except BaseException:
+                self._release_step_executor()
+                raise
+            print(f"从检查点恢复工作流，已完成 {self.current_step} 步: {resume_from}")
+    
+    def _get_state(self) -> Dict[str, Any]:
+        """
+        导出当前病例的完整工作流状态，用于检查点
+        
+        Returns:
+            Dict: 工作流、任务管理器和执行器状态，以及日志文件的有效长度
+        """
+        return {
+            "case_fingerprint": self.case_fingerprint,
+            "log_file_path": self.logger.get_log_file_path(),
+            "log_offset": self.logger.get_log_offset(),
+            "current_step": self.current_step,
+            "current_hpi": self.current_hpi,
+            "current_ph": self.current_ph,
+            "current_chief_complaint": self.current_chief_complaint,
+            "current_triage": self.current_triage.to_dict(),
+            "current_guidance": self.current_guidance,
+            "last_doctor_question": getattr(self, '_last_doctor_question', ""),
+            "last_patient_response": getattr(self, '_last_patient_response', ""),
+            "turns": self.turn_store.to_list(),
+            "task_manager": self.task_manager.get_state(),
+            "step_executor": self.step_executor.get_case_state()
+        }
+    
+    def _restore_state(self, state: Dict[str, Any]):
+        """
+        从检查点恢复工作流状态
+        
+        Args:
+            state: _get_state导出的工作流状态
+        """
+        self.current_step = state["current_step"]
+        self.current_hpi = state.get("current_hpi", "")
+        self.current_ph = state.get("current_ph", "")
+        self.current_chief_complaint = state.get("current_chief_complaint", "")
+        self.current_triage = TriageState.from_dict(state.get("current_triage", {}))
+        self.current_guidance = state.get("current_guidance", self.current_guidance)
+        self._last_doctor_question = state.get("last_doctor_question", "")
+        self._last_patient_response = state.get("last_patient_response", "")
+        self.turn_store = TurnStore.from_list(state.get("turns", []))
+        self.task_manager.restore_state(state.get("task_manager", {}))
+        self.step_executor.restore_case_state(state.get("step_executor", {}))
+    
+    @profiled("checkpoint", "io")
+    def _save_checkpoint(self):
+        """保存检查点，失败时仅记录警告，不影响工作流执行"""
+        if not self.checkpoint_enabled:
+            return
+        try:
+            save_checkpoint(self.checkpoint_path, self._get_state())
+        except Exception as e:
+            logging.warning(f"保存检查点失败: {e}")
+    
     def run(self) -> str:
         """
         执行完整的医疗问诊工作流
@@ -73,9 +247,11 @@ class MedicalWorkflow:
         """
         print(f"开始执行医疗问诊工作流，病例：{self.case_data.get('病案介绍', {}).get('主诉', '未知病例')}")
         
+        interrupted = False
         try:
             # 执行工作流的主循环
-            for step in range(1, self.max_steps + 1):
+            # 从检查点恢复时从下一步继续
+            for step in range(self.current_step + 1, self.max_steps + 1):
                 self.current_step = step
                 
                 # 检查是否所有任务都已完成
@@ -98,23 +274,63 @@ class MedicalWorkflow:
                 print(f"已达到最大步数 {self.max_steps}，工作流结束")
                 self.workflow_success = False
             
+        except KeyboardInterrupt:
+            interrupted = True
+            raise
+        
         except Exception as e:
             print(f"工作流执行出现异常: {str(e)}")
             self.logger.log_error(self.current_step, "workflow_error", str(e))
             self.workflow_success = False
         
         finally:
-            # 记录工作流完成信息
-            final_summary = self.task_manager.get_completion_summary()
-            self.logger.log_workflow_complete(
-                total_steps=self.current_step,
-                final_summary=final_summary,
-                success=self.workflow_success
-            )
+            self._finish_run(interrupted)
         
         print(f"工作流执行完成，日志文件：{self.logger.get_log_file_path()}")
         return self.logger.get_log_file_path()
     
+    def _finish_run(self, interrupted: bool):
+        """
+        结束工作流：释放评分历史，归还或关闭执行器，中断时保留检查点，否则记录完成信息并删除检查点
+        
+        Args:
+            interrupted: 是否被手动中断
+        """
+        try:
+            # 释放本病例的评分历史，中断时评分历史已保存在检查点中
+            self.step_executor.score_history.clear_history(self.session_id)
+            if interrupted and self.checkpoint_enabled:
+                # 手动中断时保留检查点且不写入完成记录，便于下次续跑
+                print(f"工作流被中断，已保留检查点: {self.checkpoint_path}")
+            else:
+                # 记录工作流完成信息
+                final_summary = self.task_manager.get_completion_summary()
+                self.logger.log_workflow_complete(
+                    total_steps=self.current_step,
+                    final_summary=final_summary,
+                    success=self.workflow_success
+                )
+                # 病例已完整结束，检查点不再需要
+                remove_checkpoint(self.checkpoint_path)
+            trace_path = self.profiler.export_chrome_trace(get_trace_path(self.logger.get_log_file_path()))
+            if trace_path:
+                print(f"性能剖析已导出: {trace_path}")
+        finally:
+            self._release_step_executor()
+    
+    def _release_step_executor(self):
+        """归还或关闭step执行器"""
+        if self.step_executor_pool is not None:
+            # 执行器归还到池中供下一个病例复用，下次借出时重置病例状态
+            self.step_executor_pool.release(self.step_executor)
+        else:
+            self.step_executor.shutdown()
+    
+    @property
+    def conversation_history(self) -> str:
+        """完整对话历史文本，由对话轮次存储渲染"""
+        return self.turn_store.render_conversation()
+    
     def _execute_single_step(self, step_num: int) -> bool:
         """
         执行单个step
@@ -126,79 +342,104 @@ class MedicalWorkflow:
             bool: 是否执行成功
         """
         try:
-            # 更新TaskManager中的当前步骤
-            self.task_manager.update_step(step_num)
-            
-            # 获取当前阶段和待完成任务
-            current_phase = self.task_manager.get_current_phase()
-            pending_tasks = self.task_manager.get_pending_tasks(current_phase)
+            with self.profiler.activate(), self.profiler.span("step", "step", step=step_num):
+                step_result = self.step_executor.execute_step(**self._prepare_step(step_num))
+                return self._record_step_result(step_num, step_result)
             
-            # 记录step开始
-            self.logger.log_step_start(step_num, current_phase.value, pending_tasks)
+        except Exception as e:
+            self._handle_step_exception(step_num, e)
+            return False
+    
+    @profiled("prepare_step", "stage")
+    def _prepare_step(self, step_num: int) -> Dict[str, Any]:
+        """
+        记录step开始并构建step执行器的参数
+        
+        Args:
+            step_num: step编号
             
+        Returns:
+            Dict: execute_step的参数
+        """
+        # 更新TaskManager中的当前步骤
+        self.task_manager.update_step(step_num)
+        
+        # 获取当前阶段和待完成任务
+        current_phase = self.task_manager.get_current_phase()
+        pending_tasks = self.task_manager.get_pending_tasks(current_phase)
+        
+        # 记录step开始
+        self.logger.log_step_start(step_num, current_phase.value, pending_tasks)
+        
+        return {
+            "step_num": step_num,
+            "case_data": self.case_data,
+            "task_manager": self.task_manager,
+            "logger": self.logger,
+            "turn_store": self.turn_store,
+            "previous_hpi": self.current_hpi,
+            "previous_ph": self.current_ph,
+            "previous_chief_complaint": self.current_chief_complaint,
+            "previous_triage": self.current_triage,
+            "current_guidance": self.current_guidance,
             # 确定是否为第一步
-            is_first_step = (step_num == 1)
-            
+            "is_first_step": step_num == 1,
             # 准备医生问题（非首轮时使用上轮的结果）
-            doctor_question = getattr(self, '_last_doctor_question', "")
-            
-            # 执行step
-            step_result = self.step_executor.execute_step(
-                step_num=step_num,
-                case_data=self.case_data,
-                task_manager=self.task_manager,
-                logger=self.logger,
-                conversation_history=self.conversation_history,
-                previous_hpi=self.current_hpi,
-                previous_ph=self.current_ph,
-                previous_chief_complaint=self.current_chief_complaint,
-                previous_department=f"{self.current_triage.get('primary_department', '')}-{self.current_triage.get('secondary_department', '')}",
-                previous_candidate_department=f"{self.current_triage.get('candidate_primary_department', '')}-{self.current_triage.get('candidate_secondary_department', '')}",
-                previous_triage_reasoning=self.current_triage.get("triage_reasoning", ""),
-                current_guidance=self.current_guidance,
-                is_first_step=is_first_step,
-                doctor_question=doctor_question,
-            )
-            
-            # 检查执行结果
-            if not step_result["success"]:
-                print(f"Step {step_num} 执行失败: {step_result.get('errors', [])}")
-                return False
-            
-            # 更新工作流状态
-            self._update_workflow_state(step_result)
-            
-            # 记录step完成
-            self.logger.log_step_complete(
-                step_num=step_num,
-                doctor_question=step_result["doctor_question"],
-                conversation_history=step_result["conversation_history"],
-                task_completion_summary=step_result["task_completion_summary"]
-            )
-            
-            return True
+            "doctor_question": getattr(self, '_last_doctor_question', ""),
+        }
+    
+    @profiled("record_step", "stage")
+    def _record_step_result(self, step_num: int, step_result: StepResult) -> bool:
+        """
+        根据step执行结果更新工作流状态，记录step完成并保存检查点
+        
+        Args:
+            step_num: step编号
+            step_result: step执行结果
             
-        except Exception as e:
-            error_msg = f"Step {step_num} 执行异常: {str(e)}"
-            print(error_msg)
-            self.logger.log_error(step_num, "step_error", error_msg)
+        Returns:
+            bool: 是否执行成功
+        """
+        # 检查执行结果
+        if not step_result.success:
+            print(f"Step {step_num} 执行失败: {step_result.errors}")
             return False
+        
+        # 更新工作流状态
+        self._update_workflow_state(step_result)
+        self.last_step_result = step_result
+        
+        # 记录step完成
+        self.logger.log_step_complete(
+            step_num=step_num,
+            doctor_question=step_result.doctor_question,
+            conversation_history=step_result.conversation_history,
+            task_completion_summary=step_result.task_completion_summary
+        )
+        self._save_checkpoint()
+        
+        return True
+    
+    def _handle_step_exception(self, step_num: int, error: Exception):
+        """记录step执行异常"""
+        error_msg = f"Step {step_num} 执行异常: {str(error)}"
+        print(error_msg)
+        self.logger.log_error(step_num, "step_error", error_msg)
     
-    def _update_workflow_state(self, step_result: Dict[str, Any]):
+    def _update_workflow_state(self, step_result: StepResult):
         """
         根据step执行结果更新工作流状态
         
         Args:
             step_result: step执行结果
         """
-        self.conversation_history = step_result["conversation_history"]
-        self.current_hpi = step_result["updated_hpi"]
-        self.current_ph = step_result["updated_ph"]
-        self.current_chief_complaint = step_result["updated_chief_complaint"]
-        self.current_triage = step_result["triage_result"]
-        self._last_doctor_question = step_result["doctor_question"]
-        self.current_guidance = step_result.get("new_guidance", self.current_guidance)
-        self._last_patient_response = step_result["patient_response"]
+        self.current_hpi = step_result.updated_hpi
+        self.current_ph = step_result.updated_ph
+        self.current_chief_complaint = step_result.updated_chief_complaint
+        self.current_triage = step_result.triage
+        self._last_doctor_question = step_result.doctor_question
+        self.current_guidance = step_result.new_guidance
+        self._last_patient_response = step_result.patient_response
     def _print_step_progress(self, step_num: int):
         """
         打印step进度信息
@@ -213,10 +454,11 @@ class MedicalWorkflow:
         logging.info(f"当前阶段: {current_phase.value}")
         
         # 显示分诊信息
-        if self.current_triage and self.current_triage.get("primary_department") and self.current_triage.get("candidate_secondary_department"):
-            logging.info(f"科室分诊: {self.current_triage['primary_department']} → {self.current_triage['secondary_department']}")
-            logging.info(f"候选科室分诊: {self.current_triage['candidate_primary_department']} → {self.current_triage['candidate_secondary_department']}")
-            logging.info(f"分诊理由: {self.current_triage['triage_reasoning'][:50]}...")
+        triage = self.current_triage
+        if triage.primary_department and triage.candidate_secondary_department:
+            logging.info(f"科室分诊: {triage.primary_department} → {triage.secondary_department}")
+            logging.info(f"候选科室分诊: {triage.candidate_primary_department} → {triage.candidate_secondary_department}")
+            logging.info(f"分诊理由: {triage.triage_reasoning[:50]}...")
         
         # 显示各阶段完成情况
         for phase_name, phase_info in completion_summary["phases"].items():
@@ -247,7 +489,7 @@ class MedicalWorkflow:
             "workflow_success": self.workflow_success,
             "completion_summary": self.task_manager.get_completion_summary(),
             "conversation_length": len(self.conversation_history),
-            "triage_info": self.current_triage,
+            "triage_info": self.current_triage.to_dict(),
             "log_file_path": self.logger.get_log_file_path()
         }
     
@@ -271,5 +513,5 @@ class MedicalWorkflow:
             "chief_complaint": self.current_chief_complaint,
             "history_of_present_illness": self.current_hpi,
             "past_history": self.current_ph,
-            "triage_info": self.current_triage
+            "triage_info": self.current_triage.to_dict()
         }
\ No newline at end of file
@@ -0,0 +1,138 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+
+@dataclass(slots=True)
+class TriageState:
+    """
+    分诊状态
+    记录当前分诊科室、候选科室及分诊理由
+    """
+    primary_department: str = ""
+    secondary_department: str = ""
+    triage_reasoning: str = ""
+    candidate_primary_department: str = ""
+    candidate_secondary_department: str = ""
+
+    @property
+    def department(self) -> str:
+        """分诊科室，格式为"一级科室-二级科室\""""
+        return f"{self.primary_department}-{self.secondary_department}"
+
+    @property
+    def candidate_department(self) -> str:
+        """候选科室，格式为"一级科室-二级科室\""""
+        return f"{self.candidate_primary_department}-{self.candidate_secondary_department}"
+
+    @staticmethod
+    def _split(dept: str) -> tuple:
+        """将"一级科室-二级科室"拆分为一级、二级科室，无分隔符时两者相同"""
+        if '-' in dept:
+            primary, secondary = dept.split('-')[:2]
+            return primary, secondary
+        return dept, dept
+
+    @classmethod
+    def from_departments(cls, department: str, candidate_department: str, triage_reasoning: str = "") -> "TriageState":
+        """
+        根据"一级科室-二级科室"格式的科室字符串构建分诊状态
+
+        Args:
+            department: 分诊科室
+            candidate_department: 候选科室
+            triage_reasoning: 分诊理由
+
+        Returns:
+            TriageState: 分诊状态
+        """
+        primary, secondary = cls._split(department)
+        candidate_primary, candidate_secondary = cls._split(candidate_department)
+        return cls(primary, secondary, triage_reasoning, candidate_primary, candidate_secondary)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "TriageState":
+        """从字典构建分诊状态，用于检查点恢复"""
+        return cls(
+            primary_department=data.get("primary_department", ""),
+            secondary_department=data.get("secondary_department", ""),
+            triage_reasoning=data.get("triage_reasoning", ""),
+            candidate_primary_department=data.get("candidate_primary_department", ""),
+            candidate_secondary_department=data.get("candidate_secondary_department", "")
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        """转换为字典，用于日志和检查点"""
+        return {
+            "primary_department": self.primary_department,
+            "secondary_department": self.secondary_department,
+            "triage_reasoning": self.triage_reasoning,
+            "candidate_primary_department": self.candidate_primary_department,
+            "candidate_secondary_department": self.candidate_secondary_department
+        }
+
+
+@dataclass(slots=True)
+class PhaseSummary:
+    """
+    单个任务阶段的完成情况
+    由TaskManager在评分变化时增量维护
+    """
+    total: int
+    completed: int = 0
+    saturated: int = 0
+    is_completed: bool = False
+
+    @property
+    def completion_rate(self) -> float:
+        """阶段完成率"""
+        return self.completed / self.total if self.total > 0 else 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，格式与日志中的task_completion_summary一致"""
+        return {
+            "completed": self.completed,
+            "saturated": self.saturated,
+            "total": self.total,
+            "completion_rate": self.completion_rate,
+            "is_completed": self.is_completed
+        }
+
+
+@dataclass(slots=True)
+class StepResult:
+    """
+    单个step的执行结果
+    """
+    step_number: int
+    updated_hpi: str = ""
+    updated_ph: str = ""
+    updated_chief_complaint: str = ""
+    triage: TriageState = field(default_factory=TriageState)
+    success: bool = False
+    patient_response: str = ""
+    doctor_question: str = ""
+    selected_task: str = ""
+    new_guidance: str = ""
+    conversation_history: str = ""
+    task_completion_summary: Dict[str, Any] = field(default_factory=dict)
+    evaluator_result: Optional[Any] = None
+    errors: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，便于序列化和兼容按键访问的调用方"""
+        return {
+            "step_number": self.step_number,
+            "success": self.success,
+            "patient_response": self.patient_response,
+            "updated_hpi": self.updated_hpi,
+            "updated_ph": self.updated_ph,
+            "updated_chief_complaint": self.updated_chief_complaint,
+            "triage_result": self.triage.to_dict(),
+            "doctor_question": self.doctor_question,
+            "selected_task": self.selected_task,
+            "new_guidance": self.new_guidance,
+            "conversation_history": self.conversation_history,
+            "task_completion_summary": self.task_completion_summary,
+            "evaluator_result": self.evaluator_result,
+            "errors": list(self.errors)
+        }
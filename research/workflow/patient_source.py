@@ -0,0 +1,214 @@
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable
+
+from .workflow_logger import WorkflowLogger
+from .replay import ReplayLog
+
+
+class PatientSource:
+    """
+    患者回答来源基类
+    StepExecutor每步通过患者来源获取本轮患者回答，科研批处理使用虚拟患者，
+    服务端使用真实患者输入，回放模式使用历史日志中的回答
+    """
+
+    name = "base"
+    # 获取回答是否需要调用LLM，异步引擎据此决定是否占用LLM并发配额
+    uses_llm = False
+    FIRST_INQUIRY = "您好，请问您哪里不舒服？"
+
+    def get_response(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+                     is_first_step: bool, doctor_question: str = "") -> str:
+        """
+        获取本轮患者回答，并记录patient_response日志
+
+        Args:
+            step_num: step编号
+            case_data: 病例数据，服务端为空
+            logger: 日志记录器
+            is_first_step: 是否为第一个step
+            doctor_question: 上一轮医生问题，首轮为空
+
+        Returns:
+            str: 患者回答
+        """
+        patient_response = self._fetch(step_num, case_data, logger, is_first_step, doctor_question)
+        logger.log_patient_response(step_num, patient_response, is_first_step)
+        return patient_response
+
+    async def async_get_response(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+                                 is_first_step: bool, doctor_question: str = "") -> str:
+        """
+        异步获取本轮患者回答，参数与返回值同get_response
+        """
+        patient_response = await self._async_fetch(step_num, case_data, logger, is_first_step, doctor_question)
+        logger.log_patient_response(step_num, patient_response, is_first_step)
+        return patient_response
+
+    def _fetch(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+               is_first_step: bool, doctor_question: str) -> str:
+        """获取患者回答，由子类实现"""
+        raise NotImplementedError
+
+    async def _async_fetch(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+                           is_first_step: bool, doctor_question: str) -> str:
+        """异步获取患者回答，不需要调用LLM的来源直接使用同步实现"""
+        return self._fetch(step_num, case_data, logger, is_first_step, doctor_question)
+
+
+class VirtualPatientSource(PatientSource):
+    """
+    虚拟患者来源
+    使用VirtualPatientAgent根据病例数据扮演患者
+    """
+
+    name = "virtual"
+    uses_llm = True
+    DEFAULT_RESPONSE = "对不起，我不太清楚怎么描述，医生您看着办吧。"
+
+    def __init__(self, virtual_patient):
+        """
+        初始化虚拟患者来源
+
+        Args:
+            virtual_patient: VirtualPatientAgent 对象
+        """
+        self.virtual_patient = virtual_patient
+
+    def _fetch(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+               is_first_step: bool, doctor_question: str) -> str:
+        """调用虚拟患者agent生成回答，失败时返回默认回答"""
+        start_time = time.time()
+        worker_inquiry = self.FIRST_INQUIRY if is_first_step else doctor_question
+        try:
+            patient_result = self.virtual_patient.run(
+                worker_inquiry=worker_inquiry,
+                is_first_epoch=is_first_step,
+                patient_case=case_data
+            )
+        except Exception as e:
+            return self._handle_error(step_num, logger, e)
+        return self._log_result(step_num, logger, worker_inquiry, is_first_step, case_data,
+                                patient_result, time.time() - start_time)
+
+    async def _async_fetch(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+                           is_first_step: bool, doctor_question: str) -> str:
+        """异步调用虚拟患者agent生成回答，失败时返回默认回答"""
+        start_time = time.time()
+        worker_inquiry = self.FIRST_INQUIRY if is_first_step else doctor_question
+        try:
+            patient_result = await self.virtual_patient.async_run(
+                worker_inquiry=worker_inquiry,
+                is_first_epoch=is_first_step,
+                patient_case=case_data
+            )
+        except Exception as e:
+            return self._handle_error(step_num, logger, e)
+        return self._log_result(step_num, logger, worker_inquiry, is_first_step, case_data,
+                                patient_result, time.time() - start_time)
+
+    def _log_result(self, step_num: int, logger: WorkflowLogger, worker_inquiry: str,
+                    is_first_step: bool, case_data: Dict[str, Any], patient_result,
+                    execution_time: float) -> str:
+        """记录虚拟患者的执行日志并返回回答"""
+        patient_response = patient_result.current_chat
+        logger.log_agent_execution(
+            step_num, "virtual_patient",
+            {
+                "worker_inquiry": worker_inquiry,
+                "is_first_epoch": is_first_step,
+                "case_data": case_data
+            },
+            {"patient_response": patient_response},
+            execution_time
+        )
+        return patient_response
+
+    def _handle_error(self, step_num: int, logger: WorkflowLogger, error: Exception) -> str:
+        """记录虚拟患者执行失败并返回默认回答"""
+        error_msg = f"虚拟患者执行失败: {str(error)}"
+        logger.log_error(step_num, "virtual_patient_error", error_msg)
+        return self.DEFAULT_RESPONSE
+
+
+class InteractivePatientSource(PatientSource):
+    """
+    真实患者来源
+    服务端在执行step前通过provide传入患者输入；终端交互可传入response_fn按需读取输入
+    """
+
+    name = "interactive"
+    DEFAULT_RESPONSE = "患者未提供描述"
+
+    def __init__(self, response_fn: Optional[Callable[[str, bool], str]] = None):
+        """
+        初始化真实患者来源
+
+        Args:
+            response_fn: 没有预先传入的回答时调用的函数，参数为医生问题和是否首轮，返回患者回答
+        """
+        self.response_fn = response_fn
+        self._pending: deque = deque()
+
+    def provide(self, patient_response: str):
+        """
+        传入下一轮的患者回答
+
+        Args:
+            patient_response: 患者回答
+        """
+        self._pending.append(patient_response)
+
+    def clear(self):
+        """丢弃尚未使用的患者回答，用于执行失败后回退"""
+        self._pending.clear()
+
+    def _fetch(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+               is_first_step: bool, doctor_question: str) -> str:
+        """优先使用预先传入的回答，否则调用response_fn"""
+        if self._pending:
+            patient_response = self._pending.popleft()
+        elif self.response_fn is not None:
+            patient_response = self.response_fn(self.FIRST_INQUIRY if is_first_step else doctor_question, is_first_step)
+        else:
+            raise RuntimeError(f"Step {step_num} 没有可用的患者回答")
+        return patient_response or self.DEFAULT_RESPONSE
+
+
+class ReplayPatientSource(PatientSource):
+    """
+    日志回放患者来源
+    按step编号使用ReplayLog解析出的patient_response事件，用于复现或对比不同配置下的问诊过程
+    """
+
+    name = "replay"
+
+    def __init__(self, replay_log: ReplayLog, fallback: Optional[PatientSource] = None):
+        """
+        初始化日志回放患者来源
+
+        Args:
+            replay_log: 已加载的历史工作流日志
+            fallback: 日志中没有对应step的回答时使用的患者来源，为None时抛出异常
+        """
+        self.replay_log = replay_log
+        self.log_file_path = replay_log.source_path
+        self.fallback = fallback
+        self.responses: Dict[int, str] = replay_log.patient_responses
+
+    def _fetch(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+               is_first_step: bool, doctor_question: str) -> str:
+        """读取日志中对应step的回答"""
+        if step_num in self.responses:
+            return self.responses[step_num]
+        if self.fallback is not None:
+            return self.fallback._fetch(step_num, case_data, logger, is_first_step, doctor_question)
+        raise RuntimeError(f"回放日志中没有 Step {step_num} 的患者回答: {self.log_file_path}")
+
+    async def _async_fetch(self, step_num: int, case_data: Dict[str, Any], logger: WorkflowLogger,
+                           is_first_step: bool, doctor_question: str) -> str:
+        """异步读取日志中对应step的回答，缺失时异步调用回退来源"""
+        if step_num not in self.responses and self.fallback is not None:
+            return await self.fallback._async_fetch(step_num, case_data, logger, is_first_step, doctor_question)
+        return self._fetch(step_num, case_data, logger, is_first_step, doctor_question)
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+
+from agent_system.base.profiling import set_profiler, reset_profiler
+
+# 剖析文件后缀，与工作流日志同名
+TRACE_SUFFIX = ".trace.json"
+
+# 当前所在span的id，用于记录父子关系；asyncio任务继承创建时的span
+_current_span: ContextVar[Optional[int]] = ContextVar("current_span", default=None)
+
+
+def get_trace_path(log_file_path: str) -> str:
+    """根据工作流日志路径获取剖析文件路径"""
+    base, _ = os.path.splitext(log_file_path)
+    return base + TRACE_SUFFIX
+
+
+class StepProfiler:
+    """
+    工作流性能剖析器
+    记录嵌套的span（step、各agent阶段、提示词构建、LLM请求、解析、日志写入、指导查询等），
+    导出为Chrome trace-event格式，可在chrome://tracing或Perfetto中查看
+    """
+
+    def __init__(self, case_index: Optional[int] = None):
+        """
+        Args:
+            case_index: 病例序号，记录在trace元数据中
+        """
+        self.case_index = case_index
+        self.events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """在当前上下文中启用剖析器，agent内部的span也会记录到本剖析器"""
+        token = set_profiler(self)
+        try:
+            yield self
+        finally:
+            reset_profiler(token)
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **args):
+        """
+        记录一个span
+
+        Args:
+            name: span名称
+            category: span类别
+            **args: 附加参数
+        """
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        parent_id = _current_span.get()
+        token = _current_span.set(span_id)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            _current_span.reset(token)
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((start - self._origin) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": dict(args, id=span_id, parent=parent_id)
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def export_chrome_trace(self, path: str) -> str:
+        """
+        导出Chrome trace-event JSON
+
+        Args:
+            path: 输出文件路径
+
+        Returns:
+            str: 输出文件路径
+        """
+        trace = {
+            "traceEvents": sorted(self.events, key=lambda event: event["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {"case_index": self.case_index}
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False)
+        return path
+
+
+class NullProfiler:
+    """未启用剖析时使用的空剖析器"""
+
+    @contextmanager
+    def activate(self):
+        yield self
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", **args):
+        yield
+
+    def export_chrome_trace(self, path: str) -> Optional[str]:
+        return None
+
+
+NULL_PROFILER = NullProfiler()
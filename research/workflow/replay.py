@@ -0,0 +1,239 @@
+import json
+import logging
+from typing import Dict, Any, List, Optional, Iterable
+
+from agent_system.recipient.response_model import RecipientResponseModel
+from agent_system.triager.response_model import TriageResult
+from agent_system.monitor.response_model import MonitorResult
+from agent_system.controller.response_model import ControllerDecision
+from agent_system.prompter.response_model import PrompterResult
+from agent_system.inquirer.response_model import InquirerResponseModel
+from agent_system.fused_inquirer.response_model import FusedInquiryResult
+from agent_system.evaluator.response_model import EvaluatorResult
+
+
+def _build_recipient(output_data: Dict[str, Any], kwargs: Dict[str, Any]):
+    return RecipientResponseModel(
+        updated_HPI=output_data["updated_HPI"],
+        updated_PH=output_data["updated_PH"],
+        chief_complaint=output_data["chief_complaint"]
+    )
+
+
+def _build_triager(output_data: Dict[str, Any], kwargs: Dict[str, Any]):
+    return TriageResult(**output_data)
+
+
+def _build_monitor(output_data: Dict[str, Any], kwargs: Dict[str, Any]):
+    # 日志只记录本阶段各任务的评分，按任务名取出
+    return MonitorResult(
+        completion_score=output_data["phase_scores"][kwargs["task_name"]],
+        reason="回放历史评分"
+    )
+
+
+def _build_controller(output_data: Dict[str, Any], kwargs: Dict[str, Any]):
+    return ControllerDecision(
+        selected_task=output_data["selected_task"],
+        specific_guidance=output_data["specific_guidance"]
+    )
+
+
+def _build_prompter(output_data: Dict[str, Any], kwargs: Dict[str, Any]):
+    return PrompterResult(
+        description=output_data["description"],
+        instructions=output_data["instructions"]
+    )
+
+
+def _build_inquirer(output_data: Dict[str, Any], kwargs: Dict[str, Any]):
+    return InquirerResponseModel(current_chat=output_data["doctor_question"])
+
+
+def _build_fused_inquirer(output_data: Dict[str, Any], kwargs: Dict[str, Any]):
+    return FusedInquiryResult(
+        selected_task=output_data["selected_task"],
+        specific_guidance=output_data["specific_guidance"],
+        current_chat=output_data["doctor_question"]
+    )
+
+
+def _build_evaluator(output_data: Dict[str, Any], kwargs: Dict[str, Any]):
+    return EvaluatorResult(**output_data)
+
+
+# 可冻结的agent及其从日志输出重建响应模型的方法；patient表示患者回答，由ReplayPatientSource回放
+RESULT_BUILDERS = {
+    "recipient": _build_recipient,
+    "triager": _build_triager,
+    "monitor": _build_monitor,
+    "controller": _build_controller,
+    "prompter": _build_prompter,
+    "inquirer": _build_inquirer,
+    "fused_inquirer": _build_fused_inquirer,
+    "evaluator": _build_evaluator,
+}
+REPLAYABLE_AGENTS = ["patient"] + list(RESULT_BUILDERS)
+
+# 默认冻结上游阶段，只重新运行问题生成和评估
+DEFAULT_FROZEN_AGENTS = ["patient", "recipient", "triager", "monitor", "controller", "prompter"]
+
+
+class ReplayLog:
+    """
+    工作流日志回放源
+    读取历史工作流jsonl日志，按(step, agent)索引agent输出，并记录回放过程中每个agent输出的来源
+    """
+
+    def __init__(self, log_file_path: str, frozen_agents: Optional[Iterable[str]] = None):
+        """
+        加载历史工作流日志
+
+        Args:
+            log_file_path: 历史工作流jsonl日志路径
+            frozen_agents: 使用日志输出代替LLM调用的agent名称，为None时使用DEFAULT_FROZEN_AGENTS
+        """
+        self.source_path = log_file_path
+        self.frozen_agents = list(DEFAULT_FROZEN_AGENTS if frozen_agents is None else frozen_agents)
+        unknown = [name for name in self.frozen_agents if name not in REPLAYABLE_AGENTS]
+        if unknown:
+            raise ValueError(f"不支持冻结的agent: {unknown}，可选: {REPLAYABLE_AGENTS}")
+
+        self.case_data: Optional[Dict[str, Any]] = None
+        self.workflow_config: Dict[str, Any] = {}
+        self.outputs: Dict[tuple, Dict[str, Any]] = {}
+        self.patient_responses: Dict[int, str] = {}
+        self.current_step = 0
+        # (step, agent) -> 每次调用是否使用了日志输出
+        self._sources: Dict[tuple, List[bool]] = {}
+
+        with open(log_file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                event_type = entry.get("event_type")
+                if event_type == "workflow_start":
+                    self.case_data = entry.get("case_data")
+                    self.workflow_config = entry.get("workflow_config", {})
+                elif event_type == "patient_response":
+                    self.patient_responses[entry["step_number"]] = entry.get("message", "")
+                elif event_type == "agent_execution":
+                    self.outputs[(entry["step_number"], entry["agent_name"])] = entry.get("output_data", {})
+
+    def is_frozen(self, agent_name: str) -> bool:
+        """agent是否使用日志输出"""
+        return agent_name in self.frozen_agents
+
+    def get_result(self, agent_name: str, kwargs: Dict[str, Any]):
+        """
+        从日志重建当前step指定agent的响应模型
+
+        Returns:
+            响应模型，日志中没有对应输出（如步数超出原日志或回放后决策发生偏离）时返回None
+        """
+        output_data = self.outputs.get((self.current_step, agent_name))
+        if output_data is None:
+            return None
+        try:
+            return RESULT_BUILDERS[agent_name](output_data, kwargs)
+        except (KeyError, TypeError, ValueError) as e:
+            logging.debug(f"回放 Step {self.current_step} {agent_name} 输出失败: {e}")
+            return None
+
+    def record_source(self, agent_name: str, replayed: bool, step_num: Optional[int] = None):
+        """记录一次agent调用的输出来源"""
+        step = self.current_step if step_num is None else step_num
+        self._sources.setdefault((step, agent_name), []).append(replayed)
+
+    def get_provenance(self, step_num: int, agent_name: str) -> Dict[str, Any]:
+        """
+        获取step中agent输出的来源标记，写入新日志
+
+        Returns:
+            dict: source为replay（全部来自日志）、live（全部实时调用）或partial（部分回放）
+        """
+        if agent_name == "patient":
+            sources = [step_num in self.patient_responses] if self.is_frozen(agent_name) else []
+        else:
+            sources = self._sources.pop((step_num, agent_name), [])
+        if sources and all(sources):
+            source = "replay"
+        elif any(sources):
+            source = "partial"
+        else:
+            source = "live"
+        provenance = {"source": source}
+        if source != "live":
+            provenance.update({"replay_log": self.source_path, "replay_step": step_num})
+        elif self.is_frozen(agent_name):
+            # 冻结的agent在日志中没有可用输出，回退到实时调用
+            provenance["replay_miss"] = True
+        return provenance
+
+
+class FrozenAgent:
+    """
+    冻结的agent
+    优先返回回放日志中当前step的输出，日志中没有对应输出时回退到实时agent
+    未定义的属性转发给实时agent，以便执行器照常读取模式开关等配置
+    """
+
+    def __init__(self, replay_log: ReplayLog, agent_name: str, live_agent=None):
+        """
+        Args:
+            replay_log: 回放日志
+            agent_name: agent名称，对应日志中的agent_name
+            live_agent: 日志中没有对应输出时使用的实时agent，为None时抛出异常
+        """
+        self.replay_log = replay_log
+        self.agent_name = agent_name
+        self.live_agent = live_agent
+        self.last_prompt_tokens = 0
+        self.last_completion_tokens = 0
+        self.last_run_fallback = False
+
+    def __getattr__(self, name):
+        live_agent = self.__dict__.get("live_agent")
+        if live_agent is None:
+            raise AttributeError(name)
+        return getattr(live_agent, name)
+
+    def _replay(self, kwargs: Dict[str, Any]):
+        """取出日志输出，回放时不产生token用量"""
+        result = self.replay_log.get_result(self.agent_name, kwargs)
+        self.replay_log.record_source(self.agent_name, result is not None)
+        if result is not None:
+            self.last_prompt_tokens = 0
+            self.last_completion_tokens = 0
+            self.last_run_fallback = False
+        elif self.live_agent is None:
+            raise RuntimeError(f"回放日志中没有 Step {self.replay_log.current_step} 的{self.agent_name}输出: "
+                               f"{self.replay_log.source_path}")
+        return result
+
+    def _sync_usage(self):
+        """实时调用后同步实时agent的用量统计"""
+        self.last_prompt_tokens = getattr(self.live_agent, "last_prompt_tokens", 0)
+        self.last_completion_tokens = getattr(self.live_agent, "last_completion_tokens", 0)
+        self.last_run_fallback = getattr(self.live_agent, "last_run_fallback", False)
+
+    def run(self, **kwargs):
+        """返回日志输出，没有时调用实时agent"""
+        result = self._replay(kwargs)
+        if result is None:
+            result = self.live_agent.run(**kwargs)
+            self._sync_usage()
+        return result
+
+    async def async_run(self, **kwargs):
+        """异步版本，参数与返回值同run"""
+        result = self._replay(kwargs)
+        if result is None:
+            result = await self.live_agent.async_run(**kwargs)
+            self._sync_usage()
+        return result
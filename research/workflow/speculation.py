@@ -0,0 +1,314 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, Tuple
+
+
+class SpeculativeWork:
+    """
+    单次推测预计算
+    在step N生成医生问题后提交，预先计算step N+1中不依赖患者回答的工作；
+    step N+1中各环节在前置条件仍然成立时领取结果，否则丢弃
+    """
+
+    KINDS = ("controller", "prompter", "comparison_guidance", "inquiry_guidance")
+
+    def __init__(self, step_num: int, phase_value: str,
+                 controller_snapshot: Optional[Tuple] = None,
+                 controller_decision=None,
+                 prompter_key: Optional[Tuple[str, str, str, str]] = None,
+                 chief_complaint: str = "",
+                 department: str = "",
+                 candidate_department: str = "",
+                 primary_department: str = ""):
+        """
+        初始化推测预计算
+
+        Args:
+            step_num: 提交推测的step编号，结果供下一步使用
+            phase_value: 预测的下一步任务阶段
+            controller_snapshot: 预测Controller决策时的阶段、待完成任务及分数快照
+            controller_decision: 预测的Controller决策
+            prompter_key: 预热Prompter时使用的(任务, 一级科室, 二级科室, 阶段)
+            chief_complaint: 预热Prompter时使用的主诉
+            department: 当前分诊科室（一级-二级），用于科室对比指导
+            candidate_department: 当前候选科室（一级-二级），用于科室对比指导
+            primary_department: 预取询问指导的一级科室
+        """
+        self.step_num = step_num
+        self.phase_value = phase_value
+        self.controller_snapshot = controller_snapshot
+        self.controller_decision = controller_decision
+        self.prompter_key = prompter_key
+        self.chief_complaint = chief_complaint
+        self.department = department
+        self.candidate_department = candidate_department
+        self.primary_department = primary_department
+        self.future: Optional[Future] = None
+        self.wait_time = 0.0
+        self.time_saved = 0.0
+        # 各项推测的结果：None表示未提交，"hit"为已采用，"wasted"为已丢弃
+        self.outcomes: Dict[str, Optional[str]] = {kind: None for kind in self.KINDS}
+        if controller_decision is not None:
+            self.outcomes["controller"] = "pending"
+
+    def mark_submitted(self, kind: str):
+        """标记某项推测已提交"""
+        self.outcomes[kind] = "pending"
+
+    def claim_controller(self, snapshot: Tuple):
+        """
+        领取预测的Controller决策
+
+        Args:
+            snapshot: 当前的阶段、待完成任务及分数快照
+
+        Returns:
+            预测的决策，前置条件不成立时返回None
+        """
+        if self.outcomes["controller"] != "pending":
+            return None
+        if snapshot != self.controller_snapshot:
+            self.outcomes["controller"] = "wasted"
+            return None
+        self.outcomes["controller"] = "hit"
+        return self.controller_decision
+
+    def claim_prompter(self, key: Tuple[str, str, str, str], chief_complaint: str):
+        """
+        领取预热的Prompter结果，仅在任务、科室、阶段和主诉均与预测一致时采用
+
+        Args:
+            key: 当前的(任务, 一级科室, 二级科室, 阶段)
+            chief_complaint: 当前主诉
+
+        Returns:
+            Optional[PrompterResult]: 预热结果，前置条件不成立时返回None
+        """
+        if self.outcomes["prompter"] != "pending":
+            return None
+        if key != self.prompter_key or chief_complaint != self.chief_complaint:
+            self.outcomes["prompter"] = "wasted"
+            return None
+        results = self._get_results()
+        result = results.get("prompter")
+        if result is None:
+            self.outcomes["prompter"] = "wasted"
+            return None
+        self.outcomes["prompter"] = "hit"
+        self.time_saved += results.get("prompter_time", 0.0)
+        return result
+
+    def claim_comparison_guidance(self, department: str, candidate_department: str) -> Optional[str]:
+        """
+        领取预取的科室对比指导
+
+        Args:
+            department: 当前分诊科室
+            candidate_department: 当前候选科室
+
+        Returns:
+            Optional[str]: 对比指导，前置条件不成立时返回None
+        """
+        if self.outcomes["comparison_guidance"] != "pending":
+            return None
+        if (department, candidate_department) != (self.department, self.candidate_department):
+            self.outcomes["comparison_guidance"] = "wasted"
+            return None
+        results = self._get_results()
+        if "comparison_guidance" not in results:
+            self.outcomes["comparison_guidance"] = "wasted"
+            return None
+        self.outcomes["comparison_guidance"] = "hit"
+        return results["comparison_guidance"]
+
+    def claim_inquiry_guidance(self, primary_department: str) -> Optional[str]:
+        """
+        领取预取的科室询问指导
+
+        Args:
+            primary_department: 本步分诊得到的一级科室
+
+        Returns:
+            Optional[str]: 询问指导，前置条件不成立时返回None
+        """
+        if self.outcomes["inquiry_guidance"] != "pending":
+            return None
+        if primary_department != self.primary_department:
+            self.outcomes["inquiry_guidance"] = "wasted"
+            return None
+        results = self._get_results()
+        if "inquiry_guidance" not in results:
+            self.outcomes["inquiry_guidance"] = "wasted"
+            return None
+        self.outcomes["inquiry_guidance"] = "hit"
+        return results["inquiry_guidance"]
+
+    def _get_results(self) -> Dict[str, Any]:
+        """等待后台预计算完成并返回结果，预计算失败时返回空结果"""
+        if self.future is None:
+            return {}
+        start_time = time.time()
+        try:
+            return self.future.result()
+        except Exception as e:
+            logging.warning(f"推测预计算失败: {e}")
+            return {}
+        finally:
+            self.wait_time += time.time() - start_time
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        结束本次推测，未被领取的推测计为浪费
+
+        Returns:
+            Dict: 各项推测的结果、等待时间和节省时间
+        """
+        for kind, outcome in self.outcomes.items():
+            if outcome == "pending":
+                self.outcomes[kind] = "wasted"
+        if self.future is not None and not self.future.done():
+            self.future.cancel()
+        return {
+            "submitted_at_step": self.step_num,
+            "outcomes": {kind: outcome for kind, outcome in self.outcomes.items() if outcome is not None},
+            "wait_time_seconds": self.wait_time,
+            "time_saved_seconds": self.time_saved
+        }
+
+
+class SpeculativePrefetcher:
+    """
+    推测预取器
+    在等待患者回答期间，于后台线程中预先计算下一步不依赖患者回答的工作：
+    score_driven/sequence模式下的Controller决策、预测任务的Prompter预热、当前分诊结果对应的指导查询。
+    使用独立的Prompter实例，避免与主流程并发使用同一agent。
+    """
+
+    def __init__(self, prompter=None, guidance_loader=None):
+        """
+        初始化推测预取器
+
+        Args:
+            prompter: 专用于预热的Prompter实例，为None时不预热Prompter
+            guidance_loader: GuidanceLoader 对象，为None时不预取指导
+        """
+        self.prompter = prompter
+        self.guidance_loader = guidance_loader
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        self._pending: Optional[SpeculativeWork] = None
+        self.stats = {kind: {"submitted": 0, "hit": 0, "wasted": 0} for kind in SpeculativeWork.KINDS}
+        self.total_wait_time = 0.0
+        self.total_time_saved = 0.0
+
+    def submit(self, work: SpeculativeWork, prompter_inputs: Optional[Dict[str, Any]] = None):
+        """
+        提交推测预计算，未被领取的上一次推测将被丢弃
+
+        Args:
+            work: 推测预计算描述，包含前置条件
+            prompter_inputs: Prompter.run的输入参数，为None时不预热Prompter
+        """
+        if self._pending is not None:
+            self.finish(self._pending)
+
+        if prompter_inputs is not None and self.prompter is not None:
+            work.mark_submitted("prompter")
+        else:
+            prompter_inputs = None
+        if self.guidance_loader is not None and work.department and work.candidate_department:
+            work.mark_submitted("comparison_guidance")
+        if (self.guidance_loader is not None and work.primary_department
+                and getattr(self.guidance_loader, "use_dynamic_guidance", False)):
+            work.mark_submitted("inquiry_guidance")
+
+        work.future = self._executor.submit(self._compute, work, prompter_inputs)
+        self._pending = work
+
+    def take(self, step_num: int) -> Optional[SpeculativeWork]:
+        """
+        取出供指定step使用的推测
+
+        Args:
+            step_num: 当前step编号
+
+        Returns:
+            Optional[SpeculativeWork]: 上一步提交的推测，不存在时返回None
+        """
+        work = self._pending
+        self._pending = None
+        if work is None:
+            return None
+        if work.step_num != step_num - 1:
+            self.finish(work)
+            return None
+        return work
+
+    def finish(self, work: SpeculativeWork) -> Dict[str, Any]:
+        """
+        结束推测并累计命中与浪费统计
+
+        Args:
+            work: 已取出的推测
+
+        Returns:
+            Dict: 本次推测的结果
+        """
+        outcome = work.finish()
+        for kind, result in outcome["outcomes"].items():
+            self.stats[kind]["submitted"] += 1
+            if result in ("hit", "wasted"):
+                self.stats[kind][result] += 1
+        self.total_wait_time += work.wait_time
+        self.total_time_saved += work.time_saved
+        return outcome
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取累计的推测统计
+
+        Returns:
+            Dict: 各项推测的提交、命中、浪费次数与命中率，以及等待和节省时间
+        """
+        stats = {}
+        for kind, counts in self.stats.items():
+            submitted = counts["submitted"]
+            stats[kind] = dict(counts, hit_rate=counts["hit"] / submitted if submitted else 0.0)
+        stats["total_wait_time_seconds"] = self.total_wait_time
+        stats["total_time_saved_seconds"] = self.total_time_saved
+        return stats
+
+    def reset(self):
+        """开始新病例前丢弃未领取的推测并清零统计，后台线程和Prompter保留"""
+        if self._pending is not None:
+            self.finish(self._pending)
+            self._pending = None
+        if self.prompter is not None:
+            self.prompter.reset_case_state()
+        self.stats = {kind: {"submitted": 0, "hit": 0, "wasted": 0} for kind in SpeculativeWork.KINDS}
+        self.total_wait_time = 0.0
+        self.total_time_saved = 0.0
+
+    def shutdown(self):
+        """丢弃未领取的推测并关闭后台线程"""
+        if self._pending is not None:
+            self.finish(self._pending)
+            self._pending = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _compute(self, work: SpeculativeWork, prompter_inputs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """后台执行的预计算"""
+        results = {}
+        if work.outcomes["comparison_guidance"] == "pending":
+            results["comparison_guidance"] = self.guidance_loader.get_comparison_guidance(
+                work.department, work.candidate_department
+            )
+        if work.outcomes["inquiry_guidance"] == "pending":
+            results["inquiry_guidance"] = self.guidance_loader.load_inquiry_guidance(work.primary_department)
+        if prompter_inputs is not None:
+            start_time = time.time()
+            prompter_result = self.prompter.run(**prompter_inputs)
+            if not self.prompter.last_run_fallback:
+                results["prompter"] = prompter_result
+                results["prompter_time"] = time.time() - start_time
+        return results
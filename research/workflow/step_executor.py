@@ -2,6 +2,8 @@ import time
 import sys
 import os
 import logging
+import hashlib
+import difflib
 
 # 设置动态项目目录
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -9,15 +11,23 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from typing import Dict, Any, List, Optional
-from agent_system.recipient import RecipientAgent
-from agent_system.triager import TriageAgent
+from agent_system.recipient import RecipientAgent, RecipientDeltaAgent
+from agent_system.triager import TriageAgent, TriageResult
 from agent_system.monitor import Monitor
 from agent_system.controller import TaskController
-from agent_system.prompter import Prompter
+from agent_system.prompter import Prompter, PrompterTemplateCache
 from agent_system.inquirer import Inquirer
+from agent_system.fused_inquirer import FusedInquirer
 from agent_system.virtual_patient import VirtualPatientAgent
 from agent_system.evaluator import Evaluator
+from agent_system.base.profiling import profiled, profile_span
+from agent_system.evaluator.score_history import ScoreHistoryManager, score_history_manager, empty_scores
 from .task_manager import TaskManager, TaskPhase
+from .turn_store import TurnStore
+from .models import StepResult, TriageState
+from .speculation import SpeculativePrefetcher, SpeculativeWork
+from .patient_source import PatientSource, VirtualPatientSource, ReplayPatientSource
+from .replay import ReplayLog, FrozenAgent
 from .workflow_logger import WorkflowLogger
 
 
@@ -27,30 +37,6 @@ class StepExecutor:
     负责执行单个step中的完整agent pipeline流程
     """
     
-    # 全局变量存储历史评分
-    _global_historical_scores = {
-        "clinical_inquiry": 0.0,
-        "communication_quality": 0.0,
-        "information_completeness": 0.0,
-        "overall_professionalism": 0.0,
-        "present_illness_similarity": 0.0,
-        "past_history_similarity": 0.0,
-        "chief_complaint_similarity": 0.0
-    }
-    
-    @classmethod
-    def reset_historical_scores(cls):
-        """重置全局历史评分"""
-        cls._global_historical_scores = {
-            "clinical_inquiry": 0.0,
-            "communication_quality": 0.0,
-            "information_completeness": 0.0,
-            "overall_professionalism": 0.0,
-            "present_illness_similarity": 0.0,
-            "past_history_similarity": 0.0,
-            "chief_complaint_similarity": 0.0
-        }
-    
     @staticmethod
     def extract_secondary(dept: str) -> str:
         return dept.split('-')[1] if '-' in dept else dept
@@ -63,6 +49,17 @@ class StepExecutor:
                 llm_config: dict = None, 
                  controller_mode: str = "normal", 
                  guidance_loader: Optional = None,
+                 recipient_mode: str = "full",
+                 recipient_full_interval: int = 5,
+                 monitor_skip_threshold: int = -1,
+                 prompter_cache: Optional[PrompterTemplateCache] = None,
+                 generation_mode: str = "chained",
+                 speculative: bool = False,
+                 session_id: str = "default",
+                 score_history: Optional[ScoreHistoryManager] = None,
+                 patient_source: Optional[PatientSource] = None,
+                 replay_log: Optional[ReplayLog] = None,
+                 triage_stable_steps: int = 0,
                 ):
         """
         初始化step执行器
@@ -73,15 +70,39 @@ class StepExecutor:
             controller_mode: 任务控制器模式，'normal'为智能模式，'sequence'为顺序模式，'score_driven'为分数驱动模式
             guidance_loader: GuidanceLoader 对象，用于加载动态指导内容
             department_inquiry_guidance: 科室询问指导文本，传递给Inquirer
+            recipient_mode: Recipient模式，'full'为每轮基于完整对话全量重整，'delta'为仅基于最新一轮对话增量更新
+            recipient_full_interval: 增量模式下每隔多少步执行一次全量重整（阶段切换时也会全量重整）
+            monitor_skip_threshold: Monitor跳过阈值（字符数），任务依赖的病历内容自上次评分以来的变化不超过该值时复用上次评分；负数表示不跳过
+            prompter_cache: Prompter模板缓存，可在多个工作流之间共享；为None时每步都调用Prompter
+            generation_mode: 问题生成模式，'chained'为Controller→Prompter→Inquirer串行调用，'fused'为单次调用融合生成
+            speculative: 是否在等待患者回答期间推测预计算下一步不依赖回答的工作（Controller决策、Prompter预热、指导查询）
+            session_id: 评分历史的会话ID，每个工作流使用独立的会话
+            score_history: 评分历史管理器，为None时使用全局共享的管理器
+            patient_source: 患者回答来源，为None时使用虚拟患者；服务端传入InteractivePatientSource
+            replay_log: 回放日志，指定时冻结的agent使用日志中的输出，只有未冻结的agent调用LLM
+            triage_stable_steps: 分诊稳定步数K，科室结果连续K步相同且主诉未实质变化时复用上次分诊结果而不调用Triager；0表示不跳过
         """
         self.model_type = model_type
         self.llm_config = llm_config or {}
         self.controller_mode = controller_mode
         # 定义GuidanceLoader
         self.guidance_loader = guidance_loader
+        self.recipient_mode = recipient_mode
+        self.recipient_full_interval = max(1, recipient_full_interval)
+        self.monitor_skip_threshold = monitor_skip_threshold
+        self.triage_stable_steps = max(0, triage_stable_steps)
+        self.prompter_cache = prompter_cache
+        self.generation_mode = generation_mode
+        self.session_id = session_id
+        self.score_history = score_history or score_history_manager
+        self.replay_log = replay_log
         
         # 初始化所有agent
         self.recipient = RecipientAgent(model_type=model_type, llm_config=self.llm_config)
+        self.recipient_delta = (
+            RecipientDeltaAgent(model_type=model_type, llm_config=self.llm_config)
+            if recipient_mode == "delta" else None
+        )
         self.triager = TriageAgent(model_type=model_type, llm_config=self.llm_config)
         self.monitor = Monitor(model_type=model_type, llm_config=self.llm_config)
         # 根据模式初始化TaskController
@@ -94,24 +115,104 @@ class StepExecutor:
             score_driven_mode=score_driven_mode
         )
         self.prompter = Prompter(model_type=model_type, llm_config=self.llm_config)
-        self.virtual_patient = VirtualPatientAgent(model_type=model_type, llm_config=self.llm_config)
+        self.fused_inquirer = (
+            FusedInquirer(model_type=model_type, llm_config=self.llm_config)
+            if generation_mode == "fused" else None
+        )
+        self.patient_source = patient_source or VirtualPatientSource(
+            VirtualPatientAgent(model_type=model_type, llm_config=self.llm_config)
+        )
         self.evaluator = Evaluator(model_type="deepseek", llm_config=self.llm_config)
+        if replay_log is not None:
+            self._freeze_agents(replay_log, replay_patient=patient_source is None)
+            # 推测预计算会绕过冻结的Controller和Prompter
+            speculative = False
+        
+        # 推测预取器，使用独立的Prompter实例在后台线程中预热
+        self.prefetcher = None
+        if speculative:
+            self.prefetcher = SpeculativePrefetcher(
+                prompter=Prompter(model_type=model_type, llm_config=self.llm_config) if generation_mode == "chained" else None,
+                guidance_loader=guidance_loader
+            )
+        
+        self._init_case_state()
+    
+    def _init_case_state(self):
+        """初始化与单个病例相关的执行器状态，get_case_state导出的字段都在这里初始化"""
+        # 增量Recipient的状态：上次全量重整的步数和阶段
+        self._recipient_last_full_step = 0
+        self._recipient_last_phase = None
+        
+        # Monitor跳过的状态：每个任务上次评分时的证据指纹、证据内容和评分
+        self._monitor_evidence = {}
+        self.monitor_skip_count = 0
+        
+        # Triager跳过的状态：上次调用Triager的结果、对应的主诉以及科室结果连续相同的步数
+        self._triage_last: Optional[Dict[str, Any]] = None
+        self._triage_stable_count = 0
+        self.triage_skip_count = 0
+        
+        # 问题生成的LLM调用次数和token估算，按step累计
+        self._generation_usage = {}
+        
+        # 上一步提交、尚未领取的推测预计算
+        self._speculation: Optional[SpeculativeWork] = None
+    
+    def reset_case_state(self, session_id: str, department_guidance: str = ""):
+        """
+        开始新病例前重置执行器，使同一执行器及其agent、模型客户端和已加载的指导可在多个病例之间复用
+        
+        Args:
+            session_id: 新病例评分历史的会话ID
+            department_guidance: 新病例的初始科室指导
+        """
+        if self.replay_log is not None:
+            raise RuntimeError("回放模式的执行器绑定了单个病例的历史日志，不能复用")
+        self.session_id = session_id
+        self._init_case_state()
+        for agent in (self.recipient, self.recipient_delta, self.triager, self.monitor, self.controller,
+                      self.prompter, self.fused_inquirer, self.evaluator,
+                      getattr(self.patient_source, "virtual_patient", None)):
+            if agent is not None:
+                agent.reset_case_state()
+        if self.guidance_loader is not None:
+            self.guidance_loader.reset(department_guidance)
+        if self.prefetcher is not None:
+            self.prefetcher.reset()
+
+    def _freeze_agents(self, replay_log: ReplayLog, replay_patient: bool):
+        """将冻结的agent替换为回放日志输出，日志中没有对应输出时回退到原agent"""
+        for name in ("recipient", "triager", "monitor", "controller", "prompter", "fused_inquirer", "evaluator"):
+            live_agent = getattr(self, name)
+            if live_agent is not None and replay_log.is_frozen(name):
+                setattr(self, name, FrozenAgent(replay_log, name, live_agent))
+        # 日志中的Recipient输出已是更新后的完整病历，按全量结果回放
+        if replay_log.is_frozen("recipient"):
+            self.recipient_delta = None
+        # 模板缓存和评分复用会绕过日志输出
+        if replay_log.is_frozen("prompter"):
+            self.prompter_cache = None
+        if replay_log.is_frozen("monitor"):
+            self.monitor_skip_threshold = -1
+        if replay_log.is_frozen("triager"):
+            self.triage_stable_steps = 0
+        if replay_patient and replay_log.is_frozen("patient"):
+            self.patient_source = ReplayPatientSource(replay_log, fallback=self.patient_source)
 
     def execute_step(self, 
                     step_num: int,
                     case_data: Dict[str, Any],
                     task_manager: TaskManager,
                     logger: WorkflowLogger,
-                    conversation_history: str = "",
+                    turn_store: Optional[TurnStore] = None,
                     previous_hpi: str = "",
                     previous_ph: str = "",
                     previous_chief_complaint: str = "",
-                    previous_department=None,
-                    previous_candidate_department=None,
-                    previous_triage_reasoning: str = "",
+                    previous_triage: Optional[TriageState] = None,
                     current_guidance: str = "",
                     is_first_step: bool = False,
-                    doctor_question: str = "") -> Dict[str, Any]:
+                    doctor_question: str = "") -> StepResult:
         """
         执行单个step的完整流程
         
@@ -120,213 +221,300 @@ class StepExecutor:
             case_data: 病例数据
             task_manager: 任务管理器
             logger: 日志记录器
-            conversation_history: 对话历史
+            turn_store: 对话轮次存储，本步的患者回应会追加到其中
             previous_hpi: 上轮现病史
             previous_ph: 上轮既往史
             previous_chief_complaint: 上轮主诉
-            previous_department: 上轮分诊主要科室
-            previous_candidate_department: 上轮分诊候选科室
-            previous_triage_reasoning: 上轮分诊推理
+            previous_triage: 上轮分诊状态，非分诊阶段直接沿用
             current_guidance: 当前指导文本
             is_first_step: 是否为第一个step
             doctor_question: 医生问题（非首轮时）
             
         Returns:
-            Dict: step执行结果，包含更新后的病史信息、医生问题、患者回应等
+            StepResult: step执行结果，包含更新后的病史信息、医生问题、患者回应等
         """
-        step_result = {
-            "step_number": step_num,
-            "success": False,
-            "patient_response": "",
-            "updated_hpi": previous_hpi,
-            "updated_ph": previous_ph,
-            "updated_chief_complaint": previous_chief_complaint,
-            "triage_result": {
-                "primary_department": "",
-                "secondary_department": "",
-                "triage_reasoning": "",
-                "candidate_primary_department": "",
-                "candidate_secondary_department": ""
-            },
-            "doctor_question": "",
-            "conversation_history": conversation_history,
-            "task_completion_summary": {},
-            "errors": []
-        }
+        step_result = StepResult(
+            step_number=step_num,
+            updated_hpi=previous_hpi,
+            updated_ph=previous_ph,
+            updated_chief_complaint=previous_chief_complaint
+        )
+        if previous_triage is None:
+            previous_triage = TriageState()
+        
+        if turn_store is None:
+            turn_store = TurnStore()
         
         try:
-            logging.info(f"--- 开始执行 Round {step_num} ---")
-            # 更新任务管理器的当前步骤
-            task_manager.current_step = step_num
+            current_phase = self._begin_step(step_num, task_manager)
             
             # Step 1: 获取患者回应
             patient_response = self._get_patient_response(
                 step_num, case_data, logger, is_first_step, doctor_question
             )
-            step_result["patient_response"] = patient_response
-            logging.info(f"患者: {patient_response}")
-            
-            # 更新对话历史
-            if is_first_step:
-                updated_conversation = f"患者: {patient_response}"
-            else:
-                updated_conversation = conversation_history + f"\n医生: {doctor_question}\n患者: {patient_response}"
-            step_result["conversation_history"] = updated_conversation
+            self._apply_patient_response(step_num, step_result, turn_store, patient_response,
+                                         is_first_step, doctor_question)
             
             # Step 2: 使用Recipient更新病史信息
             recipient_result = self._execute_recipient(
-                step_num, logger, updated_conversation, previous_hpi, previous_ph, previous_chief_complaint
+                step_num, logger, turn_store, previous_hpi, previous_ph, previous_chief_complaint,
+                current_phase=current_phase,
+                latest_doctor_question="" if is_first_step else doctor_question,
+                latest_patient_response=patient_response
             )
-            step_result.update({
-                "updated_hpi": recipient_result.updated_HPI,
-                "updated_ph": recipient_result.updated_PH, 
-                "updated_chief_complaint": recipient_result.chief_complaint
-            })
+            self._apply_recipient_result(step_result, recipient_result)
             
             # Step 3: 使用Triager进行科室分诊（仅当当前阶段是分诊阶段时）
-            current_phase = task_manager.get_current_phase()
-            
             if current_phase == TaskPhase.TRIAGE:
                 # 当前处于分诊阶段
                 triage_result = self._execute_triager(
-                    step_num, logger, recipient_result, previous_department, previous_candidate_department, current_guidance
+                    step_num, logger, recipient_result, previous_triage.department,
+                    previous_triage.candidate_department, current_guidance
                 )
-                step_result["triage_result"] = {
-                    "primary_department": triage_result.primary_department,
-                    "secondary_department": triage_result.secondary_department,
-                    "triage_reasoning": triage_result.triage_reasoning,
-                    "candidate_primary_department": triage_result.candidate_primary_department,
-                    "candidate_secondary_department": triage_result.candidate_secondary_department
-                }
-
-                department = f"{triage_result.primary_department}-{triage_result.secondary_department}"
-                # 根据预测科室动态更新指导
-                new_guidance = self.guidance_loader.update_guidance_for_Triager(department)
-
+                new_guidance = self._apply_triage_result(step_result, triage_result)
             else:
-                # 分诊已完成或已超过分诊阶段，使用已有的分诊结果
-                primary_department = self.extract_primary(previous_department)
-                secondary_department = self.extract_secondary(previous_department)
-                candidate_primary_department = self.extract_primary(previous_candidate_department)
-                candidate_secondary_department = self.extract_secondary(previous_candidate_department)
-                step_result["triage_result"] = {
-                    "primary_department": primary_department,   
-                    "secondary_department": secondary_department,
-                    "triage_reasoning": previous_triage_reasoning,
-                    "candidate_primary_department": candidate_primary_department,
-                    "candidate_secondary_department": candidate_secondary_department
-                }
-                # 使用已有分诊结果更新指导
+                # 分诊已完成或已超过分诊阶段，沿用已有的分诊结果和指导
+                step_result.triage = previous_triage
                 new_guidance = current_guidance
 
             # Step 4: 使用Monitor评估任务完成度
             monitor_results = self._execute_monitor_by_phase(
-                step_num, logger, task_manager, recipient_result, step_result.get("triage_result", {})
+                step_num, logger, task_manager, recipient_result, step_result.triage
             )
             
-            
             # Step 5: 更新任务分数
             self._update_task_scores(step_num, logger, task_manager, monitor_results)
             
-            # Step 6: 使用Controller选择下一个任务
-            controller_result = self._execute_controller(
-                step_num, logger, task_manager, recipient_result
-            )
-            
-            # Step 7: 使用Prompter生成询问策略
-            prompter_result = self._execute_prompter(
-                step_num, logger, recipient_result, controller_result
-            )
+            generation_start = time.time()
+            self._generation_usage = {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            if self.generation_mode == "fused":
+                # Step 6-8: 使用FusedInquirer一次完成任务选择、询问指导和问题生成
+                fused_result = self._execute_fused_inquirer(
+                    step_num, logger, task_manager, recipient_result, new_guidance
+                )
+                selected_task = fused_result.selected_task
+                doctor_question = fused_result.current_chat
+            else:
+                # Step 6: 使用Controller选择下一个任务
+                controller_result = self._execute_controller(
+                    step_num, logger, task_manager, recipient_result
+                )
+                
+                # Step 7: 使用Prompter生成询问策略
+                prompter_result = self._execute_prompter(
+                    step_num, logger, recipient_result, controller_result,
+                    step_result.triage, current_phase
+                )
+                
+                # Step 8: 使用Inquirer生成医生问题
+                doctor_question = self._execute_inquirer(
+                    step_num, logger, recipient_result, prompter_result, new_guidance
+                )
+                selected_task = controller_result.selected_task
             
-            # Step 8: 使用Inquirer生成医生问题
+            self._apply_generated_question(step_num, logger, task_manager, step_result,
+                                           selected_task, doctor_question, generation_start)
             
-            doctor_question = self._execute_inquirer(
-                step_num, logger, recipient_result, prompter_result, new_guidance
-            )
-            step_result["doctor_question"] = doctor_question
-            logging.info(f"医生: {doctor_question}")
+            # 医生问题已生成，在评估和等待患者回答期间推测预计算下一步
+            if self.prefetcher is not None:
+                self._submit_speculation(step_num, task_manager, recipient_result, step_result.triage)
             
             # Step 9: 使用Evaluator进行评分
             evaluator_result = self._execute_evaluator(
-                step_num, logger, case_data, step_result
+                step_num, logger, case_data, step_result, turn_store
             )
-            step_result["evaluator_result"] = evaluator_result
-            logging.info(f"评估结果: {evaluator_result}")
             
             # Step 10: 获取任务完成情况摘要
-            step_result["task_completion_summary"] = task_manager.get_completion_summary()
-            step_result["new_guidance"] = new_guidance
-            
-            step_result["success"] = True
+            self._complete_step(step_result, task_manager, turn_store, evaluator_result, new_guidance)
             
         except Exception as e:
-            error_msg = f"Step {step_num} 执行失败: {str(e)}"
-            step_result["errors"].append(error_msg)
-            logger.log_error(step_num, "step_execution_error", error_msg, {"case_data": case_data})
-            print(error_msg)
+            self._handle_step_error(step_num, logger, step_result, case_data, e)
         
+        self._end_speculation(step_num, logger)
         return step_result
     
+    def _begin_step(self, step_num: int, task_manager: TaskManager) -> TaskPhase:
+        """开始执行step：更新当前步骤、取出上一步提交的推测预计算，返回当前阶段"""
+        logging.info(f"--- 开始执行 Round {step_num} ---")
+        # 更新任务管理器的当前步骤
+        task_manager.current_step = step_num
+        current_phase = task_manager.get_current_phase()
+        if self.replay_log is not None:
+            self.replay_log.current_step = step_num
+        # 取出上一步提交的推测预计算
+        if self.prefetcher is not None:
+            self._speculation = self.prefetcher.take(step_num)
+        return current_phase
+    
+    @staticmethod
+    def _apply_patient_response(step_num: int, step_result: StepResult, turn_store: TurnStore,
+                                patient_response: str, is_first_step: bool, doctor_question: str):
+        """记录患者回应并追加本轮对话"""
+        step_result.patient_response = patient_response
+        logging.info(f"患者: {patient_response}")
+        turn_store.append(step_num, "" if is_first_step else doctor_question, patient_response)
+    
+    @staticmethod
+    def _apply_recipient_result(step_result: StepResult, recipient_result):
+        """将Recipient整理的病历写入step结果"""
+        step_result.updated_hpi = recipient_result.updated_HPI
+        step_result.updated_ph = recipient_result.updated_PH
+        step_result.updated_chief_complaint = recipient_result.chief_complaint
+    
+    def _apply_triage_result(self, step_result: StepResult, triage_result) -> str:
+        """将分诊结果写入step结果，并根据预测科室动态更新指导"""
+        step_result.triage = TriageState(
+            primary_department=triage_result.primary_department,
+            secondary_department=triage_result.secondary_department,
+            triage_reasoning=triage_result.triage_reasoning,
+            candidate_primary_department=triage_result.candidate_primary_department,
+            candidate_secondary_department=triage_result.candidate_secondary_department
+        )
+        with profile_span("guidance_lookup", "guidance"):
+            return self.guidance_loader.update_guidance_for_Triager(
+                step_result.triage.department,
+                preloaded_guidance=self._claim_speculative_inquiry_guidance(triage_result.primary_department)
+            )
+    
+    def _apply_generated_question(self, step_num: int, logger: WorkflowLogger, task_manager: TaskManager,
+                                  step_result: StepResult, selected_task: str, doctor_question: str,
+                                  generation_start: float):
+        """记录问题生成日志，并将选择的任务和医生问题写入step结果"""
+        logger.log_question_generation(
+            step_num, self.generation_mode, selected_task, doctor_question,
+            time.time() - generation_start, self._generation_usage
+        )
+        step_result.selected_task = selected_task
+        task_manager.set_selected_task(selected_task)
+        step_result.doctor_question = doctor_question
+        logging.info(f"医生: {doctor_question}")
+    
+    @staticmethod
+    def _complete_step(step_result: StepResult, task_manager: TaskManager, turn_store: TurnStore,
+                       evaluator_result, new_guidance: str):
+        """写入评估结果、任务完成情况摘要和对话历史，标记step成功"""
+        step_result.evaluator_result = evaluator_result
+        logging.info(f"评估结果: {evaluator_result}")
+        step_result.task_completion_summary = task_manager.get_completion_summary()
+        step_result.new_guidance = new_guidance
+        step_result.conversation_history = turn_store.render_conversation()
+        step_result.success = True
+    
+    @staticmethod
+    def _handle_step_error(step_num: int, logger: WorkflowLogger, step_result: StepResult,
+                           case_data: Dict[str, Any], error: Exception):
+        """记录step执行失败"""
+        error_msg = f"Step {step_num} 执行失败: {str(error)}"
+        step_result.errors.append(error_msg)
+        logger.log_error(step_num, "step_execution_error", error_msg, {"case_data": case_data})
+        print(error_msg)
+    
+    def _end_speculation(self, step_num: int, logger: WorkflowLogger):
+        """结束本步推测，记录命中与浪费情况"""
+        if self._speculation is not None:
+            outcome = self.prefetcher.finish(self._speculation)
+            self._speculation = None
+            logger.log_speculation(step_num, outcome, self.prefetcher.get_stats())
+    
+    def get_case_state(self) -> Dict[str, Any]:
+        """
+        导出与当前病例相关的执行器状态，用于检查点
+        
+        Returns:
+            Dict: 评估历史评分、增量Recipient状态、Monitor跳过状态和Triager跳过状态
+        """
+        return {
+            "score_history": self.score_history.get_all_history(self.session_id),
+            "recipient_last_full_step": self._recipient_last_full_step,
+            "recipient_last_phase": self._recipient_last_phase.value if self._recipient_last_phase else None,
+            "monitor_evidence": [
+                dict(record, phase=phase.value, task_name=task_name)
+                for (phase, task_name), record in self._monitor_evidence.items()
+            ],
+            "monitor_skip_count": self.monitor_skip_count,
+            "triage_last": (
+                dict(self._triage_last, result=self._triage_last["result"].model_dump())
+                if self._triage_last else None
+            ),
+            "triage_stable_count": self._triage_stable_count,
+            "triage_skip_count": self.triage_skip_count
+        }
+    
+    def restore_case_state(self, state: Dict[str, Any]):
+        """
+        从检查点恢复与当前病例相关的执行器状态
+        
+        Args:
+            state: get_case_state导出的执行器状态
+        """
+        self.score_history.restore_history(state.get("score_history", []), self.session_id)
+        self._recipient_last_full_step = state.get("recipient_last_full_step", 0)
+        last_phase = state.get("recipient_last_phase")
+        self._recipient_last_phase = TaskPhase(last_phase) if last_phase else None
+        self._monitor_evidence = {
+            (TaskPhase(record["phase"]), record["task_name"]): {
+                "fingerprint": record["fingerprint"],
+                "evidence": record["evidence"],
+                "score": record["score"]
+            }
+            for record in state.get("monitor_evidence", [])
+        }
+        self.monitor_skip_count = state.get("monitor_skip_count", 0)
+        triage_last = state.get("triage_last")
+        self._triage_last = (
+            dict(triage_last, result=TriageResult(**triage_last["result"])) if triage_last else None
+        )
+        self._triage_stable_count = state.get("triage_stable_count", 0)
+        self.triage_skip_count = state.get("triage_skip_count", 0)
+    
+    def shutdown(self):
+        """释放执行器持有的后台资源"""
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+    
+    @profiled("patient", "stage")
     def _get_patient_response(self, step_num: int, case_data: Dict[str, Any], 
                              logger: WorkflowLogger, is_first_step: bool, 
                              doctor_question: str = "") -> str:
-        """获取虚拟患者的回应"""
-        start_time = time.time()
-        
-        try:
-            # 构建虚拟患者输入
-            if is_first_step:
-                worker_inquiry = "您好，请问您哪里不舒服？"
-            else:
-                worker_inquiry = doctor_question
-            
-            # 调用虚拟患者agent
-            patient_result = self.virtual_patient.run(
-                worker_inquiry=worker_inquiry,
-                is_first_epoch=is_first_step,
-                patient_case=case_data
-            )
-            
-            execution_time = time.time() - start_time
-            patient_response = patient_result.current_chat
-            
-            # 记录日志
-            logger.log_agent_execution(
-                step_num, "virtual_patient",
-                {
-                    "worker_inquiry": worker_inquiry,
-                    "is_first_epoch": is_first_step,
-                    "case_data": case_data
-                },
-                {"patient_response": patient_response},
-                execution_time
-            )
-            
-            logger.log_patient_response(step_num, patient_response, is_first_step)
-            
-            return patient_response
-            
-        except Exception as e:
-            error_msg = f"虚拟患者执行失败: {str(e)}"
-            logger.log_error(step_num, "virtual_patient_error", error_msg)
-            # 返回默认回应
-            return "对不起，我不太清楚怎么描述，医生您看着办吧。"
+        """从患者来源获取本轮患者回应"""
+        return self.patient_source.get_response(step_num, case_data, logger, is_first_step, doctor_question)
     
+    @profiled("recipient", "stage")
     def _execute_recipient(self, step_num: int, logger: WorkflowLogger, 
-                          conversation_history: str, previous_hpi: str, 
-                          previous_ph: str, previous_chief_complaint: str):
-        """执行Recipient agent"""
+                          turn_store: TurnStore, previous_hpi: str, 
+                          previous_ph: str, previous_chief_complaint: str,
+                          current_phase: Optional[TaskPhase] = None,
+                          latest_doctor_question: str = "",
+                          latest_patient_response: str = ""):
+        """执行Recipient agent（全量或增量模式）"""
+        if not self._should_run_full_recipient(step_num, current_phase, previous_hpi):
+            try:
+                return self._execute_recipient_delta(
+                    step_num, logger, latest_doctor_question, latest_patient_response,
+                    previous_hpi, previous_ph, previous_chief_complaint
+                )
+            except Exception as e:
+                error_msg = f"Recipient增量更新失败，回退到全量模式: {str(e)}"
+                logger.log_error(step_num, "recipient_delta_error", error_msg)
+        
         start_time = time.time()
         
         input_data = {
-            "conversation_history": conversation_history,
+            "conversation_history": turn_store.render_conversation(),
             "previous_HPI": previous_hpi,
             "previous_PH": previous_ph,
             "previous_chief_complaint": previous_chief_complaint
         }
         
         result = self.recipient.run(**input_data)
-        execution_time = time.time() - start_time
+        return self._finish_recipient(step_num, logger, input_data, result,
+                                      time.time() - start_time, current_phase)
+        
+    def _finish_recipient(self, step_num: int, logger: WorkflowLogger, input_data: Dict[str, Any],
+                          result, execution_time: float, current_phase: Optional[TaskPhase]):
+        """记录全量重整的状态和日志"""
+        self._recipient_last_full_step = step_num
+        self._recipient_last_phase = current_phase
         
         output_data = {
             "updated_HPI": result.updated_HPI,
@@ -334,39 +522,173 @@ class StepExecutor:
             "chief_complaint": result.chief_complaint
         }
         
-        logger.log_agent_execution(step_num, "recipient", input_data, output_data, execution_time)
+        log_input_data = dict(input_data, mode="full")
+        logger.log_agent_execution(step_num, "recipient", log_input_data, output_data, execution_time)
+        
+        return result
+    
+    def _should_run_full_recipient(self, step_num: int, current_phase: Optional[TaskPhase],
+                                   previous_hpi: str) -> bool:
+        """判断本步是否需要全量重整：非增量模式、尚无病历、阶段切换或距上次全量重整已满N步"""
+        if self.recipient_mode != "delta" or self.recipient_delta is None:
+            return True
+        if not previous_hpi or self._recipient_last_full_step == 0:
+            return True
+        if current_phase != self._recipient_last_phase:
+            return True
+        return step_num - self._recipient_last_full_step >= self.recipient_full_interval
+    
+    def _execute_recipient_delta(self, step_num: int, logger: WorkflowLogger,
+                                 latest_doctor_question: str, latest_patient_response: str,
+                                 previous_hpi: str, previous_ph: str, previous_chief_complaint: str):
+        """执行增量Recipient：只发送最新一轮对话与当前病历，在本地应用补丁"""
+        start_time = time.time()
+        
+        input_data = {
+            "latest_doctor_question": latest_doctor_question,
+            "latest_patient_response": latest_patient_response,
+            "previous_HPI": previous_hpi,
+            "previous_PH": previous_ph,
+            "previous_chief_complaint": previous_chief_complaint
+        }
+        
+        patch = self.recipient_delta.run(**input_data)
+        return self._finish_recipient_delta(step_num, logger, input_data, patch, start_time)
+    
+    @staticmethod
+    def _finish_recipient_delta(step_num: int, logger: WorkflowLogger, input_data: Dict[str, Any],
+                                patch, start_time: float):
+        """在本地应用增量补丁并记录日志"""
+        result = RecipientDeltaAgent.apply_patch(
+            patch, input_data["previous_HPI"], input_data["previous_PH"], input_data["previous_chief_complaint"]
+        )
+        execution_time = time.time() - start_time
+        
+        output_data = {
+            "updated_HPI": result.updated_HPI,
+            "updated_PH": result.updated_PH,
+            "chief_complaint": result.chief_complaint,
+            "patch": {
+                "changed_fields": patch.changed_fields,
+                "HPI_append": patch.HPI_append,
+                "PH_append": patch.PH_append,
+                "chief_complaint": patch.chief_complaint
+            }
+        }
+        
+        log_input_data = dict(input_data, mode="delta")
+        logger.log_agent_execution(step_num, "recipient", log_input_data, output_data, execution_time)
         
         return result
     
+    @profiled("triager", "stage")
     def _execute_triager(self, step_num: int, logger: WorkflowLogger, 
                         recipient_result, previous_department: str, 
                         previous_candidate_department: str, current_guidance: str):
-        """执行Triage agent进行科室分诊"""
+        """执行Triage agent进行科室分诊，科室已稳定时复用上次分诊结果"""
+        reused = self._reuse_triage_result(step_num, logger, recipient_result)
+        if reused is not None:
+            return reused
+        
         start_time = time.time()
+        input_data, comparison_guidance = self._triager_input(
+            recipient_result, previous_department, previous_candidate_department, current_guidance
+        )
+        
+        result = self.triager.run(**input_data)
+        return self._finish_triager(step_num, logger, input_data, comparison_guidance, result,
+                                    time.time() - start_time)
+    
+    def _triager_input(self, recipient_result, previous_department: str,
+                       previous_candidate_department: str, current_guidance: str):
+        """构建Triager输入，存在上一轮主要科室和候选科室时附加科室对比指导"""
         # 初始化对比指导和合并指导
         comparison_guidance = ""
         combined_guidance = current_guidance
 
         # 如果存在上一轮的分诊结果，并且有主要科室和候选科室，则生成对比指导
         if previous_department and previous_candidate_department:
-            comparison_guidance = self.guidance_loader.get_comparison_guidance(previous_department, previous_candidate_department)
+            comparison_guidance = None
+            if self._speculation is not None:
+                comparison_guidance = self._speculation.claim_comparison_guidance(previous_department, previous_candidate_department)
+            if comparison_guidance is None:
+                with profile_span("guidance_lookup", "guidance"):
+                    comparison_guidance = self.guidance_loader.get_comparison_guidance(previous_department, previous_candidate_department)
             combined_guidance = current_guidance
             if comparison_guidance:
                 combined_guidance += f"\n\n【科室对比鉴别指导】\n{comparison_guidance}"
         else:
             combined_guidance += f"\n\n【科室对比鉴别指导】\n无对比建议"
 
-
         input_data = {
             "chief_complaint": recipient_result.chief_complaint,
             "hpi_content": recipient_result.updated_HPI,
             "ph_content": recipient_result.updated_PH,
             "current_guidance": combined_guidance,
         }
+        return input_data, comparison_guidance
         
-        result = self.triager.run(**input_data)
-        execution_time = time.time() - start_time
+    @staticmethod
+    def _normalize_chief_complaint(chief_complaint: str) -> str:
+        """去除空白和标点，只保留判断主诉是否实质变化的内容"""
+        return "".join(ch for ch in (chief_complaint or "") if ch.isalnum())
+    
+    def _reuse_triage_result(self, step_num: int, logger: WorkflowLogger, recipient_result):
+        """
+        科室结果已连续triage_stable_steps步相同且主诉未实质变化时复用上次的分诊结果，并记录跳过原因
+        
+        Returns:
+            上次的TriageResult，需要调用Triager时返回None
+        """
+        if self.triage_stable_steps <= 0 or self._triage_last is None:
+            return None
+        if self._triage_stable_count < self.triage_stable_steps:
+            return None
+        if self._normalize_chief_complaint(recipient_result.chief_complaint) != self._triage_last["chief_complaint"]:
+            return None
+        
+        result = self._triage_last["result"]
+        self.triage_skip_count += 1
+        skip_reason = f"科室结果已连续 {self._triage_stable_count} 步相同且主诉未变化，复用上次分诊结果"
+        logging.info(f"Triager跳过（累计跳过 {self.triage_skip_count} 次）: {skip_reason}")
         
+        input_data = {
+            "chief_complaint": recipient_result.chief_complaint,
+            "hpi_content": recipient_result.updated_HPI,
+            "ph_content": recipient_result.updated_PH
+        }
+        output_data = {
+            "primary_department": result.primary_department,
+            "secondary_department": result.secondary_department,
+            "triage_reasoning": result.triage_reasoning,
+            "candidate_primary_department": result.candidate_primary_department,
+            "candidate_secondary_department": result.candidate_secondary_department,
+            "skipped": True,
+            "skip_reason": skip_reason,
+            "total_skip_count": self.triage_skip_count
+        }
+        logger.log_agent_execution(step_num, "triager", input_data, output_data, 0.0)
+        return result
+    
+    def _record_triage_stability(self, chief_complaint: str, result):
+        """记录本次分诊结果，科室结果与主诉都与上次相同时累计稳定步数，否则重新计数"""
+        departments = [
+            result.primary_department, result.secondary_department,
+            result.candidate_primary_department, result.candidate_secondary_department
+        ]
+        chief_complaint = self._normalize_chief_complaint(chief_complaint)
+        last = self._triage_last
+        if last is not None and last["departments"] == departments and last["chief_complaint"] == chief_complaint:
+            self._triage_stable_count += 1
+        else:
+            self._triage_stable_count = 1
+        self._triage_last = {"result": result, "departments": departments, "chief_complaint": chief_complaint}
+    
+    def _finish_triager(self, step_num: int, logger: WorkflowLogger, input_data: Dict[str, Any],
+                        comparison_guidance, result, execution_time: float):
+        """记录Triager日志和分诊稳定状态"""
+        if self.triage_stable_steps > 0:
+            self._record_triage_stability(input_data["chief_complaint"], result)
         output_data = {
             "primary_department": result.primary_department,
             "secondary_department": result.secondary_department,
@@ -381,8 +703,9 @@ class StepExecutor:
         
         return result
     
+    @profiled("monitor", "stage")
     def _execute_monitor_by_phase(self, step_num: int, logger: WorkflowLogger, 
-                                 task_manager: TaskManager, recipient_result, triage_result: Dict[str, Any] = None) -> Dict[str, Dict[str, float]]:
+                                 task_manager: TaskManager, recipient_result, triage: Optional[TriageState] = None) -> Dict[str, Dict[str, float]]:
         """按阶段执行Monitor评估，只评估当前阶段未完成的任务"""
         monitor_results = {}
         current_phase = task_manager.get_current_phase()
@@ -399,56 +722,17 @@ class StepExecutor:
         start_time = time.time()
         
         try:
-            # 使用for循环逐个评估所有未完成的任务
-            phase_scores = {}
-            for task in pending_tasks:
-                task_name = task.get("name", "")
-                task_description = task.get("description", "")
+            evidence = self._get_monitor_evidence(current_phase, recipient_result, triage)
+            scores, skipped_tasks, tasks_to_evaluate = self._reuse_monitor_scores(current_phase, pending_tasks, evidence)
+            # 使用for循环逐个评估证据有变化的任务
+            for task in tasks_to_evaluate:
+                monitor_result = self.monitor.run(**self._monitor_input(current_phase, recipient_result, triage, task))
+                self._record_monitor_score(current_phase, task, evidence, monitor_result, scores)
                 
-                # 调用Monitor评估特定任务
-                # 分诊阶段传入triage_result，其他阶段不传入
-                if current_phase == TaskPhase.TRIAGE:
-                    # 使用传入的triage_result
-                    monitor_result = self.monitor.run(
-                        hpi_content=recipient_result.updated_HPI,
-                        ph_content=recipient_result.updated_PH,
-                        chief_complaint=recipient_result.chief_complaint,
-                        task_name=task_name,
-                        task_description=task_description,
-                        triage_result=triage_result if triage_result and triage_result.get("primary_department") else None
-                    )
-                else:
-                    # 现病史/既往史阶段不传入triage_result
-                    monitor_result = self.monitor.run(
-                        hpi_content=recipient_result.updated_HPI,
-                        ph_content=recipient_result.updated_PH,
-                        chief_complaint=recipient_result.chief_complaint,
-                        task_name=task_name,
-                        task_description=task_description
-                    )
-                
-                phase_scores[task_name] = monitor_result.completion_score
-                print(f"任务'{task_name}'评分: {monitor_result.completion_score:.2f} - {monitor_result.reason}")
-            
-            execution_time = time.time() - start_time
-            monitor_results[current_phase] = phase_scores
-            
-            # 记录日志
-            input_data = {
-                "hpi_content": recipient_result.updated_HPI,
-                "ph_content": recipient_result.updated_PH,
-                "chief_complaint": recipient_result.chief_complaint,
-                "evaluated_phase": current_phase.value,
-                "pending_tasks": [t["name"] for t in pending_tasks]
-            }
-            
-            output_data = {
-                "phase_scores": phase_scores,
-                "evaluated_tasks": list(phase_scores.keys()),
-                "average_score": sum(phase_scores.values()) / len(phase_scores) if phase_scores else 0.0
-            }
-            
-            logger.log_agent_execution(step_num, "monitor", input_data, output_data, execution_time)
+            monitor_results[current_phase] = self._finish_monitor(
+                step_num, logger, current_phase, pending_tasks, recipient_result,
+                scores, skipped_tasks, time.time() - start_time
+            )
             
         except Exception as e:
             error_msg = f"Monitor执行失败: {str(e)}"
@@ -459,22 +743,165 @@ class StepExecutor:
         
         return monitor_results
     
+    def _reuse_monitor_scores(self, current_phase: TaskPhase, pending_tasks: List[Dict[str, str]], evidence: str):
+        """
+        复用证据未变化（或变化很小）的任务的上次评分
+        
+        Returns:
+            tuple: (已复用的评分, 跳过的任务名列表, 需要调用Monitor评估的任务列表)
+        """
+        scores = {}
+        skipped_tasks = []
+        tasks_to_evaluate = []
+        for task in pending_tasks:
+            task_name = task.get("name", "")
+            cached = self._get_reusable_monitor_score(current_phase, task_name, evidence)
+            if cached is not None:
+                scores[task_name] = cached["score"]
+                skipped_tasks.append(task_name)
+                print(f"任务'{task_name}'评分: {cached['score']:.2f} - 证据未变化，复用上次评分")
+            else:
+                tasks_to_evaluate.append(task)
+        return scores, skipped_tasks, tasks_to_evaluate
+    
+    @staticmethod
+    def _monitor_input(current_phase: TaskPhase, recipient_result, triage: Optional[TriageState],
+                       task: Dict[str, str]) -> Dict[str, Any]:
+        """构建Monitor评估特定任务的输入，分诊阶段传入triage_result，其他阶段不传入"""
+        input_data = {
+            "hpi_content": recipient_result.updated_HPI,
+            "ph_content": recipient_result.updated_PH,
+            "chief_complaint": recipient_result.chief_complaint,
+            "task_name": task.get("name", ""),
+            "task_description": task.get("description", "")
+        }
+        if current_phase == TaskPhase.TRIAGE:
+            input_data["triage_result"] = triage.to_dict() if triage and triage.primary_department else None
+        return input_data
+    
+    def _record_monitor_score(self, current_phase: TaskPhase, task: Dict[str, str], evidence: str,
+                              monitor_result, scores: Dict[str, float]):
+        """记录任务评分及其证据指纹，供后续step判断是否可以复用"""
+        task_name = task.get("name", "")
+        scores[task_name] = monitor_result.completion_score
+        self._monitor_evidence[(current_phase, task_name)] = {
+            "fingerprint": hashlib.md5(evidence.encode("utf-8")).hexdigest(),
+            "evidence": evidence,
+            "score": monitor_result.completion_score
+        }
+        print(f"任务'{task_name}'评分: {monitor_result.completion_score:.2f} - {monitor_result.reason}")
+    
+    def _finish_monitor(self, step_num: int, logger: WorkflowLogger, current_phase: TaskPhase,
+                        pending_tasks: List[Dict[str, str]], recipient_result, scores: Dict[str, float],
+                        skipped_tasks: List[str], execution_time: float) -> Dict[str, float]:
+        """按待完成任务顺序整理本阶段评分并记录日志"""
+        phase_scores = {task["name"]: scores[task["name"]] for task in pending_tasks if task["name"] in scores}
+        
+        if skipped_tasks:
+            self.monitor_skip_count += len(skipped_tasks)
+            logging.info(f"Monitor跳过 {len(skipped_tasks)} 个证据未变化的任务（累计跳过 {self.monitor_skip_count} 次）: {skipped_tasks}")
+        
+        # 记录日志
+        input_data = {
+            "hpi_content": recipient_result.updated_HPI,
+            "ph_content": recipient_result.updated_PH,
+            "chief_complaint": recipient_result.chief_complaint,
+            "evaluated_phase": current_phase.value,
+            "pending_tasks": [t["name"] for t in pending_tasks]
+        }
+        
+        output_data = {
+            "phase_scores": phase_scores,
+            "evaluated_tasks": [name for name in phase_scores if name not in skipped_tasks],
+            "skipped_tasks": skipped_tasks,
+            "skip_count": len(skipped_tasks),
+            "total_skip_count": self.monitor_skip_count,
+            "average_score": sum(phase_scores.values()) / len(phase_scores) if phase_scores else 0.0
+        }
+        
+        logger.log_agent_execution(step_num, "monitor", input_data, output_data, execution_time)
+        return phase_scores
+    
+    @staticmethod
+    def _get_monitor_evidence(current_phase: TaskPhase, recipient_result,
+                              triage: Optional[TriageState] = None) -> str:
+        """获取当前阶段任务评分所依赖的病历内容：分诊任务依赖主诉、现病史和分诊结果，现病史任务依赖现病史，既往史任务依赖既往史"""
+        if current_phase == TaskPhase.TRIAGE:
+            triage = triage or TriageState()
+            return "\n".join([
+                recipient_result.chief_complaint,
+                recipient_result.updated_HPI,
+                triage.primary_department,
+                triage.secondary_department
+            ])
+        if current_phase == TaskPhase.HPI:
+            return recipient_result.updated_HPI
+        return recipient_result.updated_PH
+    
+    def _get_reusable_monitor_score(self, current_phase: TaskPhase, task_name: str,
+                                    evidence: str) -> Optional[Dict[str, Any]]:
+        """证据指纹相同或变化字符数不超过阈值时返回上次的评分记录，否则返回None"""
+        if self.monitor_skip_threshold < 0:
+            return None
+        
+        cached = self._monitor_evidence.get((current_phase, task_name))
+        if cached is None:
+            return None
+        
+        if cached["fingerprint"] == hashlib.md5(evidence.encode("utf-8")).hexdigest():
+            return cached
+        
+        # 长度差已超过阈值时无需计算具体差异
+        previous = cached["evidence"]
+        if abs(len(evidence) - len(previous)) > self.monitor_skip_threshold:
+            return None
+        
+        matcher = difflib.SequenceMatcher(None, previous, evidence, autojunk=False)
+        diff_size = sum(
+            max(i2 - i1, j2 - j1)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"
+        )
+        return cached if diff_size <= self.monitor_skip_threshold else None
+    
+    @profiled("task_scores", "stage")
     def _update_task_scores(self, step_num: int, logger: WorkflowLogger, 
                            task_manager: TaskManager, monitor_results: Dict):
         """更新任务分数"""
         for phase, scores in monitor_results.items():
             if scores:
                 old_scores = task_manager.get_task_scores(phase).copy()
-                task_manager.update_task_scores(phase, scores)
+                newly_saturated = task_manager.update_task_scores(phase, scores)
                 new_scores = task_manager.get_task_scores(phase)
                 
                 logger.log_task_scores_update(step_num, phase.value, old_scores, new_scores)
+                for saturated in newly_saturated:
+                    logger.log_task_saturated(
+                        step_num, phase.value, saturated["task_name"],
+                        saturated["reason"], saturated["score_history"]
+                    )
+                    logging.info(f"任务 {saturated['task_name']} 已饱和: {saturated['reason']}")
     
+    @profiled("controller", "stage")
     def _execute_controller(self, step_num: int, logger: WorkflowLogger, 
                            task_manager: TaskManager, recipient_result):
         """执行Controller agent"""
         start_time = time.time()
+        input_data, result = self._controller_input(task_manager, recipient_result)
+        speculative_hit = result is not None
+        if result is None:
+            result = self.controller.run(**input_data)
+            if not self._is_rule_based_controller():
+                self._record_generation_usage(self.controller)
+        return self._finish_controller(step_num, logger, input_data, result, speculative_hit,
+                                       time.time() - start_time)
+        
+    def _controller_input(self, task_manager: TaskManager, recipient_result):
+        """
+        构建Controller输入，并尝试领取预测的Controller决策
         
+        Returns:
+            tuple: (输入数据, 预测的决策，没有可用推测时为None)
+        """
         # 获取当前阶段的未完成任务
         current_phase = task_manager.get_current_phase()
         pending_tasks = task_manager.get_pending_tasks(current_phase)
@@ -487,9 +914,14 @@ class StepExecutor:
             "task_manager": task_manager  # 传递task_manager用于score_driven模式
         }
         
-        result = self.controller.run(**input_data)
-        execution_time = time.time() - start_time
+        result = None
+        if self._speculation is not None:
+            result = self._speculation.claim_controller(self._controller_snapshot(task_manager, current_phase))
+        return input_data, result
         
+    def _finish_controller(self, step_num: int, logger: WorkflowLogger, input_data: Dict[str, Any],
+                           result, speculative_hit: bool, execution_time: float):
+        """记录Controller日志"""
         # 为日志记录创建可序列化的input_data副本（移除TaskManager对象）
         log_input_data = {
             "pending_tasks": input_data["pending_tasks"],
@@ -503,16 +935,38 @@ class StepExecutor:
             "selected_task": result.selected_task,
             "specific_guidance": result.specific_guidance
         }
+        if self.prefetcher is not None:
+            output_data["speculative_hit"] = speculative_hit
         
         logger.log_agent_execution(step_num, "controller", log_input_data, output_data, execution_time)
         
         return result
     
+    @profiled("prompter", "stage")
     def _execute_prompter(self, step_num: int, logger: WorkflowLogger, 
-                         recipient_result, controller_result):
-        """执行Prompter agent"""
+                         recipient_result, controller_result,
+                         triage: Optional[TriageState] = None,
+                         current_phase: Optional[TaskPhase] = None):
+        """执行Prompter agent，启用模板缓存时优先复用相同任务、科室和阶段的输出"""
         start_time = time.time()
+        input_data, cache_key, slots, result, cache_hit = self._lookup_prompter(
+            recipient_result, controller_result, triage, current_phase
+        )
+        fresh = result is None
+        if fresh:
+            result = self.prompter.run(**input_data)
+            self._record_generation_usage(self.prompter)
+        return self._finish_prompter(step_num, logger, input_data, cache_key, slots, result,
+                                     cache_hit, fresh, time.time() - start_time)
         
+    def _lookup_prompter(self, recipient_result, controller_result,
+                         triage: Optional[TriageState], current_phase: Optional[TaskPhase]):
+        """
+        构建Prompter输入，并依次尝试模板缓存和预热的Prompter结果
+        
+        Returns:
+            tuple: (输入数据, 缓存键, 缓存槽位, 可复用的结果（没有时为None）, 是否命中模板缓存)
+        """
         input_data = {
             "hpi_content": recipient_result.updated_HPI,
             "ph_content": recipient_result.updated_PH,
@@ -521,18 +975,53 @@ class StepExecutor:
             "specific_guidance": controller_result.specific_guidance
         }
         
-        result = self.prompter.run(**input_data)
-        execution_time = time.time() - start_time
+        triage = triage or TriageState()
+        cache_key = PrompterTemplateCache.build_key(
+            controller_result.selected_task,
+            triage.primary_department,
+            triage.secondary_department,
+            current_phase.value if current_phase else ""
+        )
+        slots = {
+            "chief_complaint": recipient_result.chief_complaint,
+            "hpi": recipient_result.updated_HPI
+        }
+        
+        result = None
+        cache_hit = False
+        if self.prompter_cache is not None:
+            result = self.prompter_cache.get(cache_key, slots)
+            cache_hit = result is not None
+        if result is None:
+            result = self._claim_speculative_prompter(cache_key, recipient_result.chief_complaint)
+        return input_data, cache_key, slots, result, cache_hit
+    
+    def _finish_prompter(self, step_num: int, logger: WorkflowLogger, input_data: Dict[str, Any],
+                         cache_key, slots: Dict[str, str], result, cache_hit: bool, fresh: bool,
+                         execution_time: float):
+        """写入模板缓存（默认结果不缓存）并记录Prompter日志"""
+        log_input_data = input_data
+        if self.prompter_cache is not None:
+            if not cache_hit and not (fresh and self.prompter.last_run_fallback):
+                self.prompter_cache.put(cache_key, result, slots)
+            log_input_data = dict(input_data, cache_key={
+                "task": cache_key[0],
+                "primary_department": cache_key[1],
+                "secondary_department": cache_key[2],
+                "phase": cache_key[3]
+            })
         
         output_data = {
             "description": result.description,
-            "instructions": result.instructions
+            "instructions": result.instructions,
+            "cache_hit": cache_hit
         }
         
-        logger.log_agent_execution(step_num, "prompter", input_data, output_data, execution_time)
+        logger.log_agent_execution(step_num, "prompter", log_input_data, output_data, execution_time)
         
         return result
     
+    @profiled("inquirer", "stage")
     def _execute_inquirer(self, step_num: int, logger: WorkflowLogger, 
                          recipient_result, prompter_result,
                          new_guidance) -> str:
@@ -540,188 +1029,347 @@ class StepExecutor:
         start_time = time.time()
 
         try:
-            # 使用Prompter生成的描述和指令初始化Inquirer
-            inquirer = Inquirer(
-                description=prompter_result.description,
-                instructions=prompter_result.instructions,
-                model_type=self.model_type,
-                llm_config=self.llm_config,
-                department_inquiry_guidance=new_guidance,
-            )
-            
-            input_data = {
-                "hpi_content": recipient_result.updated_HPI,
-                "ph_content": recipient_result.updated_PH,
-                "chief_complaint": recipient_result.chief_complaint
-            }
-            
+            inquirer, input_data = self._build_inquirer(recipient_result, prompter_result, new_guidance)
             result = inquirer.run(**input_data)
-            execution_time = time.time() - start_time
-            
-            doctor_question = result.current_chat
-            
-            output_data = {"doctor_question": doctor_question}
-            
-            logger.log_agent_execution(step_num, "inquirer", input_data, output_data, execution_time)
-            
-            return doctor_question
+            return self._finish_inquirer(step_num, logger, inquirer, input_data, result,
+                                         time.time() - start_time)
             
         except Exception as e:
-            error_msg = f"Inquirer执行失败: {str(e)}"
-            logger.log_error(step_num, "inquirer_error", error_msg)
-            # 返回默认问题
-            return "请您详细描述一下您的症状，包括什么时候开始的，有什么特点？"
+            return self._handle_inquirer_error(step_num, logger, e)
 
+    def _build_inquirer(self, recipient_result, prompter_result, new_guidance):
+        """使用Prompter生成的描述和指令初始化Inquirer，返回Inquirer及其输入"""
+        inquirer = Inquirer(
+            description=prompter_result.description,
+            instructions=prompter_result.instructions,
+            model_type=self.model_type,
+            llm_config=self.llm_config,
+            department_inquiry_guidance=new_guidance,
+        )
+        if self.replay_log is not None and self.replay_log.is_frozen("inquirer"):
+            inquirer = FrozenAgent(self.replay_log, "inquirer", inquirer)
+        
+        input_data = {
+            "hpi_content": recipient_result.updated_HPI,
+            "ph_content": recipient_result.updated_PH,
+            "chief_complaint": recipient_result.chief_complaint
+        }
+        return inquirer, input_data
     
+    def _finish_inquirer(self, step_num: int, logger: WorkflowLogger, inquirer,
+                         input_data: Dict[str, Any], result, execution_time: float) -> str:
+        """记录Inquirer日志并返回医生问题"""
+        self._record_generation_usage(inquirer)
+        
+        doctor_question = result.current_chat
+        
+        output_data = {"doctor_question": doctor_question}
+        
+        logger.log_agent_execution(step_num, "inquirer", input_data, output_data, execution_time)
+        
+        return doctor_question
+    
+    @staticmethod
+    def _handle_inquirer_error(step_num: int, logger: WorkflowLogger, error: Exception) -> str:
+        """记录Inquirer执行失败并返回默认问题"""
+        error_msg = f"Inquirer执行失败: {str(error)}"
+        logger.log_error(step_num, "inquirer_error", error_msg)
+        # 返回默认问题
+        return "请您详细描述一下您的症状，包括什么时候开始的，有什么特点？"
+    
+    @profiled("fused_inquirer", "stage")
+    def _execute_fused_inquirer(self, step_num: int, logger: WorkflowLogger,
+                                task_manager: TaskManager, recipient_result, new_guidance):
+        """执行FusedInquirer agent，sequence/score_driven模式下任务仍由规则确定"""
+        start_time = time.time()
+        input_data = self._fused_inquirer_input(task_manager, recipient_result, new_guidance)
+        result = self.fused_inquirer.run(**input_data)
+        return self._finish_fused_inquirer(step_num, logger, input_data, result, time.time() - start_time)
+        
+    def _fused_inquirer_input(self, task_manager: TaskManager, recipient_result, new_guidance) -> Dict[str, Any]:
+        """构建FusedInquirer输入，规则型Controller模式下先确定任务"""
+        current_phase = task_manager.get_current_phase()
+        pending_tasks = task_manager.get_pending_tasks(current_phase)
+        
+        fixed_task = None
+        if self._is_rule_based_controller() and self._speculation is not None:
+            decision = self._speculation.claim_controller(self._controller_snapshot(task_manager, current_phase))
+            fixed_task = decision.selected_task if decision is not None else None
+        if self._is_rule_based_controller() and fixed_task is None:
+            fixed_task = self.controller.run(
+                pending_tasks=pending_tasks,
+                chief_complaint=recipient_result.chief_complaint,
+                task_manager=task_manager
+            ).selected_task
+        
+        return {
+            "pending_tasks": pending_tasks,
+            "chief_complaint": recipient_result.chief_complaint,
+            "hpi_content": recipient_result.updated_HPI,
+            "ph_content": recipient_result.updated_PH,
+            "department_inquiry_guidance": new_guidance,
+            "fixed_task": fixed_task
+        }
+        
+    def _finish_fused_inquirer(self, step_num: int, logger: WorkflowLogger, input_data: Dict[str, Any],
+                               result, execution_time: float):
+        """记录FusedInquirer日志"""
+        self._record_generation_usage(self.fused_inquirer)
+        
+        output_data = {
+            "selected_task": result.selected_task,
+            "specific_guidance": result.specific_guidance,
+            "doctor_question": result.current_chat
+        }
+        
+        logger.log_agent_execution(step_num, "fused_inquirer", input_data, output_data, execution_time)
+        
+        return result
+    
+    @staticmethod
+    def _controller_snapshot(task_manager: TaskManager, phase: TaskPhase):
+        """Controller决策依赖的状态快照：阶段、待完成任务及其分数"""
+        scores = task_manager.get_task_scores(phase) if phase != TaskPhase.COMPLETED else {}
+        return (
+            phase.value,
+            tuple((task["name"], scores.get(task["name"], 0.0)) for task in task_manager.get_pending_tasks(phase))
+        )
+    
+    @profiled("speculation", "stage")
+    def _submit_speculation(self, step_num: int, task_manager: TaskManager,
+                            recipient_result, triage: TriageState):
+        """
+        提交下一步的推测预计算
+        仅在规则型Controller且下一步阶段不变时预测任务并预热Prompter；分诊阶段预取科室指导
+        """
+        next_phase = task_manager.get_current_phase(step_num + 1)
+        if next_phase == TaskPhase.COMPLETED:
+            return
+        
+        controller_snapshot, decision, prompter_key, prompter_inputs = None, None, None, None
+        if self._is_rule_based_controller() and next_phase == task_manager.get_current_phase():
+            pending_tasks = task_manager.get_pending_tasks(next_phase)
+            controller_snapshot = self._controller_snapshot(task_manager, next_phase)
+            decision = self.controller.run(
+                pending_tasks=pending_tasks,
+                chief_complaint=recipient_result.chief_complaint,
+                task_manager=task_manager
+            )
+            if self.generation_mode == "chained":
+                prompter_key = PrompterTemplateCache.build_key(
+                    decision.selected_task,
+                    triage.primary_department,
+                    triage.secondary_department,
+                    next_phase.value
+                )
+                # 模板缓存中已有该任务模板时无需预热
+                if self.prompter_cache is None or prompter_key not in self.prompter_cache:
+                    prompter_inputs = {
+                        "hpi_content": recipient_result.updated_HPI,
+                        "ph_content": recipient_result.updated_PH,
+                        "chief_complaint": recipient_result.chief_complaint,
+                        "current_task": decision.selected_task,
+                        "specific_guidance": decision.specific_guidance
+                    }
+        
+        department, candidate_department, primary_department = "", "", ""
+        if next_phase == TaskPhase.TRIAGE and self.guidance_loader is not None:
+            department = triage.department
+            candidate_department = triage.candidate_department
+            primary_department = triage.primary_department
+        
+        if decision is None and not department:
+            return
+        
+        work = SpeculativeWork(
+            step_num, next_phase.value,
+            controller_snapshot=controller_snapshot,
+            controller_decision=decision,
+            prompter_key=prompter_key,
+            chief_complaint=recipient_result.chief_complaint,
+            department=department,
+            candidate_department=candidate_department,
+            primary_department=primary_department
+        )
+        self.prefetcher.submit(work, prompter_inputs)
+    
+    def _claim_speculative_prompter(self, cache_key, chief_complaint: str):
+        """领取预热的Prompter结果，无可用推测时返回None"""
+        if self._speculation is None:
+            return None
+        return self._speculation.claim_prompter(cache_key, chief_complaint)
+    
+    def _claim_speculative_inquiry_guidance(self, primary_department: str) -> Optional[str]:
+        """领取预取的科室询问指导，无可用推测时返回None"""
+        if self._speculation is None:
+            return None
+        return self._speculation.claim_inquiry_guidance(primary_department)
+    
+    def _is_rule_based_controller(self) -> bool:
+        """Controller是否按规则选择任务（sequence/score_driven模式不调用LLM）"""
+        return self.controller.simple_mode or self.controller.score_driven_mode
+    
+    def _record_generation_usage(self, agent):
+        """累计本步问题生成的LLM调用次数和token估算"""
+        self._generation_usage["llm_calls"] = self._generation_usage.get("llm_calls", 0) + 1
+        self._generation_usage["prompt_tokens"] = self._generation_usage.get("prompt_tokens", 0) + agent.last_prompt_tokens
+        self._generation_usage["completion_tokens"] = self._generation_usage.get("completion_tokens", 0) + agent.last_completion_tokens
+    
+    @profiled("evaluator", "stage")
     def _execute_evaluator(self, step_num: int, logger: WorkflowLogger, 
-                          case_data: Dict[str, Any], step_result: Dict[str, Any]):
+                          case_data: Dict[str, Any], step_result: StepResult,
+                          turn_store: TurnStore):
         """执行Evaluator agent"""
         start_time = time.time()
         
         try:
-            # 准备评价器需要的数据格式，包含完整对话历史
-            conversation_history = step_result.get("conversation_history", "")
-            round_data = {
-                "patient_response": step_result.get("patient_response", ""),
-                "doctor_inquiry": step_result.get("doctor_question", ""),
-                "HPI": step_result.get("updated_hpi", ""),
-                "PH": step_result.get("updated_ph", ""),
-                "chief_complaint": step_result.get("updated_chief_complaint", "")
-            }
+            input_data, evaluator_kwargs = self._evaluator_input(step_num, case_data, step_result, turn_store)
             
-            # 使用全局历史评分
-            historical_scores = self._global_historical_scores
+            # 调用支持多轮的评估方法
+            result = self.evaluator.run(**evaluator_kwargs)
             
-            # 调用评价器进行评价，传入完整对话历史和历史评分
-            input_data = {
-                "patient_case": case_data,
-                "current_round": step_num,
-                "round_data": round_data,
-                "conversation_history": conversation_history,
-                "historical_scores": historical_scores  # 添加历史评分作为明确参数
+            return self._finish_evaluator(step_num, logger, input_data, result, time.time() - start_time)
+        
+        except Exception as e:
+            return self._handle_evaluator_error(step_num, logger, e)
+    
+    def _evaluator_input(self, step_num: int, case_data: Dict[str, Any], step_result: StepResult,
+                         turn_store: TurnStore):
+        """
+        构建Evaluator输入，包含完整对话历史和本会话的历史评分
+        
+        Returns:
+            tuple: (用于日志的输入数据, Evaluator.run的参数)
+        """
+        # 准备评价器需要的数据格式，包含完整对话历史
+        conversation_history = turn_store.render_conversation()
+        round_data = {
+            "patient_response": step_result.patient_response,
+            "doctor_inquiry": step_result.doctor_question,
+            "HPI": step_result.updated_hpi,
+            "PH": step_result.updated_ph,
+            "chief_complaint": step_result.updated_chief_complaint
+        }
+        
+        # 服务端没有标准病例，使用当前整理的病历构建简化的patient_case
+        if not case_data:
+            case_data = {
+                "病案介绍": {
+                    "主诉": step_result.updated_chief_complaint,
+                    "现病史": step_result.updated_hpi,
+                    "既往史": step_result.updated_ph
+                }
             }
+        
+        # 使用本会话上一轮的评分，第一轮为全0
+        historical_scores = self.score_history.get_historical_scores(step_num, self.session_id) or empty_scores()
+        
+        # 调用评价器进行评价，传入完整对话历史和历史评分
+        input_data = {
+            "patient_case": case_data,
+            "current_round": step_num,
+            "round_data": round_data,
+            "conversation_history": conversation_history,
+            "historical_scores": historical_scores  # 添加历史评分作为明确参数
+        }
+        
+        # 从对话轮次存储中构建所有轮次的数据用于多轮评估
+        all_rounds_data = turn_store.to_rounds()
+        
+        # 最后一轮附加当前病史信息
+        if all_rounds_data:
+            all_rounds_data[-1].update({
+                "HPI": step_result.updated_hpi,
+                "PH": step_result.updated_ph,
+                "chief_complaint": step_result.updated_chief_complaint
+            })
             
-            # 构建所有轮次的数据用于多轮评估
-            all_rounds_data = []
-            
-            # 从对话历史中提取每轮数据
-            lines = conversation_history.strip().split('\n')
-            current_round_data = {}
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('医生:') and current_round_data:
-                    # 完成上轮，开始新轮
-                    all_rounds_data.append(current_round_data)
-                    current_round_data = {"doctor_inquiry": line[3:].strip(), "patient_response": ""}
-                elif line.startswith('医生:'):
-                    # 新轮开始
-                    current_round_data = {"doctor_inquiry": line[3:].strip(), "patient_response": ""}
-                elif line.startswith('患者:') and current_round_data:
-                    current_round_data["patient_response"] = line[3:].strip()
-                elif line.startswith('患者:'):
-                    # 第一轮只有患者回应
-                    current_round_data = {"doctor_inquiry": "", "patient_response": line[3:].strip()}
-            
-            # 添加最后一轮
-            if current_round_data:
-                current_round_data.update({
-                    "HPI": step_result.get("updated_hpi", ""),
-                    "PH": step_result.get("updated_ph", ""),
-                    "chief_complaint": step_result.get("updated_chief_complaint", "")
-                })
-                all_rounds_data.append(current_round_data)
-            
-            # 为所有轮次添加evaluation_scores，使用全局历史评分
-            for i, round_data in enumerate(all_rounds_data):
-                if i < step_num - 1:  # 历史轮次
-                    # 使用全局历史评分
-                    round_data["evaluation_scores"] = self._global_historical_scores
-                else:  # 当前轮次
-                    # 当前轮次尚未评分，使用空值占位
-                    round_data["evaluation_scores"] = {
-                        "clinical_inquiry": 0.0,
-                        "communication_quality": 0.0,
-                        "information_completeness": 0.0,
-                        "overall_professionalism": 0.0,
-                        "present_illness_similarity": 0.0,
-                        "past_history_similarity": 0.0,
-                        "chief_complaint_similarity": 0.0
-                    }
-            
-            # 调用支持多轮的评估方法
-            result = self.evaluator.run(
-                patient_case=case_data,
-                current_round=step_num,
-                all_rounds_data=all_rounds_data,
-                historical_scores=historical_scores
-            )
+        # 为所有轮次添加evaluation_scores，历史轮次使用各自的评分
+        for i, round_data in enumerate(all_rounds_data):
+            if i < step_num - 1:  # 历史轮次
+                round_data["evaluation_scores"] = (
+                    self.score_history.get_round_score(i + 1, self.session_id) or historical_scores
+                )
+            else:  # 当前轮次
+                # 当前轮次尚未评分，使用空值占位
+                round_data["evaluation_scores"] = empty_scores()
             
-            execution_time = time.time() - start_time
+        evaluator_kwargs = {
+            "patient_case": case_data,
+            "current_round": step_num,
+            "all_rounds_data": all_rounds_data,
+            "historical_scores": historical_scores
+        }
+        return input_data, evaluator_kwargs
             
-            output_data = {
-                "clinical_inquiry": {
-                    "score": result.clinical_inquiry.score,
-                    "comment": result.clinical_inquiry.comment
-                },
-                "communication_quality": {
-                    "score": result.communication_quality.score,
-                    "comment": result.communication_quality.comment
-                },
-                "information_completeness": {
-                    "score": result.information_completeness.score,
-                    "comment": result.information_completeness.comment
-                },
-                "overall_professionalism": {
-                    "score": result.overall_professionalism.score,
-                    "comment": result.overall_professionalism.comment
-                },
-                "present_illness_similarity": {
-                    "score": result.present_illness_similarity.score,
-                    "comment": result.present_illness_similarity.comment
-                },
-                "past_history_similarity": {
-                    "score": result.past_history_similarity.score,
-                    "comment": result.past_history_similarity.comment
-                },
-                "chief_complaint_similarity": {
-                    "score": result.chief_complaint_similarity.score,
-                    "comment": result.chief_complaint_similarity.comment
-                },
-                "summary": result.summary,
-                "key_suggestions": result.key_suggestions
-            }
+    def _finish_evaluator(self, step_num: int, logger: WorkflowLogger, input_data: Dict[str, Any],
+                          result, execution_time: float):
+        """记录Evaluator日志和本会话本轮评分"""
+        output_data = {
+            "clinical_inquiry": {
+                "score": result.clinical_inquiry.score,
+                "comment": result.clinical_inquiry.comment
+            },
+            "communication_quality": {
+                "score": result.communication_quality.score,
+                "comment": result.communication_quality.comment
+            },
+            "information_completeness": {
+                "score": result.information_completeness.score,
+                "comment": result.information_completeness.comment
+            },
+            "overall_professionalism": {
+                "score": result.overall_professionalism.score,
+                "comment": result.overall_professionalism.comment
+            },
+            "present_illness_similarity": {
+                "score": result.present_illness_similarity.score,
+                "comment": result.present_illness_similarity.comment
+            },
+            "past_history_similarity": {
+                "score": result.past_history_similarity.score,
+                "comment": result.past_history_similarity.comment
+            },
+            "chief_complaint_similarity": {
+                "score": result.chief_complaint_similarity.score,
+                "comment": result.chief_complaint_similarity.comment
+            },
+            "summary": result.summary,
+            "key_suggestions": result.key_suggestions
+        }
             
-            logger.log_agent_execution(step_num, "evaluator", input_data, output_data, execution_time)
+        logger.log_agent_execution(step_num, "evaluator", input_data, output_data, execution_time)
             
-            # 更新全局历史评分
-            self._global_historical_scores = {
-                "clinical_inquiry": result.clinical_inquiry.score,
-                "communication_quality": result.communication_quality.score,
-                "information_completeness": result.information_completeness.score,
-                "overall_professionalism": result.overall_professionalism.score,
-                "present_illness_similarity": result.present_illness_similarity.score,
-                "past_history_similarity": result.past_history_similarity.score,
-                "chief_complaint_similarity": result.chief_complaint_similarity.score
-            }
+        # 记录本会话本轮评分
+        self.score_history.add_round_score(step_num, {
+            "clinical_inquiry": result.clinical_inquiry.score,
+            "communication_quality": result.communication_quality.score,
+            "information_completeness": result.information_completeness.score,
+            "overall_professionalism": result.overall_professionalism.score,
+            "present_illness_similarity": result.present_illness_similarity.score,
+            "past_history_similarity": result.past_history_similarity.score,
+            "chief_complaint_similarity": result.chief_complaint_similarity.score
+        }, self.session_id)
             
-            return result
+        return result
             
-        except Exception as e:
-            error_msg = f"Evaluator执行失败: {str(e)}"
-            logger.log_error(step_num, "evaluator_error", error_msg)
-            # 返回默认评价结果
-            from agent_system.evaluator.response_model import EvaluatorResult, EvaluationDimension
+    @staticmethod
+    def _handle_evaluator_error(step_num: int, logger: WorkflowLogger, error: Exception):
+        """记录Evaluator执行失败并返回默认评价结果"""
+        error_msg = f"Evaluator执行失败: {str(error)}"
+        logger.log_error(step_num, "evaluator_error", error_msg)
+        # 返回默认评价结果
+        from agent_system.evaluator.response_model import EvaluatorResult, EvaluationDimension
             
-            default_dimension = EvaluationDimension(score=0.0, comment="评价失败")
-            return EvaluatorResult(
-                clinical_inquiry=default_dimension,
-                communication_quality=default_dimension,
-                information_completeness=default_dimension,
-                overall_professionalism=default_dimension,
-                present_illness_similarity=default_dimension,
-                past_history_similarity=default_dimension,
-                chief_complaint_similarity=default_dimension,
-                summary="评价失败",
-                key_suggestions=["系统需要调试"]
-            )
+        default_dimension = EvaluationDimension(score=0.0, comment="评价失败")
+        return EvaluatorResult(
+            clinical_inquiry=default_dimension,
+            communication_quality=default_dimension,
+            information_completeness=default_dimension,
+            overall_professionalism=default_dimension,
+            present_illness_similarity=default_dimension,
+            past_history_similarity=default_dimension,
+            chief_complaint_similarity=default_dimension,
+            summary="评价失败",
+            key_suggestions=["系统需要调试"]
+        )
\ No newline at end of file
@@ -0,0 +1,79 @@
+from typing import Dict, Any, List, Optional
+
+
+class StoppingPolicy:
+    """
+    任务停止策略基类
+    根据任务的评分历史判断是否应将未达到完成阈值的任务标记为"饱和"并跳过
+    """
+
+    name = "none"
+
+    def check(self, task_name: str, score_history: List[float]) -> Optional[str]:
+        """
+        判断任务是否饱和
+
+        Args:
+            task_name: 任务名称
+            score_history: 该任务被询问后的评分历史，按时间顺序排列
+
+        Returns:
+            Optional[str]: 饱和原因，不饱和时返回None
+        """
+        return None
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        获取策略配置，用于记录在日志中
+
+        Returns:
+            Dict: 策略名称及参数
+        """
+        return {"name": self.name}
+
+
+class ScorePlateauPolicy(StoppingPolicy):
+    """
+    评分平台期停止策略
+    任务在最近window次被询问后，评分相对窗口之前的最高分提升不足min_gain时判定为饱和
+    """
+
+    name = "score_plateau"
+
+    def __init__(self, window: int = 3, min_gain: float = 0.05, min_score: float = 0.0):
+        """
+        初始化评分平台期停止策略
+
+        Args:
+            window: 观察窗口，即连续询问该任务的次数
+            min_gain: 窗口内的最小边际提升，低于该值判定为饱和
+            min_score: 允许判定饱和的最低当前评分，低于该值的任务继续询问
+        """
+        self.window = max(1, window)
+        self.min_gain = min_gain
+        self.min_score = min_score
+
+    def check(self, task_name: str, score_history: List[float]) -> Optional[str]:
+        """判断任务评分是否进入平台期"""
+        if len(score_history) <= self.window:
+            return None
+        if score_history[-1] < self.min_score:
+            return None
+
+        best_before = max(score_history[:-self.window])
+        best_in_window = max(score_history[-self.window:])
+        gain = best_in_window - best_before
+        if gain >= self.min_gain:
+            return None
+
+        return (f"最近{self.window}次询问后评分提升{gain:.2f}，低于最小提升{self.min_gain:.2f}，"
+                f"当前评分{score_history[-1]:.2f}")
+
+    def describe(self) -> Dict[str, Any]:
+        """获取策略配置"""
+        return {
+            "name": self.name,
+            "window": self.window,
+            "min_gain": self.min_gain,
+            "min_score": self.min_score
+        }
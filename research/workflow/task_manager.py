@@ -1,5 +1,7 @@
 from typing import Dict, List, Optional
 from enum import Enum
+from .stopping_policy import StoppingPolicy
+from .models import PhaseSummary
 
 class TaskPhase(Enum):
     """任务阶段枚举"""
@@ -48,6 +50,36 @@ class TaskManager:
             self.task_scores[phase] = {}
             for task_name in self.task_definitions[phase]:
                 self.task_scores[phase][task_name] = 0.0
+        
+        # 停止策略：任务被询问后的评分历史与饱和任务（任务名 -> 饱和原因）
+        self.stopping_policy = StoppingPolicy()
+        self.score_history = {phase: {task_name: [] for task_name in tasks} for phase, tasks in self.task_definitions.items()}
+        self.saturated_tasks = {phase: {} for phase in self.task_definitions}
+        self.last_selected_task: Optional[str] = None
+        
+        # 各阶段完成情况，仅在评分或饱和状态变化时增量更新
+        self.phase_summaries = {phase: PhaseSummary(total=len(tasks)) for phase, tasks in self.task_definitions.items()}
+        self._completion_summary: Optional[Dict[str, any]] = None
+        for phase in self.task_definitions:
+            self._refresh_phase_summary(phase)
+    
+    def set_stopping_policy(self, policy: Optional[StoppingPolicy]):
+        """
+        设置任务停止策略
+        
+        Args:
+            policy: 停止策略，为None时不提前停止
+        """
+        self.stopping_policy = policy or StoppingPolicy()
+    
+    def set_selected_task(self, task_name: str):
+        """
+        记录本步询问的任务，下一次评分更新时计入该任务的评分历史
+        
+        Args:
+            task_name: 本步询问的任务名称
+        """
+        self.last_selected_task = task_name
     
     def update_step(self, step_num: int):
         """
@@ -58,16 +90,22 @@ class TaskManager:
         """
         self.current_step = step_num
     
-    def get_current_phase(self) -> TaskPhase:
+    def get_current_phase(self, step_num: Optional[int] = None) -> TaskPhase:
         """
         获取当前应该执行的任务阶段
         分诊阶段限制最多4步，第5步开始即使未完成也进入现病史阶段
         
+        Args:
+            step_num: 按指定步骤编号判断阶段（用于预测下一步），为None时使用当前步骤
+        
         Returns:
             TaskPhase: 当前任务阶段
         """
+        if step_num is None:
+            step_num = self.current_step
+        
         # 检查分诊阶段是否完成，且不超过4步
-        if not self._is_phase_completed(TaskPhase.TRIAGE) and self.current_step <= 4:
+        if not self._is_phase_completed(TaskPhase.TRIAGE) and step_num <= 4:
             return TaskPhase.TRIAGE
         
         # 如果超过4步或分诊已完成，进入现病史阶段
@@ -101,8 +139,9 @@ class TaskManager:
         phase_tasks = self.task_definitions[phase]
         phase_scores = self.task_scores[phase]
         
+        saturated = self.saturated_tasks[phase]
         for task_name, task_info in phase_tasks.items():
-            if phase_scores[task_name] < self.completion_threshold:
+            if phase_scores[task_name] < self.completion_threshold and task_name not in saturated:
                 pending_tasks.append({
                     "name": task_name,
                     "description": task_info["description"]
@@ -110,20 +149,80 @@ class TaskManager:
         
         return pending_tasks
     
-    def update_task_scores(self, phase: TaskPhase, task_scores: Dict[str, float]):
+    def update_task_scores(self, phase: TaskPhase, task_scores: Dict[str, float]) -> List[Dict[str, any]]:
         """
-        更新指定阶段的任务完成度评分
+        更新指定阶段的任务完成度评分，并对上一步询问的任务应用停止策略
         
         Args:
             phase: 任务阶段
             task_scores: 任务评分字典，格式为 {任务名: 评分}
+            
+        Returns:
+            List[Dict]: 本次新判定为饱和的任务，每项包含task_name、reason、score_history
         """
         if phase not in self.task_scores:
-            return
+            return []
         
+        changed = False
         for task_name, score in task_scores.items():
-            if task_name in self.task_scores[phase]:
+            if task_name in self.task_scores[phase] and self.task_scores[phase][task_name] != score:
                 self.task_scores[phase][task_name] = score
+                changed = True
+        
+        # 只有被询问过的任务才计入评分历史，未被询问的任务分数不变不代表停滞
+        newly_saturated = []
+        task_name = self.last_selected_task
+        if task_name in task_scores and task_name in self.task_scores[phase]:
+            self.last_selected_task = None
+            history = self.score_history[phase][task_name]
+            history.append(self.task_scores[phase][task_name])
+            if (history[-1] < self.completion_threshold
+                    and task_name not in self.saturated_tasks[phase]):
+                reason = self.stopping_policy.check(task_name, history)
+                if reason:
+                    self.saturated_tasks[phase][task_name] = reason
+                    newly_saturated.append({
+                        "task_name": task_name,
+                        "reason": reason,
+                        "score_history": list(history)
+                    })
+                    changed = True
+        
+        if changed:
+            self._refresh_phase_summary(phase)
+        return newly_saturated
+    
+    def _refresh_phase_summary(self, phase: TaskPhase):
+        """
+        重新统计单个阶段的完成情况，并使缓存的完成情况摘要失效
+        
+        Args:
+            phase: 评分或饱和状态发生变化的任务阶段
+        """
+        phase_scores = self.task_scores[phase]
+        saturated = self.saturated_tasks[phase]
+        summary = self.phase_summaries[phase]
+        summary.completed = sum(1 for score in phase_scores.values() if score >= self.completion_threshold)
+        summary.saturated = len(saturated)
+        summary.is_completed = all(
+            score >= self.completion_threshold or task_name in saturated
+            for task_name, score in phase_scores.items()
+        )
+        self._completion_summary = None
+    
+    def get_saturated_tasks(self, phase: Optional[TaskPhase] = None) -> Dict:
+        """
+        获取被停止策略判定为饱和的任务
+        
+        Args:
+            phase: 指定的任务阶段，如果为None则返回所有阶段
+            
+        Returns:
+            Dict: 任务名到饱和原因的映射
+        """
+        if phase is None:
+            return self.saturated_tasks
+        return self.saturated_tasks.get(phase, {})
     
     def get_task_scores(self, phase: Optional[TaskPhase] = None) -> Dict:
         """
@@ -139,34 +238,74 @@ class TaskManager:
             return self.task_scores
         return self.task_scores.get(phase, {})
     
+    def get_task_phase_map(self) -> Dict[str, str]:
+        """
+        获取任务名到所属阶段的映射
+        
+        Returns:
+            Dict[str, str]: 任务名到阶段值的映射
+        """
+        return {
+            task_name: phase.value
+            for phase, tasks in self.task_definitions.items()
+            for task_name in tasks
+        }
+    
     def get_completion_summary(self) -> Dict[str, any]:
         """
         获取任务完成情况摘要
+        摘要在评分变化或阶段切换前保持不变，多次调用返回同一对象，调用方不应修改
         
         Returns:
             Dict: 完成情况摘要，包含各阶段完成状态和进度
         """
-        summary = {
-            "current_phase": self.get_current_phase().value,
-            "phases": {}
-        }
-        
-        for phase, tasks in self.task_definitions.items():
-            completed_count = sum(
-                1 for task_name in tasks 
-                if self.task_scores[phase][task_name] >= self.completion_threshold
-            )
-            total_count = len(tasks)
-            
-            summary["phases"][phase.value] = {
-                "completed": completed_count,
-                "total": total_count,
-                "completion_rate": completed_count / total_count if total_count > 0 else 0,
-                "is_completed": self._is_phase_completed(phase)
+        current_phase = self.get_current_phase().value
+        summary = self._completion_summary
+        if summary is None or summary["current_phase"] != current_phase:
+            summary = {
+                "current_phase": current_phase,
+                "phases": {phase.value: phase_summary.to_dict() for phase, phase_summary in self.phase_summaries.items()}
             }
-        
+            self._completion_summary = summary
         return summary
     
+    def get_state(self) -> Dict[str, any]:
+        """
+        导出可JSON序列化的任务状态，用于检查点
+        
+        Returns:
+            Dict: 当前步骤、任务评分、评分历史、饱和任务和上一步询问的任务
+        """
+        return {
+            "current_step": self.current_step,
+            "task_scores": {phase.value: dict(scores) for phase, scores in self.task_scores.items()},
+            "score_history": {
+                phase.value: {task_name: list(history) for task_name, history in tasks.items()}
+                for phase, tasks in self.score_history.items()
+            },
+            "saturated_tasks": {phase.value: dict(tasks) for phase, tasks in self.saturated_tasks.items()},
+            "last_selected_task": self.last_selected_task
+        }
+    
+    def restore_state(self, state: Dict[str, any]):
+        """
+        从检查点恢复任务状态
+        
+        Args:
+            state: get_state导出的任务状态
+        """
+        self.current_step = state.get("current_step", self.current_step)
+        for phase in self.task_definitions:
+            for task_name, score in state.get("task_scores", {}).get(phase.value, {}).items():
+                if task_name in self.task_scores[phase]:
+                    self.task_scores[phase][task_name] = score
+            for task_name, history in state.get("score_history", {}).get(phase.value, {}).items():
+                if task_name in self.score_history[phase]:
+                    self.score_history[phase][task_name] = list(history)
+            self.saturated_tasks[phase] = dict(state.get("saturated_tasks", {}).get(phase.value, {}))
+            self._refresh_phase_summary(phase)
+        self.last_selected_task = state.get("last_selected_task")
+    
     def _is_phase_completed(self, phase: TaskPhase) -> bool:
         """
         检查指定阶段是否完成
@@ -177,11 +316,9 @@ class TaskManager:
         Returns:
             bool: 是否完成
         """
-        if phase not in self.task_scores:
+        if phase not in self.phase_summaries:
             return False
-        
-        phase_scores = self.task_scores[phase]
-        return all(score >= self.completion_threshold for score in phase_scores.values())
+        return self.phase_summaries[phase].is_completed
     
     def is_workflow_completed(self) -> bool:
         """
@@ -0,0 +1,128 @@
+from typing import Dict, Any, Iterator, List, Optional
+
+
+class Turn:
+    """
+    单轮对话记录
+    一轮由医生上一步生成的问题和患者本轮的回答组成，首轮没有医生问题
+    """
+
+    __slots__ = ("step", "doctor_question", "patient_response")
+
+    def __init__(self, step: int, doctor_question: str, patient_response: str):
+        self.step = step
+        self.doctor_question = doctor_question
+        self.patient_response = patient_response
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        return {
+            "step": self.step,
+            "doctor_question": self.doctor_question,
+            "patient_response": self.patient_response
+        }
+
+
+class TurnStore:
+    """
+    对话轮次存储
+    以只追加的方式保存结构化的对话轮次，追加为O(1)，
+    并为各agent提供所需格式的渲染视图，避免每步拼接和重新解析完整对话字符串
+    """
+
+    DOCTOR_PREFIX = "医生: "
+    PATIENT_PREFIX = "患者: "
+
+    def __init__(self):
+        """初始化空的对话存储"""
+        self._turns: List[Turn] = []
+        self._rendered_turns: List[str] = []
+        self._conversation_cache: Optional[str] = None
+
+    def append(self, step: int, doctor_question: str, patient_response: str) -> Turn:
+        """
+        追加一轮对话
+
+        Args:
+            step: step编号
+            doctor_question: 医生问题，首轮为空字符串
+            patient_response: 患者回答
+
+        Returns:
+            Turn: 新追加的对话轮次
+        """
+        turn = Turn(step, doctor_question or "", patient_response or "")
+        self._turns.append(turn)
+        self._rendered_turns.append(self._render_turn(turn))
+        self._conversation_cache = None
+        return turn
+
+    def latest(self) -> Optional[Turn]:
+        """
+        获取最新一轮对话
+
+        Returns:
+            Optional[Turn]: 最新一轮对话，无对话时返回None
+        """
+        return self._turns[-1] if self._turns else None
+
+    def render_conversation(self) -> str:
+        """
+        渲染为"医生: ...\\n患者: ..."格式的完整对话文本（Recipient全量模式和日志使用）
+        渲染结果在下次追加前被缓存
+
+        Returns:
+            str: 完整对话文本
+        """
+        if self._conversation_cache is None:
+            self._conversation_cache = "\n".join(self._rendered_turns)
+        return self._conversation_cache
+
+    def to_rounds(self) -> List[Dict[str, str]]:
+        """
+        渲染为Evaluator使用的多轮数据格式
+
+        Returns:
+            List[Dict]: 每轮包含doctor_inquiry和patient_response字段
+        """
+        return [
+            {"doctor_inquiry": turn.doctor_question, "patient_response": turn.patient_response}
+            for turn in self._turns
+        ]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        导出为可JSON序列化的轮次列表
+
+        Returns:
+            List[Dict]: 轮次列表
+        """
+        return [turn.to_dict() for turn in self._turns]
+
+    @classmethod
+    def from_list(cls, turns: List[Dict[str, Any]]) -> "TurnStore":
+        """
+        从轮次列表恢复对话存储
+
+        Args:
+            turns: to_list导出的轮次列表
+
+        Returns:
+            TurnStore: 恢复后的对话存储
+        """
+        store = cls()
+        for turn in turns:
+            store.append(turn.get("step", 0), turn.get("doctor_question", ""), turn.get("patient_response", ""))
+        return store
+
+    def _render_turn(self, turn: Turn) -> str:
+        """渲染单轮对话，首轮只有患者回答"""
+        if not turn.doctor_question:
+            return f"{self.PATIENT_PREFIX}{turn.patient_response}"
+        return f"{self.DOCTOR_PREFIX}{turn.doctor_question}\n{self.PATIENT_PREFIX}{turn.patient_response}"
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Turn]:
+        return iter(self._turns)
@@ -1,16 +1,25 @@
 import json
 import os
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List
 import hashlib
 
+from agent_system.base.profiling import profiled
+from .completion_manifest import CompletionManifest
+
 class WorkflowLogger:
     """
     工作流日志记录器
     负责将每个step的详细信息记录到jsonl格式文件中
     """
     
-    def __init__(self, case_data: Dict[str, Any], log_dir: str = "logs", case_index: Optional[int] = None):
+    # 缓冲模式下尚未写入文件的日志行，为None时每条记录直接写入文件
+    _buffer: Optional[List[bytes]] = None
+    
+    def __init__(self, case_data: Dict[str, Any], log_dir: str = "logs", case_index: Optional[int] = None,
+                 workflow_config: Optional[Dict[str, Any]] = None,
+                 resume_log_file: Optional[str] = None, resume_offset: Optional[int] = None,
+                 resume_step: int = 0):
         """
         初始化日志记录器
         
@@ -18,18 +27,32 @@ class WorkflowLogger:
             case_data: 病例数据
             log_dir: 日志目录，默认为"logs"  
             case_index: 病例序号，用于文件名标识
+            workflow_config: 工作流运行配置，记录在workflow_start事件中，便于对比不同配置的运行结果
+            resume_log_file: 断点续跑时沿用的日志文件路径
+            resume_offset: 断点续跑时日志的有效长度（字节），之后的内容属于未完成的step，将被截断
+            resume_step: 断点续跑时已完成的最后一个step
         """
         self.case_data = case_data
         self.log_dir = log_dir
         self.case_index = case_index
-        self.log_file_path = self._generate_log_file_path()
+        self.workflow_config = workflow_config or {}
         self.step_count = 0
+        # 回放模式下返回(step, agent)输出来源标记的函数，为None时不记录来源
+        self.provenance_provider: Optional[Callable[[int, str], Dict[str, Any]]] = None
         
         # 确保日志目录存在
         os.makedirs(log_dir, exist_ok=True)
         
-        # 初始化日志文件，记录工作流开始信息
-        self._log_workflow_start()
+        if resume_log_file:
+            # 沿用原日志文件，截断最后一个检查点之后的不完整记录，保持日志只追加且不重复
+            self.log_file_path = resume_log_file
+            self.step_count = resume_step
+            self._truncate_log(resume_offset)
+            self._log_workflow_resume(resume_step)
+        else:
+            self.log_file_path = self._generate_log_file_path()
+            # 初始化日志文件，记录工作流开始信息
+            self._log_workflow_start()
     
     def _generate_log_file_path(self) -> str:
         """
@@ -61,11 +84,81 @@ class WorkflowLogger:
             "workflow_config": {
                 "max_steps": 30,
                 "completion_threshold": 0.85,
-                "phases": ["triage", "hpi", "ph"]
+                "phases": ["triage", "hpi", "ph"],
+                **self.workflow_config
             }
         }
         self._write_log_entry(start_log)
     
+    def _truncate_log(self, offset: Optional[int]):
+        """将日志文件截断到指定长度"""
+        if offset is None or not os.path.exists(self.log_file_path):
+            return
+        if os.path.getsize(self.log_file_path) > offset:
+            with open(self.log_file_path, 'r+b') as f:
+                f.truncate(offset)
+    
+    def _log_workflow_resume(self, resume_step: int):
+        """记录工作流从检查点恢复的信息"""
+        resume_log = {
+            "event_type": "workflow_resume",
+            "timestamp": datetime.now().isoformat(),
+            "resumed_after_step": resume_step,
+            "workflow_config": self.workflow_config
+        }
+        self._write_log_entry(resume_log)
+    
+    def get_log_offset(self) -> int:
+        """
+        获取当前日志文件长度（字节），用于检查点记录日志的有效位置；缓冲模式下包含尚未写入的日志行
+        
+        Returns:
+            int: 日志文件长度
+        """
+        buffered = sum(len(line) for line in self._buffer) if self._buffer else 0
+        try:
+            return os.path.getsize(self.log_file_path) + buffered
+        except OSError:
+            return buffered
+    
+    def start_buffering(self):
+        """
+        开启缓冲模式：之后的日志记录在调用线程中序列化后暂存在内存，由flush一次追加写入文件
+        异步工作流在线程中调用flush，避免在事件循环中写文件
+        """
+        if self._buffer is None:
+            self._buffer = []
+    
+    def stop_buffering(self) -> bool:
+        """
+        写出缓冲的日志记录并关闭缓冲模式，之后的记录直接写入文件
+        
+        Returns:
+            bool: 是否写入成功
+        """
+        success = self.flush()
+        self._buffer = None
+        return success
+    
+    @profiled("log_write", "io")
+    def flush(self) -> bool:
+        """
+        将缓冲的日志记录一次追加写入文件，未开启缓冲模式时不做任何操作
+        
+        Returns:
+            bool: 是否写入成功，失败时缓冲的记录被丢弃
+        """
+        if not self._buffer:
+            return True
+        lines, self._buffer = self._buffer, []
+        try:
+            with open(self.log_file_path, 'ab') as f:
+                f.write(b''.join(lines))
+            return True
+        except Exception as e:
+            print(f"写入日志失败: {e}")
+            return False
+    
     def log_step_start(self, step_num: int, current_phase: str, pending_tasks: list):
         """
         记录step开始信息
@@ -101,6 +194,8 @@ class WorkflowLogger:
             "is_first_step": is_first_step,
             "message": patient_message
         }
+        if self.provenance_provider is not None:
+            patient_log["provenance"] = self.provenance_provider(step_num, "patient")
         self._write_log_entry(patient_log)
     
     def log_agent_execution(self, step_num: int, agent_name: str, 
@@ -127,9 +222,79 @@ class WorkflowLogger:
         
         if execution_time is not None:
             agent_log["execution_time_seconds"] = execution_time
+        if self.provenance_provider is not None:
+            agent_log["provenance"] = self.provenance_provider(step_num, agent_name)
             
         self._write_log_entry(agent_log)
     
+    def log_question_generation(self, step_num: int, generation_mode: str, selected_task: str,
+                                doctor_question: str, latency: float, usage: Dict[str, int]):
+        """
+        记录本步医生问题生成的汇总信息，用于对比串行与融合生成模式
+        
+        Args:
+            step_num: step编号
+            generation_mode: 问题生成模式（chained/fused）
+            selected_task: 选择的任务
+            doctor_question: 生成的医生问题
+            latency: 问题生成总耗时（秒）
+            usage: LLM调用次数与token估算，包含llm_calls、prompt_tokens、completion_tokens
+        """
+        generation_log = {
+            "event_type": "question_generation",
+            "step_number": step_num,
+            "timestamp": datetime.now().isoformat(),
+            "generation_mode": generation_mode,
+            "selected_task": selected_task,
+            "doctor_question": doctor_question,
+            "latency_seconds": latency,
+            "llm_calls": usage.get("llm_calls", 0),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0)
+        }
+        self._write_log_entry(generation_log)
+    
+    def log_speculation(self, step_num: int, outcome: Dict[str, Any], totals: Dict[str, Any]):
+        """
+        记录本步推测预计算的命中与浪费情况
+        
+        Args:
+            step_num: step编号
+            outcome: 本步各项推测的结果（hit/wasted）、等待时间和节省时间
+            totals: 截至本步的累计推测统计
+        """
+        speculation_log = {
+            "event_type": "speculation",
+            "step_number": step_num,
+            "timestamp": datetime.now().isoformat(),
+            **outcome,
+            "totals": totals
+        }
+        self._write_log_entry(speculation_log)
+    
+    def log_task_saturated(self, step_num: int, phase: str, task_name: str,
+                           reason: str, score_history: list):
+        """
+        记录被停止策略判定为饱和的任务
+        
+        Args:
+            step_num: step编号
+            phase: 任务阶段
+            task_name: 任务名称
+            reason: 饱和原因
+            score_history: 该任务被询问后的评分历史
+        """
+        saturated_log = {
+            "event_type": "task_saturated",
+            "step_number": step_num,
+            "timestamp": datetime.now().isoformat(),
+            "phase": phase,
+            "task_name": task_name,
+            "reason": reason,
+            "score_history": score_history
+        }
+        self._write_log_entry(saturated_log)
+    
     def log_task_scores_update(self, step_num: int, phase: str, 
                              old_scores: Dict[str, float], 
                              new_scores: Dict[str, float]):
@@ -194,7 +359,19 @@ class WorkflowLogger:
             "final_summary": final_summary,
             "log_file_path": self.log_file_path
         }
-        self._write_log_entry(complete_log)
+        if self._write_log_entry(complete_log):
+            self._record_completion(total_steps, success)
+    
+    def _record_completion(self, total_steps: int, success: bool):
+        """完成记录写入日志后，在日志目录的完成清单中追加一条记录，供续跑时快速跳过"""
+        if self.case_index is None:
+            return
+        try:
+            CompletionManifest(self.log_dir).record(self.case_index, self.log_file_path, success, total_steps,
+                                                    self.case_data.get("一级科室", ""))
+        except OSError as e:
+            # 清单缺失的病例在续跑时会回退到检查日志文件
+            print(f"写入完成清单失败: {e}")
     
     def log_error(self, step_num: int, error_type: str, error_message: str, 
                  error_context: Optional[Dict] = None):
@@ -220,18 +397,27 @@ class WorkflowLogger:
             
         self._write_log_entry(error_log)
     
+    @profiled("log_write", "io")
     def _write_log_entry(self, log_entry: Dict[str, Any]):
         """
         写入一条日志记录到jsonl文件
         
         Args:
             log_entry: 日志条目
+            
+        Returns:
+            bool: 是否写入成功，缓冲模式下为是否已加入缓冲
         """
+        if self._buffer is not None:
+            self._buffer.append((json.dumps(log_entry, ensure_ascii=False) + '\n').encode('utf-8'))
+            return True
         try:
             with open(self.log_file_path, 'a', encoding='utf-8') as f:
                 f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
+            return True
         except Exception as e:
             print(f"写入日志失败: {e}")
+            return False
     
     def get_log_file_path(self) -> str:
         """
@@ -1,4 +1,5 @@
 import uuid
+import time
 import argparse
 import logging
 from typing import Dict, Any
@@ -7,7 +8,6 @@ from fastapi import APIRouter, HTTPException
 # 导入业务模块
 from service.main import prepare_for_interactive, setup_logging
 from service.workflow.medical_workflow import MedicalWorkflow
-from service.workflow.workflow_logger import WorkflowLogger
 from research.config import LLM_CONFIG
 
 # 导入数据库模型
@@ -25,6 +25,23 @@ report_db = ReportModel()
 # 2. 会话状态存储 (内存，用于维持工作流对象状态)
 # 注意：这个变量会被 api_report.py 引用
 sessions: Dict[str, Dict] = {}
+# 会话空闲超过该时长（秒）后被清理并释放工作流资源
+SESSION_TTL_SECONDS = 3600
+
+
+def evict_expired_sessions():
+    """清理空闲超时的会话，结束其工作流并释放后台资源"""
+    now = time.time()
+    expired = [sid for sid, data in sessions.items() if now - data["last_active"] > SESSION_TTL_SECONDS]
+    for sid in expired:
+        session_data = sessions.pop(sid, None)
+        if session_data is None:
+            continue
+        try:
+            session_data["workflow"].finish()
+        except Exception as e:
+            logging.error(f"Failed to finish expired session {sid}: {e}")
+        print(f"[INFO] 会话 {sid} 空闲超时，已清理")
 
 def get_default_args():
     """构造默认配置参数"""
@@ -47,6 +64,8 @@ def get_default_args():
             
     args.model_type = default_model
     args.controller_mode = 'normal'
+    # normal模式下推测预计算几乎没有可预取的工作，且每个会话会占用一个后台线程，服务端默认关闭
+    args.speculative = False
     args.log_level = 'INFO'
     
     setup_logging(args.log_dir, args.log_level)
@@ -59,6 +78,7 @@ async def chat_interaction(request: ChatRequest):
     patient_content = request.patient_content
     
     print(f"[DEBUG] 收到请求 - SessionID: {session_id}, Content: {patient_content}")
+    evict_expired_sessions()
     
     # --- A. 会话初始化逻辑 (修改版) ---
     # 触发初始化的条件：
@@ -81,13 +101,11 @@ async def chat_interaction(request: ChatRequest):
             args = get_default_args()
             workflow = prepare_for_interactive(args)
             
-            if not hasattr(workflow, 'logger'):
-                workflow.logger = WorkflowLogger(log_dir=args.log_dir)
-            
             sessions[session_id] = {
                 "workflow": workflow,
                 "args": args,
-                "step_count": 0
+                "step_count": 0,
+                "last_active": time.time()
             }
             print(f"[INFO] 会话 {session_id} 初始化成功")
         except Exception as e:
@@ -98,9 +116,10 @@ async def chat_interaction(request: ChatRequest):
     session_data = sessions[session_id]
     workflow: MedicalWorkflow = session_data["workflow"]
     args = session_data["args"]
+    session_data["last_active"] = time.time()
     
+    # 本轮成功执行后才推进会话步数，失败时前端可用同一步数重试
     current_step = session_data["step_count"] + 1
-    session_data["step_count"] = current_step
     
     # [DB] 保存患者输入
     try:
@@ -111,53 +130,32 @@ async def chat_interaction(request: ChatRequest):
     # --- C. 检查结束条件 ---
     task_manager = workflow.task_manager
     if task_manager.is_workflow_completed() or current_step > args.max_steps:
+        workflow.finish()
         return ChatResponse(
             session_id=session_id,
             worker_inquiry="问诊已结束，感谢您的配合。",
             is_completed=True,
         )
 
-    # --- D. 执行单步逻辑 ---
+    # --- D. 执行单步逻辑（与科研批处理共用同一问诊引擎） ---
     logger = workflow.logger
-    step_executor = workflow.step_executor
-
-    task_manager.update_step(current_step)
-    current_phase = task_manager.get_current_phase()
-    pending_tasks = task_manager.get_pending_tasks(current_phase)
-    logger.log_step_start(current_step, current_phase.value, pending_tasks)
-
-    last_doctor_question = getattr(workflow, "_last_doctor_question", "")
 
     try:
-        step_result = step_executor.execute_step(
-            step_num=current_step,
-            task_manager=task_manager,
-            logger=logger,
-            conversation_history=workflow.conversation_history,
-            previous_hpi=workflow.current_hpi,
-            previous_ph=workflow.current_ph,
-            previous_chief_complaint=workflow.current_chief_complaint,
-            previous_department=f"{workflow.current_triage.get('primary_department','')}-{workflow.current_triage.get('secondary_department','')}",
-            previous_candidate_department=f"{workflow.current_triage.get('candidate_primary_department','')}-{workflow.current_triage.get('candidate_secondary_department','')}",
-            previous_triage_reasoning=workflow.current_triage.get("triage_reasoning", ""),
-            current_guidance=workflow.current_guidance if hasattr(workflow, 'current_guidance') else "",
-            patient_response=patient_content,
-            is_first_step=(current_step == 1),
-            doctor_question=last_doctor_question
-        )
+        step_result = workflow.run_turn(patient_content)
     except Exception as e:
+        # 引擎外的异常无法回退本轮状态，结束并移除会话，下次请求重新初始化
+        sessions.pop(session_id, None)
+        workflow.finish()
         raise HTTPException(status_code=500, detail=f"Internal processing error: {str(e)}")
 
-    if not step_result.get("success", False):
-        error_msg = f"Step {current_step} execution failed: {step_result.get('errors')}"
+    if step_result is None:
+        error_msg = f"Step {current_step} execution failed"
         logger.log_error(current_step, "execution_error", error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
-
-    # 更新工作流状态
-    workflow._update_workflow_state(step_result)
+    session_data["step_count"] = current_step
     
     # 准备返回数据
-    worker_inquiry = step_result.get("doctor_question", "请问还有什么需要补充的吗？")
+    worker_inquiry = step_result.doctor_question or "请问还有什么需要补充的吗？"
     is_completed = task_manager.is_workflow_completed()
 
     # [DB] 保存医生回复
@@ -166,16 +164,17 @@ async def chat_interaction(request: ChatRequest):
     except Exception as e:
         logging.error(f"Failed to save doctor record: {e}")
 
+    # 达到最大步数时释放工作流资源，会话保留到超时以便查询实时报告
+    if workflow.is_finished():
+        workflow.finish()
+
     # 如果问诊结束，保存报告到数据库
     if is_completed:
-        final_summary = task_manager.get_completion_summary()
-        logger.log_workflow_complete(total_steps=current_step, final_summary=final_summary, success=True)
         worker_inquiry = "问诊结束，感谢您的配合。"
         
         # 格式化分诊结果
-        triage_data = workflow.current_triage or {}
-        primary = triage_data.get('primary_department', '')
-        secondary = triage_data.get('secondary_department', '')
+        primary = workflow.current_triage.primary_department
+        secondary = workflow.current_triage.secondary_department
         triage_str = f"{primary}" + (f" - {secondary}" if secondary else "") if primary else "尚未生成"
 
         # [DB] 保存最终报告
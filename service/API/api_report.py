@@ -44,9 +44,8 @@ async def get_medical_report(session_id: str):
         workflow: MedicalWorkflow = session_data["workflow"]
         
         # 格式化分诊结果
-        triage_data = workflow.current_triage or {}
-        primary = triage_data.get('primary_department', '')
-        secondary = triage_data.get('secondary_department', '')
+        primary = workflow.current_triage.primary_department
+        secondary = workflow.current_triage.secondary_department
         
         if primary:
             triage_str = f"{primary}" + (f" - {secondary}" if secondary else "")
@@ -18,7 +18,6 @@ from typing import Dict, Any, List, Optional
 # 导入本地模块
 from workflow.medical_workflow import MedicalWorkflow
 from guidance.loader import GuidanceLoader
-from service.workflow.step_executor import StepExecutor
 
 # 设置项目根目录
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -137,6 +136,12 @@ def parse_arguments() -> argparse.Namespace:
         default='normal',
         help='任务控制器模式：normal为智能模式（需要LLM推理），sequence为顺序模式（直接选择第一个任务），score_driven为分数驱动模式（选择当前任务组中分数最低的任务）'
     )
+    parser.add_argument(
+        '--speculative',
+        action='store_true',
+        default=False,
+        help='启用推测预计算：在等待患者输入期间，后台预先计算下一步的Controller决策、Prompter预热和科室指导'
+    )
     
     
     # 调试和日志
@@ -183,7 +188,8 @@ def prepare_for_interactive(args: argparse.Namespace):
         log_dir=args.log_dir,
         controller_mode="normal",
         guidance_loader=loader,
-        department_guidance=department_guidance
+        department_guidance=department_guidance,
+        speculative=getattr(args, 'speculative', False)
     )
     return workflow
 
@@ -215,15 +221,7 @@ def interactive(worker_inquiry: str, is_first_epoch: bool) -> str:
         raise e
 def process_interaction(workflow: MedicalWorkflow, args: argparse.Namespace, patient_response: str):
     """处理交互流程的其余步骤"""
-    # 获取工作流内部组件
     task_manager = workflow.task_manager
-    logger = workflow.logger
-    conversation_history = workflow.conversation_history
-    current_hpi = workflow.current_hpi
-    current_ph = workflow.current_ph
-    current_chief_complaint = workflow.current_chief_complaint
-    current_triage = workflow.current_triage
-    step_executor = workflow.step_executor
     resp = patient_response  # 初始患者回答
     
     try:
@@ -233,74 +231,37 @@ def process_interaction(workflow: MedicalWorkflow, args: argparse.Namespace, pat
                 print(f"所有任务已完成，工作流在第 {step} 步结束")
                 break
 
-            task_manager.update_step(step)
-            current_phase = task_manager.get_current_phase()
-            pending_tasks = task_manager.get_pending_tasks(current_phase)
-            logger.log_step_start(step, current_phase.value, pending_tasks)
-
-            # 执行单步
-            step_result = step_executor.execute_step(
-                step_num=step,
-                task_manager=task_manager,
-                logger=logger,
-                conversation_history=conversation_history,
-                previous_hpi=current_hpi,
-                previous_ph=current_ph,
-                previous_chief_complaint=current_chief_complaint,
-                previous_department=f"{current_triage.get('primary_department','')}-{current_triage.get('secondary_department','')}",
-                previous_candidate_department=f"{current_triage.get('candidate_primary_department','')}-{current_triage.get('candidate_secondary_department','')}",
-                previous_triage_reasoning=current_triage.get("triage_reasoning", ""),
-                current_guidance=workflow.current_guidance if hasattr(workflow, 'current_guidance') else "",
-                patient_response=resp,
-                is_first_step=(step == 1),
-                doctor_question=getattr(workflow, "_last_doctor_question", "")
-            )
-
-            if not step_result.get("success", False):
-                print(f"Step {step} 执行失败: {step_result.get('errors')}")
+            # 执行单步（与科研批处理共用同一问诊引擎）
+            step_result = workflow.run_turn(resp)
+            if step_result is None:
+                print(f"Step {step} 执行失败")
                 break
 
-            # 更新本地工作流状态
-            workflow._update_workflow_state(step_result)
-            conversation_history = step_result.get("conversation_history", conversation_history)
-            current_hpi = step_result.get("updated_hpi", current_hpi)
-            current_ph = step_result.get("updated_ph", current_ph)
-            current_chief_complaint = step_result.get("updated_chief_complaint", current_chief_complaint)
-            current_triage = step_result.get("triage_result", current_triage)
-
-
-            # 记录 step_complete 日志
-            logger.log_step_complete(
-                step_num=step,
-                doctor_question=step_result.get("doctor_question", ""),
-                conversation_history=conversation_history,
-                task_completion_summary=step_result.get("task_completion_summary", {})
-            )
+            current_phase = task_manager.get_current_phase()
+            triage = workflow.current_triage
 
             # 终端即时输出本轮信息
             print("\n--- 本轮终端输出 ---")
             print(f"当前轮次: {step}")
             print(f"任务管理器当前步骤: {current_phase.value}")
-            print(f"{current_hpi or '（无）'}")
-            print(f"{current_ph or '（无）'}")
-            print(f"当前主诉: {current_chief_complaint or '（无）'}")
-            print(f"当前分诊结果: {current_triage or '（无）'}")
+            print(f"{workflow.current_hpi or '（无）'}")
+            print(f"{workflow.current_ph or '（无）'}")
+            print(f"当前主诉: {workflow.current_chief_complaint or '（无）'}")
+            print(f"当前分诊结果: {triage.to_dict()}")
             completion_summary = task_manager.get_completion_summary()
             print("阶段完成进度:")
             for phase_name, phase_info in completion_summary["phases"].items():
                 status = "✓" if phase_info["is_completed"] else "○"
                 print(f"  {status} {phase_name}: {phase_info['completed']}/{phase_info['total']} ({phase_info['completion_rate']:.1%})")
             print("当前对话历史（预览）:")
-            print(conversation_history or "（无）")
-            tr = step_result.get("triage_result", {})
-            if tr:
-                print("分诊结果:")
-                print(f"  推荐科室: {tr.get('primary_department','')} - {tr.get('secondary_department','')}")
-                print(f"  候选科室: {tr.get('candidate_primary_department','')} - {tr.get('candidate_secondary_department','')}")
+            print(workflow.conversation_history or "（无）")
+            print("分诊结果:")
+            print(f"  推荐科室: {triage.primary_department} - {triage.secondary_department}")
+            print(f"  候选科室: {triage.candidate_primary_department} - {triage.candidate_secondary_department}")
             print("----------------------\n")
 
             # 获取下一轮患者输入（调用interactive获取回答）
-            worker_inquiry = step_result.get("doctor_question", "请问还有什么需要补充的吗？")
+            worker_inquiry = step_result.doctor_question or "请问还有什么需要补充的吗？"
             try:
                 resp = interactive(worker_inquiry, is_first_epoch=False)
             except KeyboardInterrupt:
@@ -308,12 +269,12 @@ def process_interaction(workflow: MedicalWorkflow, args: argparse.Namespace, pat
 
 
         # 循环结束后记录完成
-        final_summary = task_manager.get_completion_summary()
-        logger.log_workflow_complete(total_steps=step if 'step' in locals() else 0, final_summary=final_summary, success=task_manager.is_workflow_completed())
+        workflow.finish()
 
     except KeyboardInterrupt:
         # 优雅终止：展示当前状态摘要并返回
         print("\n用户中断交互会话，正在保存并显示当前进度...")
+        workflow.finish()
         try:
             status = workflow.get_current_status()
             summary = workflow.get_medical_summary()
@@ -329,7 +290,7 @@ def process_interaction(workflow: MedicalWorkflow, args: argparse.Namespace, pat
     # 会话结束后打印对话与分诊摘要
     print("\n=== 最终对话历史 ===")
     try:
-        print(conversation_history or "无对话历史")
+        print(workflow.conversation_history or "无对话历史")
     except Exception:
         print("无法获取对话历史")
 
@@ -1,7 +1,16 @@
-# 医疗问诊工作流模块
+# 医疗问诊工作流模块（服务端）
+# 复用research中的问诊引擎，患者回答来自真实用户输入
+import os
+import sys
+
+# 设置动态项目目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
 from .medical_workflow import MedicalWorkflow
 from .task_manager import TaskManager  
 from .step_executor import StepExecutor
 from .workflow_logger import WorkflowLogger
 
-__all__ = ["MedicalWorkflow", "TaskManager", "StepExecutor", "WorkflowLogger"]
\ No newline at end of file
+__all__ = ["MedicalWorkflow", "TaskManager", "StepExecutor", "WorkflowLogger"]